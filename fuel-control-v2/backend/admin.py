@@ -0,0 +1,26 @@
+"""
+Admin access checks for diagnostic endpoints
+"""
+
+import hmac
+from functools import wraps
+from flask import request, jsonify
+from config import Config
+
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+def is_admin_request() -> bool:
+    """Check the request carries the configured admin token"""
+    if not Config.ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get(ADMIN_TOKEN_HEADER, '')
+    return hmac.compare_digest(supplied, Config.ADMIN_TOKEN)
+
+def admin_required(view):
+    """Reject requests to a view that do not carry the admin token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -3,16 +3,31 @@ Advanced Fuel Consumption Forecasting System - Backend API
 Version 2.0 with Enhanced Forecasting Capabilities
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-import pyodbc
 import logging
 from datetime import datetime, date, timedelta
 import json
+import itertools
+import uuid
 from decimal import Decimal
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from config import Config
+from tracing import tracer, init_tracing, REQUEST_ID_HEADER
+from profiling import init_profiling, ARTIFACT_HEADER
+from admin import admin_required
+from memory import init_memory_tracking, iter_json_array, MemoryBudgetExceeded
+from capture import init_capture
+from storage import create_backend
+from scenarios import ScenarioGridError, evaluate_grid, grid_cells, parse_grid
+from simulation import simulate_stockouts, simulation_options
+from trajectories import history_curves, parse_scheduled, project_trajectories, supplier_lead_times, trajectory_options
+import deliveries
+import prices
+import reorder
+from transfers import plan_transfers, transfer_options
+import timeseries
 
 # Configure logging
 logging.basicConfig(
@@ -26,14 +41,15 @@ CORS(app, origins=[
     'http://localhost:8080', 'http://127.0.0.1:8080',
     'http://localhost:3000', 'http://127.0.0.1:3000',
     'http://localhost:5501', 'http://127.0.0.1:5501'
-], supports_credentials=True)
+], supports_credentials=True, expose_headers=[REQUEST_ID_HEADER, ARTIFACT_HEADER])
 
-# Database configuration
-class DatabaseConfig:
-    SERVER = Config.DB_SERVER
-    DATABASE = Config.DB_NAME
-    DRIVER = Config.DB_DRIVER
-    CONNECTION_STRING = Config.get_db_connection_string()
+init_tracing(app, Config)
+request_profiler = init_profiling(app, Config)
+memory_tracker = init_memory_tracking(app, Config)
+workload_capture = init_capture(app, Config)
+
+# Database backend (SQL Server or embedded SQLite, see Config.DB_BACKEND)
+storage = create_backend(Config)
 
 class DecimalEncoder(json.JSONEncoder):
     """Custom JSON encoder for Decimal types"""
@@ -49,8 +65,10 @@ app.json_encoder = DecimalEncoder
 def get_db_connection():
     """Get database connection"""
     try:
-        conn = pyodbc.connect(DatabaseConfig.CONNECTION_STRING)
-        return conn
+        with tracer.span('db.connect', kind='client',
+                         **{'db.system': storage.name, 'db.name': storage.database_name}):
+            conn = storage.connect()
+        return tracer.wrap_connection(conn)
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         raise
@@ -59,8 +77,68 @@ def row_to_dict(row, cursor_description) -> Dict[str, Any]:
     """Convert database row to dictionary"""
     return dict(zip([column[0] for column in cursor_description], row))
 
+def call_procedure(cursor, name: str, params: tuple = ()):
+    """Execute a stored procedure with positional parameters"""
+    storage.call_procedure(cursor, name, params)
+
+def build_filtered_query(query: str, args, filters, order_by: str):
+    """Append an AND clause for every filter present in args; returns (query, params)"""
+    clauses = []
+    params = []
+    for arg, clause in filters:
+        value = args.get(arg)
+        if value:
+            clauses.append(clause)
+            params.append(value)
+    if clauses:
+        query += " AND " + " AND ".join(clauses)
+    return f"{query} {order_by}", (tuple(params) if params else None)
+
+def paginate_query(query: str, params: Optional[tuple], args):
+    """Apply optional limit/offset paging arguments; without a limit the full list is returned"""
+    limit = args.get('limit', type=int)
+    if not limit or limit < 1:
+        return query, params
+    offset = max(args.get('offset', 0, type=int), 0)
+    return storage.paginate(query, params, min(limit, MAX_PAGE_SIZE), offset)
+
+# Largest page a list endpoint returns when paged
+MAX_PAGE_SIZE = 5000
+
+# Optional list filters: (query argument, SQL clause)
+DELIVERY_FILTERS = (
+    ('site_id', 'ds.site_id = ?'),
+    ('fuel_type_id', 'ds.fuel_type_id = ?'),
+    ('supplier_id', 'ds.supplier_id = ?'),
+    ('start_date', 'ds.delivery_date >= ?'),
+    ('end_date', 'ds.delivery_date <= ?'),
+)
+OPERATIONAL_HOURS_FILTERS = (
+    ('site_id', 'oh.site_id = ?'),
+    ('equipment_id', 'oh.equipment_id = ?'),
+    ('start_date', 'oh.log_date >= ?'),
+    ('end_date', 'oh.log_date <= ?'),
+)
+REFILL_FILTERS = (
+    ('site_id', 'rt.site_id = ?'),
+    ('start_date', 'rt.refill_date >= ?'),
+    ('end_date', 'rt.refill_date <= ?'),
+)
+REORDER_FILTERS = (
+    ('site_id', 'rr.site_id = ?'),
+    ('fuel_type_id', 'rr.fuel_type_id = ?'),
+    ('supplier_id', 'rr.supplier_id = ?'),
+)
+USAGE_FILTERS = (
+    ('site_id', 'ut.site_id = ?'),
+    ('equipment_id', 'ut.equipment_id = ?'),
+    ('start_date', 'ut.usage_date >= ?'),
+    ('end_date', 'ut.usage_date <= ?'),
+)
+
 def execute_query(query: str, params: tuple = None, fetch_all: bool = True):
     """Execute database query and return results"""
+    conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -71,8 +149,7 @@ def execute_query(query: str, params: tuple = None, fetch_all: bool = True):
             cursor.execute(query)
         
         if fetch_all:
-            rows = cursor.fetchall()
-            result = [row_to_dict(row, cursor.description) for row in rows]
+            result = fetch_rows(conn, cursor)
         else:
             row = cursor.fetchone()
             result = row_to_dict(row, cursor.description) if row else None
@@ -80,10 +157,65 @@ def execute_query(query: str, params: tuple = None, fetch_all: bool = True):
         conn.commit()
         conn.close()
         return result
+    except MemoryBudgetExceeded:
+        raise
     except Exception as e:
         logger.error(f"Query execution failed: {e}")
+        if conn is not None:
+            conn.close()
         raise
 
+def fetch_rows(conn, cursor) -> List[Dict[str, Any]]:
+    """Fetch all rows, in batches when a per-request memory budget is configured"""
+    if cursor.description is None:
+        return []
+    budget = memory_tracker.fetch_budget()
+    if budget is None:
+        result = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        memory_tracker.checkpoint()
+        return result
+    
+    result = []
+    while True:
+        rows = cursor.fetchmany(Config.MEMORY_FETCH_BATCH)
+        if not rows:
+            break
+        result.extend(row_to_dict(row, cursor.description) for row in rows)
+        used = budget.exceeded(result)
+        if used is not None:
+            memory_tracker.checkpoint()
+            if memory_tracker.budget_action == 'stream':
+                raise MemoryBudgetExceeded(used, budget.limit_bytes, result, iter_remaining_rows(conn, cursor))
+            conn.close()
+            raise MemoryBudgetExceeded(used, budget.limit_bytes, [])
+    memory_tracker.checkpoint()
+    return result
+
+def iter_remaining_rows(conn, cursor):
+    """Yield the rest of a result set batch by batch, then release the connection"""
+    try:
+        while True:
+            rows = cursor.fetchmany(Config.MEMORY_FETCH_BATCH)
+            if not rows:
+                break
+            for row in rows:
+                yield row_to_dict(row, cursor.description)
+    finally:
+        conn.close()
+
+def query_response(query: str, params: tuple = None):
+    """Return query results as JSON, switching to a streamed body past the memory budget"""
+    try:
+        return jsonify(execute_query(query, params))
+    except MemoryBudgetExceeded as e:
+        if e.remaining is None:
+            logger.warning(f"{request.method} {request.path}: {e}")
+            return jsonify({'error': str(e)}), 507
+        logger.warning(f"{request.method} {request.path}: streaming response past memory budget")
+        rows = itertools.chain(e.rows, e.remaining)
+        return Response(stream_with_context(iter_json_array(rows, app.json.dumps)),
+                        mimetype='application/json')
+
 # =============================================
 # HEALTH CHECK AND SYSTEM INFO
 # =============================================
@@ -102,6 +234,7 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
+            'backend': storage.name,
             'timestamp': datetime.now().isoformat(),
             'version': '2.0'
         })
@@ -117,7 +250,7 @@ def health_check():
 def get_system_settings():
     """Get system settings"""
     query = "SELECT setting_key, setting_value, setting_description, data_type FROM SystemSettings ORDER BY setting_key"
-    return jsonify(execute_query(query))
+    return query_response(query)
 
 # =============================================
 # FUEL TYPES MANAGEMENT
@@ -133,7 +266,7 @@ def get_fuel_types():
     WHERE is_active = 1
     ORDER BY fuel_name
     """
-    return jsonify(execute_query(query))
+    return query_response(query)
 
 @app.route('/api/fuel-types', methods=['POST'])
 def create_fuel_type():
@@ -173,7 +306,7 @@ def get_sites():
     WHERE is_active = 1
     ORDER BY site_name
     """
-    return jsonify(execute_query(query))
+    return query_response(query)
 
 @app.route('/api/sites', methods=['POST'])
 def create_site():
@@ -181,15 +314,17 @@ def create_site():
     data = request.get_json()
     
     query = """
-    INSERT INTO Sites (site_name, site_code, site_type, location_address,
+    INSERT INTO Sites (site_name, site_code, site_type, location_address, latitude, longitude,
                       contact_person, contact_phone, storage_capacity, safety_stock_days)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
     params = (
         data['site_name'],
         data['site_code'],
         data['site_type'],
         data.get('location_address'),
+        data.get('latitude'),
+        data.get('longitude'),
         data.get('contact_person'),
         data.get('contact_phone'),
         data.get('storage_capacity', 0),
@@ -229,7 +364,7 @@ def get_equipment():
     
     query += " ORDER BY s.site_name, e.equipment_name"
     
-    return jsonify(execute_query(query, params))
+    return query_response(query, params)
 
 @app.route('/api/equipment', methods=['POST'])
 def create_equipment():
@@ -265,11 +400,6 @@ def create_equipment():
 @app.route('/api/operational-hours', methods=['GET'])
 def get_operational_hours():
     """Get operational hours log"""
-    site_id = request.args.get('site_id')
-    equipment_id = request.args.get('equipment_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
     query = """
     SELECT oh.log_id, oh.site_id, oh.equipment_id, oh.log_date,
            oh.running_hours, oh.fuel_consumed, oh.recorded_by, oh.notes,
@@ -280,29 +410,12 @@ def get_operational_hours():
     WHERE 1=1
     """
     
-    params = []
-    if site_id:
-        query += " AND oh.site_id = ?"
-        params.append(site_id)
-    if equipment_id:
-        query += " AND oh.equipment_id = ?"
-        params.append(equipment_id)
-    if start_date:
-        query += " AND oh.log_date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND oh.log_date <= ?"
-        params.append(end_date)
-    
-    query += " ORDER BY oh.log_date DESC, s.site_name, e.equipment_name"
-    
-    return jsonify(execute_query(query, tuple(params) if params else None))
+    query, params = build_filtered_query(query, request.args, OPERATIONAL_HOURS_FILTERS,
+                                         "ORDER BY oh.log_date DESC, s.site_name, e.equipment_name, oh.log_id DESC")
+    return query_response(*paginate_query(query, params, request.args))
 
-@app.route('/api/operational-hours', methods=['POST'])
-def log_operational_hours():
-    """Log operational hours for equipment"""
-    data = request.get_json()
-    
+def insert_operational_hours(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert one operational hours entry; the caller recalculates the site's forecast"""
     query = """
     INSERT INTO OperationalHoursLog (site_id, equipment_id, log_date, running_hours,
                                    fuel_consumed, recorded_by, notes)
@@ -317,14 +430,22 @@ def log_operational_hours():
         data.get('recorded_by'),
         data.get('notes')
     )
+    execute_query(query, params)
+    return {'message': 'Operational hours logged successfully'}
+
+@app.route('/api/operational-hours', methods=['POST'])
+def log_operational_hours():
+    """Log operational hours for equipment"""
+    data = request.get_json()
     
     try:
-        execute_query(query, params)
+        result, replayed = apply_write('/api/operational-hours', data, request.headers.get(IDEMPOTENCY_HEADER))
         
         # Recalculate forecast after logging hours
-        recalculate_forecast(data['site_id'])
+        if not replayed:
+            recalculate_forecast(data['site_id'])
         
-        return jsonify({'message': 'Operational hours logged successfully'}), 201
+        return jsonify(result), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -335,12 +456,36 @@ def log_operational_hours():
 @app.route('/api/stock', methods=['GET'])
 def get_stock():
     """Get current stock levels"""
-    return jsonify(execute_query("SELECT * FROM vw_CurrentStockStatus ORDER BY site_name, fuel_name"))
+    return query_response("SELECT * FROM vw_CurrentStockStatus ORDER BY site_name, fuel_name")
 
 @app.route('/api/stock/summary', methods=['GET'])
 def get_stock_summary():
     """Get stock summary with consumption data"""
-    return jsonify(execute_query("SELECT * FROM vw_SiteConsumptionSummary ORDER BY site_name, fuel_name"))
+    return query_response("SELECT * FROM vw_SiteConsumptionSummary ORDER BY site_name, fuel_name")
+
+# =============================================
+# FUEL PRICES
+# =============================================
+
+@app.route('/api/prices', methods=['GET'])
+def get_fuel_prices():
+    """
+    Prices in effect on `date` (default today) per fuel, supplier and price type; supplier_id
+    null is the fleet reference price
+    """
+    try:
+        day = date.fromisoformat(request.args.get('date') or date.today().isoformat())
+    except ValueError:
+        return jsonify({'error': 'date must be an ISO date'}), 400
+    price_type = request.args.get('price_type')
+    if price_type and price_type not in prices.PRICE_TYPES:
+        return jsonify({'error': f"price_type must be one of {', '.join(prices.PRICE_TYPES)}"}), 400
+    try:
+        index, _ = price_index()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(index.effective(day, request.args.get('fuel_type_id', type=int),
+                                   request.args.get('supplier_id', type=int), price_type))
 
 # =============================================
 # FORECASTING ENDPOINTS
@@ -367,7 +512,7 @@ def get_forecasts():
     
     query += " ORDER BY s.site_name, ft.fuel_name"
     
-    return jsonify(execute_query(query, tuple(params)))
+    return query_response(query, tuple(params))
 
 @app.route('/api/forecasts/calculate', methods=['POST'])
 def calculate_forecasts():
@@ -376,6 +521,19 @@ def calculate_forecasts():
     site_id = data.get('site_id')
     fuel_type_id = data.get('fuel_type_id')
     forecast_date = data.get('forecast_date', date.today().isoformat())
+    method = data.get('method', Config.FORECAST_METHOD)
+    if method not in timeseries.METHODS:
+        return jsonify({'error': f"method must be one of: {', '.join(timeseries.METHODS)}"}), 400
+    
+    if method == 'holt-winters':
+        # Fitted per equipment; a site_id limits the run to that site's fuels
+        try:
+            result = calculate_model_forecasts(site_id, forecast_date)
+            if Config.REORDER_ON_FORECAST:
+                result['reorders_recalculated'] = optimize_reorders(site_id)['recalculated']
+            return jsonify({'message': 'Forecasts calculated successfully', **result})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
     
     try:
         conn = get_db_connection()
@@ -383,16 +541,19 @@ def calculate_forecasts():
         
         if site_id and fuel_type_id:
             # Calculate for specific site and fuel type
-            cursor.execute("EXEC sp_CalculateSiteForecast ?, ?, ?", 
-                         (site_id, fuel_type_id, forecast_date))
+            call_procedure(cursor, 'sp_CalculateSiteForecast', (site_id, fuel_type_id, forecast_date))
         else:
             # Calculate for all sites
-            cursor.execute("EXEC sp_CalculateAllForecasts ?", (forecast_date,))
+            call_procedure(cursor, 'sp_CalculateAllForecasts', (forecast_date,))
         
         conn.commit()
         conn.close()
         
-        return jsonify({'message': 'Forecasts calculated successfully'})
+        result = {'message': 'Forecasts calculated successfully'}
+        if Config.REORDER_ON_FORECAST:
+            # New demand: re-optimize the stock rows whose inputs moved
+            result['reorders_recalculated'] = optimize_reorders(site_id)['recalculated']
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -405,9 +566,7 @@ def create_forecast_scenario():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            EXEC sp_CreateForecastScenario ?, ?, ?, ?
-        """, (
+        call_procedure(cursor, 'sp_CreateForecastScenario', (
             data['forecast_id'],
             data['scenario_name'],
             data.get('adjusted_consumption_rate'),
@@ -421,11 +580,287 @@ def create_forecast_scenario():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+# Forecast ids accepted per grid request (SQL Server allows 2100 parameters per statement)
+MAX_GRID_FORECASTS = 1000
+
+@app.route('/api/forecasts/scenarios/grid', methods=['POST'])
+def evaluate_scenario_grid():
+    """Evaluate a what-if grid for one or many forecasts without saving it"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        axes = parse_grid(data)
+        forecast_ids = [int(forecast_id) for forecast_id in data.get('forecast_ids') or []]
+    except (ScenarioGridError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if len(forecast_ids) > MAX_GRID_FORECASTS:
+        return jsonify({'error': f'At most {MAX_GRID_FORECASTS} forecast_ids per grid'}), 400
+    
+    query = """
+    SELECT cf.*, s.site_name, ft.fuel_name
+    FROM ConsumptionForecast cf
+    JOIN Sites s ON cf.site_id = s.site_id
+    JOIN FuelTypes ft ON cf.fuel_type_id = ft.fuel_type_id
+    """
+    if forecast_ids:
+        query += f" WHERE cf.forecast_id IN ({', '.join('?' * len(forecast_ids))})"
+        params = list(forecast_ids)
+    else:
+        # Same selection as GET /api/forecasts
+        query += " WHERE cf.forecast_date = ?"
+        params = [data.get('forecast_date', date.today().isoformat())]
+        if data.get('site_id'):
+            query += " AND cf.site_id = ?"
+            params.append(data['site_id'])
+    query += " ORDER BY s.site_name, ft.fuel_name"
+    
+    try:
+        forecasts = execute_query(query, tuple(params))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    if not forecasts:
+        return jsonify({'error': 'No forecasts match the request'}), 404
+    
+    cells = grid_cells(len(forecasts), axes)
+    if cells > Config.SCENARIO_MAX_CELLS:
+        return jsonify({'error': f'Grid has {cells} cells; at most {Config.SCENARIO_MAX_CELLS} allowed'}), 400
+    
+    return jsonify(evaluate_grid(forecasts, axes))
+
+@app.route('/api/forecasts/stockout-risk', methods=['GET'])
+def get_stockout_risk():
+    """Monte Carlo P(stockout within N days) and days-remaining percentiles per site and fuel"""
+    try:
+        days, paths, seed = simulation_options(request.args, Config.SIMULATION_PATHS,
+                                               Config.SIMULATION_MAX_PATHS, Config.SIMULATION_MAX_DAYS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    site_id = request.args.get('site_id', type=int)
+    history_start = (date.today() - timedelta(days=Config.SIMULATION_HISTORY_DAYS)).isoformat()
+    
+    try:
+        stocks = execute_query(f"""
+        SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, s.site_name, ft.fuel_name
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+        WHERE s.is_active = 1{' AND fs.site_id = ?' if site_id else ''}
+        """, (site_id,) if site_id else None)
+        equipment = execute_query(f"""
+        SELECT equipment_id, site_id, fuel_type_id, consumption_rate
+        FROM Equipment
+        WHERE is_active = 1{' AND site_id = ?' if site_id else ''}
+        """, (site_id,) if site_id else None)
+        # One figure per equipment and logged day
+        history = execute_query(f"""
+        SELECT equipment_id, SUM(running_hours) AS running_hours
+        FROM OperationalHoursLog
+        WHERE log_date >= ?{' AND site_id = ?' if site_id else ''}
+        GROUP BY equipment_id, log_date
+        """, (history_start, site_id) if site_id else (history_start,))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    daily_hours: Dict[int, List[float]] = {}
+    for row in history:
+        daily_hours.setdefault(row['equipment_id'], []).append(row['running_hours'])
+    
+    return jsonify(simulate_stockouts(stocks, equipment, daily_hours, days, paths, seed))
+
+@app.route('/api/forecasts/trajectory', methods=['GET', 'POST'])
+def get_stock_trajectories():
+    """
+    Projected daily stock per site and fuel from the latest forecast rate, reorder-point orders
+    and scheduled deliveries (POST body scheduled_refills), optionally with rebuilt history and
+    downsampled to a fixed number of points
+    """
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    today = date.today()
+    try:
+        settings = trajectory_options(options, Config.TRAJECTORY_DAYS, Config.TRAJECTORY_MAX_DAYS,
+                                      Config.TRAJECTORY_MAX_HISTORY_DAYS, Config.TRAJECTORY_MAX_POINTS)
+        scheduled = parse_scheduled(options.get('scheduled_refills'), today)
+        site_id = int(options['site_id']) if options.get('site_id') else None
+        fuel_type_id = int(options['fuel_type_id']) if options.get('fuel_type_id') else None
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    conditions = [(column, value) for column, value in (('site_id', site_id), ('fuel_type_id', fuel_type_id)) if value]
+    stock_filters = ''.join(f' AND fs.{column} = ?' for column, _ in conditions)
+    filters = ''.join(f' AND {column} = ?' for column, _ in conditions)
+    params = tuple(value for _, value in conditions)
+    try:
+        pairs = execute_query(f"""
+        SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, fs.maximum_capacity, fs.minimum_threshold,
+               fs.reorder_point, fs.optimal_order_quantity, s.site_name, ft.fuel_name, cf.daily_consumption_rate
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+        JOIN ConsumptionForecast cf ON cf.site_id = fs.site_id AND cf.fuel_type_id = fs.fuel_type_id
+            AND cf.forecast_date = (SELECT MAX(forecast_date) FROM ConsumptionForecast
+                                    WHERE site_id = fs.site_id AND fuel_type_id = fs.fuel_type_id)
+        WHERE s.is_active = 1{stock_filters}
+        ORDER BY s.site_name, ft.fuel_name
+        """, params or None)
+        lead_times = execute_query("""
+        SELECT DISTINCT fp.fuel_type_id, sup.lead_time_days, sup.is_preferred
+        FROM FuelPrices fp
+        JOIN Suppliers sup ON fp.supplier_id = sup.supplier_id
+        WHERE fp.is_active = 1 AND sup.is_active = 1
+        """)
+        daily_net = []
+        if settings['history']:
+            history_start = (today - timedelta(days=settings['history'])).isoformat()
+            # Net change per day: refills in, usage out
+            for table, column, sign in (('RefillTransactions', 'refill_date', ''),
+                                        ('UsageTransactions', 'usage_date', '-')):
+                day = storage.day_of(column)
+                daily_net += execute_query(f"""
+                SELECT site_id, fuel_type_id, {day} AS day, {sign}SUM(quantity) AS quantity
+                FROM {table}
+                WHERE {column} >= ?{filters}
+                GROUP BY site_id, fuel_type_id, {day}
+                """, (history_start,) + params)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    history = None
+    if settings['history']:
+        history = history_curves(pairs, ((row['site_id'], row['fuel_type_id'], row['day'], row['quantity'])
+                                         for row in daily_net), settings['history'], today)
+    return jsonify(project_trajectories(
+        pairs, settings['days'],
+        supplier_lead_times((row['fuel_type_id'], row['lead_time_days'], row['is_preferred']) for row in lead_times),
+        scheduled, reorder=settings['reorder'], lead_time_days=settings['lead_time_days'], history=history,
+        points=settings['points'], today=today))
+
 @app.route('/api/forecasts/<int:forecast_id>/scenarios', methods=['GET'])
 def get_forecast_scenarios(forecast_id):
     """Get scenarios for a forecast"""
     query = "SELECT * FROM ForecastScenarios WHERE forecast_id = ? ORDER BY created_date"
-    return jsonify(execute_query(query, (forecast_id,)))
+    return query_response(query, (forecast_id,))
+
+# =============================================
+# REORDER OPTIMIZATION
+# =============================================
+
+@app.route('/api/reorder/recommendations', methods=['GET'])
+def get_reorder_recommendations():
+    """Stored reorder recommendations with the stock they apply to"""
+    query = """
+    SELECT rr.*, s.site_name, ft.fuel_name, sup.supplier_name, fs.current_quantity, fs.maximum_capacity
+    FROM ReorderRecommendations rr
+    JOIN FuelStock fs ON rr.stock_id = fs.stock_id
+    JOIN Sites s ON rr.site_id = s.site_id
+    JOIN FuelTypes ft ON rr.fuel_type_id = ft.fuel_type_id
+    LEFT JOIN Suppliers sup ON rr.supplier_id = sup.supplier_id
+    WHERE 1=1
+    """
+    query, params = build_filtered_query(query, request.args, REORDER_FILTERS, "ORDER BY s.site_name, ft.fuel_name")
+    return query_response(*paginate_query(query, params, request.args))
+
+@app.route('/api/reorder/optimize', methods=['POST'])
+def optimize_reorder_points():
+    """
+    Re-optimize order quantities and reorder points; only stock rows whose inputs changed are
+    recalculated unless force is set, and nothing is written with save=false
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result = optimize_reorders(data.get('site_id'), force=bool(data.get('force')), save=data.get('save', True))
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# =============================================
+# TRANSFER PLANNING
+# =============================================
+
+@app.route('/api/transfers/plan', methods=['GET', 'POST'])
+def plan_stock_transfers():
+    """
+    Proposed transfers between sites that cover forecast shortfalls more cheaply than supplier
+    deliveries, with the deliveries still needed; nothing is booked
+    """
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    try:
+        settings = transfer_options(options, Config.TRANSFER_HORIZON_DAYS, Config.TRANSFER_MAX_HORIZON_DAYS,
+                                    Config.TRANSFER_MAX_KM, Config.TRANSFER_MIN_LITRES, Config.TRANSFER_TIME_BUDGET_MS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fuel_type_id = settings['fuel_type_id']
+    history_start = (date.today() - timedelta(days=Config.REORDER_HISTORY_DAYS)).isoformat()
+    try:
+        # Demand is the latest forecast rate without its safety factor
+        pairs = execute_query(f"""
+        SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, fs.maximum_capacity, fs.minimum_threshold,
+               fs.reorder_point, fs.optimal_order_quantity, s.site_name, ft.fuel_name,
+               cf.daily_consumption_rate / COALESCE(NULLIF(cf.safety_factor, 0), 1) AS daily_demand
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+        JOIN ConsumptionForecast cf ON cf.site_id = fs.site_id AND cf.fuel_type_id = fs.fuel_type_id
+            AND cf.forecast_date = (SELECT MAX(forecast_date) FROM ConsumptionForecast
+                                    WHERE site_id = fs.site_id AND fuel_type_id = fs.fuel_type_id)
+        WHERE s.is_active = 1{' AND fs.fuel_type_id = ?' if fuel_type_id else ''}
+        """, (fuel_type_id,) if fuel_type_id else None)
+        sites = execute_query("SELECT site_id, latitude, longitude FROM Sites WHERE is_active = 1")
+        lead_times = execute_query("""
+        SELECT DISTINCT fp.fuel_type_id, sup.lead_time_days, sup.is_preferred
+        FROM FuelPrices fp
+        JOIN Suppliers sup ON fp.supplier_id = sup.supplier_id
+        WHERE fp.is_active = 1 AND sup.is_active = 1
+        """)
+        order_costs = execute_query("""
+        SELECT site_id, fuel_type_id,
+               AVG(COALESCE(transportation_cost, 0) + COALESCE(loading_unloading_cost, 0)) AS order_cost
+        FROM RefillTransactions
+        WHERE refill_date >= ? AND supplier_id IS NOT NULL
+        GROUP BY site_id, fuel_type_id
+        """, (history_start,))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(plan_transfers(
+        pairs, ((row['site_id'], row['latitude'], row['longitude']) for row in sites),
+        supplier_lead_times((row['fuel_type_id'], row['lead_time_days'], row['is_preferred']) for row in lead_times),
+        {(row['site_id'], row['fuel_type_id']): float(row['order_cost'] or 0.0) for row in order_costs},
+        Config.REORDER_ORDER_COST, settings['horizon_days'], Config.TRANSFER_COST_PER_LITRE_KM,
+        Config.TRANSFER_HANDLING_COST, Config.TRANSFER_SHORTAGE_COST, Config.TRANSFER_ROAD_FACTOR,
+        settings['max_km'], settings['min_litres'], settings['time_budget_ms']))
+
+# =============================================
+# DELIVERY SCHEDULING
+# =============================================
+
+@app.route('/api/deliveries/schedule', methods=['GET'])
+def get_delivery_schedule():
+    """Planned deliveries from the stored calendar"""
+    query = """
+    SELECT ds.*, s.site_name, ft.fuel_name, sup.supplier_name
+    FROM DeliverySchedule ds
+    JOIN Sites s ON ds.site_id = s.site_id
+    JOIN FuelTypes ft ON ds.fuel_type_id = ft.fuel_type_id
+    LEFT JOIN Suppliers sup ON ds.supplier_id = sup.supplier_id
+    WHERE ds.status = 'Planned'
+    """
+    query, params = build_filtered_query(query, request.args, DELIVERY_FILTERS,
+                                         "ORDER BY ds.delivery_date, s.site_name, ft.fuel_name")
+    return query_response(*paginate_query(query, params, request.args))
+
+@app.route('/api/deliveries/schedule', methods=['POST'])
+def create_delivery_schedule():
+    """
+    Re-plan the delivery calendar for the whole fleet over horizon_days; the stored planned
+    deliveries are replaced unless save=false
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        horizon_days = deliveries.delivery_horizon(data, Config.DELIVERY_HORIZON_DAYS, Config.DELIVERY_MAX_HORIZON_DAYS)
+        return jsonify(plan_deliveries(horizon_days=horizon_days, save=data.get('save', True)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 # =============================================
 # ALERTS AND NOTIFICATIONS
@@ -446,11 +881,11 @@ def get_alerts():
     JOIN AlertConfigurations ac ON ah.alert_id = ac.alert_id
     LEFT JOIN Sites s ON ac.site_id = s.site_id
     LEFT JOIN FuelTypes ft ON ac.fuel_type_id = ft.fuel_type_id
-    WHERE ah.triggered_date >= DATEADD(day, -?, GETDATE())
+    WHERE ah.triggered_date >= ?
     ORDER BY ah.triggered_date DESC
     """
     
-    return jsonify(execute_query(query, (days,)))
+    return query_response(query, (datetime.now() - timedelta(days=days),))
 
 @app.route('/api/alerts/check', methods=['POST'])
 def check_alerts():
@@ -458,7 +893,7 @@ def check_alerts():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("EXEC sp_CheckForecastAlerts")
+        call_procedure(cursor, 'sp_CheckForecastAlerts')
         conn.commit()
         conn.close()
         
@@ -473,10 +908,6 @@ def check_alerts():
 @app.route('/api/refills', methods=['GET'])
 def get_refills():
     """Get refill transactions"""
-    site_id = request.args.get('site_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
     query = """
     SELECT rt.*, s.site_name, ft.fuel_name, sup.supplier_name
     FROM RefillTransactions rt
@@ -486,28 +917,13 @@ def get_refills():
     WHERE 1=1
     """
     
-    params = []
-    if site_id:
-        query += " AND rt.site_id = ?"
-        params.append(site_id)
-    if start_date:
-        query += " AND rt.refill_date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND rt.refill_date <= ?"
-        params.append(end_date)
-    
-    query += " ORDER BY rt.refill_date DESC"
-    
-    return jsonify(execute_query(query, tuple(params) if params else None))
+    query, params = build_filtered_query(query, request.args, REFILL_FILTERS, "ORDER BY rt.refill_date DESC, rt.refill_id DESC")
+    return query_response(*paginate_query(query, params, request.args))
 
-@app.route('/api/refills', methods=['POST'])
-def create_refill():
-    """Create refill transaction"""
-    data = request.get_json()
-    
+def insert_refill(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert one refill transaction and add it to the site's stock"""
     # Generate transaction ID
-    transaction_id = f"REF-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    transaction_id = f"REF-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
     
     query = """
     INSERT INTO RefillTransactions (transaction_id, site_id, fuel_type_id, supplier_id,
@@ -525,25 +941,28 @@ def create_refill():
         data.get('refill_date', datetime.now()),
         data.get('created_by', 'System')
     )
+    execute_query(query, params)
     
+    # Update stock
+    update_stock_after_transaction(data['site_id'], data['fuel_type_id'], data['quantity'])
+    
+    return {'message': 'Refill transaction created successfully', 'transaction_id': transaction_id}
+
+@app.route('/api/refills', methods=['POST'])
+def create_refill():
+    """Create refill transaction"""
     try:
-        execute_query(query, params)
-        
-        # Update stock
-        update_stock_after_transaction(data['site_id'], data['fuel_type_id'], data['quantity'])
-        
-        return jsonify({'message': 'Refill transaction created successfully', 'transaction_id': transaction_id}), 201
+        data = request.get_json()
+        result, replayed = apply_write('/api/refills', data, request.headers.get(IDEMPOTENCY_HEADER))
+        if not replayed and Config.DELIVERY_REPLAN_ON_WRITE:
+            replan_deliveries(data['site_id'], data['fuel_type_id'])
+        return jsonify(result), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/usage', methods=['GET'])
 def get_usage():
     """Get usage transactions"""
-    site_id = request.args.get('site_id')
-    equipment_id = request.args.get('equipment_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
     query = """
     SELECT ut.*, s.site_name, ft.fuel_name, e.equipment_name
     FROM UsageTransactions ut
@@ -553,31 +972,13 @@ def get_usage():
     WHERE 1=1
     """
     
-    params = []
-    if site_id:
-        query += " AND ut.site_id = ?"
-        params.append(site_id)
-    if equipment_id:
-        query += " AND ut.equipment_id = ?"
-        params.append(equipment_id)
-    if start_date:
-        query += " AND ut.usage_date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND ut.usage_date <= ?"
-        params.append(end_date)
-    
-    query += " ORDER BY ut.usage_date DESC"
-    
-    return jsonify(execute_query(query, tuple(params) if params else None))
+    query, params = build_filtered_query(query, request.args, USAGE_FILTERS, "ORDER BY ut.usage_date DESC, ut.usage_id DESC")
+    return query_response(*paginate_query(query, params, request.args))
 
-@app.route('/api/usage', methods=['POST'])
-def create_usage():
-    """Create usage transaction"""
-    data = request.get_json()
-    
+def insert_usage(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert one usage transaction and take it off the site's stock"""
     # Generate transaction ID
-    transaction_id = f"USE-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    transaction_id = f"USE-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
     
     query = """
     INSERT INTO UsageTransactions (transaction_id, site_id, fuel_type_id, equipment_id,
@@ -595,17 +996,93 @@ def create_usage():
         data.get('purpose'),
         data.get('created_by', 'System')
     )
+    execute_query(query, params)
     
+    # Update stock (negative quantity for usage)
+    update_stock_after_transaction(data['site_id'], data['fuel_type_id'], -data['quantity'])
+    
+    return {'message': 'Usage transaction created successfully', 'transaction_id': transaction_id}
+
+@app.route('/api/usage', methods=['POST'])
+def create_usage():
+    """Create usage transaction"""
     try:
-        execute_query(query, params)
-        
-        # Update stock (negative quantity for usage)
-        update_stock_after_transaction(data['site_id'], data['fuel_type_id'], -data['quantity'])
-        
-        return jsonify({'message': 'Usage transaction created successfully', 'transaction_id': transaction_id}), 201
+        data = request.get_json()
+        result, replayed = apply_write('/api/usage', data, request.headers.get(IDEMPOTENCY_HEADER))
+        if not replayed and Config.DELIVERY_REPLAN_ON_WRITE:
+            replan_deliveries(data['site_id'], data['fuel_type_id'])
+        return jsonify(result), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+# =============================================
+# OFFLINE SYNC ENDPOINTS
+# =============================================
+
+# Field clients tag every write with a key; a write whose key was already applied
+# returns the stored response instead of inserting a second row.
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+SYNC_WRITERS = {
+    '/api/operational-hours': insert_operational_hours,
+    '/api/refills': insert_refill,
+    '/api/usage': insert_usage,
+}
+
+def apply_write(endpoint: str, data: Dict[str, Any], key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+    """Apply a write at most once per idempotency key; returns (response body, replayed)"""
+    if key:
+        stored = execute_query("SELECT response FROM SyncRequests WHERE idempotency_key = ?",
+                               (key,), fetch_all=False)
+        if stored:
+            return json.loads(stored['response']), True
+    
+    result = SYNC_WRITERS[endpoint](data)
+    if key:
+        execute_query("INSERT INTO SyncRequests (idempotency_key, endpoint, response) VALUES (?, ?, ?)",
+                      (key, endpoint, json.dumps(result)))
+    return result, False
+
+@app.route('/api/sync/batch', methods=['POST'])
+def sync_batch():
+    """Apply writes queued by offline clients, returning one result per operation in order"""
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list):
+        return jsonify({'error': 'operations must be a list'}), 400
+    if len(operations) > Config.SYNC_MAX_BATCH:
+        return jsonify({'error': f'At most {Config.SYNC_MAX_BATCH} operations per batch'}), 400
+    
+    results = []
+    forecast_sites = set()
+    delivery_pairs = set()
+    for operation in operations:
+        key = operation.get('idempotency_key')
+        endpoint = operation.get('endpoint')
+        payload = operation.get('payload') or {}
+        if not key or endpoint not in SYNC_WRITERS:
+            results.append({'idempotency_key': key, 'status': 400,
+                            'error': f'Unsupported sync operation: {endpoint}'})
+            continue
+        try:
+            result, replayed = apply_write(endpoint, payload, key)
+            results.append({'idempotency_key': key, 'status': 200 if replayed else 201, 'result': result})
+            if not replayed and endpoint == '/api/operational-hours':
+                forecast_sites.add(payload['site_id'])
+            elif not replayed:
+                delivery_pairs.add((payload['site_id'], payload['fuel_type_id']))
+        except Exception as e:
+            results.append({'idempotency_key': key, 'status': 400, 'error': str(e)})
+    
+    # One forecast recalculation per site, however many hours entries arrived for it
+    for site_id in sorted(forecast_sites):
+        recalculate_forecast(site_id)
+    # Likewise one delivery re-plan per site and fuel
+    if Config.DELIVERY_REPLAN_ON_WRITE:
+        for site_id, fuel_type_id in sorted(delivery_pairs):
+            replan_deliveries(site_id, fuel_type_id)
+    
+    return jsonify({'results': results})
+
 # =============================================
 # REPORTING ENDPOINTS
 # =============================================
@@ -642,12 +1119,79 @@ def get_consumption_summary():
     ORDER BY s.site_name, ft.fuel_name
     """
     
-    return jsonify(execute_query(query, tuple(params)))
+    return query_response(query, tuple(params))
+
+@app.route('/api/reports/consumption-cost', methods=['GET'])
+def get_consumption_cost():
+    """
+    Cost of consumption: usage between start_date and end_date, priced on its usage_date from
+    the FuelPrices interval index and totalled per group_by (fuel, site, site_fuel, month, day)
+    """
+    try:
+        settings = prices.costing_options(request.args, Config.COST_REPORT_DEFAULT_DAYS, Config.COST_REPORT_PRICE_TYPE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    by_site = settings['group_by'] in ('site', 'site_fuel')
+    day = storage.day_of('usage_date')
+    filters = [column for column in ('site_id', 'fuel_type_id') if settings[column]]
+    params = (settings['start_date'].isoformat(), (settings['end_date'] + timedelta(days=1)).isoformat())
+    params += tuple(settings[column] for column in filters)
+
+    try:
+        index, cached = price_index()
+        # Litres per day are priced exactly like the transactions they sum
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+            SELECT {'site_id, ' if by_site else ''}fuel_type_id, {day} AS day, SUM(quantity) AS quantity
+            FROM UsageTransactions
+            WHERE usage_date >= ? AND usage_date < ?{''.join(f' AND {column} = ?' for column in filters)}
+            GROUP BY {'site_id, ' if by_site else ''}fuel_type_id, {day}
+            """, params)
+            columns = [list(column) for column in zip(*cursor.fetchall())] or [[]] * (4 if by_site else 3)
+        finally:
+            conn.close()
+        site_ids = columns.pop(0) if by_site else None
+        site_names = ({row['site_id']: row['site_name'] for row in execute_query("SELECT site_id, site_name FROM Sites")}
+                      if by_site else None)
+        fuel_names = {row['fuel_type_id']: row['fuel_name']
+                      for row in execute_query("SELECT fuel_type_id, fuel_name FROM FuelTypes")}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = prices.cost_consumption(index, columns[0], columns[1], columns[2], site_ids, settings['group_by'],
+                                     settings['supplier_id'], settings['price_type'], site_names, fuel_names)
+    return jsonify({'start_date': settings['start_date'].isoformat(), 'end_date': settings['end_date'].isoformat(),
+                    **result, 'price_index': 'hit' if cached else 'miss'})
 
 @app.route('/api/reports/equipment-efficiency', methods=['GET'])
 def get_equipment_efficiency():
     """Get equipment efficiency report"""
-    return jsonify(execute_query("SELECT * FROM vw_EquipmentConsumptionSummary ORDER BY site_name, equipment_name"))
+    return query_response("SELECT * FROM vw_EquipmentConsumptionSummary ORDER BY site_name, equipment_name")
+
+# =============================================
+# DIAGNOSTICS (ADMIN)
+# =============================================
+
+@app.route('/api/admin/memory', methods=['GET'])
+@admin_required
+def get_memory_report():
+    """Heaviest sampled requests and top allocation sites"""
+    return jsonify(memory_tracker.report(live=request.args.get('live') == '1'))
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """List stored request profiles"""
+    return jsonify(request_profiler.list_artifacts())
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download a stored pstats / collapsed-stack profile"""
+    return send_from_directory(os.path.abspath(request_profiler.directory), os.path.basename(name),
+                               as_attachment=True)
 
 # =============================================
 # UTILITY FUNCTIONS
@@ -658,16 +1202,163 @@ def update_stock_after_transaction(site_id: int, fuel_type_id: int, quantity_cha
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("EXEC sp_UpdateStockAfterTransaction ?, ?, ?, ?", 
-                      (site_id, fuel_type_id, quantity_change, 'REFILL' if quantity_change > 0 else 'USAGE'))
+        call_procedure(cursor, 'sp_UpdateStockAfterTransaction',
+                       (site_id, fuel_type_id, quantity_change, 'REFILL' if quantity_change > 0 else 'USAGE'))
         conn.commit()
         conn.close()
     except Exception as e:
         logger.error(f"Failed to update stock: {e}")
         raise
 
+def read_safety_factor(cursor) -> float:
+    """SystemSettings default_safety_factor, as the forecasting procedures read it"""
+    cursor.execute("SELECT setting_value FROM SystemSettings WHERE setting_key = 'default_safety_factor'")
+    row = cursor.fetchone()
+    try:
+        return float(row[0]) if row else Config.DEFAULT_SAFETY_FACTOR
+    except (TypeError, ValueError):
+        return Config.DEFAULT_SAFETY_FACTOR
+
+def load_model_history(cursor, equipment_ids: List[int], window_start: str,
+                       site_id: Optional[int] = None) -> Dict[int, Dict[Any, float]]:
+    """{equipment_id: {log date: running hours}} since window_start for the given equipment"""
+    query = """
+    SELECT equipment_id, log_date, SUM(running_hours)
+    FROM OperationalHoursLog
+    WHERE log_date >= ?
+    """
+    params: List[Any] = [window_start]
+    if len(equipment_ids) <= 500:
+        query += f" AND equipment_id IN ({', '.join('?' * len(equipment_ids))})"
+        params += equipment_ids
+    elif site_id:
+        query += " AND site_id = ?"
+        params.append(site_id)
+    query += " GROUP BY equipment_id, log_date"
+    cursor.execute(query, tuple(params))
+    
+    wanted = set(equipment_ids)
+    history: Dict[int, Dict[Any, float]] = {}
+    for equipment_id, log_date, hours in cursor.fetchall():
+        if equipment_id in wanted:
+            history.setdefault(equipment_id, {})[log_date] = hours
+    return history
+
+def calculate_model_forecasts(site_id: Optional[int] = None, forecast_date=None) -> Dict[str, int]:
+    """
+    Holt-Winters forecasts for every active site/fuel pair, or one site. Equipment models are
+    refitted only when the equipment's hours log changed since the cached fit in ForecastModels.
+    """
+    forecast_date = timeseries.as_date(forecast_date or date.today())
+    window_start = (date.today() - timedelta(days=Config.FORECAST_MODEL_HISTORY_DAYS)).isoformat()
+    site_filter = ' AND {}site_id = ?' if site_id else ''
+    site_params = (site_id,) if site_id else ()
+    
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, fs.optimal_order_quantity
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        WHERE s.is_active = 1{site_filter.format('fs.')}
+        """, site_params)
+        stocks = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        cursor.execute(f"""
+        SELECT equipment_id, site_id, fuel_type_id, consumption_rate
+        FROM Equipment
+        WHERE is_active = 1{site_filter.format('')}
+        """, site_params)
+        equipment = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        
+        # Whole-log signatures decide what to refit; recent hours pair with UsageTransactions litres
+        cursor.execute(f"""
+        SELECT oh.equipment_id, COUNT(*), MAX(oh.log_date), SUM(oh.running_hours),
+               SUM(CASE WHEN oh.log_date >= ? THEN oh.running_hours ELSE 0 END)
+        FROM OperationalHoursLog oh
+        JOIN Equipment e ON oh.equipment_id = e.equipment_id
+        WHERE e.is_active = 1{site_filter.format('e.')}
+        GROUP BY oh.equipment_id
+        """, (window_start,) + site_params)
+        signatures, recent_hours = {}, {}
+        for equipment_id, count, last_date, total, recent in cursor.fetchall():
+            signatures[equipment_id] = timeseries.data_signature(count, last_date, total)
+            recent_hours[equipment_id] = recent
+        cursor.execute(f"""
+        SELECT equipment_id, SUM(quantity)
+        FROM UsageTransactions
+        WHERE equipment_id IS NOT NULL AND usage_date >= ?{site_filter.format('')}
+        GROUP BY equipment_id
+        """, (window_start,) + site_params)
+        usage = {equipment_id: (litres, recent_hours.get(equipment_id)) for equipment_id, litres in cursor.fetchall()}
+        
+        cursor.execute(f"""
+        SELECT fm.equipment_id, fm.data_signature, fm.state_date, fm.parameters
+        FROM ForecastModels fm
+        JOIN Equipment e ON fm.equipment_id = e.equipment_id
+        WHERE e.is_active = 1{site_filter.format('e.')}
+        """, site_params)
+        cached = {equipment_id: {'data_signature': signature, 'state_date': state_date, **json.loads(parameters)}
+                  for equipment_id, signature, state_date, parameters in cursor.fetchall()}
+        
+        stale = timeseries.stale_equipment(signatures, cached)
+        fitted = {}
+        if stale:
+            history = load_model_history(cursor, stale, window_start, site_id)
+            fitted = timeseries.fit_models(history, Config.FORECAST_MODEL_HISTORY_DAYS, Config.FORECAST_MODEL_WORKERS)
+            cursor.executemany("DELETE FROM ForecastModels WHERE equipment_id = ?",
+                               [(equipment_id,) for equipment_id in stale])
+            cursor.executemany("""
+            INSERT INTO ForecastModels (equipment_id, model_type, data_signature, state_date, parameters, fitted_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, [(equipment_id, model['model_type'], signatures[equipment_id], model['state_date'],
+                   json.dumps({key: value for key, value in model.items() if key != 'state_date'}), datetime.now())
+                  for equipment_id, model in fitted.items()])
+        models = {equipment_id: model for equipment_id, model in cached.items() if equipment_id not in stale}
+        models.update(fitted)
+        
+        forecasts = timeseries.site_forecasts(stocks, equipment, models, usage, read_safety_factor(cursor),
+                                              forecast_date, Config.FORECAST_MODEL_HORIZON_DAYS)
+        now = datetime.now()
+        for forecast in forecasts:
+            values = (forecast['current_balance'], forecast['daily_consumption_rate'], forecast['safety_factor'],
+                      forecast['forecast_days_remaining'], forecast['next_refill_date_estimate'],
+                      forecast['recommended_order_quantity'], forecast['confidence_level'],
+                      forecast['calculation_method'], now, 'System')
+            key = (forecast['site_id'], forecast['fuel_type_id'], forecast_date)
+            cursor.execute("""
+            UPDATE ConsumptionForecast
+            SET current_balance = ?, daily_consumption_rate = ?, safety_factor = ?, forecast_days_remaining = ?,
+                next_refill_date_estimate = ?, recommended_order_quantity = ?, confidence_level = ?,
+                calculation_method = ?, last_calculated = ?, calculated_by = ?
+            WHERE site_id = ? AND fuel_type_id = ? AND forecast_date = ?
+            """, values + key)
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                INSERT INTO ConsumptionForecast (current_balance, daily_consumption_rate, safety_factor,
+                    forecast_days_remaining, next_refill_date_estimate, recommended_order_quantity,
+                    confidence_level, calculation_method, last_calculated, calculated_by,
+                    site_id, fuel_type_id, forecast_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, values + key)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    logger.info(f"Model forecasts calculated for {forecast_date}: {len(forecasts)} forecasts, {len(fitted)} models fitted")
+    return {'forecasts': len(forecasts), 'models_fitted': len(fitted), 'models_cached': len(models) - len(fitted)}
+
+@tracer.traced('job.recalculate_forecast')
+@memory_tracker.tracked('job.recalculate_forecast')
 def recalculate_forecast(site_id: int):
     """Recalculate forecast for a site"""
+    if Config.FORECAST_METHOD == 'holt-winters':
+        try:
+            calculate_model_forecasts(site_id)
+        except Exception as e:
+            logger.error(f"Failed to recalculate forecast: {e}")
+        return
+    
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -677,14 +1368,213 @@ def recalculate_forecast(site_id: int):
         fuel_types = cursor.fetchall()
         
         for fuel_type in fuel_types:
-            cursor.execute("EXEC sp_CalculateSiteForecast ?, ?, ?", 
-                          (site_id, fuel_type[0], date.today()))
+            call_procedure(cursor, 'sp_CalculateSiteForecast', (site_id, fuel_type[0], date.today()))
         
         conn.commit()
         conn.close()
     except Exception as e:
         logger.error(f"Failed to recalculate forecast: {e}")
 
+def optimize_reorders(site_id: Optional[int] = None, force: bool = False, save: bool = True) -> Dict[str, Any]:
+    """
+    Supplier, order quantity and reorder point for every active stock row, or one site's. Rows
+    whose demand, tank and supplier offers are unchanged since their stored recommendation are
+    skipped unless `force`; with `save`, the rest are written to ReorderRecommendations and to
+    FuelStock.reorder_point/optimal_order_quantity (and today's forecast's recommended quantity).
+    """
+    today = date.today()
+    history_start = (today - timedelta(days=Config.REORDER_HISTORY_DAYS)).isoformat()
+    site_filter = ' AND {}site_id = ?' if site_id else ''
+    site_params = (site_id,) if site_id else ()
+    day = storage.day_of('usage_date')
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # Demand is the latest forecast rate without its safety factor
+        cursor.execute(f"""
+        SELECT fs.stock_id, fs.site_id, fs.fuel_type_id, fs.maximum_capacity, fs.optimal_order_quantity,
+               s.site_name, s.safety_stock_days, ft.fuel_name, cf.daily_consumption_rate, cf.safety_factor
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+        LEFT JOIN ConsumptionForecast cf ON cf.site_id = fs.site_id AND cf.fuel_type_id = fs.fuel_type_id
+            AND cf.forecast_date = (SELECT MAX(forecast_date) FROM ConsumptionForecast
+                                    WHERE site_id = fs.site_id AND fuel_type_id = fs.fuel_type_id)
+        WHERE s.is_active = 1{site_filter.format('fs.')}
+        """, site_params)
+        pairs = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        cursor.execute(f"""
+        SELECT site_id, fuel_type_id, {day}, SUM(quantity)
+        FROM UsageTransactions
+        WHERE usage_date >= ?{site_filter.format('')}
+        GROUP BY site_id, fuel_type_id, {day}
+        """, (history_start,) + site_params)
+        usage = reorder.daily_usage_stats(cursor.fetchall(), Config.REORDER_HISTORY_DAYS)
+        cursor.execute(f"""
+        SELECT site_id, fuel_type_id,
+               AVG(COALESCE(transportation_cost, 0) + COALESCE(loading_unloading_cost, 0))
+        FROM RefillTransactions
+        WHERE refill_date >= ? AND supplier_id IS NOT NULL{site_filter.format('')}
+        GROUP BY site_id, fuel_type_id
+        """, (history_start,) + site_params)
+        order_costs = {(site, fuel): float(cost or 0.0) for site, fuel, cost in cursor.fetchall()}
+        # Today's purchase price per supplier and fuel; later effective dates replace earlier ones
+        cursor.execute("""
+        SELECT fp.fuel_type_id, fp.supplier_id, sup.supplier_name, fp.price_per_liter,
+               fp.volume_discount_threshold, fp.volume_discount_rate, sup.lead_time_days,
+               sup.minimum_order_quantity, sup.is_preferred, sup.rating
+        FROM FuelPrices fp
+        JOIN Suppliers sup ON fp.supplier_id = sup.supplier_id
+        WHERE fp.is_active = 1 AND sup.is_active = 1 AND fp.price_type <> 'Market'
+          AND fp.effective_date <= ? AND (fp.expiry_date IS NULL OR fp.expiry_date >= ?)
+        ORDER BY fp.effective_date
+        """, (today, today))
+        offers = {(row['fuel_type_id'], row['supplier_id']): row
+                  for row in (row_to_dict(row, cursor.description) for row in cursor.fetchall())}
+        cursor.execute(f"""
+        SELECT site_id, fuel_type_id, input_signature FROM ReorderRecommendations WHERE 1 = 1{site_filter.format('')}
+        """, site_params)
+        stored = {(site, fuel): signature for site, fuel, signature in cursor.fetchall()}
+
+        for pair in pairs:
+            mean, spread = usage.get((pair['site_id'], pair['fuel_type_id']), (0.0, None))
+            rate = pair.pop('daily_consumption_rate')
+            safety_factor = float(pair.pop('safety_factor') or 1.0)
+            pair['daily_demand'] = float(rate) / safety_factor if rate is not None else mean
+            pair['demand_std'] = spread
+        result = reorder.run_optimizer(pairs, list(offers.values()), order_costs, stored, Config.REORDER_ORDER_COST,
+                                       Config.REORDER_HOLDING_RATE, Config.REORDER_SERVICE_LEVEL,
+                                       Config.REORDER_MIN_SUPPLIER_RATING, force)
+
+        if save and result['recommendations']:
+            now = datetime.now()
+            rows = result['recommendations']
+            cursor.executemany("DELETE FROM ReorderRecommendations WHERE stock_id = ?",
+                               [(row['stock_id'],) for row in rows])
+            cursor.executemany("""
+            INSERT INTO ReorderRecommendations (stock_id, site_id, fuel_type_id, supplier_id, unit_price,
+                order_quantity, reorder_point, safety_stock, lead_time_days, daily_demand, annual_cost,
+                current_annual_cost, input_signature, calculated_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(row['stock_id'], row['site_id'], row['fuel_type_id'], row['supplier_id'], row.get('unit_price'),
+                   row.get('order_quantity'), row.get('reorder_point'), row.get('safety_stock'),
+                   row.get('lead_time_days'), row['daily_demand'], row.get('annual_cost'),
+                   row.get('current_annual_cost'), row['input_signature'], now) for row in rows])
+            supplied = [row for row in rows if row['supplier_id'] is not None]
+            cursor.executemany("""
+            UPDATE FuelStock SET reorder_point = ?, optimal_order_quantity = ?, last_updated = ?, updated_by = ?
+            WHERE stock_id = ?
+            """, [(row['reorder_point'], row['order_quantity'], now, 'Reorder Optimizer', row['stock_id'])
+                  for row in supplied])
+            cursor.executemany("""
+            UPDATE ConsumptionForecast SET recommended_order_quantity = ?
+            WHERE site_id = ? AND fuel_type_id = ? AND forecast_date = ?
+            """, [(row['order_quantity'], row['site_id'], row['fuel_type_id'], today) for row in supplied])
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(f"Reorders optimized: {result['recalculated']} of {result['pairs']} stock rows recalculated")
+    return result
+
+def plan_deliveries(site_id: Optional[int] = None, fuel_type_id: Optional[int] = None,
+                    horizon_days: Optional[int] = None, save: bool = True) -> Dict[str, Any]:
+    """
+    Delivery calendar for every active stock row, or for one site and fuel around the trucks the
+    stored calendar already books for the others; with `save`, the stored planned deliveries it
+    covers are replaced
+    """
+    today = date.today()
+    horizon_days = horizon_days or Config.DELIVERY_HORIZON_DAYS
+    pair_filter = ' AND {0}site_id = ? AND {0}fuel_type_id = ?' if site_id and fuel_type_id else ''
+    pair_params = (site_id, fuel_type_id) if pair_filter else ()
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, fs.minimum_threshold, fs.maximum_capacity,
+               s.site_name, ft.fuel_name, cf.daily_consumption_rate AS daily_demand
+        FROM FuelStock fs
+        JOIN Sites s ON fs.site_id = s.site_id
+        JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+        JOIN ConsumptionForecast cf ON cf.site_id = fs.site_id AND cf.fuel_type_id = fs.fuel_type_id
+            AND cf.forecast_date = (SELECT MAX(forecast_date) FROM ConsumptionForecast
+                                    WHERE site_id = fs.site_id AND fuel_type_id = fs.fuel_type_id)
+        WHERE s.is_active = 1{pair_filter.format('fs.')}
+        """, pair_params)
+        pairs = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        cursor.execute("""
+        SELECT DISTINCT fp.fuel_type_id, sup.supplier_id, sup.lead_time_days, sup.minimum_order_quantity,
+               sup.is_preferred
+        FROM FuelPrices fp
+        JOIN Suppliers sup ON fp.supplier_id = sup.supplier_id
+        WHERE fp.is_active = 1 AND sup.is_active = 1 AND fp.price_type <> 'Market'
+          AND fp.effective_date <= ? AND (fp.expiry_date IS NULL OR fp.expiry_date >= ?)
+        """, (today, today))
+        offers = [row_to_dict(row, cursor.description) for row in cursor.fetchall()]
+        cursor.execute(f"""
+        SELECT site_id, fuel_type_id, supplier_id FROM ReorderRecommendations
+        WHERE supplier_id IS NOT NULL{pair_filter.format('')}
+        """, pair_params)
+        recommended = {(site, fuel): supplier for site, fuel, supplier in cursor.fetchall()}
+        reserved = {}
+        if pair_filter:
+            cursor.execute("""
+            SELECT supplier_id, delivery_date, SUM(trucks)
+            FROM DeliverySchedule
+            WHERE status = 'Planned' AND delivery_date >= ? AND NOT (site_id = ? AND fuel_type_id = ?)
+            GROUP BY supplier_id, delivery_date
+            """, (today,) + pair_params)
+            reserved = {(supplier, day): trucks for supplier, day, trucks in cursor.fetchall()}
+
+        deliveries.assign_suppliers(pairs, offers, recommended)
+        result = deliveries.schedule_deliveries(pairs, horizon_days, Config.DELIVERY_TRUCK_LITRES,
+                                                Config.DELIVERY_SUPPLIER_DAILY_TRUCKS, reserved, today)
+
+        if save:
+            cursor.execute(f"DELETE FROM DeliverySchedule WHERE status = 'Planned'{pair_filter.format('')}",
+                           pair_params)
+            now = datetime.now()
+            cursor.executemany("""
+            INSERT INTO DeliverySchedule (site_id, fuel_type_id, supplier_id, order_date, delivery_date,
+                quantity, trucks, stock_before, at_risk, status, planned_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'Planned', ?)
+            """, [(row['site_id'], row['fuel_type_id'], row['supplier_id'], row['order_date'], row['delivery_date'],
+                   row['quantity'], row['trucks'], row['stock_before'], int(row['at_risk']), now)
+                  for row in result['schedule']])
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(f"Deliveries planned for {result['pairs']} stock rows: {result['deliveries']} deliveries, "
+                f"{result['at_risk']} at risk")
+    return result
+
+def replan_deliveries(site_id: int, fuel_type_id: int):
+    """Re-plan one site and fuel after its stock changed"""
+    try:
+        plan_deliveries(site_id, fuel_type_id)
+    except Exception as e:
+        logger.error(f"Failed to re-plan deliveries: {e}")
+
+def price_index() -> Tuple[prices.PriceIndex, bool]:
+    """
+    (FuelPrices interval index, cache hit). The cached index is kept while a cheap aggregate over
+    FuelPrices is unchanged, so price rows added, repriced, deactivated or expired rebuild it
+    """
+    signature = execute_query("""
+    SELECT COUNT(*) AS prices, MAX(price_id) AS last_price_id, SUM(price_per_liter * price_id) AS weighted_prices,
+           SUM(CASE WHEN is_active = 1 THEN price_id ELSE 0 END) AS active_ids, COUNT(expiry_date) AS expiring,
+           MIN(expiry_date) AS first_expiry, MAX(expiry_date) AS last_expiry, MAX(effective_date) AS last_effective
+    FROM FuelPrices
+    """, fetch_all=False)
+    return prices.cached_index(tuple(signature.values()), lambda: execute_query("""
+    SELECT price_id, fuel_type_id, supplier_id, price_type, price_per_liter, effective_date, expiry_date, is_active
+    FROM FuelPrices
+    """))
+
 # =============================================
 # ERROR HANDLERS
 # =============================================
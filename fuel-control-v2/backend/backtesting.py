@@ -0,0 +1,306 @@
+"""
+Forecast backtesting for Advanced Fuel Consumption Forecasting System
+Replays history day by day: on every forecast date each method forecasts from the logs before that
+date, and the forecast is scored against the UsageTransactions consumption that followed. Work is
+vectorized over equipment and dates, and chunks of site/fuel pairs run in a process pool
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import timeseries
+from timeseries import DEFAULT_HOURS, RATE_BOUNDS, SEASON, UNLIMITED_DAYS
+
+METHODS = timeseries.METHODS
+AVERAGE_WINDOW_DAYS = 14  # sp_CalculateSiteForecast's hours window
+CHUNKS_PER_WORKER = 4
+
+
+def _prefixed_cumsum(values: np.ndarray) -> np.ndarray:
+    """Cumulative sums along days with a leading zero column: sums over [a, b) are c[:, b] - c[:, a]"""
+    return np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+
+
+def _reverse_cumsum(values: np.ndarray) -> np.ndarray:
+    """Sums over [day, end] for every day"""
+    return np.cumsum(values[:, ::-1], axis=1)[:, ::-1]
+
+
+def _window_sums(cumulative: np.ndarray, days: np.ndarray, window: int) -> np.ndarray:
+    return cumulative[:, days] - cumulative[:, np.maximum(days - window, 0)]
+
+
+def backtest_chunk(chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Score every method on one chunk of pairs. `chunk` holds equipment arrays (hours with NaN for
+    unlogged days, usage litres, nominal rate, local pair index) and pair arrays (actual litres,
+    refills, current balance) over the same days, plus the options set by run_backtest.
+    """
+    hours, equipment_usage = chunk['hours'], chunk['equipment_usage']
+    rate, equipment_pair = chunk['rate'], chunk['equipment_pair']
+    actual, refills, balance_now = chunk['actual'], chunk['refills'], chunk['balance']
+    evaluate, horizon = chunk['evaluate'], chunk['horizon']
+    safety_factor = chunk['safety_factor']
+    pair_count, day_count = actual.shape
+    membership = np.zeros((pair_count, len(rate)))
+    membership[equipment_pair, np.arange(len(rate))] = 1.0
+
+    observed = ~np.isnan(hours)
+    filled = np.nan_to_num(hours)
+
+    # Stock at the start of each day, rebuilt backwards from today's balance
+    balance = balance_now[:, None] + _reverse_cumsum(actual) - _reverse_cumsum(refills)
+
+    # What actually happened: litres over the horizon, and full days each balance really lasted
+    consumed = _prefixed_cumsum(actual)
+    actual_litres = consumed[:, evaluate + horizon] - consumed[:, evaluate]
+    lasted = np.empty((pair_count, len(evaluate)), dtype=np.int64)
+    for pair in range(pair_count):
+        ends = np.searchsorted(consumed[pair], consumed[pair, evaluate] + balance[pair, evaluate], side='right')
+        lasted[pair] = np.where(ends <= day_count, np.maximum(ends - evaluate - 1, 0), -1)
+
+    # sp_CalculateSiteForecast: nominal rate x average logged hours of the 14 days before the date
+    hour_sums = _prefixed_cumsum(filled)
+    log_counts = _prefixed_cumsum(observed.astype(float))
+    counts = _window_sums(log_counts, evaluate, AVERAGE_WINDOW_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average = np.where(counts > 0, _window_sums(hour_sums, evaluate, AVERAGE_WINDOW_DAYS) / counts,
+                           DEFAULT_HOURS)
+    average_litres = average * rate[:, None]
+
+    forecasts: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    if 'average' in chunk['methods']:
+        daily = membership @ average_litres
+        burn = daily * safety_factor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days = np.where(burn > 0, np.floor(balance[:, evaluate] / burn), UNLIMITED_DAYS)
+        forecasts['average'] = (daily * horizon, np.minimum(days, UNLIMITED_DAYS).astype(np.int64))
+
+    if 'holt-winters' in chunk['methods']:
+        forecasts['holt-winters'] = _holt_winters(chunk, membership, filled, observed, equipment_usage,
+                                                  average_litres, balance)
+
+    results = []
+    for method, (forecast_litres, predicted) in forecasts.items():
+        scored = actual_litres > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ape = np.where(scored, np.abs(forecast_litres - actual_litres) / actual_litres, 0.0)
+        # A prediction can be checked when the stock really ran dry in the data, or the predicted day is in it
+        ran_dry = lasted >= 0
+        checkable = ran_dry | (evaluate[None, :] + predicted < day_count)
+        misses = ran_dry & (lasted < predicted)
+        days_error = np.where(ran_dry, predicted - lasted, 0)
+        for pair in range(pair_count):
+            results.append({
+                'pair': int(chunk['pairs'][pair]),
+                'method': method,
+                'forecasts': len(evaluate),
+                'ape_sum': float(ape[pair].sum()),
+                'ape_count': int(scored[pair].sum()),
+                'error_sum': float((forecast_litres[pair] - actual_litres[pair]).sum()),
+                'actual_sum': float(actual_litres[pair].sum()),
+                'stockout_checks': int(checkable[pair].sum()),
+                'stockout_misses': int(misses[pair].sum()),
+                'days_error_sum': float(days_error[pair].sum()),
+                'days_error_count': int(ran_dry[pair].sum()),
+            })
+    return results
+
+
+def _holt_winters(chunk: Dict[str, Any], membership: np.ndarray, filled: np.ndarray, observed: np.ndarray,
+                  equipment_usage: np.ndarray, average_litres: np.ndarray,
+                  balance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit on the days before the first forecast date, then run the filter forward with those
+    parameters: the state at each date only has the logs before it. Equipment with too few
+    training days keeps the 14-day average, and litres per hour follow the same usage
+    calibration as timeseries.litres_per_hour over the trailing history window
+    """
+    evaluate, first_weekday = chunk['evaluate'], chunk['first_weekday']
+    horizon, model_horizon, safety_factor = chunk['horizon'], chunk['model_horizon'], chunk['safety_factor']
+    rate = chunk['rate']
+    first = int(evaluate[0])
+
+    training = observed[:, :first].sum(axis=1)
+    seasonal = np.flatnonzero(training >= timeseries.MIN_SEASONAL_DAYS)
+    models = timeseries.fit_chunk(chunk['hours'][seasonal, :first], first_weekday) \
+        if seasonal.size else []
+    level = np.array([model['level'] for model in models])
+    trend = np.array([model['trend'] for model in models])
+    season = np.array([model['season'] for model in models]).reshape(len(models), SEASON)
+    alpha, beta, gamma = (np.array([model[name] for model in models]) for name in ('alpha', 'beta', 'gamma'))
+
+    usage_sums = _window_sums(_prefixed_cumsum(equipment_usage), evaluate, chunk['history_days'])
+    logged_sums = _window_sums(_prefixed_cumsum(filled), evaluate, chunk['history_days'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calibrated = usage_sums / logged_sums
+    nominal = rate[:, None]
+    plausible = (usage_sums > 0) & (logged_sums > 0) & (
+        (nominal <= 0) | ((calibrated >= RATE_BOUNDS[0] * nominal) & (calibrated <= RATE_BOUNDS[1] * nominal)))
+    litres_per_hour = np.where(plausible, calibrated, nominal)
+
+    forecast_litres = np.empty((membership.shape[0], len(evaluate)))
+    predicted = np.empty((membership.shape[0], len(evaluate)), dtype=np.int64)
+    equipment_path = np.repeat(average_litres[:, :1], model_horizon, axis=1)
+    seen, values = observed[seasonal], filled[seasonal]
+    for index, day in enumerate(evaluate):
+        weekday = (first_weekday + day) % SEASON
+        if index:
+            # Bring the state up to date with the day before this forecast date
+            previous = day - 1
+            timeseries.smooth(level, trend, season, values[:, previous], seen[:, previous],
+                              (first_weekday + previous) % SEASON, alpha, beta, gamma)
+        equipment_path[:] = average_litres[:, index, None]
+        if seasonal.size:
+            equipment_path[seasonal] = timeseries.paths(level, trend, season, weekday, model_horizon) * \
+                litres_per_hour[seasonal, index, None]
+        pair_path = membership @ equipment_path
+        forecast_litres[:, index] = pair_path[:, :horizon].sum(axis=1)
+        predicted[:, index] = timeseries.days_covered(pair_path * safety_factor, balance[:, day])
+    return forecast_litres, predicted
+
+
+def summarize(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """MAPE and bias (%), stockout-miss rate and mean days error from summed chunk rows"""
+    totals = {key: 0.0 for key in ('forecasts', 'ape_sum', 'ape_count', 'error_sum', 'actual_sum',
+                                   'stockout_checks', 'stockout_misses', 'days_error_sum', 'days_error_count')}
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+    return {
+        'forecasts': int(totals['forecasts']),
+        'mape': round(100.0 * totals['ape_sum'] / totals['ape_count'], 2) if totals['ape_count'] else None,
+        'bias': round(100.0 * totals['error_sum'] / totals['actual_sum'], 2) if totals['actual_sum'] else None,
+        'stockout_checks': int(totals['stockout_checks']),
+        'stockout_misses': int(totals['stockout_misses']),
+        'miss_rate': round(100.0 * totals['stockout_misses'] / totals['stockout_checks'], 2)
+        if totals['stockout_checks'] else None,
+        'mean_days_error': round(totals['days_error_sum'] / totals['days_error_count'], 2)
+        if totals['days_error_count'] else None,
+    }
+
+
+def run_backtest(stocks: List[Dict[str, Any]], equipment: List[Dict[str, Any]],
+                 hours: Iterable[Sequence], usage: Iterable[Sequence], refills: Iterable[Sequence],
+                 start: date, end: date, as_of: Optional[date] = None, methods: Sequence[str] = METHODS,
+                 horizon: int = 7, train_days: int = 56, model_horizon: int = 28, history_days: int = 182,
+                 safety_factor: float = 1.2, workers: int = 0) -> Dict[str, Any]:
+    """
+    Forecast every date in [start, end] for every stock row (site_id, fuel_type_id,
+    current_quantity as of `as_of`) with each method, and score it against what followed.
+
+    Rows: hours (equipment_id, log_date, running_hours), usage (site_id, fuel_type_id,
+    equipment_id, usage_date, quantity) and refills (site_id, fuel_type_id, delivery date,
+    quantity), covering train_days before `start` up to `as_of`.
+
+    Accuracy compares raw forecast litres over `horizon` days (no safety factor) with actual
+    usage; a stockout miss is a forecast date whose predicted days remaining (with the safety
+    factor, no refills) outlasted the stock as it was really drawn down.
+    """
+    started = time.perf_counter()
+    as_of = as_of or date.today()
+    end = min(end, as_of - timedelta(days=horizon))
+    unknown = [method for method in methods if method not in METHODS]
+    if unknown:
+        raise ValueError(f"Unknown methods: {', '.join(unknown)}")
+    if horizon > model_horizon:
+        raise ValueError(f'horizon must be at most {model_horizon} days')
+    if end < start:
+        raise ValueError('No forecast dates with a full horizon of actual usage in the range')
+
+    first_day = start - timedelta(days=max(train_days, AVERAGE_WINDOW_DAYS))
+    day_count = (as_of - first_day).days + 1
+    pairs = sorted({(row['site_id'], row['fuel_type_id']) for row in stocks})
+    pair_index = {pair: index for index, pair in enumerate(pairs)}
+    machines = sorted((item for item in equipment if (item['site_id'], item['fuel_type_id']) in pair_index),
+                      key=lambda item: pair_index[(item['site_id'], item['fuel_type_id'])])
+    machine_index = {item['equipment_id']: index for index, item in enumerate(machines)}
+    equipment_pair = np.array([pair_index[(item['site_id'], item['fuel_type_id'])] for item in machines],
+                              dtype=np.int64)
+
+    def day_of(value) -> int:
+        return (timeseries.as_date(value) - first_day).days
+
+    hours_matrix = np.full((len(machines), day_count), np.nan)
+    for equipment_id, log_date, running_hours in hours:
+        row, day = machine_index.get(equipment_id), day_of(log_date)
+        if row is not None and 0 <= day < day_count:
+            hours_matrix[row, day] = float(running_hours or 0.0)
+    equipment_usage = np.zeros((len(machines), day_count))
+    actual = np.zeros((len(pairs), day_count))
+    for site_id, fuel_type_id, equipment_id, usage_date, quantity in usage:
+        pair, day = pair_index.get((site_id, fuel_type_id)), day_of(usage_date)
+        if pair is None or not 0 <= day < day_count:
+            continue
+        actual[pair, day] += float(quantity or 0.0)
+        if equipment_id in machine_index:
+            equipment_usage[machine_index[equipment_id], day] += float(quantity or 0.0)
+    refill_matrix = np.zeros((len(pairs), day_count))
+    for site_id, fuel_type_id, delivered, quantity in refills:
+        pair, day = pair_index.get((site_id, fuel_type_id)), day_of(delivered)
+        if pair is not None and 0 <= day < day_count:
+            refill_matrix[pair, day] += float(quantity or 0.0)
+    balance = np.zeros(len(pairs))
+    for row in stocks:
+        balance[pair_index[(row['site_id'], row['fuel_type_id'])]] += float(row.get('current_quantity') or 0.0)
+    rates = np.array([float(item.get('consumption_rate') or 0.0) for item in machines])
+    evaluate = np.arange(day_of(start), day_of(end) + 1)
+
+    # Consecutive pairs per chunk; equipment is sorted by pair, so each chunk's equipment is one slice
+    chunk_count = max(1, min(len(pairs), (workers or os.cpu_count() or 1) * CHUNKS_PER_WORKER))
+    bounds = np.linspace(0, len(pairs), chunk_count + 1).astype(int)
+    machine_bounds = np.searchsorted(equipment_pair, bounds)
+    chunks = []
+    for lo, hi, machine_lo, machine_hi in zip(bounds[:-1], bounds[1:], machine_bounds[:-1], machine_bounds[1:]):
+        if hi <= lo:
+            continue
+        chunks.append({
+            'pairs': np.arange(lo, hi), 'methods': tuple(methods),
+            'hours': hours_matrix[machine_lo:machine_hi], 'equipment_usage': equipment_usage[machine_lo:machine_hi],
+            'rate': rates[machine_lo:machine_hi], 'equipment_pair': equipment_pair[machine_lo:machine_hi] - lo,
+            'actual': actual[lo:hi], 'refills': refill_matrix[lo:hi], 'balance': balance[lo:hi],
+            'evaluate': evaluate, 'first_weekday': first_day.weekday(), 'horizon': horizon,
+            'model_horizon': model_horizon, 'history_days': history_days, 'safety_factor': safety_factor,
+        })
+
+    if workers == 1 or len(chunks) <= 1:
+        scored = [backtest_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            scored = list(pool.map(backtest_chunk, chunks))
+    rows = [row for chunk_rows in scored for row in chunk_rows]
+
+    names = {(row['site_id'], row['fuel_type_id']): (row.get('site_name'), row.get('fuel_name')) for row in stocks}
+    by_pair = []
+    for row in rows:
+        site_id, fuel_type_id = pairs[row['pair']]
+        site_name, fuel_name = names.get((site_id, fuel_type_id), (None, None))
+        by_pair.append({'site_id': site_id, 'site_name': site_name, 'fuel_type_id': fuel_type_id,
+                        'fuel_name': fuel_name, 'method': row['method'], **summarize([row])})
+    by_method = [{'method': method, **summarize(row for row in rows if row['method'] == method)}
+                 for method in methods]
+    fuels = sorted({(pairs[row['pair']][1], names.get(pairs[row['pair']], (None, None))[1]) for row in rows},
+                   key=lambda fuel: fuel[0])
+    by_fuel = [{'fuel_type_id': fuel_type_id, 'fuel_name': fuel_name, 'method': method,
+                **summarize(row for row in rows
+                            if row['method'] == method and pairs[row['pair']][1] == fuel_type_id)}
+               for fuel_type_id, fuel_name in fuels for method in methods]
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'forecast_dates': len(evaluate),
+        'pairs': len(pairs),
+        'equipment': len(machines),
+        'horizon': horizon,
+        'safety_factor': safety_factor,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'by_method': by_method,
+        'by_fuel': by_fuel,
+        'by_pair': by_pair,
+    }
@@ -0,0 +1,162 @@
+"""
+Production workload capture for Advanced Fuel Consumption Forecasting System
+Records sanitized request logs (route, filters, body shape, timing) for benchmarks/replay.py
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REDACTED_RE = re.compile(r'^<str:(\d+)>$')
+
+# Values kept verbatim: ids, numbers and ISO dates/datetimes; everything else becomes <str:N>
+_KEEP_RE = re.compile(r'^(-?\d+(\.\d+)?|\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?)$')
+_SKIPPED_ARGS = ('__profile', '__memory')
+
+
+def sanitize(value: Any) -> Any:
+    """Keep the shape of a JSON value but drop free text (names, notes, emails)"""
+    if isinstance(value, dict):
+        return {key: sanitize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    if isinstance(value, str) and not _KEEP_RE.match(value):
+        return f"<str:{len(value)}>"
+    return value
+
+
+def restore(value: Any) -> Any:
+    """Turn a sanitized value back into something sendable (redacted text becomes filler)"""
+    if isinstance(value, dict):
+        return {key: restore(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [restore(item) for item in value]
+    if isinstance(value, str):
+        match = REDACTED_RE.match(value)
+        if match:
+            return 'x' * int(match.group(1))
+    return value
+
+
+class CaptureWriter:
+    """Append capture records to a JSON-lines file from a background thread"""
+
+    def __init__(self, path: str, max_queue: int = 10000):
+        self.path = path
+        self.dropped = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='capture-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            lines = [json.dumps(record, default=str)]
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._queue.put(None)
+                    break
+                lines.append(json.dumps(record, default=str))
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._file.close()
+
+
+class WorkloadCapture:
+    """Decide which requests get captured and build their sanitized records"""
+
+    def __init__(self, writer: CaptureWriter, sample_rate: float = 1.0):
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self) -> Optional[Tuple[float, float, int]]:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        with self._lock:
+            self.in_flight += 1
+            concurrent = self.in_flight
+        return time.time(), time.perf_counter(), concurrent
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, started, method: str, route: str, path: str, args: Dict[str, str],
+               body: Any, status: int, response_bytes: Optional[int]):
+        wall_started, perf_started, concurrent = started
+        self.writer.write({
+            'ts': round(wall_started, 6),
+            'method': method,
+            'route': route,
+            'path': path,
+            'args': {key: sanitize(value) for key, value in args.items() if key not in _SKIPPED_ARGS},
+            'body': sanitize(body) if body is not None else None,
+            'status': status,
+            'duration_ms': round((time.perf_counter() - perf_started) * 1000.0, 3),
+            'response_bytes': response_bytes,
+            'in_flight': concurrent
+        })
+
+
+def init_capture(app, config) -> Optional[WorkloadCapture]:
+    """Capture sanitized API requests to CAPTURE_FILE for later replay"""
+    from flask import g, request
+
+    if not config.CAPTURE_ENABLED:
+        return None
+
+    capture = WorkloadCapture(CaptureWriter(config.CAPTURE_FILE), config.CAPTURE_SAMPLE_RATE)
+
+    @app.before_request
+    def _begin_capture():
+        if request.method == 'OPTIONS' or request.path.startswith('/api/admin'):
+            return
+        g.capture_started = capture.begin()
+
+    @app.after_request
+    def _record_capture(response):
+        started = g.pop('capture_started', None)
+        if started is not None:
+            capture.end()
+            route = request.url_rule.rule if request.url_rule else request.path
+            body = request.get_json(silent=True) if request.is_json else None
+            capture.record(started, request.method, route, request.path, request.args.to_dict(),
+                           body, response.status_code, response.calculate_content_length())
+        return response
+
+    @app.teardown_request
+    def _abandon_capture(error=None):
+        if g.pop('capture_started', None) is not None:
+            capture.end()
+
+    app.extensions['workload_capture'] = capture
+    logger.info(f"Workload capture enabled ({config.CAPTURE_FILE}, sample rate {config.CAPTURE_SAMPLE_RATE})")
+    return capture
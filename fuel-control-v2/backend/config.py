@@ -16,6 +16,12 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'FuelControlV2')
     DB_DRIVER = os.getenv('DB_DRIVER', '{ODBC Driver 17 for SQL Server}')
     DB_TRUSTED_CONNECTION = os.getenv('DB_TRUSTED_CONNECTION', 'yes')
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mssql')  # 'mssql' (SQL Server via pyodbc) or 'sqlite' (embedded)
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/fuel_control.db')
+    SQLITE_CACHE_MB = int(os.getenv('SQLITE_CACHE_MB', '64'))  # Page cache per connection
+    SQLITE_MMAP_MB = int(os.getenv('SQLITE_MMAP_MB', '256'))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', '8'))  # Idle connections kept open
     
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'fuel-control-v2-secret-key')
@@ -27,6 +33,49 @@ class Config:
     DEFAULT_SAFETY_FACTOR = float(os.getenv('DEFAULT_SAFETY_FACTOR', '1.2'))
     FORECAST_CALCULATION_FREQUENCY = int(os.getenv('FORECAST_CALCULATION_FREQUENCY', '24'))  # hours
     LOW_STOCK_THRESHOLD = float(os.getenv('LOW_STOCK_THRESHOLD', '0.2'))  # 20% of capacity
+    SCENARIO_MAX_CELLS = int(os.getenv('SCENARIO_MAX_CELLS', '200000'))  # forecasts x grid values per scenario grid
+    SIMULATION_PATHS = int(os.getenv('SIMULATION_PATHS', '2000'))  # Monte Carlo paths per stockout-risk request
+    SIMULATION_MAX_PATHS = int(os.getenv('SIMULATION_MAX_PATHS', '20000'))
+    SIMULATION_MAX_DAYS = int(os.getenv('SIMULATION_MAX_DAYS', '180'))
+    SIMULATION_HISTORY_DAYS = int(os.getenv('SIMULATION_HISTORY_DAYS', '60'))  # Days of hours logs sampled from
+    FORECAST_METHOD = os.getenv('FORECAST_METHOD', 'average')  # 'average' (sp_CalculateSiteForecast) or 'holt-winters'
+    FORECAST_MODEL_HISTORY_DAYS = int(os.getenv('FORECAST_MODEL_HISTORY_DAYS', '182'))  # Days of hours logs per model
+    FORECAST_MODEL_HORIZON_DAYS = int(os.getenv('FORECAST_MODEL_HORIZON_DAYS', '28'))
+    FORECAST_MODEL_WORKERS = int(os.getenv('FORECAST_MODEL_WORKERS', '0'))  # Fitting processes; 0 = one per CPU
+    TRAJECTORY_DAYS = int(os.getenv('TRAJECTORY_DAYS', '30'))  # Default projection horizon of stock trajectories
+    TRAJECTORY_MAX_DAYS = int(os.getenv('TRAJECTORY_MAX_DAYS', '365'))
+    TRAJECTORY_MAX_HISTORY_DAYS = int(os.getenv('TRAJECTORY_MAX_HISTORY_DAYS', '365'))
+    TRAJECTORY_MAX_POINTS = int(os.getenv('TRAJECTORY_MAX_POINTS', '1000'))  # Largest downsampled curve
+    
+    # Reorder Optimization Configuration
+    REORDER_ORDER_COST = float(os.getenv('REORDER_ORDER_COST', '150000'))  # Per delivery when refills record no costs
+    REORDER_HOLDING_RATE = float(os.getenv('REORDER_HOLDING_RATE', '0.2'))  # Yearly holding cost, share of fuel value
+    REORDER_SERVICE_LEVEL = float(os.getenv('REORDER_SERVICE_LEVEL', '0.95'))  # Chance lead-time demand is covered
+    REORDER_HISTORY_DAYS = int(os.getenv('REORDER_HISTORY_DAYS', '90'))  # Days of usage for demand spread and costs
+    REORDER_MIN_SUPPLIER_RATING = float(os.getenv('REORDER_MIN_SUPPLIER_RATING', '0'))
+    REORDER_ON_FORECAST = os.getenv('REORDER_ON_FORECAST', 'false').lower() == 'true'  # Re-optimize after forecasts
+    
+    # Transfer Planning Configuration
+    TRANSFER_HORIZON_DAYS = int(os.getenv('TRANSFER_HORIZON_DAYS', '14'))  # Days of forecast demand a plan covers
+    TRANSFER_MAX_HORIZON_DAYS = int(os.getenv('TRANSFER_MAX_HORIZON_DAYS', '90'))
+    TRANSFER_COST_PER_LITRE_KM = float(os.getenv('TRANSFER_COST_PER_LITRE_KM', '0.1'))  # Tanker cost per litre and road km
+    TRANSFER_HANDLING_COST = float(os.getenv('TRANSFER_HANDLING_COST', '2'))  # Loading and unloading, per litre
+    TRANSFER_SHORTAGE_COST = float(os.getenv('TRANSFER_SHORTAGE_COST', '200'))  # Per litre short before a delivery lands
+    TRANSFER_ROAD_FACTOR = float(os.getenv('TRANSFER_ROAD_FACTOR', '1.3'))  # Road km per great-circle km
+    TRANSFER_MAX_KM = float(os.getenv('TRANSFER_MAX_KM', '300'))
+    TRANSFER_MIN_LITRES = float(os.getenv('TRANSFER_MIN_LITRES', '500'))  # Smaller moves are left to suppliers
+    TRANSFER_TIME_BUDGET_MS = int(os.getenv('TRANSFER_TIME_BUDGET_MS', '2000'))  # Solver time per plan
+    
+    # Delivery Scheduling Configuration
+    DELIVERY_HORIZON_DAYS = int(os.getenv('DELIVERY_HORIZON_DAYS', '28'))  # Days the delivery calendar covers
+    DELIVERY_MAX_HORIZON_DAYS = int(os.getenv('DELIVERY_MAX_HORIZON_DAYS', '90'))
+    DELIVERY_TRUCK_LITRES = float(os.getenv('DELIVERY_TRUCK_LITRES', '20000'))  # One truckload
+    DELIVERY_SUPPLIER_DAILY_TRUCKS = int(os.getenv('DELIVERY_SUPPLIER_DAILY_TRUCKS', '0'))  # Per supplier; 0 = no limit
+    DELIVERY_REPLAN_ON_WRITE = os.getenv('DELIVERY_REPLAN_ON_WRITE', 'true').lower() == 'true'  # After refills and usage
+    
+    # Cost Reporting Configuration
+    COST_REPORT_PRICE_TYPE = os.getenv('COST_REPORT_PRICE_TYPE', 'Purchase')  # Purchase, Market or Contract
+    COST_REPORT_DEFAULT_DAYS = int(os.getenv('COST_REPORT_DEFAULT_DAYS', '30'))  # Before end_date when no start_date
     
     # Alert Configuration
     EMAIL_NOTIFICATIONS_ENABLED = os.getenv('EMAIL_NOTIFICATIONS_ENABLED', 'false').lower() == 'true'
@@ -35,6 +84,45 @@ class Config:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
     
+    # Tracing Configuration
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'jsonl')  # 'jsonl' or 'otlp'
+    TRACE_FILE = os.getenv('TRACE_FILE', 'logs/traces.jsonl')
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'fuel-control-api')
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))  # requests without X-Request-ID
+    
+    # Diagnostics Configuration
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')  # Required in X-Admin-Token for admin/diagnostic features
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')
+    PROFILE_MODE = os.getenv('PROFILE_MODE', 'cprofile')  # 'cprofile' (pstats) or 'sample' (collapsed stacks)
+    PROFILE_EVERY_N = int(os.getenv('PROFILE_EVERY_N', '0'))  # 0 disables rolling profiling
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+    PROFILE_MAX_ARTIFACTS = int(os.getenv('PROFILE_MAX_ARTIFACTS', '200'))
+    
+    # Memory Accounting Configuration
+    MEMORY_SAMPLE_RATE = float(os.getenv('MEMORY_SAMPLE_RATE', '0'))  # Share of requests traced with tracemalloc
+    MEMORY_BUDGET_MB = float(os.getenv('MEMORY_BUDGET_MB', '0'))  # 0 disables the per-request budget
+    MEMORY_BUDGET_ACTION = os.getenv('MEMORY_BUDGET_ACTION', 'stream')  # 'stream' or 'fail'
+    MEMORY_FETCH_BATCH = int(os.getenv('MEMORY_FETCH_BATCH', '5000'))  # Rows per fetchmany() under a budget
+    MEMORY_HISTORY = int(os.getenv('MEMORY_HISTORY', '200'))
+    MEMORY_TOP_SITES = int(os.getenv('MEMORY_TOP_SITES', '25'))
+    
+    # Workload Capture Configuration
+    CAPTURE_ENABLED = os.getenv('CAPTURE_ENABLED', 'false').lower() == 'true'
+    CAPTURE_FILE = os.getenv('CAPTURE_FILE', 'logs/capture.jsonl')
+    CAPTURE_SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', '1.0'))
+    
+    # Offline Sync Configuration
+    SYNC_MAX_BATCH = int(os.getenv('SYNC_MAX_BATCH', '200'))  # Operations accepted per /api/sync/batch call
+    
+    # Demo Server Configuration (demo_app.py)
+    DEMO_SNAPSHOT = os.getenv('DEMO_SNAPSHOT', '')  # Loaded at start when present, written on exit
+    DEMO_DATASET_SITES = int(os.getenv('DEMO_DATASET_SITES', '0'))  # 0 serves the built-in sample data
+    DEMO_DATASET_EQUIPMENT_PER_SITE = int(os.getenv('DEMO_DATASET_EQUIPMENT_PER_SITE', '12'))
+    DEMO_DATASET_YEARS = float(os.getenv('DEMO_DATASET_YEARS', '1'))
+    DEMO_DATASET_SEED = int(os.getenv('DEMO_DATASET_SEED', '42'))
+    
     @classmethod
     def get_db_connection_string(cls):
         """Generate database connection string"""
@@ -0,0 +1,206 @@
+"""
+Delivery scheduling for Advanced Fuel Consumption Forecasting System
+Builds a multi-week delivery calendar for every site/fuel pair at once: each delivery arrives on
+the last day the forecast allows and fills the tank, split into truckloads, and a supplier's daily
+truck limit pulls deliveries forward only as far as needed
+"""
+
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trajectories import DEFAULT_LEAD_TIME_DAYS
+
+EPSILON = 1e-6  # Litres below this count as zero
+
+
+def delivery_horizon(options, default_days: int, max_days: int) -> int:
+    """horizon_days from request args or a JSON body"""
+    try:
+        days = int(options.get('horizon_days', default_days))
+    except (TypeError, ValueError):
+        raise ValueError('horizon_days must be an integer')
+    if not 1 <= days <= max_days:
+        raise ValueError(f'horizon_days must be between 1 and {max_days}')
+    return days
+
+
+def assign_suppliers(pairs: List[Dict[str, Any]], offers: Iterable[Dict[str, Any]],
+                     recommended: Dict[Tuple[int, int], int]):
+    """
+    Set supplier_id, lead_time_days and minimum_order_quantity on every pair from the suppliers
+    pricing its fuel (fuel_type_id, supplier_id, lead_time_days, minimum_order_quantity,
+    is_preferred): the `recommended` supplier of its reorder recommendation when it still prices
+    the fuel, else the preferred, then quickest supplier whose minimum order fits the tank
+    """
+    by_fuel: Dict[int, List[Dict[str, Any]]] = {}
+    for offer in offers:
+        by_fuel.setdefault(offer['fuel_type_id'], []).append(offer)
+    for pair in pairs:
+        candidates = by_fuel.get(pair['fuel_type_id'], [])
+        wanted = recommended.get((pair['site_id'], pair['fuel_type_id']))
+        chosen = next((offer for offer in candidates if offer['supplier_id'] == wanted), None)
+        if chosen is None and candidates:
+            room = float(pair.get('maximum_capacity') or 0.0) - float(pair.get('minimum_threshold') or 0.0)
+            chosen = min(candidates, key=lambda offer: (
+                float(offer.get('minimum_order_quantity') or 0.0) > room, not offer.get('is_preferred'),
+                DEFAULT_LEAD_TIME_DAYS if offer.get('lead_time_days') is None else offer['lead_time_days'],
+                offer['supplier_id']))
+        pair['supplier_id'] = chosen['supplier_id'] if chosen else None
+        pair['lead_time_days'] = (DEFAULT_LEAD_TIME_DAYS if not chosen or chosen.get('lead_time_days') is None
+                                  else int(chosen['lead_time_days']))
+        pair['minimum_order_quantity'] = float(chosen.get('minimum_order_quantity') or 0.0) if chosen else 0.0
+
+
+def _column(pairs: Sequence[Dict[str, Any]], name: str, default: float = 0.0) -> np.ndarray:
+    return np.array([default if pair.get(name) is None else float(pair[name]) for pair in pairs], dtype=float)
+
+
+def schedule_deliveries(pairs: List[Dict[str, Any]], horizon_days: int, truck_litres: float, daily_trucks: int = 0,
+                        reserved: Optional[Dict[Tuple[int, str], int]] = None,
+                        today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Delivery calendar over `horizon_days` for pairs (site_id, fuel_type_id, current_quantity,
+    minimum_threshold, maximum_capacity, daily_demand, supplier_id, lead_time_days,
+    minimum_order_quantity; see assign_suppliers).
+
+    Days are simulated for all pairs at once. A pair is due on the day its forecast stock would
+    end below minimum_threshold; a delivery arriving that morning fills the tank, in
+    `truck_litres` loads, so every delivery is as late and as large as the tank allows and the
+    count stays minimal. Orders cannot arrive before today plus the supplier lead time.
+    With `daily_trucks`, each supplier sends at most that many trucks a day (less the trucks
+    `reserved` per (supplier_id, ISO date) by pairs not being planned); deliveries are then
+    brought forward earliest-deadline-first, only when a later day could not carry its due loads.
+    Deliveries below the supplier's minimum order are made only when due, and flagged.
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    count = len(pairs)
+    level = _column(pairs, 'current_quantity')
+    rate = np.maximum(_column(pairs, 'daily_demand'), 0.0)
+    minimum = _column(pairs, 'minimum_threshold')
+    capacity = _column(pairs, 'maximum_capacity', np.inf)
+    capacity = np.where(capacity > 0, capacity, np.inf)
+    lead = _column(pairs, 'lead_time_days', DEFAULT_LEAD_TIME_DAYS).astype(int)
+    moq = _column(pairs, 'minimum_order_quantity')
+    supplier_ids = sorted({pair['supplier_id'] for pair in pairs if pair.get('supplier_id') is not None})
+    group_of = {supplier_id: group for group, supplier_id in enumerate(supplier_ids)}
+    group = np.array([group_of.get(pair.get('supplier_id'), -1) for pair in pairs], dtype=np.int64)
+    supplied = group >= 0
+    limited = daily_trucks > 0
+
+    # Trucks each supplier still has per day
+    trucks_left = np.full((len(supplier_ids), horizon_days), float(daily_trucks) if limited else np.inf)
+    for (supplier_id, day), trucks in (reserved or {}).items():
+        offset = (date.fromisoformat(str(day)[:10]) - today).days
+        if supplier_id in group_of and 0 <= offset < horizon_days:
+            trucks_left[group_of[supplier_id], offset] = max(trucks_left[group_of[supplier_id], offset] - trucks, 0)
+
+    def due_day(levels: np.ndarray, rates: np.ndarray, mins: np.ndarray, day: int) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(rates > 0, day + np.floor((levels - mins) / rates), np.inf)
+
+    due = due_day(level, rate, minimum, 0)
+    short = np.zeros(count, dtype=bool)       # Below minimum since the last delivery
+    first_short = np.full(count, -1)
+    unmet = np.zeros(count)                   # Forecast demand the empty tank could not serve since the last delivery
+    lowest = level.copy()                     # Stock less unmet demand: negative is the shortfall depth
+    deliveries = []
+    for day in range(horizon_days):
+        room = capacity - level
+        ready = supplied & (day >= lead) & (room > EPSILON)
+        eligible = ready & ((room >= moq) | (due <= day))
+
+        if not limited:
+            chosen = np.flatnonzero(eligible & (due <= day))
+            trucks = np.ceil(room[chosen] / truck_litres)
+        else:
+            # Loads due on each coming day, per supplier; today carries whatever the later days cannot
+            candidates = np.flatnonzero(eligible & (due < horizon_days))
+            offset = np.clip(due[candidates] - day, 0, horizon_days - day - 1).astype(np.int64)
+            room_due = capacity[candidates] - np.maximum(level[candidates] - rate[candidates] * offset, 0.0)
+            loads = np.ceil(room_due / truck_litres)
+            due_loads = np.zeros((len(supplier_ids), horizon_days - day))
+            np.add.at(due_loads, (group[candidates], offset), loads)
+            later = np.concatenate([np.zeros((len(supplier_ids), 1)),
+                                    np.cumsum(trucks_left[:, day + 1:], axis=1)], axis=1)
+            needed = np.clip((np.cumsum(due_loads, axis=1) - later).max(axis=1, initial=0.0), 0.0, trucks_left[:, day])
+            # Earliest deadlines first within each supplier, while today's trucks last
+            order = np.lexsort((due[candidates], group[candidates]))
+            candidates, loads = candidates[order], loads[order]
+            groups = group[candidates]
+            before = np.cumsum(loads) - loads
+            before -= before[np.searchsorted(groups, groups)] if len(groups) else 0
+            allotted = np.minimum(loads, needed[groups] - before)
+            keep = allotted > 0
+            chosen, trucks = candidates[keep], allotted[keep]
+            trucks = np.minimum(trucks, np.ceil(room[chosen] / truck_litres))
+            np.subtract.at(trucks_left[:, day], group[chosen], trucks)
+
+        if len(chosen):
+            quantity = np.minimum(room[chosen], trucks * truck_litres)
+            arrival = today + timedelta(days=day)
+            for row, litres, loads_used in zip(chosen.tolist(), quantity.tolist(), trucks.tolist()):
+                pair = pairs[row]
+                deliveries.append({
+                    'site_id': pair['site_id'], 'site_name': pair.get('site_name'),
+                    'fuel_type_id': pair['fuel_type_id'], 'fuel_name': pair.get('fuel_name'),
+                    'supplier_id': pair['supplier_id'],
+                    'order_date': (arrival - timedelta(days=int(lead[row]))).isoformat(),
+                    'delivery_date': arrival.isoformat(),
+                    'quantity': round(litres), 'trucks': int(loads_used),
+                    'stock_before': round(float(level[row])),
+                    'at_risk': bool(short[row]),
+                    'below_minimum_order': bool(litres < moq[row] - EPSILON),
+                })
+            level[chosen] += quantity
+            short[chosen] = False
+            unmet[chosen] = 0.0
+            due[chosen] = due_day(level[chosen], rate[chosen], minimum[chosen], day)
+
+        # The day's forecast usage; the tank never holds less than nothing
+        unmet += np.maximum(rate - level, 0.0)
+        level = np.maximum(level - rate, 0.0)
+        below = (level < minimum - EPSILON) | (unmet > EPSILON)
+        first_short[below & (first_short < 0)] = day
+        short |= below
+        lowest = np.minimum(lowest, level - unmet)
+
+    risks = []
+    for row in np.flatnonzero(first_short >= 0).tolist():
+        pair = pairs[row]
+        if not supplied[row]:
+            reason = 'No active supplier prices this fuel'
+        elif first_short[row] < lead[row]:
+            reason = 'Runs short before an order placed today can arrive'
+        else:
+            reason = 'Deliveries cannot keep up with the forecast'
+        risks.append({'site_id': pair['site_id'], 'site_name': pair.get('site_name'),
+                      'fuel_type_id': pair['fuel_type_id'], 'fuel_name': pair.get('fuel_name'),
+                      'first_short_date': (today + timedelta(days=int(first_short[row]))).isoformat(),
+                      'lowest_stock': round(float(lowest[row])), 'reason': reason})
+
+    calendar: Dict[str, List[float]] = {}
+    for delivery in deliveries:
+        entry = calendar.setdefault(delivery['delivery_date'], [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += delivery['trucks']
+        entry[2] += delivery['quantity']
+    deliveries.sort(key=lambda delivery: (delivery['delivery_date'], delivery.get('site_name') or '',
+                                          delivery.get('fuel_name') or ''))
+    return {
+        'start': today.isoformat(),
+        'horizon_days': horizon_days,
+        'pairs': count,
+        'deliveries': len(deliveries),
+        'trucks': int(sum(delivery['trucks'] for delivery in deliveries)),
+        'litres': round(sum(delivery['quantity'] for delivery in deliveries)),
+        'at_risk': len(risks),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'calendar': [{'date': day, 'deliveries': entry[0], 'trucks': entry[1], 'litres': round(entry[2])}
+                     for day, entry in sorted(calendar.items())],
+        'schedule': deliveries,
+        'risks': risks,
+    }
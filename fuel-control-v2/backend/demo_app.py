@@ -2,13 +2,30 @@
 """
 Demo version of Fuel Control System Backend
 Works without database for immediate demonstration
+Data lives in an indexed in-memory store (demo_store.py); set DEMO_DATASET_SITES for a generated fleet
 """
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, date, timedelta
+import atexit
 import json
+import logging
+import os
+import uuid
 from decimal import Decimal
+from config import Config
+from deliveries import delivery_horizon
+import prices
+from demo_store import DemoStore
+from scenarios import ScenarioGridError, evaluate_grid, grid_cells, parse_grid
+from simulation import simulate_stockouts, simulation_options
+from trajectories import history_curves, parse_scheduled, project_trajectories, supplier_lead_times, trajectory_options
+from transfers import plan_transfers, transfer_options
+import timeseries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:8080', 'http://127.0.0.1:8080', 'http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:5501', 'http://127.0.0.1:5501'])
@@ -23,12 +40,16 @@ class DecimalEncoder(json.JSONEncoder):
 
 app.json_encoder = DecimalEncoder
 
-# Demo data
+# Demo data (rows of the database tables; joined names and stock status are derived by the store)
 demo_sites = [
-    {"site_id": 1, "site_name": "Main Warehouse", "site_code": "WH001", "site_type": "Warehouse", "is_active": True},
-    {"site_id": 2, "site_name": "Construction Site Alpha", "site_code": "CS001", "site_type": "Site", "is_active": True},
-    {"site_id": 3, "site_name": "Mining Operation Gamma", "site_code": "MO001", "site_type": "Site", "is_active": True},
-    {"site_id": 4, "site_name": "Power Plant Delta", "site_code": "PP001", "site_type": "Site", "is_active": True}
+    {"site_id": 1, "site_name": "Main Warehouse", "site_code": "WH001", "site_type": "Warehouse",
+     "latitude": 16.8409, "longitude": 96.1735, "is_active": True},
+    {"site_id": 2, "site_name": "Construction Site Alpha", "site_code": "CS001", "site_type": "Site",
+     "latitude": 17.3352, "longitude": 96.4814, "is_active": True},
+    {"site_id": 3, "site_name": "Mining Operation Gamma", "site_code": "MO001", "site_type": "Site",
+     "latitude": 17.0912, "longitude": 96.2305, "is_active": True},
+    {"site_id": 4, "site_name": "Power Plant Delta", "site_code": "PP001", "site_type": "Site",
+     "latitude": 16.6633, "longitude": 96.2810, "is_active": True}
 ]
 
 demo_fuel_types = [
@@ -37,48 +58,110 @@ demo_fuel_types = [
     {"fuel_type_id": 3, "fuel_name": "Heavy Fuel Oil", "fuel_code": "HFO", "density": 0.960, "is_active": True}
 ]
 
+demo_suppliers = [
+    {"supplier_id": 1, "supplier_name": "Myanmar Petroleum Corporation", "supplier_code": "MPC001", "lead_time_days": 3, "minimum_order_quantity": 10000, "is_preferred": True, "rating": 4.5},
+    {"supplier_id": 2, "supplier_name": "Asia Fuel Trading", "supplier_code": "AFT001", "lead_time_days": 5, "minimum_order_quantity": 5000, "is_preferred": False, "rating": 4.2}
+]
+
+demo_fuel_prices = [
+    {"price_id": 1, "fuel_type_id": 1, "supplier_id": 1, "price_per_liter": 1850.00, "effective_date": (date.today() - timedelta(days=30)).isoformat(), "price_type": "Purchase", "volume_discount_threshold": 50000, "volume_discount_rate": 0.03},
+    {"price_id": 2, "fuel_type_id": 1, "supplier_id": 2, "price_per_liter": 1820.00, "effective_date": (date.today() - timedelta(days=30)).isoformat(), "price_type": "Purchase", "volume_discount_threshold": 30000, "volume_discount_rate": 0.02},
+    {"price_id": 3, "fuel_type_id": 3, "supplier_id": 1, "price_per_liter": 1450.00, "effective_date": (date.today() - timedelta(days=30)).isoformat(), "price_type": "Purchase", "volume_discount_threshold": 100000, "volume_discount_rate": 0.05}
+]
+
 demo_equipment = [
-    {"equipment_id": 1, "site_id": 1, "equipment_name": "Forklift Unit 1", "equipment_code": "FL001", "fuel_type_id": 1, "consumption_rate": 3.5, "equipment_type": "Forklift", "manufacturer": "Toyota", "model": "FD25", "is_active": True, "site_name": "Main Warehouse", "fuel_name": "Diesel"},
-    {"equipment_id": 2, "site_id": 2, "equipment_name": "Excavator Alpha 1", "equipment_code": "EX001", "fuel_type_id": 1, "consumption_rate": 18.5, "equipment_type": "Excavator", "manufacturer": "Komatsu", "model": "PC200", "is_active": True, "site_name": "Construction Site Alpha", "fuel_name": "Diesel"},
-    {"equipment_id": 3, "site_id": 3, "equipment_name": "Mining Truck 1", "equipment_code": "MT001", "fuel_type_id": 1, "consumption_rate": 45.0, "equipment_type": "Mining Truck", "manufacturer": "Caterpillar", "model": "777D", "is_active": True, "site_name": "Mining Operation Gamma", "fuel_name": "Diesel"},
-    {"equipment_id": 4, "site_id": 4, "equipment_name": "Main Generator 1", "equipment_code": "PG001", "fuel_type_id": 3, "consumption_rate": 180.0, "equipment_type": "Power Generator", "manufacturer": "GE", "model": "LM6000", "is_active": True, "site_name": "Power Plant Delta", "fuel_name": "Heavy Fuel Oil"}
+    {"equipment_id": 1, "site_id": 1, "equipment_name": "Forklift Unit 1", "equipment_code": "FL001", "fuel_type_id": 1, "consumption_rate": 3.5, "equipment_type": "Forklift", "manufacturer": "Toyota", "model": "FD25", "is_active": True},
+    {"equipment_id": 2, "site_id": 2, "equipment_name": "Excavator Alpha 1", "equipment_code": "EX001", "fuel_type_id": 1, "consumption_rate": 18.5, "equipment_type": "Excavator", "manufacturer": "Komatsu", "model": "PC200", "is_active": True},
+    {"equipment_id": 3, "site_id": 3, "equipment_name": "Mining Truck 1", "equipment_code": "MT001", "fuel_type_id": 1, "consumption_rate": 45.0, "equipment_type": "Mining Truck", "manufacturer": "Caterpillar", "model": "777D", "is_active": True},
+    {"equipment_id": 4, "site_id": 4, "equipment_name": "Main Generator 1", "equipment_code": "PG001", "fuel_type_id": 3, "consumption_rate": 180.0, "equipment_type": "Power Generator", "manufacturer": "GE", "model": "LM6000", "is_active": True}
 ]
 
 demo_stock = [
-    {"site_name": "Main Warehouse", "fuel_name": "Diesel", "current_quantity": 350000, "available_quantity": 340000, "minimum_threshold": 50000, "maximum_capacity": 500000, "fill_percentage": 70.0, "stock_status": "Normal", "last_updated": datetime.now().isoformat()},
-    {"site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_quantity": 8000, "available_quantity": 7500, "minimum_threshold": 5000, "maximum_capacity": 50000, "fill_percentage": 16.0, "stock_status": "Critical", "last_updated": datetime.now().isoformat()},
-    {"site_name": "Mining Operation Gamma", "fuel_name": "Diesel", "current_quantity": 65000, "available_quantity": 60000, "minimum_threshold": 15000, "maximum_capacity": 100000, "fill_percentage": 65.0, "stock_status": "Normal", "last_updated": datetime.now().isoformat()},
-    {"site_name": "Power Plant Delta", "fuel_name": "Heavy Fuel Oil", "current_quantity": 45000, "available_quantity": 40000, "minimum_threshold": 25000, "maximum_capacity": 200000, "fill_percentage": 22.5, "stock_status": "Low", "last_updated": datetime.now().isoformat()}
+    {"stock_id": 1, "site_id": 1, "fuel_type_id": 1, "current_quantity": 350000, "reserved_quantity": 10000, "minimum_threshold": 50000, "maximum_capacity": 500000, "reorder_point": 100000, "optimal_order_quantity": 150000, "last_updated": datetime.now().isoformat()},
+    {"stock_id": 2, "site_id": 2, "fuel_type_id": 1, "current_quantity": 8000, "reserved_quantity": 500, "minimum_threshold": 8000, "maximum_capacity": 50000, "reorder_point": 15000, "optimal_order_quantity": 30000, "last_updated": datetime.now().isoformat()},
+    {"stock_id": 3, "site_id": 3, "fuel_type_id": 1, "current_quantity": 65000, "reserved_quantity": 5000, "minimum_threshold": 15000, "maximum_capacity": 100000, "reorder_point": 30000, "optimal_order_quantity": 50000, "last_updated": datetime.now().isoformat()},
+    {"stock_id": 4, "site_id": 4, "fuel_type_id": 3, "current_quantity": 45000, "reserved_quantity": 5000, "minimum_threshold": 25000, "maximum_capacity": 200000, "reorder_point": 60000, "optimal_order_quantity": 120000, "last_updated": datetime.now().isoformat()}
 ]
 
 demo_forecasts = [
-    {"forecast_id": 1, "site_id": 1, "fuel_type_id": 1, "site_name": "Main Warehouse", "fuel_name": "Diesel", "current_balance": 350000, "daily_consumption_rate": 2500, "forecast_days_remaining": 140, "next_refill_date_estimate": (date.today() + timedelta(days=120)).isoformat(), "confidence_level": 85},
-    {"forecast_id": 2, "site_id": 2, "fuel_type_id": 1, "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_balance": 8000, "daily_consumption_rate": 1200, "forecast_days_remaining": 6, "next_refill_date_estimate": (date.today() + timedelta(days=5)).isoformat(), "confidence_level": 92},
-    {"forecast_id": 3, "site_id": 3, "fuel_type_id": 1, "site_name": "Mining Operation Gamma", "fuel_name": "Diesel", "current_balance": 65000, "daily_consumption_rate": 3500, "forecast_days_remaining": 18, "next_refill_date_estimate": (date.today() + timedelta(days=15)).isoformat(), "confidence_level": 88},
-    {"forecast_id": 4, "site_id": 4, "fuel_type_id": 3, "site_name": "Power Plant Delta", "fuel_name": "Heavy Fuel Oil", "current_balance": 45000, "daily_consumption_rate": 4320, "forecast_days_remaining": 10, "next_refill_date_estimate": (date.today() + timedelta(days=8)).isoformat(), "confidence_level": 90}
+    {"forecast_id": 1, "site_id": 1, "fuel_type_id": 1, "forecast_date": date.today().isoformat(), "current_balance": 350000, "daily_consumption_rate": 2500, "safety_factor": 1.2, "forecast_days_remaining": 140, "next_refill_date_estimate": (date.today() + timedelta(days=120)).isoformat(), "recommended_order_quantity": 150000, "confidence_level": 85},
+    {"forecast_id": 2, "site_id": 2, "fuel_type_id": 1, "forecast_date": date.today().isoformat(), "current_balance": 8000, "daily_consumption_rate": 1200, "safety_factor": 1.2, "forecast_days_remaining": 6, "next_refill_date_estimate": (date.today() + timedelta(days=5)).isoformat(), "recommended_order_quantity": 30000, "confidence_level": 92},
+    {"forecast_id": 3, "site_id": 3, "fuel_type_id": 1, "forecast_date": date.today().isoformat(), "current_balance": 65000, "daily_consumption_rate": 3500, "safety_factor": 1.2, "forecast_days_remaining": 18, "next_refill_date_estimate": (date.today() + timedelta(days=15)).isoformat(), "recommended_order_quantity": 50000, "confidence_level": 88},
+    {"forecast_id": 4, "site_id": 4, "fuel_type_id": 3, "forecast_date": date.today().isoformat(), "current_balance": 45000, "daily_consumption_rate": 4320, "safety_factor": 1.2, "forecast_days_remaining": 10, "next_refill_date_estimate": (date.today() + timedelta(days=8)).isoformat(), "recommended_order_quantity": 120000, "confidence_level": 90}
 ]
 
 demo_operational_hours = [
-    {"log_id": 1, "site_id": 2, "equipment_id": 2, "log_date": date.today().isoformat(), "running_hours": 8.5, "fuel_consumed": 157.25, "recorded_by": "Site Supervisor A", "notes": "Normal operation", "site_name": "Construction Site Alpha", "equipment_name": "Excavator Alpha 1"},
-    {"log_id": 2, "site_id": 3, "equipment_id": 3, "log_date": date.today().isoformat(), "running_hours": 12.0, "fuel_consumed": 540.0, "recorded_by": "Mining Chief", "notes": "Heavy load transport", "site_name": "Mining Operation Gamma", "equipment_name": "Mining Truck 1"},
-    {"log_id": 3, "site_id": 4, "equipment_id": 4, "log_date": date.today().isoformat(), "running_hours": 24.0, "fuel_consumed": 4320.0, "recorded_by": "Plant Engineer", "notes": "Continuous operation", "site_name": "Power Plant Delta", "equipment_name": "Main Generator 1"}
+    {"log_id": 1, "site_id": 2, "equipment_id": 2, "log_date": date.today().isoformat(), "running_hours": 8.5, "fuel_consumed": 157.25, "recorded_by": "Site Supervisor A", "notes": "Normal operation"},
+    {"log_id": 2, "site_id": 3, "equipment_id": 3, "log_date": date.today().isoformat(), "running_hours": 12.0, "fuel_consumed": 540.0, "recorded_by": "Mining Chief", "notes": "Heavy load transport"},
+    {"log_id": 3, "site_id": 4, "equipment_id": 4, "log_date": date.today().isoformat(), "running_hours": 24.0, "fuel_consumed": 4320.0, "recorded_by": "Plant Engineer", "notes": "Continuous operation"}
 ]
 
 demo_refills = [
-    {"transaction_id": "REF-2025-001", "refill_date": date.today().isoformat(), "site_name": "Main Warehouse", "fuel_name": "Diesel", "quantity": 100000, "supplier_name": "Myanmar Petroleum Corporation", "unit_cost": 1850.00, "total_cost": 185000000, "created_by": "System"},
-    {"transaction_id": "REF-2025-002", "refill_date": (date.today() - timedelta(days=1)).isoformat(), "site_name": "Mining Operation Gamma", "fuel_name": "Diesel", "quantity": 50000, "supplier_name": "Asia Fuel Trading", "unit_cost": 1820.00, "total_cost": 91000000, "created_by": "Mining Chief"}
+    {"refill_id": 1, "transaction_id": "REF-2025-001", "refill_date": date.today().isoformat(), "site_id": 1, "fuel_type_id": 1, "supplier_id": 1, "quantity": 100000, "unit_cost": 1850.00, "total_cost": 185000000, "created_by": "System"},
+    {"refill_id": 2, "transaction_id": "REF-2025-002", "refill_date": (date.today() - timedelta(days=1)).isoformat(), "site_id": 3, "fuel_type_id": 1, "supplier_id": 2, "quantity": 50000, "unit_cost": 1820.00, "total_cost": 91000000, "created_by": "Mining Chief"}
 ]
 
 demo_usage = [
-    {"transaction_id": "USE-2025-001", "usage_date": date.today().isoformat(), "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "equipment_name": "Excavator Alpha 1", "quantity": 157.25, "purpose": "Excavation work", "operator_name": "John Operator", "created_by": "Site Supervisor A"},
-    {"transaction_id": "USE-2025-002", "usage_date": date.today().isoformat(), "site_name": "Power Plant Delta", "fuel_name": "Heavy Fuel Oil", "equipment_name": "Main Generator 1", "quantity": 4320.0, "purpose": "Electricity generation", "operator_name": "Plant Operator", "created_by": "Plant Engineer"}
+    {"usage_id": 1, "transaction_id": "USE-2025-001", "usage_date": date.today().isoformat(), "site_id": 2, "fuel_type_id": 1, "equipment_id": 2, "quantity": 157.25, "purpose": "Excavation work", "operator_name": "John Operator", "created_by": "Site Supervisor A"},
+    {"usage_id": 2, "transaction_id": "USE-2025-002", "usage_date": date.today().isoformat(), "site_id": 4, "fuel_type_id": 3, "equipment_id": 4, "quantity": 4320.0, "purpose": "Electricity generation", "operator_name": "Plant Operator", "created_by": "Plant Engineer"}
+]
+
+demo_alert_configurations = [
+    {"alert_id": 1, "alert_name": "Construction Alpha Low Stock", "alert_type": "Low Stock", "site_id": 2, "fuel_type_id": 1, "threshold_value": 10000},
+    {"alert_id": 2, "alert_name": "Power Plant Forecast Warning", "alert_type": "Forecast Shortage", "site_id": 4, "fuel_type_id": 3, "threshold_days": 14}
 ]
 
 demo_alerts = [
-    {"alert_history_id": 1, "alert_name": "Construction Alpha Low Stock", "alert_type": "Low Stock", "alert_message": "Construction Site Alpha diesel stock is critically low (8,000L remaining)", "severity_level": "Critical", "triggered_date": datetime.now().isoformat(), "site_name": "Construction Site Alpha", "fuel_name": "Diesel"},
-    {"alert_history_id": 2, "alert_name": "Power Plant Forecast Warning", "alert_type": "Forecast Shortage", "alert_message": "Power Plant Delta estimated to run out of fuel in 10 days", "severity_level": "High", "triggered_date": datetime.now().isoformat(), "site_name": "Power Plant Delta", "fuel_name": "Heavy Fuel Oil"}
+    {"alert_history_id": 1, "alert_id": 1, "alert_message": "Construction Site Alpha diesel stock is critically low (8,000L remaining)", "severity_level": "Critical", "triggered_date": datetime.now().isoformat()},
+    {"alert_history_id": 2, "alert_id": 2, "alert_message": "Power Plant Delta estimated to run out of fuel in 10 days", "severity_level": "High", "triggered_date": datetime.now().isoformat()}
 ]
 
+demo_settings = [
+    {"setting_key": "default_safety_factor", "setting_value": "1.2", "setting_description": "Default safety factor for forecasting"},
+    {"setting_key": "demo_mode", "setting_value": "true", "setting_description": "Running in demo mode"}
+]
+
+def create_store() -> DemoStore:
+    """Snapshot if one exists, else a generated fleet or the sample data above"""
+    store = DemoStore(default_safety_factor=Config.DEFAULT_SAFETY_FACTOR)
+    if Config.DEMO_SNAPSHOT and os.path.exists(Config.DEMO_SNAPSHOT):
+        store.load_snapshot(Config.DEMO_SNAPSHOT)
+        logger.info(f"Loaded demo snapshot {Config.DEMO_SNAPSHOT}")
+    elif Config.DEMO_DATASET_SITES > 0:
+        store.load_generated(Config.DEMO_DATASET_SITES, Config.DEMO_DATASET_EQUIPMENT_PER_SITE,
+                             Config.DEMO_DATASET_YEARS, Config.DEMO_DATASET_SEED)
+    else:
+        store.load_rows({
+            'FuelTypes': demo_fuel_types, 'Suppliers': demo_suppliers, 'FuelPrices': demo_fuel_prices, 'Sites': demo_sites,
+            'Equipment': demo_equipment, 'SystemSettings': demo_settings,
+            'AlertConfigurations': demo_alert_configurations, 'FuelStock': demo_stock,
+            'ConsumptionForecast': demo_forecasts, 'OperationalHoursLog': demo_operational_hours,
+            'UsageTransactions': demo_usage, 'RefillTransactions': demo_refills, 'AlertHistory': demo_alerts
+        })
+    return store
+
+store = create_store()
+
+def save_snapshot():
+    if Config.DEMO_SNAPSHOT and store.dirty:
+        store.save_snapshot(Config.DEMO_SNAPSHOT)
+        logger.info(f"Demo snapshot written to {Config.DEMO_SNAPSHOT}")
+
+atexit.register(save_snapshot)
+
+def active(rows):
+    return [row for row in rows if row.get('is_active', True)]
+
+# Largest page a list endpoint returns when paged (as in app.py)
+MAX_PAGE_SIZE = 5000
+
+def page_args():
+    """Optional limit/offset paging arguments for Table.select"""
+    limit = request.args.get('limit', type=int)
+    if not limit or limit < 1:
+        return {}
+    return {'limit': min(limit, MAX_PAGE_SIZE), 'offset': max(request.args.get('offset', 0, type=int), 0)}
+
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -86,68 +169,439 @@ def health_check():
         'status': 'healthy',
         'database': 'demo_mode',
         'timestamp': datetime.now().isoformat(),
-        'version': '2.0-demo'
+        'version': '2.0-demo',
+        'rows': sum(store.stats().values())
     })
 
-@app.route('/api/sites', methods=['GET'])
-def get_sites():
-    return jsonify(demo_sites)
+@app.route('/api/system/settings', methods=['GET'])
+def get_system_settings():
+    return jsonify(store.ordered('SystemSettings', lambda row: row['setting_key']))
 
 @app.route('/api/fuel-types', methods=['GET'])
 def get_fuel_types():
-    return jsonify(demo_fuel_types)
+    return jsonify(active(store.ordered('FuelTypes', lambda row: row['fuel_name'])))
+
+@app.route('/api/fuel-types', methods=['POST'])
+def create_fuel_type():
+    data = request.get_json()
+    try:
+        store.insert('FuelTypes', {
+            'fuel_name': data['fuel_name'], 'fuel_code': data['fuel_code'], 'density': data.get('density', 0.850),
+            'energy_content': data.get('energy_content'), 'carbon_factor': data.get('carbon_factor')
+        })
+        return jsonify({'message': 'Fuel type created successfully'}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/sites', methods=['GET'])
+def get_sites():
+    return jsonify(active(store.ordered('Sites', lambda row: row['site_name'])))
+
+@app.route('/api/sites', methods=['POST'])
+def create_site():
+    data = request.get_json()
+    try:
+        store.insert('Sites', {
+            'site_name': data['site_name'], 'site_code': data['site_code'], 'site_type': data['site_type'],
+            'location_address': data.get('location_address'), 'latitude': data.get('latitude'),
+            'longitude': data.get('longitude'), 'contact_person': data.get('contact_person'),
+            'contact_phone': data.get('contact_phone'), 'storage_capacity': data.get('storage_capacity', 0),
+            'safety_stock_days': data.get('safety_stock_days', 7), 'created_date': datetime.now().isoformat()
+        })
+        return jsonify({'message': 'Site created successfully'}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/equipment', methods=['GET'])
 def get_equipment():
-    site_id = request.args.get('site_id')
+    site_id = request.args.get('site_id', type=int)
     if site_id:
-        filtered_equipment = [eq for eq in demo_equipment if eq['site_id'] == int(site_id)]
-        return jsonify(filtered_equipment)
-    return jsonify(demo_equipment)
+        equipment = sorted(store['Equipment'].select({'site_id': site_id}), key=lambda row: row['equipment_name'])
+        return jsonify(active(equipment))
+    return jsonify(active(store.ordered('Equipment', lambda row: (row['site_name'], row['equipment_name']))))
+
+@app.route('/api/equipment', methods=['POST'])
+def create_equipment():
+    data = request.get_json()
+    try:
+        store.insert('Equipment', {
+            'site_id': data['site_id'], 'equipment_name': data['equipment_name'],
+            'equipment_code': data['equipment_code'], 'fuel_type_id': data['fuel_type_id'],
+            'consumption_rate': data['consumption_rate'], 'equipment_type': data.get('equipment_type'),
+            'manufacturer': data.get('manufacturer'), 'model': data.get('model')
+        })
+        return jsonify({'message': 'Equipment created successfully'}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/stock', methods=['GET'])
 def get_stock():
-    return jsonify(demo_stock)
+    return jsonify(store.stock_status())
+
+@app.route('/api/stock/summary', methods=['GET'])
+def get_stock_summary():
+    return jsonify(store.stock_summary())
 
 @app.route('/api/forecasts', methods=['GET'])
 def get_forecasts():
-    return jsonify(demo_forecasts)
+    forecasts = store['ConsumptionForecast'].select(
+        {'site_id': request.args.get('site_id', type=int)},
+        start=request.args.get('forecast_date', date.today().isoformat()),
+        end=request.args.get('forecast_date', date.today().isoformat()))
+    return jsonify(sorted(forecasts, key=lambda row: (row['site_name'], row['fuel_name'])))
+
+def calculate_model_forecasts(site_id=None, forecast_date=None):
+    return store.calculate_model_forecasts(int(site_id) if site_id else None, forecast_date,
+                                           Config.FORECAST_MODEL_HISTORY_DAYS, Config.FORECAST_MODEL_HORIZON_DAYS,
+                                           Config.FORECAST_MODEL_WORKERS)
+
+def recalculate_site(site_id):
+    if Config.FORECAST_METHOD == 'holt-winters':
+        calculate_model_forecasts(site_id)
+    else:
+        store.recalculate_site(site_id)
+
+def optimize_reorders(site_id=None, force=False, save=True):
+    return store.optimize_reorders(int(site_id) if site_id else None, force, save, Config.REORDER_HISTORY_DAYS,
+                                   Config.REORDER_ORDER_COST, Config.REORDER_HOLDING_RATE,
+                                   Config.REORDER_SERVICE_LEVEL, Config.REORDER_MIN_SUPPLIER_RATING)
+
+def plan_deliveries(site_id=None, fuel_type_id=None, horizon_days=None, save=True):
+    return store.plan_deliveries(site_id, fuel_type_id, horizon_days or Config.DELIVERY_HORIZON_DAYS,
+                                 Config.DELIVERY_TRUCK_LITRES, Config.DELIVERY_SUPPLIER_DAILY_TRUCKS, save)
+
+def replan_deliveries(site_id, fuel_type_id):
+    try:
+        plan_deliveries(site_id, fuel_type_id)
+    except Exception as e:
+        logger.error(f"Failed to re-plan deliveries: {e}")
 
 @app.route('/api/forecasts/calculate', methods=['POST'])
 def calculate_forecasts():
-    return jsonify({'message': 'Demo: Forecasts calculated successfully'})
+    data = request.get_json(silent=True) or {}
+    method = data.get('method', Config.FORECAST_METHOD)
+    if method not in timeseries.METHODS:
+        return jsonify({'error': f"method must be one of: {', '.join(timeseries.METHODS)}"}), 400
+    try:
+        result = {'message': 'Forecasts calculated successfully'}
+        if method == 'holt-winters':
+            result.update(calculate_model_forecasts(data.get('site_id'), data.get('forecast_date')))
+        elif data.get('site_id') and data.get('fuel_type_id'):
+            store.calculate_site_forecast(int(data['site_id']), int(data['fuel_type_id']), data.get('forecast_date'))
+        else:
+            store.calculate_all_forecasts(data.get('forecast_date'))
+        if Config.REORDER_ON_FORECAST:
+            result['reorders_recalculated'] = optimize_reorders(data.get('site_id'))['recalculated']
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/forecasts/scenarios', methods=['POST'])
+def create_forecast_scenario():
+    data = request.get_json()
+    try:
+        store.create_forecast_scenario(int(data['forecast_id']), data['scenario_name'],
+                                       data.get('adjusted_consumption_rate'), data.get('adjusted_safety_factor'))
+        return jsonify({'message': 'Forecast scenario created successfully'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/forecasts/scenarios/grid', methods=['POST'])
+def evaluate_scenario_grid():
+    data = request.get_json(silent=True) or {}
+    try:
+        axes = parse_grid(data)
+        forecast_ids = [int(forecast_id) for forecast_id in data.get('forecast_ids') or []]
+    except (ScenarioGridError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    table = store['ConsumptionForecast']
+    if forecast_ids:
+        forecasts = [row for row in map(table.get, forecast_ids) if row is not None]
+    else:
+        forecast_date = data.get('forecast_date', date.today().isoformat())
+        forecasts = table.select({'site_id': data.get('site_id')}, start=forecast_date, end=forecast_date)
+    if not forecasts:
+        return jsonify({'error': 'No forecasts match the request'}), 404
+    cells = grid_cells(len(forecasts), axes)
+    if cells > Config.SCENARIO_MAX_CELLS:
+        return jsonify({'error': f'Grid has {cells} cells; at most {Config.SCENARIO_MAX_CELLS} allowed'}), 400
+    return jsonify(evaluate_grid(sorted(forecasts, key=lambda row: (row['site_name'], row['fuel_name'])), axes))
+
+@app.route('/api/forecasts/stockout-risk', methods=['GET'])
+def get_stockout_risk():
+    try:
+        days, paths, seed = simulation_options(request.args, Config.SIMULATION_PATHS,
+                                               Config.SIMULATION_MAX_PATHS, Config.SIMULATION_MAX_DAYS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    history_start = (date.today() - timedelta(days=Config.SIMULATION_HISTORY_DAYS)).isoformat()
+    stocks, equipment, daily_hours = store.simulation_inputs(history_start, request.args.get('site_id', type=int))
+    return jsonify(simulate_stockouts(stocks, equipment, daily_hours, days, paths, seed))
+
+@app.route('/api/forecasts/trajectory', methods=['GET', 'POST'])
+def get_stock_trajectories():
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    today = date.today()
+    try:
+        settings = trajectory_options(options, Config.TRAJECTORY_DAYS, Config.TRAJECTORY_MAX_DAYS,
+                                      Config.TRAJECTORY_MAX_HISTORY_DAYS, Config.TRAJECTORY_MAX_POINTS)
+        scheduled = parse_scheduled(options.get('scheduled_refills'), today)
+        site_id = int(options['site_id']) if options.get('site_id') else None
+        fuel_type_id = int(options['fuel_type_id']) if options.get('fuel_type_id') else None
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    history_start = (today - timedelta(days=settings['history'])).isoformat() if settings['history'] else None
+    pairs, lead_times, daily_net = store.trajectory_inputs(history_start, site_id, fuel_type_id)
+    history = history_curves(pairs, daily_net, settings['history'], today) if settings['history'] else None
+    return jsonify(project_trajectories(pairs, settings['days'], supplier_lead_times(lead_times), scheduled,
+                                        reorder=settings['reorder'], lead_time_days=settings['lead_time_days'],
+                                        history=history, points=settings['points'], today=today))
+
+@app.route('/api/reorder/recommendations', methods=['GET'])
+def get_reorder_recommendations():
+    return jsonify(store.reorder_recommendations(request.args.get('site_id', type=int)))
+
+@app.route('/api/reorder/optimize', methods=['POST'])
+def optimize_reorder_points():
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(optimize_reorders(data.get('site_id'), bool(data.get('force')), data.get('save', True)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/transfers/plan', methods=['GET', 'POST'])
+def plan_stock_transfers():
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    try:
+        settings = transfer_options(options, Config.TRANSFER_HORIZON_DAYS, Config.TRANSFER_MAX_HORIZON_DAYS,
+                                    Config.TRANSFER_MAX_KM, Config.TRANSFER_MIN_LITRES, Config.TRANSFER_TIME_BUDGET_MS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    history_start = (date.today() - timedelta(days=Config.REORDER_HISTORY_DAYS)).isoformat()
+    pairs, sites, lead_times, order_costs = store.transfer_inputs(history_start, settings['fuel_type_id'])
+    return jsonify(plan_transfers(
+        pairs, sites, supplier_lead_times(lead_times), order_costs, Config.REORDER_ORDER_COST,
+        settings['horizon_days'], Config.TRANSFER_COST_PER_LITRE_KM, Config.TRANSFER_HANDLING_COST,
+        Config.TRANSFER_SHORTAGE_COST, Config.TRANSFER_ROAD_FACTOR, settings['max_km'], settings['min_litres'],
+        settings['time_budget_ms']))
+
+@app.route('/api/deliveries/schedule', methods=['GET'])
+def get_delivery_schedule():
+    rows = store.delivery_schedule(request.args.get('site_id', type=int), request.args.get('fuel_type_id', type=int),
+                                   request.args.get('supplier_id', type=int), request.args.get('start_date'),
+                                   request.args.get('end_date'))
+    paging = page_args()
+    return jsonify(rows[paging['offset']:paging['offset'] + paging['limit']] if paging else rows)
+
+@app.route('/api/deliveries/schedule', methods=['POST'])
+def create_delivery_schedule():
+    data = request.get_json(silent=True) or {}
+    try:
+        horizon_days = delivery_horizon(data, Config.DELIVERY_HORIZON_DAYS, Config.DELIVERY_MAX_HORIZON_DAYS)
+        return jsonify(plan_deliveries(horizon_days=horizon_days, save=data.get('save', True)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/prices', methods=['GET'])
+def get_fuel_prices():
+    try:
+        day = date.fromisoformat(request.args.get('date') or date.today().isoformat())
+    except ValueError:
+        return jsonify({'error': 'date must be an ISO date'}), 400
+    price_type = request.args.get('price_type')
+    if price_type and price_type not in prices.PRICE_TYPES:
+        return jsonify({'error': f"price_type must be one of {', '.join(prices.PRICE_TYPES)}"}), 400
+    index, _ = store.price_index()
+    return jsonify(index.effective(day, request.args.get('fuel_type_id', type=int),
+                                   request.args.get('supplier_id', type=int), price_type))
+
+@app.route('/api/forecasts/<int:forecast_id>/scenarios', methods=['GET'])
+def get_forecast_scenarios(forecast_id):
+    return jsonify(store['ForecastScenarios'].select({'forecast_id': forecast_id}))
 
 @app.route('/api/operational-hours', methods=['GET'])
 def get_operational_hours():
-    return jsonify(demo_operational_hours)
+    return jsonify(store['OperationalHoursLog'].select(
+        {'site_id': request.args.get('site_id', type=int), 'equipment_id': request.args.get('equipment_id', type=int)},
+        start=request.args.get('start_date'), end=request.args.get('end_date'), **page_args()))
+
+def insert_operational_hours(data):
+    store.insert('OperationalHoursLog', {
+        'site_id': data['site_id'], 'equipment_id': data['equipment_id'], 'log_date': data['log_date'],
+        'running_hours': data['running_hours'], 'fuel_consumed': data.get('fuel_consumed'),
+        'recorded_by': data.get('recorded_by'), 'notes': data.get('notes'),
+        'created_date': datetime.now().isoformat()
+    })
+    return {'message': 'Operational hours logged successfully'}
 
 @app.route('/api/operational-hours', methods=['POST'])
 def log_operational_hours():
-    return jsonify({'message': 'Demo: Operational hours logged successfully'})
+    data = request.get_json()
+    try:
+        result, replayed = apply_write('/api/operational-hours', data, request.headers.get(IDEMPOTENCY_HEADER))
+        if not replayed:
+            recalculate_site(data['site_id'])
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/refills', methods=['GET'])
 def get_refills():
-    return jsonify(demo_refills)
+    return jsonify(store['RefillTransactions'].select(
+        {'site_id': request.args.get('site_id', type=int)},
+        start=request.args.get('start_date'), end=request.args.get('end_date'), **page_args()))
+
+def insert_refill(data):
+    transaction_id = f"REF-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
+    with store.lock:
+        store.insert('RefillTransactions', {
+            'transaction_id': transaction_id, 'site_id': data['site_id'], 'fuel_type_id': data['fuel_type_id'],
+            'supplier_id': data.get('supplier_id'), 'quantity': data['quantity'],
+            'unit_cost': data.get('unit_cost'), 'total_cost': data.get('total_cost'),
+            'refill_date': data.get('refill_date', datetime.now()), 'created_by': data.get('created_by', 'System')
+        })
+        store.update_stock_after_transaction(data['site_id'], data['fuel_type_id'], data['quantity'])
+    return {'message': 'Refill transaction created successfully', 'transaction_id': transaction_id}
+
+@app.route('/api/refills', methods=['POST'])
+def create_refill():
+    try:
+        data = request.get_json()
+        result, replayed = apply_write('/api/refills', data, request.headers.get(IDEMPOTENCY_HEADER))
+        if not replayed and Config.DELIVERY_REPLAN_ON_WRITE:
+            replan_deliveries(data['site_id'], data['fuel_type_id'])
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/usage', methods=['GET'])
 def get_usage():
-    return jsonify(demo_usage)
+    return jsonify(store['UsageTransactions'].select(
+        {'site_id': request.args.get('site_id', type=int), 'equipment_id': request.args.get('equipment_id', type=int)},
+        start=request.args.get('start_date'), end=request.args.get('end_date'), **page_args()))
+
+def insert_usage(data):
+    transaction_id = f"USE-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
+    with store.lock:
+        store.insert('UsageTransactions', {
+            'transaction_id': transaction_id, 'site_id': data['site_id'], 'fuel_type_id': data['fuel_type_id'],
+            'equipment_id': data.get('equipment_id'), 'department': data.get('department'),
+            'quantity': data['quantity'], 'usage_date': data.get('usage_date', datetime.now()),
+            'purpose': data.get('purpose'), 'created_by': data.get('created_by', 'System')
+        })
+        store.update_stock_after_transaction(data['site_id'], data['fuel_type_id'], -data['quantity'])
+    return {'message': 'Usage transaction created successfully', 'transaction_id': transaction_id}
+
+@app.route('/api/usage', methods=['POST'])
+def create_usage():
+    try:
+        data = request.get_json()
+        result, replayed = apply_write('/api/usage', data, request.headers.get(IDEMPOTENCY_HEADER))
+        if not replayed and Config.DELIVERY_REPLAN_ON_WRITE:
+            replan_deliveries(data['site_id'], data['fuel_type_id'])
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Offline sync: same contract as app.py, with SyncRequests kept in the store
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+SYNC_WRITERS = {
+    '/api/operational-hours': insert_operational_hours,
+    '/api/refills': insert_refill,
+    '/api/usage': insert_usage,
+}
+
+def apply_write(endpoint, data, key=None):
+    with store.lock:
+        stored = store['SyncRequests'].get(key) if key else None
+        if stored:
+            return stored['response'], True
+        result = SYNC_WRITERS[endpoint](data)
+        if key:
+            store.insert('SyncRequests', {'idempotency_key': key, 'endpoint': endpoint, 'response': result,
+                                          'created_date': datetime.now().isoformat()})
+        return result, False
+
+@app.route('/api/sync/batch', methods=['POST'])
+def sync_batch():
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list):
+        return jsonify({'error': 'operations must be a list'}), 400
+    if len(operations) > Config.SYNC_MAX_BATCH:
+        return jsonify({'error': f'At most {Config.SYNC_MAX_BATCH} operations per batch'}), 400
+    results, forecast_sites, delivery_pairs = [], set(), set()
+    for operation in operations:
+        key, endpoint, payload = operation.get('idempotency_key'), operation.get('endpoint'), operation.get('payload') or {}
+        if not key or endpoint not in SYNC_WRITERS:
+            results.append({'idempotency_key': key, 'status': 400, 'error': f'Unsupported sync operation: {endpoint}'})
+            continue
+        try:
+            result, replayed = apply_write(endpoint, payload, key)
+            results.append({'idempotency_key': key, 'status': 200 if replayed else 201, 'result': result})
+            if not replayed and endpoint == '/api/operational-hours':
+                forecast_sites.add(payload['site_id'])
+            elif not replayed:
+                delivery_pairs.add((payload['site_id'], payload['fuel_type_id']))
+        except Exception as e:
+            results.append({'idempotency_key': key, 'status': 400, 'error': str(e)})
+    for site_id in sorted(forecast_sites):
+        recalculate_site(site_id)
+    if Config.DELIVERY_REPLAN_ON_WRITE:
+        for site_id, fuel_type_id in sorted(delivery_pairs):
+            replan_deliveries(site_id, fuel_type_id)
+    return jsonify({'results': results})
 
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
-    return jsonify(demo_alerts)
+    days = request.args.get('days', 7, type=int)
+    return jsonify(store['AlertHistory'].select(start=datetime.now() - timedelta(days=days)))
 
-@app.route('/api/system/settings', methods=['GET'])
-def get_system_settings():
-    return jsonify([
-        {"setting_key": "default_safety_factor", "setting_value": "1.2", "setting_description": "Default safety factor for forecasting"},
-        {"setting_key": "demo_mode", "setting_value": "true", "setting_description": "Running in demo mode"}
-    ])
+@app.route('/api/alerts/check', methods=['POST'])
+def check_alerts():
+    store.check_forecast_alerts()
+    return jsonify({'message': 'Alert check completed'})
+
+@app.route('/api/reports/consumption-summary', methods=['GET'])
+def get_consumption_summary():
+    return jsonify(store.consumption_summary(
+        request.args.get('start_date', (date.today() - timedelta(days=30)).isoformat()),
+        request.args.get('end_date', date.today().isoformat()),
+        request.args.get('site_id', type=int)))
+
+@app.route('/api/reports/consumption-cost', methods=['GET'])
+def get_consumption_cost():
+    try:
+        settings = prices.costing_options(request.args, Config.COST_REPORT_DEFAULT_DAYS, Config.COST_REPORT_PRICE_TYPE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    index, cached = store.price_index()
+    site_ids, fuel_ids, days, litres = store.usage_columns(settings['start_date'].isoformat(),
+                                                           settings['end_date'].isoformat(),
+                                                           settings['site_id'], settings['fuel_type_id'])
+    result = prices.cost_consumption(
+        index, fuel_ids, days, litres, site_ids, settings['group_by'], settings['supplier_id'], settings['price_type'],
+        {site_id: row['site_name'] for site_id, row in store['Sites'].rows.items()},
+        {fuel_id: row['fuel_name'] for fuel_id, row in store['FuelTypes'].rows.items()})
+    return jsonify({'start_date': settings['start_date'].isoformat(), 'end_date': settings['end_date'].isoformat(),
+                    **result, 'price_index': 'hit' if cached else 'miss'})
+
+@app.route('/api/reports/equipment-efficiency', methods=['GET'])
+def get_equipment_efficiency():
+    return jsonify(store.equipment_efficiency())
+
+@app.route('/api/demo/snapshot', methods=['POST'])
+def write_snapshot():
+    if not Config.DEMO_SNAPSHOT:
+        return jsonify({'error': 'DEMO_SNAPSHOT is not set'}), 400
+    store.save_snapshot(Config.DEMO_SNAPSHOT)
+    return jsonify({'message': 'Snapshot written', 'path': Config.DEMO_SNAPSHOT, 'rows': store.stats()})
 
 if __name__ == '__main__':
     print("🚀 Starting Fuel Control System - DEMO MODE")
     print("=" * 50)
     print("Backend API: http://localhost:5000")
     print("Demo mode: No database required")
+    print(f"In-memory rows: {sum(store.stats().values())}")
     print("=" * 50)
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
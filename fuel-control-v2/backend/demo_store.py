@@ -0,0 +1,954 @@
+"""
+Indexed in-memory data store for the demo server of Advanced Fuel Consumption Forecasting System
+Primary-key dicts, secondary indexes on id columns and date-sorted arrays, with the forecasting
+procedures ported to Python so write endpoints update stock, forecasts and alerts like the real API
+"""
+
+import itertools
+import logging
+import math
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import deliveries
+import prices
+import reorder
+import timeseries
+
+logger = logging.getLogger(__name__)
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+
+SNAPSHOT_VERSION = 1
+
+# Same rules as sp_CalculateSiteForecast (see sqlite_backend.py)
+HISTORY_DAYS = 14        # Operational hours window used by the forecast
+DEFAULT_HOURS = 4.0      # Assumed daily hours for equipment without recent logs
+SUMMARY_HISTORY_DAYS = 30  # Window of vw_SiteConsumptionSummary and vw_EquipmentConsumptionSummary
+UNLIMITED_DAYS = 999
+CALCULATION_METHOD = 'Equipment-based with operational hours'
+CALCULATED_BY = 'System'
+
+
+class ConstraintError(ValueError):
+    """A write would violate a primary key or unique constraint"""
+
+
+def _iso(value) -> Optional[str]:
+    """Dates are stored as ISO strings so they sort and range-compare as text"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # SQL-style 'YYYY-MM-DD HH:MM:SS' from the generator sorts like the API's 'T' form
+        return value[:10] + 'T' + value[11:] if len(value) > 10 and value[10] == ' ' else value
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _after(day: str) -> Tuple[str]:
+    """Bisect bound just past every entry dated exactly `day` (timestamps on that day sort later)"""
+    return (day + '\x00',)
+
+# =============================================
+# TABLE
+# =============================================
+
+class Table:
+    """
+    Rows by primary key with hash indexes on id columns.
+
+    When the table has a date column, the full table and every index posting list are kept as
+    sorted (date, key) lists, so equality + date-range lookups are two bisects on the smallest
+    posting list and come back newest first without a sort.
+    """
+
+    def __init__(self, name: str, key: str, indexes: Sequence[str] = (), date_column: Optional[str] = None,
+                 unique: Optional[Sequence[str]] = None):
+        self.name = name
+        self.key = key
+        self.date_column = date_column
+        self.unique = tuple(unique) if unique else None
+        self.rows: Dict[Any, dict] = {}
+        self.indexes: Dict[str, Dict[Any, list]] = {column: {} for column in indexes}
+        self.by_date: List[Tuple[str, Any]] = []
+        self.unique_keys: Dict[tuple, Any] = {}
+        self.next_id = 1
+        self.version = 0  # Bumped on every insert; keys cached orderings
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, key) -> Optional[dict]:
+        return self.rows.get(key)
+
+    def find(self, *values) -> Optional[dict]:
+        """Row by the unique constraint columns"""
+        key = self.unique_keys.get(values)
+        return None if key is None else self.rows[key]
+
+    def _prepare(self, row: dict) -> dict:
+        if row.get(self.key) is None:
+            row[self.key] = self.next_id
+        key = row[self.key]
+        if key in self.rows:
+            raise ConstraintError(f"Duplicate {self.key} {key} in {self.name}")
+        if self.date_column:
+            row[self.date_column] = _iso(row.get(self.date_column))
+        if self.unique:
+            unique_key = tuple(row.get(column) for column in self.unique)
+            if unique_key in self.unique_keys:
+                raise ConstraintError(f"Duplicate ({', '.join(self.unique)}) {unique_key} in {self.name}")
+            self.unique_keys[unique_key] = key
+        if isinstance(key, int) and key >= self.next_id:
+            self.next_id = key + 1
+        self.rows[key] = row
+        self.version += 1
+        return row
+
+    def insert(self, row: dict) -> dict:
+        row = self._prepare(row)
+        key = row[self.key]
+        if self.date_column:
+            entry = (row[self.date_column] or '', key)
+            # New rows are usually the latest, so most inserts are appends
+            if not self.by_date or entry >= self.by_date[-1]:
+                self.by_date.append(entry)
+            else:
+                insort(self.by_date, entry)
+            for column, index in self.indexes.items():
+                posting = index.setdefault(row.get(column), [])
+                if not posting or entry >= posting[-1]:
+                    posting.append(entry)
+                else:
+                    insort(posting, entry)
+        else:
+            for column, index in self.indexes.items():
+                index.setdefault(row.get(column), []).append(key)
+        return row
+
+    def insert_many(self, rows: Iterable[dict]) -> int:
+        """Bulk load: append everything, then sort each date list once"""
+        count = 0
+        for row in rows:
+            row = self._prepare(row)
+            key = row[self.key]
+            entry = (row[self.date_column] or '', key) if self.date_column else key
+            if self.date_column:
+                self.by_date.append(entry)
+            for column, index in self.indexes.items():
+                index.setdefault(row.get(column), []).append(entry)
+            count += 1
+        if self.date_column:
+            self.by_date.sort()
+            for index in self.indexes.values():
+                for posting in index.values():
+                    posting.sort()
+        return count
+
+    def _span(self, entries: list, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        lo = bisect_left(entries, (start,)) if start else 0
+        hi = bisect_left(entries, _after(end)) if end else len(entries)
+        return lo, max(lo, hi)
+
+    def select(self, where: Optional[Dict[str, Any]] = None, start=None, end=None,
+               limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        """
+        Rows whose columns equal `where` (None values are ignored) and whose date column lies in
+        [start, end]; newest first for dated tables, insertion order otherwise. `limit` and
+        `offset` page through the matches in that order.
+
+        Returned dicts are the stored rows: callers must not modify them.
+        """
+        filters = [(column, value) for column, value in (where or {}).items() if value is not None]
+        start, end = _iso(start), _iso(end)
+
+        # Drive the scan from the most selective index
+        entries, driver, span = None, None, None
+        for column, value in filters:
+            index = self.indexes.get(column)
+            if index is None:
+                continue
+            posting = index.get(value)
+            if posting is None:
+                return []
+            candidate_span = self._span(posting, start, end) if self.date_column else (0, len(posting))
+            if span is None or candidate_span[1] - candidate_span[0] < span[1] - span[0]:
+                entries, driver, span = posting, column, candidate_span
+        residual = [(column, value) for column, value in filters if column != driver]
+
+        if self.date_column:
+            if entries is None:
+                entries = self.by_date
+                span = self._span(entries, start, end)
+            keys = (entries[i][1] for i in range(span[1] - 1, span[0] - 1, -1))
+        else:
+            keys = entries if entries is not None else self.rows.keys()
+
+        rows = self.rows
+        if not residual:
+            if limit or offset:
+                keys = itertools.islice(keys, offset, offset + limit if limit else None)
+            return [rows[key] for key in keys]
+        result = []
+        for key in keys:
+            row = rows[key]
+            if any(row.get(column) != value for column, value in residual):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            result.append(row)
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    def count(self, where: Optional[Dict[str, Any]] = None, start=None, end=None) -> int:
+        """Cheap existence checks: a single indexed column needs no row access"""
+        filters = [(column, value) for column, value in (where or {}).items() if value is not None]
+        if len(filters) == 1 and filters[0][0] in self.indexes and self.date_column:
+            posting = self.indexes[filters[0][0]].get(filters[0][1], [])
+            lo, hi = self._span(posting, _iso(start), _iso(end))
+            return hi - lo
+        return len(self.select(where, start, end))
+
+# =============================================
+# STORE
+# =============================================
+
+class DemoStore:
+    """All demo tables plus the write paths of the real API; one lock guards every table"""
+
+    def __init__(self, default_safety_factor: float = 1.2):
+        self.default_safety_factor = default_safety_factor
+        self.lock = threading.RLock()
+        self.dirty = False
+        self._ordered: Dict[str, Tuple[int, List[dict]]] = {}
+        self.tables: Dict[str, Table] = {table.name: table for table in (
+            Table('FuelTypes', 'fuel_type_id'),
+            Table('Suppliers', 'supplier_id'),
+            Table('FuelPrices', 'price_id', indexes=('fuel_type_id',)),
+            Table('Sites', 'site_id'),
+            Table('Equipment', 'equipment_id', indexes=('site_id', 'fuel_type_id')),
+            Table('SystemSettings', 'setting_key'),
+            Table('AlertConfigurations', 'alert_id', indexes=('site_id',)),
+            Table('FuelStock', 'stock_id', indexes=('site_id',), unique=('site_id', 'fuel_type_id')),
+            Table('ConsumptionForecast', 'forecast_id', indexes=('site_id', 'fuel_type_id'),
+                  date_column='forecast_date', unique=('site_id', 'fuel_type_id', 'forecast_date')),
+            Table('ForecastScenarios', 'scenario_id', indexes=('forecast_id',)),
+            Table('OperationalHoursLog', 'log_id', indexes=('site_id', 'equipment_id'), date_column='log_date',
+                  unique=('equipment_id', 'log_date')),
+            Table('UsageTransactions', 'usage_id', indexes=('site_id', 'fuel_type_id', 'equipment_id'),
+                  date_column='usage_date'),
+            Table('RefillTransactions', 'refill_id', indexes=('site_id', 'fuel_type_id', 'supplier_id'),
+                  date_column='refill_date'),
+            Table('AlertHistory', 'alert_history_id', indexes=('alert_id',), date_column='triggered_date'),
+            Table('SyncRequests', 'idempotency_key'),
+            Table('ForecastModels', 'equipment_id'),
+            Table('ReorderRecommendations', 'stock_id'),
+            Table('DeliverySchedule', 'delivery_id'),
+        )}
+
+    def __getitem__(self, name: str) -> Table:
+        return self.tables[name]
+
+    def stats(self) -> Dict[str, int]:
+        return {name: len(table) for name, table in self.tables.items()}
+
+    def ordered(self, name: str, sort_key) -> List[dict]:
+        """Whole-table listing in a fixed order, cached until the table changes"""
+        table = self.tables[name]
+        cached = self._ordered.get(name)
+        if cached is not None and cached[0] == table.version:
+            return cached[1]
+        with self.lock:
+            rows = sorted(table.rows.values(), key=sort_key)
+            self._ordered[name] = (table.version, rows)
+        return rows
+
+    # Loading
+
+    def _decorate(self, table: str, row: dict) -> dict:
+        """Denormalize the joined names the API returns, so list reads are plain slices"""
+        sites, fuels = self.tables['Sites'].rows, self.tables['FuelTypes'].rows
+        if table == 'AlertHistory':
+            config = self.tables['AlertConfigurations'].get(row.get('alert_id')) or {}
+            row.setdefault('alert_name', config.get('alert_name'))
+            row.setdefault('alert_type', config.get('alert_type'))
+            row.setdefault('site_id', config.get('site_id'))
+            row.setdefault('fuel_type_id', config.get('fuel_type_id'))
+        if table in ('Sites', 'Equipment', 'AlertConfigurations', 'FuelTypes', 'Suppliers'):
+            row.setdefault('is_active', True)
+        if 'site_id' in row and table != 'Sites':
+            row.setdefault('site_name', (sites.get(row['site_id']) or {}).get('site_name'))
+        if 'fuel_type_id' in row and table != 'FuelTypes':
+            row.setdefault('fuel_name', (fuels.get(row['fuel_type_id']) or {}).get('fuel_name'))
+        if row.get('equipment_id') is not None and table != 'Equipment':
+            row.setdefault('equipment_name',
+                           (self.tables['Equipment'].get(row['equipment_id']) or {}).get('equipment_name'))
+        if table == 'RefillTransactions':
+            row.setdefault('supplier_name',
+                           (self.tables['Suppliers'].get(row.get('supplier_id')) or {}).get('supplier_name'))
+        return row
+
+    def load_rows(self, tables: Dict[str, Iterable[dict]]):
+        """Bulk load rows keyed by table name, parents before children"""
+        with self.lock:
+            for name, table in self.tables.items():
+                if name in tables:
+                    table.insert_many(self._decorate(name, dict(row)) for row in tables[name])
+            self.dirty = True
+
+    def load_generated(self, sites: int, equipment_per_site: int = 12, years: float = 1.0, seed: int = 42):
+        """Fill the store from database/generate_dataset.py and compute today's forecasts"""
+        if DATABASE_DIR not in sys.path:
+            sys.path.insert(0, DATABASE_DIR)
+        from generate_dataset import TABLE_COLUMNS, DatasetSpec, FleetGenerator, RowSink
+
+        class StoreSink(RowSink):
+            def __init__(self):
+                super().__init__()
+                self.tables = {table: [] for table in TABLE_COLUMNS}
+
+            def write(self, table: str, rows: List[tuple]):
+                columns = TABLE_COLUMNS[table]
+                self.tables[table].extend(dict(zip(columns, row)) for row in rows)
+
+        started = time.perf_counter()
+        sink = StoreSink()
+        spec = DatasetSpec(sites=sites, equipment_per_site=equipment_per_site, years=years, seed=seed)
+        FleetGenerator(spec, sink, progress=False).generate()
+        self.load_rows(sink.tables)
+        self.calculate_all_forecasts()
+        logger.info(f"Generated demo dataset: {sum(self.stats().values())} rows "
+                    f"in {time.perf_counter() - started:.1f}s")
+
+    # Snapshots
+
+    def save_snapshot(self, path: str):
+        """Write all tables with their indexes; the file is replaced atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump({'version': SNAPSHOT_VERSION, 'tables': self.tables}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self.dirty = False
+
+    def load_snapshot(self, path: str):
+        """Restore a snapshot written by save_snapshot (pickle: only load files this server wrote)"""
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported demo snapshot version {snapshot.get('version')} in {path}")
+        with self.lock:
+            self.tables.update(snapshot['tables'])
+            self._ordered.clear()
+            self.dirty = False
+
+    # Views
+
+    def safety_factor(self) -> float:
+        setting = self.tables['SystemSettings'].get('default_safety_factor')
+        try:
+            return float(setting['setting_value']) if setting else self.default_safety_factor
+        except (TypeError, ValueError):
+            return self.default_safety_factor
+
+    def _active_site_ids(self) -> set:
+        return {site_id for site_id, site in self.tables['Sites'].rows.items() if site.get('is_active', True)}
+
+    def _average_hours(self, equipment_id, window_start: str) -> Tuple[Optional[float], float, int]:
+        """(average, total, days logged) of running hours since window_start"""
+        rows = self.tables['OperationalHoursLog'].select({'equipment_id': equipment_id}, start=window_start)
+        if not rows:
+            return None, 0.0, 0
+        total = sum(float(row.get('running_hours') or 0.0) for row in rows)
+        return total / len(rows), total, len(rows)
+
+    def _window_start(self, days: int = HISTORY_DAYS) -> str:
+        return (date.today() - timedelta(days=days)).isoformat()
+
+    def simulation_inputs(self, history_start: str, site_id: Optional[int] = None) -> Tuple[list, list, dict]:
+        """(stock rows, active equipment, {equipment_id: [daily hours]}) for simulation.simulate_stockouts"""
+        with self.lock:
+            sites = self.tables['Sites'].rows
+            stocks = []
+            for stock in self.tables['FuelStock'].select({'site_id': site_id}):
+                site = sites.get(stock['site_id'])
+                if site and site.get('is_active', True):
+                    stocks.append({'site_id': stock['site_id'], 'fuel_type_id': stock['fuel_type_id'],
+                                   'current_quantity': stock.get('current_quantity'), 'site_name': site['site_name'],
+                                   'fuel_name': stock.get('fuel_name')})
+            equipment = [item for item in self.tables['Equipment'].select({'site_id': site_id})
+                         if item.get('is_active', True)]
+            daily_hours: Dict[int, List[float]] = {}
+            for log in self.tables['OperationalHoursLog'].select({'site_id': site_id}, start=history_start):
+                daily_hours.setdefault(log['equipment_id'], []).append(log.get('running_hours'))
+        return stocks, equipment, daily_hours
+
+    def trajectory_inputs(self, history_start: Optional[str], site_id: Optional[int] = None,
+                          fuel_type_id: Optional[int] = None) -> Tuple[list, list, list]:
+        """
+        (stock rows with their latest forecast rate, (fuel_type_id, lead_time_days, is_preferred)
+        rows, (site_id, fuel_type_id, day, refills - usage) rows since history_start) for
+        trajectories.project_trajectories
+        """
+        with self.lock:
+            sites, forecasts = self.tables['Sites'].rows, self.tables['ConsumptionForecast']
+            pairs = []
+            for stock in self.tables['FuelStock'].select({'site_id': site_id, 'fuel_type_id': fuel_type_id}):
+                site = sites.get(stock['site_id'])
+                latest = forecasts.select({'site_id': stock['site_id'], 'fuel_type_id': stock['fuel_type_id']},
+                                          limit=1)
+                if site and site.get('is_active', True) and latest:
+                    pairs.append({**stock, 'site_name': site['site_name'],
+                                  'daily_consumption_rate': latest[0].get('daily_consumption_rate')})
+            pairs.sort(key=lambda pair: (pair['site_name'], pair.get('fuel_name') or ''))
+            lead_times = [(offer['fuel_type_id'], offer['lead_time_days'], offer['is_preferred'])
+                          for offer in self._offers(date.today().isoformat())]
+            daily_net: Dict[Tuple[int, int, str], float] = {}
+            if history_start:
+                where = {'site_id': site_id, 'fuel_type_id': fuel_type_id}
+                for table, column, sign in (('RefillTransactions', 'refill_date', 1.0),
+                                            ('UsageTransactions', 'usage_date', -1.0)):
+                    for row in self.tables[table].select(where, start=history_start):
+                        key = (row['site_id'], row['fuel_type_id'], row[column][:10])
+                        daily_net[key] = daily_net.get(key, 0.0) + sign * float(row.get('quantity') or 0.0)
+        return pairs, lead_times, [(*key, change) for key, change in daily_net.items()]
+
+    def stock_status(self) -> List[dict]:
+        """vw_CurrentStockStatus"""
+        with self.lock:
+            sites = self.tables['Sites'].rows
+            result = []
+            for stock in self.tables['FuelStock'].rows.values():
+                site = sites.get(stock['site_id'])
+                if not site or not site.get('is_active', True):
+                    continue
+                current = float(stock.get('current_quantity') or 0.0)
+                minimum = float(stock.get('minimum_threshold') or 0.0)
+                maximum = float(stock.get('maximum_capacity') or 0.0)
+                reorder = float(stock.get('reorder_point') or 0.0)
+                if current <= minimum:
+                    status = 'Critical'
+                elif current <= reorder:
+                    status = 'Low'
+                elif maximum and current >= maximum * 0.9:
+                    status = 'High'
+                else:
+                    status = 'Normal'
+                result.append({
+                    'site_name': site['site_name'], 'site_code': site.get('site_code'),
+                    'fuel_name': stock.get('fuel_name'), 'current_quantity': current,
+                    'available_quantity': current - float(stock.get('reserved_quantity') or 0.0),
+                    'minimum_threshold': minimum, 'maximum_capacity': maximum, 'reorder_point': reorder,
+                    'stock_status': status,
+                    'fill_percentage': round(current / maximum * 100, 2) if maximum else None,
+                    'last_updated': stock.get('last_updated')
+                })
+        result.sort(key=lambda row: (row['site_name'], row['fuel_name'] or ''))
+        return result
+
+    def stock_summary(self) -> List[dict]:
+        """vw_SiteConsumptionSummary"""
+        window_start = self._window_start(SUMMARY_HISTORY_DAYS)
+        with self.lock:
+            sites, equipment = self.tables['Sites'].rows, self.tables['Equipment']
+            result = []
+            for stock in self.tables['FuelStock'].rows.values():
+                site = sites.get(stock['site_id'])
+                if not site or not site.get('is_active', True):
+                    continue
+                consumption, machines = 0.0, 0
+                for machine in equipment.select({'site_id': stock['site_id'], 'fuel_type_id': stock['fuel_type_id']}):
+                    if not machine.get('is_active', True):
+                        continue
+                    average, _, _ = self._average_hours(machine['equipment_id'], window_start)
+                    consumption += float(machine.get('consumption_rate') or 0.0) * (average or 0.0)
+                    machines += 1
+                current = float(stock.get('current_quantity') or 0.0)
+                result.append({
+                    'site_id': site['site_id'], 'site_name': site['site_name'], 'site_code': site.get('site_code'),
+                    'fuel_type_id': stock['fuel_type_id'], 'fuel_name': stock.get('fuel_name'),
+                    'current_quantity': current, 'minimum_threshold': stock.get('minimum_threshold'),
+                    'reorder_point': stock.get('reorder_point'),
+                    'estimated_daily_consumption': round(consumption, 3), 'active_equipment_count': machines,
+                    'days_remaining_estimate': current / consumption if consumption > 0 else UNLIMITED_DAYS
+                })
+        result.sort(key=lambda row: (row['site_name'], row['fuel_name'] or ''))
+        return result
+
+    def equipment_efficiency(self) -> List[dict]:
+        """vw_EquipmentConsumptionSummary"""
+        window_start = self._window_start(SUMMARY_HISTORY_DAYS)
+        with self.lock:
+            sites = self.tables['Sites'].rows
+            result = []
+            for machine in self.tables['Equipment'].rows.values():
+                if not machine.get('is_active', True):
+                    continue
+                average, total, days = self._average_hours(machine['equipment_id'], window_start)
+                rate = float(machine.get('consumption_rate') or 0.0)
+                result.append({
+                    'equipment_id': machine['equipment_id'], 'equipment_name': machine['equipment_name'],
+                    'equipment_code': machine.get('equipment_code'),
+                    'site_name': (sites.get(machine['site_id']) or {}).get('site_name'),
+                    'fuel_name': machine.get('fuel_name'), 'consumption_rate': rate,
+                    'avg_daily_hours': average or 0.0, 'total_hours_30days': total,
+                    'estimated_daily_consumption': rate * (average or 0.0), 'days_logged': days
+                })
+        result.sort(key=lambda row: (row['site_name'] or '', row['equipment_name'] or ''))
+        return result
+
+    def consumption_summary(self, start: str, end: str, site_id: Optional[int] = None) -> List[dict]:
+        """Usage totals per site and fuel over [start, end]"""
+        groups: Dict[Tuple[str, str], dict] = {}
+        with self.lock:
+            for row in self.tables['UsageTransactions'].select({'site_id': site_id}, start=start, end=end):
+                group = groups.get((row['site_name'], row['fuel_name']))
+                quantity = float(row.get('quantity') or 0.0)
+                if group is None:
+                    groups[(row['site_name'], row['fuel_name'])] = {
+                        'site_name': row['site_name'], 'fuel_name': row['fuel_name'], 'total_consumed': quantity,
+                        'transaction_count': 1, 'first_usage': row['usage_date'], 'last_usage': row['usage_date']
+                    }
+                    continue
+                group['total_consumed'] += quantity
+                group['transaction_count'] += 1
+                group['first_usage'] = min(group['first_usage'], row['usage_date'])
+                group['last_usage'] = max(group['last_usage'], row['usage_date'])
+        for group in groups.values():
+            group['avg_daily_consumption'] = group['total_consumed'] / group['transaction_count']
+        return [groups[key] for key in sorted(groups, key=lambda key: (key[0] or '', key[1] or ''))]
+
+    # Procedures (ports of database/forecasting_procedures.sql)
+
+    def _forecast(self, stock: dict, forecast_date: str, safety_factor: float, window_start: str) -> dict:
+        consumption, total_equipment, with_data, hours = 0.0, 0, 0, []
+        for machine in self.tables['Equipment'].select({'site_id': stock['site_id'],
+                                                        'fuel_type_id': stock['fuel_type_id']}):
+            if not machine.get('is_active', True):
+                continue
+            average, _, _ = self._average_hours(machine['equipment_id'], window_start)
+            consumption += float(machine.get('consumption_rate') or 0.0) * \
+                (average if average is not None else DEFAULT_HOURS)
+            total_equipment += 1
+            if average is not None:
+                with_data += 1
+                hours.append(average)
+
+        balance = float(stock.get('current_quantity') or 0.0)
+        daily = consumption * safety_factor
+        days = math.floor(balance / daily) if daily > 0 else UNLIMITED_DAYS
+        confidence = 50.0 + with_data / total_equipment * 50.0 if total_equipment else 85.0
+        values = {
+            'current_balance': balance, 'daily_consumption_rate': round(daily, 3), 'safety_factor': safety_factor,
+            'forecast_days_remaining': days,
+            'next_refill_date_estimate': (date.fromisoformat(forecast_date) + timedelta(days=days)).isoformat(),
+            'recommended_order_quantity': stock.get('optimal_order_quantity'),
+            'confidence_level': round(confidence, 2), 'calculation_method': CALCULATION_METHOD,
+            'total_equipment_count': total_equipment, 'active_equipment_count': with_data,
+            'average_operational_hours': round(sum(hours) / len(hours), 2) if hours else None,
+            'last_calculated': datetime.now().isoformat(timespec='seconds'), 'calculated_by': CALCULATED_BY
+        }
+        return self._save_forecast(stock['site_id'], stock['fuel_type_id'], forecast_date, values)
+
+    def _save_forecast(self, site_id: int, fuel_type_id: int, forecast_date: str, values: dict) -> dict:
+        forecasts = self.tables['ConsumptionForecast']
+        existing = forecasts.find(site_id, fuel_type_id, forecast_date)
+        if existing is not None:
+            existing.update(values)
+            return existing
+        return forecasts.insert(self._decorate('ConsumptionForecast', {
+            'site_id': site_id, 'fuel_type_id': fuel_type_id, 'forecast_date': forecast_date,
+            'created_date': values['last_calculated'], **values
+        }))
+
+    def calculate_site_forecast(self, site_id: int, fuel_type_id: int, forecast_date=None) -> dict:
+        """sp_CalculateSiteForecast"""
+        forecast_date = _iso(forecast_date) or date.today().isoformat()
+        with self.lock:
+            stock = self.tables['FuelStock'].find(site_id, fuel_type_id)
+            if stock is None:
+                raise ValueError(f"No stock record for site {site_id} and fuel type {fuel_type_id}")
+            self.dirty = True
+            return self._forecast(stock, forecast_date, self.safety_factor(), self._window_start())
+
+    def calculate_all_forecasts(self, forecast_date=None) -> int:
+        """sp_CalculateAllForecasts"""
+        forecast_date = _iso(forecast_date) or date.today().isoformat()
+        with self.lock:
+            active_sites = self._active_site_ids()
+            safety_factor, window_start = self.safety_factor(), self._window_start()
+            count = 0
+            for stock in list(self.tables['FuelStock'].rows.values()):
+                if stock['site_id'] in active_sites:
+                    self._forecast(stock, forecast_date, safety_factor, window_start)
+                    count += 1
+            self.dirty = True
+        logger.info(f"All forecasts calculated successfully for date: {forecast_date} ({count} forecasts)")
+        return count
+
+    def calculate_model_forecasts(self, site_id: Optional[int] = None, forecast_date=None, history_days: int = 182,
+                                  horizon: int = 28, workers: int = 0) -> Dict[str, int]:
+        """Holt-Winters forecasts (see app.calculate_model_forecasts); models refit only on new hours logs"""
+        forecast_date = _iso(forecast_date) or date.today().isoformat()
+        window_start = (date.today() - timedelta(days=history_days)).isoformat()
+        with self.lock:
+            active_sites = self._active_site_ids()
+            stocks = [stock for stock in self.tables['FuelStock'].select({'site_id': site_id})
+                      if stock['site_id'] in active_sites]
+            equipment = [item for item in self.tables['Equipment'].select({'site_id': site_id})
+                         if item.get('is_active', True)]
+            logs, usage_rows = self.tables['OperationalHoursLog'], self.tables['UsageTransactions']
+            models = self.tables['ForecastModels']
+            signatures, usage, cached = {}, {}, {}
+            for item in equipment:
+                equipment_id = item['equipment_id']
+                rows = logs.select({'equipment_id': equipment_id})
+                if rows:
+                    signatures[equipment_id] = timeseries.data_signature(
+                        len(rows), max(row['log_date'] for row in rows),
+                        sum(float(row.get('running_hours') or 0.0) for row in rows))
+                    litres = sum(float(row.get('quantity') or 0.0)
+                                 for row in usage_rows.select({'equipment_id': equipment_id}, start=window_start))
+                    usage[equipment_id] = (litres, sum(float(row.get('running_hours') or 0.0) for row in rows
+                                                       if row['log_date'] >= window_start))
+                if models.get(equipment_id) is not None:
+                    cached[equipment_id] = models.get(equipment_id)
+            stale = timeseries.stale_equipment(signatures, cached)
+            history = {equipment_id: {row['log_date']: row.get('running_hours')
+                                      for row in logs.select({'equipment_id': equipment_id}, start=window_start)}
+                       for equipment_id in stale}
+            safety_factor = self.safety_factor()
+
+        # Fitting can take a while on big fleets; it needs no table access
+        fitted = timeseries.fit_models(history, history_days, workers)
+
+        with self.lock:
+            for equipment_id in stale:
+                models.rows.pop(equipment_id, None)
+            fitted_date = datetime.now().isoformat(timespec='seconds')
+            models.insert_many({'equipment_id': equipment_id, 'data_signature': signatures[equipment_id],
+                                'fitted_date': fitted_date, **model} for equipment_id, model in fitted.items())
+            current = {equipment_id: model for equipment_id, model in cached.items() if equipment_id not in stale}
+            current.update(fitted)
+            forecasts = timeseries.site_forecasts(stocks, equipment, current, usage, safety_factor,
+                                                  date.fromisoformat(forecast_date), horizon)
+            last_calculated = datetime.now().isoformat(timespec='seconds')
+            for forecast in forecasts:
+                values = {key: value for key, value in forecast.items() if key not in ('site_id', 'fuel_type_id')}
+                self._save_forecast(forecast['site_id'], forecast['fuel_type_id'], forecast_date,
+                                    {**values, 'last_calculated': last_calculated, 'calculated_by': CALCULATED_BY})
+            self.dirty = True
+        logger.info(f"Model forecasts calculated for {forecast_date}: {len(forecasts)} forecasts, "
+                    f"{len(fitted)} models fitted")
+        return {'forecasts': len(forecasts), 'models_fitted': len(fitted), 'models_cached': len(current) - len(fitted)}
+
+    def _offers(self, today: str) -> List[dict]:
+        """Today's purchase price per active supplier and fuel, with the supplier's terms"""
+        suppliers = self.tables['Suppliers'].rows
+        offers = {}
+        for price in sorted(self.tables['FuelPrices'].rows.values(), key=lambda row: row['effective_date']):
+            supplier = suppliers.get(price.get('supplier_id'))
+            if (supplier is None or not supplier.get('is_active', True) or not price.get('is_active', True)
+                    or price.get('price_type') == 'Market' or price['effective_date'] > today
+                    or (price.get('expiry_date') or today) < today):
+                continue
+            offers[(price['fuel_type_id'], supplier['supplier_id'])] = {
+                **{key: price.get(key) for key in ('fuel_type_id', 'supplier_id', 'price_per_liter',
+                                                   'volume_discount_threshold', 'volume_discount_rate')},
+                **{key: supplier.get(key) for key in ('supplier_name', 'lead_time_days', 'minimum_order_quantity',
+                                                      'is_preferred', 'rating')}}
+        return list(offers.values())
+
+    def _delivery_costs(self, history_start: str, site_id: Optional[int] = None) -> Dict[Tuple[int, int], float]:
+        """Average transport and handling cost of supplier refills per (site_id, fuel_type_id)"""
+        delivery_costs: Dict[Tuple[int, int], List[float]] = {}
+        for row in self.tables['RefillTransactions'].select({'site_id': site_id}, start=history_start):
+            if row.get('supplier_id') is not None:
+                delivery_costs.setdefault((row['site_id'], row['fuel_type_id']), []).append(
+                    float(row.get('transportation_cost') or 0.0) + float(row.get('loading_unloading_cost') or 0.0))
+        return {key: sum(costs) / len(costs) for key, costs in delivery_costs.items()}
+
+    def optimize_reorders(self, site_id: Optional[int] = None, force: bool = False, save: bool = True,
+                          history_days: int = 90, order_cost: float = 150000.0, holding_rate: float = 0.2,
+                          service_level: float = 0.95, min_rating: float = 0.0) -> Dict[str, Any]:
+        """Reorder optimization (see app.optimize_reorders); unchanged stock rows are skipped"""
+        today = date.today().isoformat()
+        history_start = (date.today() - timedelta(days=history_days)).isoformat()
+        with self.lock:
+            active_sites = self._active_site_ids()
+            forecasts, sites = self.tables['ConsumptionForecast'], self.tables['Sites'].rows
+            daily_usage: Dict[Tuple[int, int, str], float] = {}
+            for row in self.tables['UsageTransactions'].select({'site_id': site_id}, start=history_start):
+                key = (row['site_id'], row['fuel_type_id'], row['usage_date'][:10])
+                daily_usage[key] = daily_usage.get(key, 0.0) + float(row.get('quantity') or 0.0)
+            usage = reorder.daily_usage_stats(((*key, litres) for key, litres in daily_usage.items()), history_days)
+            order_costs = self._delivery_costs(history_start, site_id)
+
+            pairs = []
+            for stock in self.tables['FuelStock'].select({'site_id': site_id}):
+                if stock['site_id'] not in active_sites:
+                    continue
+                key = (stock['site_id'], stock['fuel_type_id'])
+                latest = forecasts.select({'site_id': key[0], 'fuel_type_id': key[1]}, limit=1)
+                mean, spread = usage.get(key, (0.0, None))
+                demand = (float(latest[0]['daily_consumption_rate']) / float(latest[0].get('safety_factor') or 1.0)
+                          if latest else mean)
+                pairs.append({'stock_id': stock['stock_id'], 'site_id': key[0], 'fuel_type_id': key[1],
+                              'site_name': stock.get('site_name'), 'fuel_name': stock.get('fuel_name'),
+                              'maximum_capacity': stock.get('maximum_capacity'),
+                              'optimal_order_quantity': stock.get('optimal_order_quantity'),
+                              'safety_stock_days': sites[key[0]].get('safety_stock_days', 7),
+                              'daily_demand': demand, 'demand_std': spread})
+            recommendations = self.tables['ReorderRecommendations']
+            stored = {(row['site_id'], row['fuel_type_id']): row['input_signature']
+                      for row in recommendations.rows.values()}
+            result = reorder.run_optimizer(pairs, self._offers(today), order_costs, stored, order_cost,
+                                           holding_rate, service_level, min_rating, force)
+
+            if save and result['recommendations']:
+                calculated = datetime.now().isoformat(timespec='seconds')
+                stocks = self.tables['FuelStock']
+                for row in result['recommendations']:
+                    recommendations.rows.pop(row['stock_id'], None)
+                    recommendations.insert({**{key: value for key, value in row.items()
+                                               if key not in ('candidates', 'reason')}, 'calculated_date': calculated})
+                    if row['supplier_id'] is None:
+                        continue
+                    stocks.get(row['stock_id']).update({
+                        'reorder_point': row['reorder_point'], 'optimal_order_quantity': row['order_quantity'],
+                        'last_updated': calculated, 'updated_by': 'Reorder Optimizer'})
+                    forecast = forecasts.find(row['site_id'], row['fuel_type_id'], today)
+                    if forecast is not None:
+                        forecast['recommended_order_quantity'] = row['order_quantity']
+                self.dirty = True
+        return result
+
+    def reorder_recommendations(self, site_id: Optional[int] = None) -> List[dict]:
+        """Stored recommendations with the current stock, by site and fuel"""
+        with self.lock:
+            stocks = self.tables['FuelStock']
+            result = []
+            for row in self.tables['ReorderRecommendations'].rows.values():
+                if site_id and row['site_id'] != site_id:
+                    continue
+                stock = stocks.get(row['stock_id']) or {}
+                result.append({**row, 'current_quantity': stock.get('current_quantity'),
+                               'maximum_capacity': stock.get('maximum_capacity')})
+        result.sort(key=lambda row: (row.get('site_name') or '', row.get('fuel_name') or ''))
+        return result
+
+    def transfer_inputs(self, history_start: str, fuel_type_id: Optional[int] = None) -> Tuple[list, list, list, dict]:
+        """
+        (stock rows with their forecast demand, (site_id, latitude, longitude) rows,
+        (fuel_type_id, lead_time_days, is_preferred) rows, delivery cost per site and fuel) for
+        transfers.plan_transfers
+        """
+        with self.lock:
+            sites, forecasts = self.tables['Sites'].rows, self.tables['ConsumptionForecast']
+            active_sites = self._active_site_ids()
+            pairs = []
+            for stock in self.tables['FuelStock'].select({'fuel_type_id': fuel_type_id}):
+                latest = forecasts.select({'site_id': stock['site_id'], 'fuel_type_id': stock['fuel_type_id']},
+                                          limit=1)
+                if stock['site_id'] in active_sites and latest:
+                    rate = latest[0].get('daily_consumption_rate')
+                    pairs.append({**stock, 'site_name': sites[stock['site_id']]['site_name'],
+                                  'daily_demand': float(rate or 0.0) / float(latest[0].get('safety_factor') or 1.0)})
+            located = [(site_id, sites[site_id].get('latitude'), sites[site_id].get('longitude'))
+                       for site_id in active_sites]
+            lead_times = [(offer['fuel_type_id'], offer['lead_time_days'], offer['is_preferred'])
+                          for offer in self._offers(date.today().isoformat())]
+            order_costs = self._delivery_costs(history_start)
+        return pairs, located, lead_times, order_costs
+
+    def plan_deliveries(self, site_id: Optional[int] = None, fuel_type_id: Optional[int] = None,
+                        horizon_days: int = 28, truck_litres: float = 20000.0, daily_trucks: int = 0,
+                        save: bool = True) -> Dict[str, Any]:
+        """Delivery scheduling (see app.plan_deliveries); one site and fuel is planned around the others"""
+        today = date.today()
+        single = bool(site_id and fuel_type_id)
+        with self.lock:
+            sites, forecasts = self.tables['Sites'].rows, self.tables['ConsumptionForecast']
+            active_sites = self._active_site_ids()
+            pairs = []
+            for stock in self.tables['FuelStock'].select({'site_id': site_id, 'fuel_type_id': fuel_type_id}
+                                                         if single else None):
+                latest = forecasts.select({'site_id': stock['site_id'], 'fuel_type_id': stock['fuel_type_id']},
+                                          limit=1)
+                if stock['site_id'] in active_sites and latest:
+                    pairs.append({**stock, 'site_name': sites[stock['site_id']]['site_name'],
+                                  'daily_demand': latest[0].get('daily_consumption_rate')})
+            recommended = {(row['site_id'], row['fuel_type_id']): row['supplier_id']
+                           for row in self.tables['ReorderRecommendations'].rows.values()
+                           if row.get('supplier_id') is not None}
+            schedule = self.tables['DeliverySchedule']
+            covered = [key for key, row in schedule.rows.items()
+                       if not single or (row['site_id'], row['fuel_type_id']) == (site_id, fuel_type_id)]
+            reserved: Dict[Tuple[int, str], int] = {}
+            if single:
+                for row in schedule.rows.values():
+                    if (row['site_id'], row['fuel_type_id']) != (site_id, fuel_type_id) \
+                            and row['delivery_date'] >= today.isoformat():
+                        key = (row['supplier_id'], row['delivery_date'])
+                        reserved[key] = reserved.get(key, 0) + row['trucks']
+
+            deliveries.assign_suppliers(pairs, self._offers(today.isoformat()), recommended)
+            result = deliveries.schedule_deliveries(pairs, horizon_days, truck_litres, daily_trucks, reserved, today)
+
+            if save:
+                for key in covered:
+                    schedule.rows.pop(key)
+                planned = datetime.now().isoformat(timespec='seconds')
+                schedule.insert_many({**{key: value for key, value in row.items() if key != 'below_minimum_order'},
+                                      'status': 'Planned', 'planned_date': planned} for row in result['schedule'])
+                self.dirty = True
+        return result
+
+    def delivery_schedule(self, site_id: Optional[int] = None, fuel_type_id: Optional[int] = None,
+                          supplier_id: Optional[int] = None, start: Optional[str] = None,
+                          end: Optional[str] = None) -> List[dict]:
+        """Planned deliveries by date, site and fuel"""
+        with self.lock:
+            suppliers = self.tables['Suppliers'].rows
+            result = [{**row, 'supplier_name': (suppliers.get(row['supplier_id']) or {}).get('supplier_name')}
+                      for row in self.tables['DeliverySchedule'].rows.values()
+                      if (not site_id or row['site_id'] == site_id)
+                      and (not fuel_type_id or row['fuel_type_id'] == fuel_type_id)
+                      and (not supplier_id or row['supplier_id'] == supplier_id)
+                      and (not start or row['delivery_date'] >= start)
+                      and (not end or row['delivery_date'] <= end[:10])]
+        result.sort(key=lambda row: (row['delivery_date'], row.get('site_name') or '', row.get('fuel_name') or ''))
+        return result
+
+    def price_index(self) -> Tuple[prices.PriceIndex, bool]:
+        """FuelPrices interval index, rebuilt after price rows are added"""
+        table = self.tables['FuelPrices']
+        with self.lock:
+            return prices.cached_index(('demo', id(table), table.version), lambda: list(table.rows.values()))
+
+    def usage_columns(self, start: str, end: str, site_id: Optional[int] = None,
+                      fuel_type_id: Optional[int] = None) -> Tuple[list, list, list, list]:
+        """(site_id, fuel_type_id, usage_date, quantity) columns of the usage in [start, end]"""
+        with self.lock:
+            rows = self.tables['UsageTransactions'].select({'site_id': site_id, 'fuel_type_id': fuel_type_id},
+                                                           start=start, end=end)
+            return ([row['site_id'] for row in rows], [row['fuel_type_id'] for row in rows],
+                    [row['usage_date'][:10] for row in rows], [float(row.get('quantity') or 0.0) for row in rows])
+
+    def recalculate_site(self, site_id: int):
+        """Refresh today's forecast for every fuel stocked at a site"""
+        with self.lock:
+            for stock in self.tables['FuelStock'].select({'site_id': site_id}):
+                self.calculate_site_forecast(site_id, stock['fuel_type_id'])
+
+    def create_forecast_scenario(self, forecast_id: int, scenario_name: str, adjusted_consumption_rate=None,
+                                 adjusted_safety_factor=None) -> dict:
+        """sp_CreateForecastScenario"""
+        with self.lock:
+            forecast = self.tables['ConsumptionForecast'].get(forecast_id)
+            if forecast is None:
+                raise ValueError(f"Forecast {forecast_id} not found")
+            consumption = float(adjusted_consumption_rate) if adjusted_consumption_rate is not None \
+                else float(forecast.get('daily_consumption_rate') or 0.0)
+            original_safety_factor = forecast.get('safety_factor')
+            if adjusted_safety_factor is not None and original_safety_factor:
+                consumption = consumption * float(adjusted_safety_factor) / float(original_safety_factor)
+            balance = float(forecast.get('current_balance') or 0.0)
+            days = math.floor(balance / consumption) if consumption > 0 else UNLIMITED_DAYS
+            self.dirty = True
+            return self.tables['ForecastScenarios'].insert({
+                'forecast_id': forecast_id, 'scenario_name': scenario_name,
+                'adjusted_consumption_rate': adjusted_consumption_rate,
+                'adjusted_safety_factor': adjusted_safety_factor, 'scenario_days_remaining': days,
+                'scenario_refill_date': (date.today() + timedelta(days=days)).isoformat(),
+                'scenario_order_quantity': forecast.get('recommended_order_quantity'),
+                'created_date': datetime.now().isoformat(timespec='seconds')
+            })
+
+    def check_forecast_alerts(self) -> int:
+        """sp_CheckForecastAlerts: at most one alert per configuration per day"""
+        today = date.today().isoformat()
+        now = datetime.now().isoformat(timespec='seconds')
+        raised = 0
+        with self.lock:
+            history = self.tables['AlertHistory']
+            forecasts, stocks = self.tables['ConsumptionForecast'], self.tables['FuelStock']
+            active_sites = self._active_site_ids()
+            for config in list(self.tables['AlertConfigurations'].rows.values()):
+                if not config.get('is_active', True) or config.get('site_id') not in active_sites:
+                    continue
+                if history.count({'alert_id': config['alert_id']}, start=today):
+                    continue
+                key = (config.get('site_id'), config.get('fuel_type_id'))
+                message, severity = None, None
+                if config.get('alert_type') == 'Forecast Shortage':
+                    forecast = forecasts.find(*key, today)
+                    days = forecast and forecast.get('forecast_days_remaining')
+                    threshold = config.get('threshold_days')
+                    if days is not None and threshold is not None and days <= threshold:
+                        message = (f"Forecast shortage alert: {forecast['site_name']} - {forecast['fuel_name']} "
+                                   f"estimated to run out in {days} days")
+                        severity = 'Critical' if days <= 2 else 'High' if days <= 5 else 'Medium'
+                elif config.get('alert_type') == 'Low Stock':
+                    stock = stocks.find(*key)
+                    threshold = config.get('threshold_value')
+                    current = stock and float(stock.get('current_quantity') or 0.0)
+                    if stock is not None and threshold is not None and current <= float(threshold):
+                        message = (f"Low stock alert: {stock['site_name']} - {stock['fuel_name']} "
+                                   f"current stock: {current:.3f} liters")
+                        severity = 'Critical' if current <= float(stock.get('minimum_threshold') or 0.0) \
+                            else 'High'
+                if message:
+                    history.insert(self._decorate('AlertHistory', {
+                        'alert_id': config['alert_id'], 'alert_message': message, 'severity_level': severity,
+                        'triggered_date': now
+                    }))
+                    raised += 1
+            if raised:
+                self.dirty = True
+        return raised
+
+    def update_stock_after_transaction(self, site_id: int, fuel_type_id: int, quantity_change: float):
+        """sp_UpdateStockAfterTransaction: adjust stock, refresh the forecast and check alerts"""
+        with self.lock:
+            stock = self.tables['FuelStock'].find(site_id, fuel_type_id)
+            if stock is None:
+                raise ValueError(f"No stock record for site {site_id} and fuel type {fuel_type_id}")
+            stock['current_quantity'] = float(stock.get('current_quantity') or 0.0) + float(quantity_change)
+            stock['last_updated'] = datetime.now().isoformat(timespec='seconds')
+            stock['updated_by'] = CALCULATED_BY
+            self.calculate_site_forecast(site_id, fuel_type_id)
+            self.check_forecast_alerts()
+
+    # Writes
+
+    def insert(self, table: str, row: dict) -> dict:
+        """Insert one row with its joined names; raises ConstraintError on duplicates"""
+        with self.lock:
+            for column in ('site_id', 'fuel_type_id', 'equipment_id'):
+                parent = {'site_id': 'Sites', 'fuel_type_id': 'FuelTypes', 'equipment_id': 'Equipment'}[column]
+                if row.get(column) is not None and self.tables[parent].get(row[column]) is None:
+                    raise ConstraintError(f"{parent} has no {column} {row[column]}")
+            inserted = self.tables[table].insert(self._decorate(table, row))
+            self.dirty = True
+            return inserted
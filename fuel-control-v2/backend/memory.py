@@ -0,0 +1,265 @@
+"""
+Per-request memory accounting for Advanced Fuel Consumption Forecasting System
+Sampled tracemalloc peaks, per-request memory budgets and top allocation sites
+"""
+
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_QUERY_ARG = '__memory'
+
+_current_record = contextvars.ContextVar('fuel_control_memory_record', default=None)
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when materializing a result would exceed the per-request memory budget"""
+
+    def __init__(self, used_bytes: int, budget_bytes: int, rows: List[Dict[str, Any]],
+                 remaining: Optional[Iterator[Dict[str, Any]]] = None):
+        super().__init__(
+            f"Result exceeds the per-request memory budget "
+            f"({used_bytes / 1048576:.1f} MB used, {budget_bytes / 1048576:.1f} MB allowed); "
+            f"narrow the filters (site_id, equipment_id, start_date/end_date)"
+        )
+        self.used_bytes = used_bytes
+        self.budget_bytes = budget_bytes
+        self.rows = rows
+        self.remaining = remaining
+
+
+class MemoryRecord:
+    """Memory accounting for one request or background job"""
+
+    __slots__ = ('label', 'sampled', 'baseline', 'started', 'peak_bytes', 'checkpoint_bytes',
+                 'top_sites', 'status')
+
+    def __init__(self, label: str, sampled: bool):
+        self.label = label
+        self.sampled = sampled
+        self.baseline = tracemalloc.get_traced_memory()[0] if sampled else 0
+        self.started = time.perf_counter()
+        self.peak_bytes = None
+        self.checkpoint_bytes = 0
+        self.top_sites = []
+        self.status = None
+
+
+def estimate_row_bytes(rows: List[Dict[str, Any]], sample_size: int = 50) -> int:
+    """Approximate the size of one row dict (container, keys and values)"""
+    sample = rows[:sample_size]
+    if not sample:
+        return 0
+    total = 0
+    for row in sample:
+        total += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+    return total // len(sample)
+
+
+class FetchBudget:
+    """Measures how much a result set being materialized costs against the budget"""
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.record = _current_record.get()
+        self.row_bytes = None
+
+    def used(self, rows: List[Dict[str, Any]]) -> int:
+        if self.record is not None and self.record.sampled and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0] - self.record.baseline
+        if self.row_bytes is None:
+            self.row_bytes = estimate_row_bytes(rows)
+        return self.row_bytes * len(rows)
+
+    def exceeded(self, rows: List[Dict[str, Any]]) -> Optional[int]:
+        used = self.used(rows)
+        return used if used > self.limit_bytes else None
+
+
+class MemoryTracker:
+    """Sample requests under tracemalloc and keep the heaviest requests and allocation sites"""
+
+    def __init__(self, sample_rate: float = 0.0, budget_mb: float = 0.0, budget_action: str = 'stream',
+                 history: int = 200, top_sites: int = 25, frames: int = 1):
+        if budget_action not in ('stream', 'fail'):
+            raise ValueError(f"Unknown memory budget action: {budget_action}")
+        self.sample_rate = sample_rate
+        self.budget_bytes = int(budget_mb * 1048576)
+        self.budget_action = budget_action
+        self.top_sites = top_sites
+        self.frames = frames
+        self.recent = deque(maxlen=history)
+        self.sites: Dict[str, Dict[str, Any]] = {}
+        self._active = 0
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    # Request lifecycle
+
+    def begin(self, label: str, force: bool = False):
+        """Start accounting for a request or job; returns a token for end()"""
+        sampled = force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        if sampled:
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self.frames)
+                    self._started_tracing = True
+                self._active += 1
+                # The peak is process-wide; with concurrent sampled requests it is an upper bound
+                tracemalloc.reset_peak()
+        record = MemoryRecord(label, sampled)
+        return record, _current_record.set(record)
+
+    def end(self, record: MemoryRecord, token, status: Optional[str] = None):
+        try:
+            _current_record.reset(token)
+        except ValueError:
+            # Streamed responses may finish in a different context than they started
+            _current_record.set(None)
+        record.status = status
+        if not record.sampled:
+            return
+        record.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - record.baseline)
+        with self._lock:
+            self._active -= 1
+            if self._active == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        duration_ms = (time.perf_counter() - record.started) * 1000.0
+        self.recent.append({
+            'label': record.label,
+            'status': status,
+            'peak_kb': round(record.peak_bytes / 1024, 1),
+            'duration_ms': round(duration_ms, 1),
+            'timestamp': datetime.now().isoformat(),
+            'top_sites': record.top_sites[:5]
+        })
+        logger.info(f"Memory peak {record.peak_bytes / 1048576:.2f} MB for {record.label}")
+
+    def tracked(self, label: str):
+        """Decorator accounting a background job unless it already runs inside a tracked request"""
+        def decorator(func: Callable):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _current_record.get() is not None:
+                    return func(*args, **kwargs)
+                record, token = self.begin(label)
+                status = 'ok'
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    status = 'error'
+                    raise
+                finally:
+                    self.end(record, token, status)
+            return wrapper
+        return decorator
+
+    # Allocation sites
+
+    def checkpoint(self):
+        """Record allocation sites if the current sampled request reached a new high"""
+        record = _current_record.get()
+        if record is None or not record.sampled or not tracemalloc.is_tracing():
+            return
+        current = tracemalloc.get_traced_memory()[0] - record.baseline
+        if current <= record.checkpoint_bytes:
+            return
+        record.checkpoint_bytes = current
+        record.top_sites = self._snapshot_sites()
+        with self._lock:
+            for site in record.top_sites:
+                entry = self.sites.setdefault(site['site'], {'site': site['site'], 'max_kb': 0, 'hits': 0})
+                entry['max_kb'] = max(entry['max_kb'], site['size_kb'])
+                entry['hits'] += 1
+
+    def _snapshot_sites(self) -> List[Dict[str, Any]]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        sites = []
+        for stat in snapshot.statistics('lineno')[:self.top_sites]:
+            frame = stat.traceback[0]
+            sites.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'count': stat.count
+            })
+        return sites
+
+    # Budget
+
+    def fetch_budget(self) -> Optional[FetchBudget]:
+        return FetchBudget(self.budget_bytes) if self.budget_bytes > 0 else None
+
+    def report(self, live: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda s: s['max_kb'], reverse=True)[:self.top_sites]
+        report = {
+            'tracing': tracemalloc.is_tracing(),
+            'sample_rate': self.sample_rate,
+            'budget_mb': self.budget_bytes / 1048576,
+            'budget_action': self.budget_action,
+            'heaviest_requests': sorted(self.recent, key=lambda r: r['peak_kb'], reverse=True)[:50],
+            'top_allocation_sites': sites
+        }
+        if live and tracemalloc.is_tracing():
+            report['live_allocation_sites'] = self._snapshot_sites()
+        return report
+
+
+def iter_json_array(rows: Iterable[Dict[str, Any]], dumps: Callable[[Any], str],
+                    chunk_rows: int = 500) -> Iterator[str]:
+    """Serialize rows as a JSON array, yielding a chunk of elements at a time"""
+    yield '['
+    chunk = []
+    separator = ''
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_rows:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']'
+
+
+def init_memory_tracking(app, config) -> MemoryTracker:
+    """Account memory for sampled (or admin-flagged ?__memory=1) requests"""
+    from flask import g, request
+    from admin import is_admin_request
+
+    tracker = MemoryTracker(
+        sample_rate=config.MEMORY_SAMPLE_RATE,
+        budget_mb=config.MEMORY_BUDGET_MB,
+        budget_action=config.MEMORY_BUDGET_ACTION,
+        history=config.MEMORY_HISTORY,
+        top_sites=config.MEMORY_TOP_SITES
+    )
+
+    @app.before_request
+    def _begin_memory_accounting():
+        force = bool(request.args.get(MEMORY_QUERY_ARG)) and is_admin_request()
+        route = request.url_rule.rule if request.url_rule else request.path
+        g.memory_record, g.memory_token = tracker.begin(f"{request.method} {route}", force)
+
+    @app.teardown_request
+    def _end_memory_accounting(error=None):
+        record = g.pop('memory_record', None)
+        if record is not None:
+            tracker.end(record, g.pop('memory_token'), 'error' if error else 'ok')
+
+    app.extensions['memory_tracker'] = tracker
+    return tracker
@@ -0,0 +1,259 @@
+"""
+Effective-dated fuel prices for Advanced Fuel Consumption Forecasting System
+Flattens FuelPrices into non-overlapping day segments per (fuel, supplier, price_type), so a
+price lookup is one binary search and whole arrays of transactions are priced with a single
+np.searchsorted; the index is cached until the FuelPrices rows it was built from change
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+PRICE_TYPES = ('Purchase', 'Market', 'Contract')
+GROUPINGS = ('fuel', 'site', 'site_fuel', 'month', 'day')
+DAY_SPAN = 1 << 20   # Day numbers per key in the flat index (days since 1970 stay below this until 4840)
+KEY_SPAN = 1 << 24   # Fuel and supplier ids stay below this
+ANY_SUPPLIER = 0     # Supplier slot of the fleet reference price: the supplier-less price or the suppliers' mean
+
+_index_cache: Optional[Tuple[Any, 'PriceIndex']] = None
+_index_lock = threading.Lock()
+
+
+def day_numbers(values) -> np.ndarray:
+    """Days since 1970-01-01 for ISO dates or datetimes, date objects or datetime64 values"""
+    try:
+        days = np.asarray(values, dtype='datetime64[D]')
+    except (TypeError, ValueError):
+        days = np.array([str(value)[:10] for value in values], dtype='datetime64[D]')
+    return days.astype(np.int64)
+
+
+def _flatten(starts: np.ndarray, ends: np.ndarray, ranks: np.ndarray,
+             values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Non-overlapping (start, end, value) segments for half-open day intervals; where intervals
+    overlap, the highest rank (latest effective date, then latest price_id) wins
+    """
+    bounds = np.unique(np.concatenate([starts, ends]))
+    lo, hi = bounds[:-1], bounds[1:]
+    cover = (starts[None, :] <= lo[:, None]) & (ends[None, :] > lo[:, None])
+    winner = np.where(cover, ranks[None, :], -1).argmax(axis=1)
+    keep = cover.any(axis=1)
+    return lo[keep], hi[keep], values[winner[keep]]
+
+
+def _value_at(segments: Tuple[np.ndarray, np.ndarray, np.ndarray], days: np.ndarray) -> np.ndarray:
+    lo, hi, values = segments
+    at = np.maximum(np.searchsorted(lo, days, side='right') - 1, 0)
+    return np.where((days >= lo[at]) & (days < hi[at]), values[at], np.nan) if len(lo) else np.full(len(days), np.nan)
+
+
+class PriceIndex:
+    """
+    Interval index over FuelPrices rows (price_id, fuel_type_id, supplier_id, price_type,
+    price_per_liter, effective_date, expiry_date, is_active).
+
+    A row covers effective_date through expiry_date (open-ended without one); inactive rows are
+    left out. Each (fuel, supplier, price_type) key becomes sorted day segments, and every key's
+    segments are laid end to end in one array at key_code * DAY_SPAN + day, so any mix of keys
+    and days is found by one np.searchsorted. Per fuel and price type there is also a fleet
+    reference key (no supplier): the supplier-less price where there is one, else the mean of
+    the suppliers' prices on that day.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        grouped: Dict[Tuple[int, int, int], List[Tuple[int, int, int, float]]] = {}
+        for row in rows:
+            price_type = row.get('price_type') or 'Purchase'
+            if row.get('is_active') in (0, False) or price_type not in PRICE_TYPES:
+                continue
+            start = int(day_numbers([row['effective_date']])[0])
+            end = int(day_numbers([row['expiry_date']])[0]) + 1 if row.get('expiry_date') else DAY_SPAN
+            slot = -1 if row.get('supplier_id') is None else int(row['supplier_id'])
+            key = (PRICE_TYPES.index(price_type), int(row['fuel_type_id']), slot)
+            grouped.setdefault(key, []).append((min(max(start, 0), DAY_SPAN - 1), min(end, DAY_SPAN),
+                                                int(row.get('price_id') or 0), float(row['price_per_liter'])))
+
+        segments: Dict[Tuple[int, int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for key, intervals in grouped.items():
+            starts, ends, price_ids, values = (np.array(column) for column in zip(*intervals))
+            ranks = np.empty(len(starts), dtype=np.int64)
+            ranks[np.lexsort((price_ids, starts))] = np.arange(len(starts))
+            segments[key] = _flatten(starts, ends, ranks, values.astype(float))
+
+        # Fleet reference per fuel and price type
+        quotes: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
+        for key in segments:
+            quotes.setdefault(key[:2], []).append(key)
+        for (type_index, fuel_type_id), keys in quotes.items():
+            supplierless = (type_index, fuel_type_id, -1)
+            if supplierless in segments:
+                segments[(type_index, fuel_type_id, ANY_SUPPLIER)] = segments[supplierless]
+                continue
+            bounds = np.unique(np.concatenate([np.concatenate(segments[key][:2]) for key in keys]))
+            lo = bounds[:-1]
+            values = np.vstack([_value_at(segments[key], lo) for key in keys])
+            quoted = ~np.isnan(values).all(axis=0)
+            mean = np.nanmean(values[:, quoted], axis=0) if quoted.any() else np.empty(0)
+            segments[(type_index, fuel_type_id, ANY_SUPPLIER)] = (lo[quoted], bounds[1:][quoted], mean)
+
+        self.keys = sorted(key for key in segments if key[2] != -1)
+        self.key_codes = np.array([self._key_code(*key) for key in self.keys], dtype=np.int64)
+        starts, ends, values = [], [], []
+        for code, key in enumerate(self.keys):
+            lo, hi, value = segments[key]
+            starts.append(code * DAY_SPAN + lo)
+            ends.append(code * DAY_SPAN + hi)
+            values.append(value)
+        self.starts = np.concatenate(starts).astype(np.int64) if starts else np.empty(0, dtype=np.int64)
+        self.ends = np.concatenate(ends).astype(np.int64) if ends else np.empty(0, dtype=np.int64)
+        self.values = np.concatenate(values).astype(float) if values else np.empty(0)
+
+    @staticmethod
+    def _key_code(type_index, fuel_type_id, slot):
+        return (type_index * KEY_SPAN + fuel_type_id) * KEY_SPAN + slot
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def prices(self, fuel_type_ids, days, supplier_ids=None, price_type: str = 'Purchase') -> np.ndarray:
+        """
+        Price per litre for each (fuel, day[, supplier]) in one pass; NaN where no price was in
+        effect. Without supplier_ids, the fleet reference price is used
+        """
+        fuel = np.asarray(fuel_type_ids, dtype=np.int64)
+        day = np.clip(day_numbers(days), 0, DAY_SPAN - 1)
+        slot = ANY_SUPPLIER if supplier_ids is None else np.asarray(supplier_ids, dtype=np.int64)
+        wanted = self._key_code(PRICE_TYPES.index(price_type), fuel, slot) + np.zeros(len(fuel), dtype=np.int64)
+        if not len(self.values):
+            return np.full(len(fuel), np.nan)
+        code = np.minimum(np.searchsorted(self.key_codes, wanted), len(self.key_codes) - 1)
+        point = code * DAY_SPAN + day
+        segment = np.maximum(np.searchsorted(self.starts, point, side='right') - 1, 0)
+        found = (self.key_codes[code] == wanted) & (point >= self.starts[segment]) & (point < self.ends[segment])
+        return np.where(found, self.values[segment], np.nan)
+
+    def price(self, fuel_type_id: int, day, supplier_id: Optional[int] = None,
+              price_type: str = 'Purchase') -> Optional[float]:
+        """Price per litre of one fuel on one day, or None"""
+        value = self.prices([fuel_type_id], [day], None if supplier_id is None else [supplier_id], price_type)[0]
+        return None if np.isnan(value) else float(value)
+
+    def effective(self, day, fuel_type_id: Optional[int] = None, supplier_id: Optional[int] = None,
+                  price_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every price in effect on `day`; supplier_id None is the fleet reference price"""
+        keys = [key for key in self.keys
+                if (price_type is None or PRICE_TYPES[key[0]] == price_type)
+                and (fuel_type_id is None or key[1] == fuel_type_id)
+                and (supplier_id is None or key[2] == supplier_id)]
+        result = []
+        for type_index, fuel, slot in keys:
+            value = self.price(fuel, day, None if slot == ANY_SUPPLIER else slot, PRICE_TYPES[type_index])
+            if value is not None:
+                result.append({'fuel_type_id': fuel, 'supplier_id': None if slot == ANY_SUPPLIER else slot,
+                               'price_type': PRICE_TYPES[type_index], 'price_per_liter': round(value, 4)})
+        return result
+
+
+def cached_index(signature, load: Callable[[], Iterable[Dict[str, Any]]]) -> Tuple[PriceIndex, bool]:
+    """(index, cache hit): the cached index while `signature` of the FuelPrices table is unchanged"""
+    global _index_cache
+    with _index_lock:
+        if _index_cache is not None and _index_cache[0] == signature:
+            return _index_cache[1], True
+    index = PriceIndex(load())
+    with _index_lock:
+        _index_cache = (signature, index)
+    return index, False
+
+
+def costing_options(options, default_days: int, default_price_type: str) -> Dict[str, Any]:
+    """start_date, end_date, site_id, fuel_type_id, supplier_id, price_type and group_by from request args"""
+    try:
+        end = date.fromisoformat(options.get('end_date') or date.today().isoformat())
+        start = date.fromisoformat(options.get('start_date') or (end - timedelta(days=default_days)).isoformat())
+        ids = {name: int(options[name]) if options.get(name) not in (None, '') else None
+               for name in ('site_id', 'fuel_type_id', 'supplier_id')}
+    except (TypeError, ValueError):
+        raise ValueError('start_date and end_date must be ISO dates; site_id, fuel_type_id and supplier_id integers')
+    if start > end:
+        raise ValueError('start_date must not be after end_date')
+    price_type = options.get('price_type') or default_price_type
+    if price_type not in PRICE_TYPES:
+        raise ValueError(f"price_type must be one of {', '.join(PRICE_TYPES)}")
+    group_by = options.get('group_by') or 'fuel'
+    if group_by not in GROUPINGS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUPINGS)}")
+    return {'start_date': start, 'end_date': end, 'price_type': price_type, 'group_by': group_by, **ids}
+
+
+def cost_consumption(index: PriceIndex, fuel_type_ids, days, litres, site_ids=None, group_by: str = 'fuel',
+                     supplier_id: Optional[int] = None, price_type: str = 'Purchase',
+                     site_names: Optional[Dict[int, str]] = None,
+                     fuel_names: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+    """
+    Cost of consumed litres priced on their own day, totalled per `group_by` group. Rows may be
+    single transactions or litres already summed per day; litres with no price in effect are
+    reported as unpriced rather than costed at zero
+    """
+    started = time.perf_counter()
+    fuel = np.asarray(fuel_type_ids, dtype=np.int64)
+    day = day_numbers(days)
+    litres = np.asarray(litres, dtype=float)
+    supplier = None if supplier_id is None else np.full(len(fuel), supplier_id, dtype=np.int64)
+    price = index.prices(fuel, day, supplier, price_type)
+    priced = ~np.isnan(price)
+    cost = np.where(priced, litres * np.nan_to_num(price), 0.0)
+
+    # One int64 key per group, so grouping is a 1-D sort
+    if group_by == 'fuel':
+        group_key = fuel
+    elif group_by == 'site':
+        group_key = np.asarray(site_ids, dtype=np.int64)
+    elif group_by == 'site_fuel':
+        group_key = np.asarray(site_ids, dtype=np.int64) * KEY_SPAN + fuel
+    elif group_by == 'month':
+        group_key = day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    else:
+        group_key = day
+    groups = []
+    if len(fuel):
+        keys, inverse = np.unique(group_key, return_inverse=True)
+        group_litres = np.bincount(inverse, weights=litres, minlength=len(keys))
+        group_cost = np.bincount(inverse, weights=cost, minlength=len(keys))
+        group_priced = np.bincount(inverse, weights=np.where(priced, litres, 0.0), minlength=len(keys))
+        for key, total, spent, costed in zip(keys.tolist(), group_litres.tolist(), group_cost.tolist(),
+                                             group_priced.tolist()):
+            if group_by == 'fuel':
+                labels = {'fuel_type_id': key, 'fuel_name': (fuel_names or {}).get(key)}
+            elif group_by == 'site':
+                labels = {'site_id': key, 'site_name': (site_names or {}).get(key)}
+            elif group_by == 'site_fuel':
+                site, fuel_type_id = divmod(key, KEY_SPAN)
+                labels = {'site_id': site, 'site_name': (site_names or {}).get(site),
+                          'fuel_type_id': fuel_type_id, 'fuel_name': (fuel_names or {}).get(fuel_type_id)}
+            elif group_by == 'month':
+                labels = {'month': str(np.datetime64(key, 'M'))}
+            else:
+                labels = {'date': str(np.datetime64(key, 'D'))}
+            groups.append({**labels, 'litres': round(total, 2), 'cost': round(spent, 2),
+                           'unpriced_litres': round(total - costed, 2),
+                           'average_price': round(spent / costed, 4) if costed > 0 else None})
+
+    total_litres, total_cost = float(litres.sum()), float(cost.sum())
+    priced_litres = float(litres[priced].sum())
+    return {
+        'price_type': price_type,
+        'supplier_id': supplier_id,
+        'group_by': group_by,
+        'rows': len(fuel),
+        'litres': round(total_litres, 2),
+        'cost': round(total_cost, 2),
+        'unpriced_litres': round(total_litres - priced_litres, 2),
+        'average_price': round(total_cost / priced_litres, 4) if priced_litres > 0 else None,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'groups': groups,
+    }
@@ -0,0 +1,203 @@
+"""
+On-demand and rolling profiling of API requests
+Produces pstats (cProfile) or collapsed-stack (sampling) artifacts for flame graphs
+"""
+
+import cProfile
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_QUERY_ARG = '__profile'
+PROFILE_HEADER = 'X-Profile'
+ARTIFACT_HEADER = 'X-Profile-Artifact'
+
+MODES = ('cprofile', 'sample')
+ARTIFACT_EXTENSIONS = {'cprofile': '.pstats', 'sample': '.collapsed'}
+
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class SamplingProfiler:
+    """Periodically sample one thread's stack and count collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(frames))] += 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CProfileProfiler:
+    """Deterministic profile of everything the request thread executes"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path: str):
+        self.profile.dump_stats(path)
+
+
+class RequestProfiler:
+    """Decide which requests get profiled and manage the stored artifacts"""
+
+    def __init__(self, directory: str, default_mode: str = 'cprofile', every_n: int = 0,
+                 sample_interval_ms: float = 5.0, max_artifacts: int = 200):
+        if default_mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {default_mode}")
+        self.directory = directory
+        self.default_mode = default_mode
+        self.every_n = every_n
+        self.sample_interval = sample_interval_ms / 1000.0
+        self.max_artifacts = max_artifacts
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def requested_mode(self, value: Optional[str]) -> Optional[str]:
+        """Map a ?__profile= / X-Profile value to a profiling mode"""
+        if not value:
+            return None
+        value = value.lower()
+        if value in ('0', 'false', 'off', 'no'):
+            return None
+        return value if value in MODES else self.default_mode
+
+    def rolling_due(self) -> bool:
+        """True for every Nth request when rolling profiling is enabled"""
+        return self.every_n > 0 and next(self._counter) % self.every_n == 0
+
+    def start(self, mode: str):
+        """Start profiling the calling thread; returns (profiler, mode actually used)"""
+        if mode == 'cprofile':
+            profiler = CProfileProfiler()
+            try:
+                profiler.start()
+                return profiler, mode
+            except ValueError:
+                # Another profiler is active (one at a time on newer interpreters)
+                mode = 'sample'
+        profiler = SamplingProfiler(threading.get_ident(), self.sample_interval)
+        profiler.start()
+        return profiler, mode
+
+    def finish(self, profiler, mode: str, label: str, request_id: Optional[str] = None) -> str:
+        """Stop the profiler, store its artifact and return the artifact name"""
+        profiler.stop()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        suffix = _SAFE_NAME_RE.sub('_', request_id or uuid.uuid4().hex[:12])
+        name = f"{stamp}_{_SAFE_NAME_RE.sub('_', label)}_{suffix}{ARTIFACT_EXTENSIONS[mode]}"
+        profiler.write(os.path.join(self.directory, name))
+        self._prune()
+        return name
+
+    def list_artifacts(self) -> List[Dict[str, object]]:
+        if not os.path.isdir(self.directory):
+            return []
+        artifacts = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(tuple(ARTIFACT_EXTENSIONS.values())):
+                stat = entry.stat()
+                artifacts.append({
+                    'name': entry.name,
+                    'format': 'pstats' if entry.name.endswith('.pstats') else 'collapsed',
+                    'size_bytes': stat.st_size,
+                    'created': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                })
+        return sorted(artifacts, key=lambda a: a['name'], reverse=True)
+
+    def _prune(self):
+        with self._lock:
+            artifacts = self.list_artifacts()
+            for artifact in artifacts[self.max_artifacts:]:
+                try:
+                    os.remove(os.path.join(self.directory, artifact['name']))
+                except OSError:
+                    pass
+
+
+def init_profiling(app, config) -> RequestProfiler:
+    """Profile admin-flagged requests and, optionally, every Nth request"""
+    from flask import g, request
+    from admin import is_admin_request
+
+    profiler = RequestProfiler(
+        config.PROFILE_DIR,
+        default_mode=config.PROFILE_MODE,
+        every_n=config.PROFILE_EVERY_N,
+        sample_interval_ms=config.PROFILE_SAMPLE_INTERVAL_MS,
+        max_artifacts=config.PROFILE_MAX_ARTIFACTS
+    )
+
+    @app.before_request
+    def _start_profile():
+        requested = request.args.get(PROFILE_QUERY_ARG) or request.headers.get(PROFILE_HEADER)
+        mode = profiler.requested_mode(requested)
+        if mode is not None and not is_admin_request():
+            mode = None
+        if mode is None and profiler.rolling_due():
+            mode = profiler.default_mode
+        if mode is not None:
+            g.profile_started = time.perf_counter()
+            g.active_profiler, g.profile_mode = profiler.start(mode)
+
+    @app.after_request
+    def _store_profile(response):
+        active = g.pop('active_profiler', None)
+        if active is not None:
+            label = request.endpoint or 'unknown'
+            name = profiler.finish(active, g.profile_mode, label, request.headers.get('X-Request-ID'))
+            elapsed_ms = (time.perf_counter() - g.profile_started) * 1000.0
+            logger.info(f"Profiled {request.method} {request.path} ({elapsed_ms:.1f} ms) -> {name}")
+            response.headers[ARTIFACT_HEADER] = name
+        return response
+
+    @app.teardown_request
+    def _stop_abandoned_profile(error=None):
+        active = g.pop('active_profiler', None)
+        if active is not None:
+            active.stop()
+
+    app.extensions['request_profiler'] = profiler
+    return profiler
@@ -0,0 +1,204 @@
+"""
+Reorder optimization for Advanced Fuel Consumption Forecasting System
+Economic order quantities with supplier price breaks, minimum order quantities and lead-time demand,
+evaluated for every site/fuel/supplier combination at once in numpy
+"""
+
+import hashlib
+import math
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DAYS_PER_YEAR = 365
+MIN_USAGE_DAYS = 14  # Days with usage needed before the demand spread is trusted over safety_stock_days
+
+
+def daily_usage_stats(rows: Iterable[Sequence], days: int) -> Dict[Tuple[int, int], Tuple[float, Optional[float]]]:
+    """
+    (mean, standard deviation) of daily usage per (site_id, fuel_type_id) from (site_id,
+    fuel_type_id, day, litres) rows over a `days`-day window; days without usage count as zero.
+    The deviation is None for pairs with fewer than MIN_USAGE_DAYS days of usage.
+    """
+    totals: Dict[Tuple[int, int], List[float]] = {}
+    for site_id, fuel_type_id, _, litres in rows:
+        entry = totals.setdefault((site_id, fuel_type_id), [0, 0.0, 0.0])
+        litres = float(litres or 0.0)
+        entry[0] += 1
+        entry[1] += litres
+        entry[2] += litres * litres
+    stats = {}
+    for key, (count, total, squares) in totals.items():
+        mean = total / days
+        variance = max(squares / days - mean * mean, 0.0) * days / max(days - 1, 1)
+        stats[key] = (mean, math.sqrt(variance) if count >= MIN_USAGE_DAYS else None)
+    return stats
+
+
+def input_signature(pair: Dict[str, Any], offers: Sequence[Dict[str, Any]], order_cost: float,
+                    holding_rate: float, service_level: float, min_rating: float = 0.0) -> str:
+    """Digest of everything a recommendation depends on; unchanged inputs are not recomputed"""
+    # Demand to three significant figures, so day-to-day noise in the forecast does not churn orders
+    values = [float(f"{float(pair.get(column) or 0.0):.3g}") for column in ('daily_demand', 'demand_std')]
+    values += [pair.get('maximum_capacity'), pair.get('safety_stock_days'), round(order_cost, 2),
+               float(holding_rate), float(service_level), float(min_rating)]
+    for offer in sorted(offers, key=lambda offer: offer['supplier_id']):
+        values += [offer['supplier_id'], round(float(offer['price_per_liter']), 4),
+                   offer.get('volume_discount_threshold'), offer.get('volume_discount_rate'),
+                   offer.get('lead_time_days'), offer.get('minimum_order_quantity'),
+                   bool(offer.get('is_preferred')), offer.get('rating')]
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def _column(rows: Sequence[Dict[str, Any]], name: str, default: float = 0.0) -> np.ndarray:
+    return np.array([default if row.get(name) is None else float(row[name]) for row in rows])
+
+
+def optimize_orders(pairs: List[Dict[str, Any]], offers: List[Dict[str, Any]], order_costs: Sequence[float],
+                    holding_rate: float, service_level: float, min_rating: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Best supplier, order quantity and reorder point for every pair (site_id, fuel_type_id,
+    daily_demand, demand_std, maximum_capacity, safety_stock_days, optimal_order_quantity) from
+    the active `offers` (fuel_type_id, supplier_id, price_per_liter, volume_discount_threshold,
+    volume_discount_rate, lead_time_days, minimum_order_quantity, is_preferred, rating).
+    `order_costs` is the fixed cost of one delivery per pair.
+
+    Each pair x offer candidate keeps z x demand_std x sqrt(lead time) litres of safety stock
+    (safety_stock_days of demand when the spread is unknown) and reorders at lead-time demand
+    plus that. Its all-units price break gives two price levels; on each, the EOQ
+    sqrt(2 x annual demand x order cost / (holding_rate x price)) is clamped into the level's
+    quantity range, the supplier's minimum order and the tank (capacity less safety stock), and
+    the annual purchase + ordering + holding cost decides. The cheapest candidate wins per pair;
+    ties go to preferred, then better rated suppliers. Suppliers rated below `min_rating` are
+    skipped.
+    """
+    z = NormalDist().inv_cdf(service_level)
+    by_fuel: Dict[int, List[int]] = {}
+    for index, offer in enumerate(offers):
+        rating = offer.get('rating')
+        if rating is None or float(rating) >= min_rating:
+            by_fuel.setdefault(offer['fuel_type_id'], []).append(index)
+
+    # One candidate per pair x offer of that fuel
+    pair_index = [row for row, pair in enumerate(pairs) for _ in by_fuel.get(pair['fuel_type_id'], ())]
+    offer_index = [index for pair in pairs for index in by_fuel.get(pair['fuel_type_id'], ())]
+    candidate_pairs = [pairs[row] for row in pair_index]
+    candidate_offers = [offers[index] for index in offer_index]
+    pair_index = np.array(pair_index, dtype=np.int64)
+
+    daily = _column(candidate_pairs, 'daily_demand')
+    spread = _column(candidate_pairs, 'demand_std', np.nan)
+    capacity = _column(candidate_pairs, 'maximum_capacity', np.inf)
+    capacity = np.where(capacity > 0, capacity, np.inf)
+    safety_days = _column(candidate_pairs, 'safety_stock_days', 7.0)
+    current_quantity = _column(candidate_pairs, 'optimal_order_quantity', np.nan)
+    order_cost = np.asarray(order_costs, dtype=float)[pair_index] if len(pair_index) else np.zeros(0)
+    price = _column(candidate_offers, 'price_per_liter')
+    threshold = _column(candidate_offers, 'volume_discount_threshold', np.inf)
+    discount = _column(candidate_offers, 'volume_discount_rate')
+    lead = np.maximum(_column(candidate_offers, 'lead_time_days', 3.0), 0.0)
+    moq = np.maximum(_column(candidate_offers, 'minimum_order_quantity'), 1.0)
+    preferred = np.array([bool(offer.get('is_preferred')) for offer in candidate_offers], dtype=bool)
+    rating = _column(candidate_offers, 'rating')
+
+    annual = daily * DAYS_PER_YEAR
+    safety = np.where(np.isnan(spread), safety_days * daily, z * np.nan_to_num(spread) * np.sqrt(lead))
+    reorder_point = daily * lead + safety
+    room = capacity - safety
+    threshold = np.where((threshold > 0) & (discount > 0), threshold, np.inf)
+
+    # (unit price, lowest quantity, highest quantity) of the list price and the discounted level
+    levels = ((price, moq, np.minimum(np.nextafter(threshold, 0), room)),
+              (price * (1 - discount), np.maximum(threshold, moq), room))
+    best_cost = np.full(len(price), np.inf)
+    best_quantity = np.zeros(len(price))
+    best_price = price.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for unit_price, low, high in levels:
+            eoq = np.sqrt(2 * annual * order_cost / (holding_rate * unit_price))
+            quantity = np.clip(np.nan_to_num(eoq), low, np.maximum(low, high))
+            cost = annual * unit_price + annual * order_cost / quantity + holding_rate * unit_price * (quantity / 2 + safety)
+            cost = np.where((low <= high) & np.isfinite(low), cost, np.inf)
+            better = cost < best_cost
+            best_cost = np.where(better, cost, best_cost)
+            best_quantity = np.where(better, quantity, best_quantity)
+            best_price = np.where(better, unit_price, best_price)
+        # The same supplier at today's order quantity, for comparison, when that order is allowed
+        current_price = np.where(current_quantity >= threshold, price * (1 - discount), price)
+        current_cost = (annual * current_price + annual * order_cost / current_quantity +
+                        holding_rate * current_price * (current_quantity / 2 + safety))
+        current_cost = np.where((current_quantity >= moq) & (current_quantity <= room), current_cost, np.nan)
+
+    # Cheapest feasible candidate per pair; ties to preferred, then better rated suppliers
+    order = np.lexsort((-rating, ~preferred, np.round(best_cost, 2), pair_index))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pair_index[order][1:] != pair_index[order][:-1]
+    chosen = {int(pair_index[candidate]): int(candidate) for candidate in order[first]
+              if np.isfinite(best_cost[candidate])}
+
+    results = []
+    for row, pair in enumerate(pairs):
+        result = {'site_id': pair['site_id'], 'site_name': pair.get('site_name'),
+                  'fuel_type_id': pair['fuel_type_id'], 'fuel_name': pair.get('fuel_name'),
+                  'stock_id': pair.get('stock_id'), 'daily_demand': round(float(pair.get('daily_demand') or 0.0), 3),
+                  'candidates': len(by_fuel.get(pair['fuel_type_id'], ()))}
+        candidate = chosen.get(row)
+        if candidate is None:
+            reason = ('No active supplier prices this fuel' if not result['candidates']
+                      else "Every supplier's minimum order exceeds the tank space")
+            results.append({**result, 'supplier_id': None, 'reason': reason})
+            continue
+        offer = candidate_offers[candidate]
+        cost = float(best_cost[candidate])
+        current = float(current_cost[candidate])
+        results.append({
+            **result,
+            'supplier_id': offer['supplier_id'],
+            'supplier_name': offer.get('supplier_name'),
+            'unit_price': round(float(best_price[candidate]), 4),
+            'discount_applied': bool(best_price[candidate] < price[candidate]),
+            'order_quantity': round(float(best_quantity[candidate])),
+            'reorder_point': round(float(reorder_point[candidate])),
+            'safety_stock': round(float(safety[candidate])),
+            'lead_time_days': int(lead[candidate]),
+            'orders_per_year': round(float(annual[candidate] / best_quantity[candidate]), 2) if annual[candidate] else 0.0,
+            'annual_cost': round(cost, 2),
+            'current_annual_cost': round(current, 2) if math.isfinite(current) else None,
+        })
+    return results
+
+
+def run_optimizer(pairs: List[Dict[str, Any]], offers: List[Dict[str, Any]], order_costs: Dict[Tuple[int, int], float],
+                  stored: Dict[Tuple[int, int], str], default_order_cost: float, holding_rate: float,
+                  service_level: float, min_rating: float = 0.0, force: bool = False) -> Dict[str, Any]:
+    """
+    Signatures for every pair, then optimize_orders on the pairs whose inputs changed since
+    their `stored` signature (all of them with `force`)
+    """
+    started = time.perf_counter()
+    offers_by_fuel: Dict[int, List[Dict[str, Any]]] = {}
+    for offer in offers:
+        offers_by_fuel.setdefault(offer['fuel_type_id'], []).append(offer)
+
+    changed, costs = [], []
+    for pair in pairs:
+        key = (pair['site_id'], pair['fuel_type_id'])
+        cost = order_costs.get(key) or default_order_cost
+        pair['input_signature'] = input_signature(pair, offers_by_fuel.get(pair['fuel_type_id'], ()), cost,
+                                                  holding_rate, service_level, min_rating)
+        if force or stored.get(key) != pair['input_signature']:
+            changed.append(pair)
+            costs.append(cost)
+
+    results = optimize_orders(changed, offers, costs, holding_rate, service_level, min_rating)
+    for pair, result in zip(changed, results):
+        result['input_signature'] = pair['input_signature']
+    return {
+        'pairs': len(pairs),
+        'recalculated': len(changed),
+        'unchanged': len(pairs) - len(changed),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'recommendations': results,
+    }
@@ -0,0 +1,133 @@
+"""
+What-if scenario grids for Advanced Fuel Consumption Forecasting System
+Evaluates every (consumption multiplier, safety factor, refill lead time) combination for a set of
+forecasts in one vectorized numpy pass; nothing is persisted (saved scenarios go through
+sp_CreateForecastScenario)
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+UNLIMITED_DAYS = 999     # Same cap sp_CreateForecastScenario uses for zero consumption
+MAX_AXIS_VALUES = 1000
+
+AXES = ('consumption_multipliers', 'safety_factors', 'lead_times')
+AXIS_DEFAULTS = {
+    'consumption_multipliers': [1.0],
+    'safety_factors': None,  # Each forecast's own safety factor
+    'lead_times': [0],       # Refill date = stockout date, as in sp_CreateForecastScenario
+}
+
+
+class ScenarioGridError(ValueError):
+    """Invalid grid specification"""
+
+
+def parse_axis(name: str, spec: Any) -> Optional[np.ndarray]:
+    """A number, a list of numbers or an inclusive {start, stop, step} range -> 1-D array"""
+    if spec is None:
+        default = AXIS_DEFAULTS[name]
+        return None if default is None else np.asarray(default, dtype=float)
+
+    if isinstance(spec, dict):
+        try:
+            start, stop = float(spec['start']), float(spec['stop'])
+            step = float(spec.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ScenarioGridError(f"{name} range needs numeric start, stop and step")
+        if step <= 0 or stop < start:
+            raise ScenarioGridError(f"{name} range needs step > 0 and stop >= start")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_AXIS_VALUES:
+            raise ScenarioGridError(f"{name} range has {count} values; at most {MAX_AXIS_VALUES} allowed")
+        values = np.round(start + step * np.arange(count), 6)
+    else:
+        try:
+            values = np.atleast_1d(np.asarray(spec, dtype=float))
+        except (TypeError, ValueError):
+            raise ScenarioGridError(f"{name} must be a number, a list of numbers or a range")
+        if values.ndim != 1 or not values.size:
+            raise ScenarioGridError(f"{name} must not be empty")
+        if values.size > MAX_AXIS_VALUES:
+            raise ScenarioGridError(f"{name} has {values.size} values; at most {MAX_AXIS_VALUES} allowed")
+
+    if not np.all(np.isfinite(values)) or np.any(values < 0):
+        raise ScenarioGridError(f"{name} values must be finite and non-negative")
+    if name == 'lead_times':
+        values = np.floor(values)
+    return values
+
+
+def parse_grid(spec: Dict[str, Any]) -> Dict[str, Optional[np.ndarray]]:
+    return {name: parse_axis(name, spec.get(name)) for name in AXES}
+
+
+def grid_cells(forecast_count: int, axes: Dict[str, Optional[np.ndarray]]) -> int:
+    cells = forecast_count
+    for values in axes.values():
+        cells *= 1 if values is None else values.size
+    return cells
+
+
+def evaluate_grid(forecasts: List[Dict[str, Any]], axes: Dict[str, Optional[np.ndarray]],
+                  today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Days remaining (multiplier x safety factor) and latest refill order dates
+    (multiplier x safety factor x lead time) for each forecast.
+
+    Consumption is scaled the way sp_CreateForecastScenario scales it: by the multiplier, and by
+    the scenario safety factor relative to the one the forecast was calculated with. A refill
+    ordered on the returned date arrives on the stockout day; dates already past are clamped
+    to today and counted in `late`.
+    """
+    today = today or date.today()
+    multipliers = axes['consumption_multipliers']
+    safety_factors = axes['safety_factors']
+    lead_times = axes['lead_times']
+
+    # Shapes broadcast as (forecast, multiplier, safety factor, lead time)
+    balance = np.array([float(f.get('current_balance') or 0.0) for f in forecasts])[:, None, None, None]
+    rate = np.array([float(f.get('daily_consumption_rate') or 0.0) for f in forecasts])[:, None, None, None]
+    consumption = rate * multipliers[None, :, None, None]
+    if safety_factors is not None:
+        original = np.array([float(f.get('safety_factor') or 0.0) for f in forecasts])[:, None, None, None]
+        # A forecast without a safety factor keeps its rate, as in the procedure
+        ratio = np.divide(safety_factors[None, None, :, None], original,
+                          out=np.ones((len(forecasts), 1, safety_factors.size, 1)), where=original > 0)
+        consumption = consumption * ratio
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.where(consumption > 0, np.floor(np.maximum(balance, 0.0) / consumption), UNLIMITED_DAYS)
+    days = np.minimum(days, UNLIMITED_DAYS).astype(np.int64)
+
+    order_in = days - lead_times[None, None, None, :].astype(np.int64)
+    late = order_in < 0
+    refill_dates = np.datetime64(today, 'D') + np.maximum(order_in, 0).astype('timedelta64[D]')
+    refill_dates = refill_dates.astype(str)
+
+    results = []
+    for index, forecast in enumerate(forecasts):
+        results.append({
+            'forecast_id': forecast.get('forecast_id'),
+            'site_id': forecast.get('site_id'),
+            'site_name': forecast.get('site_name'),
+            'fuel_type_id': forecast.get('fuel_type_id'),
+            'fuel_name': forecast.get('fuel_name'),
+            'current_balance': float(balance[index, 0, 0, 0]),
+            'daily_consumption_rate': float(rate[index, 0, 0, 0]),
+            'safety_factor': None if forecast.get('safety_factor') is None else float(forecast['safety_factor']),
+            'days_remaining': days[index, :, :, 0].tolist(),
+            'refill_dates': refill_dates[index].tolist(),
+            'late': int(late[index].sum()),
+        })
+
+    return {
+        'today': today.isoformat(),
+        'axes': {name: None if values is None else (values.astype(int) if name == 'lead_times' else values).tolist()
+                 for name, values in axes.items()},
+        'shape': {'days_remaining': ['consumption_multipliers', 'safety_factors'],
+                  'refill_dates': ['consumption_multipliers', 'safety_factors', 'lead_times']},
+        'forecasts': results,
+    }
@@ -0,0 +1,375 @@
+"""
+Embedded SQLite storage backend for Advanced Fuel Consumption Forecasting System
+WAL-mode database with tuned pragmas, a small connection pool and the sp_* procedures in Python
+"""
+
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import StorageBackend
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+SCHEMA_FILES = ('create_database_sqlite.sql', 'forecasting_views_sqlite.sql')
+
+CALCULATION_METHOD = 'Equipment-based with operational hours'
+CALCULATED_BY = 'System'
+DEFAULT_HOURS = 4.0      # Assumed daily hours for equipment without recent logs
+HISTORY_DAYS = 14        # Operational hours window used by the forecast
+UNLIMITED_DAYS = 999
+
+# Parameters arrive as Python objects (pyodbc style); store them the way the schema expects
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' ', timespec='seconds'))
+
+
+def _iso_date(value) -> str:
+    if value is None:
+        return date.today().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+class PooledConnection:
+    """Connection handle whose close() hands the connection back to the pool"""
+
+    def __init__(self, conn: sqlite3.Connection, pool: 'SqliteBackend'):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn)
+
+    def __del__(self):
+        # Handlers that raise before close() must not keep a write transaction open
+        if self.__dict__.get('_conn') is not None:
+            self.close()
+
+
+class SqliteBackend(StorageBackend):
+    """Single-file database for edge sites, Linux CI and local benchmarking"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, cache_mb: int = 64, mmap_mb: int = 256, busy_timeout_ms: int = 5000,
+                 pool_size: int = 8, default_safety_factor: float = 1.2):
+        self.path = path
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.default_safety_factor = default_safety_factor
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def database_name(self) -> str:
+        return os.path.abspath(self.path)
+
+    # Connections
+
+    def connect(self) -> PooledConnection:
+        if not self._initialized:
+            self.initialize()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        return PooledConnection(conn, self)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, check_same_thread=False)
+        for pragma in (
+            'synchronous = NORMAL',                    # durable at checkpoints, safe with WAL
+            'foreign_keys = ON',
+            'temp_store = MEMORY',
+            f"cache_size = {-self.cache_mb * 1024}",   # negative = KiB
+            f"mmap_size = {self.mmap_mb * 1048576}",
+            f"busy_timeout = {self.busy_timeout_ms}",
+        ):
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+    def initialize(self):
+        """Create the schema and views if missing and switch the file to WAL"""
+        with self._init_lock:
+            if self._initialized:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0)
+            try:
+                mode = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+                for filename in SCHEMA_FILES:
+                    with open(os.path.join(DATABASE_DIR, filename), encoding='utf-8') as f:
+                        conn.executescript(f.read())
+                conn.execute('PRAGMA optimize')
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+            logger.info(f"SQLite storage ready at {self.database_name} (journal_mode={mode})")
+
+    # Stored procedures
+
+    def call_procedure(self, cursor, name: str, params: tuple = ()):
+        procedure = PROCEDURES.get(name)
+        if procedure is None:
+            raise ValueError(f"Unknown stored procedure: {name}")
+        with tracer.span(f"procedure {name}", kind='internal', **{'db.system': 'sqlite'}):
+            procedure(self, cursor, *params)
+
+    def safety_factor(self, cursor) -> float:
+        cursor.execute("SELECT setting_value FROM SystemSettings WHERE setting_key = 'default_safety_factor'")
+        row = cursor.fetchone()
+        try:
+            return float(row[0]) if row else self.default_safety_factor
+        except (TypeError, ValueError):
+            return self.default_safety_factor
+
+# =============================================
+# PROCEDURES (ports of database/forecasting_procedures.sql)
+# =============================================
+
+def _forecast_inputs(cursor, site_id: Optional[int] = None,
+                     fuel_type_id: Optional[int] = None) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Stock plus per-equipment recent hours for one site/fuel pair, or all active sites"""
+    window_start = (date.today() - timedelta(days=HISTORY_DAYS)).isoformat()
+    if site_id is not None:
+        cursor.execute("""
+            SELECT site_id, fuel_type_id, current_quantity, optimal_order_quantity
+            FROM FuelStock WHERE site_id = ? AND fuel_type_id = ?
+        """, (site_id, fuel_type_id))
+    else:
+        cursor.execute("""
+            SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, fs.optimal_order_quantity
+            FROM FuelStock fs
+            JOIN Sites s ON fs.site_id = s.site_id
+            WHERE s.is_active = 1
+        """)
+    inputs = {
+        (row[0], row[1]): {'balance': row[2], 'order_quantity': row[3], 'consumption': 0.0,
+                           'total_equipment': 0, 'equipment_with_data': 0}
+        for row in cursor.fetchall()
+    }
+    if not inputs:
+        return inputs
+
+    query = """
+        SELECT e.site_id, e.fuel_type_id, e.consumption_rate, AVG(oh.running_hours)
+        FROM Equipment e
+        LEFT JOIN OperationalHoursLog oh ON oh.equipment_id = e.equipment_id AND oh.log_date >= ?
+        WHERE e.is_active = 1
+    """
+    params: List[Any] = [window_start]
+    if site_id is not None:
+        query += " AND e.site_id = ? AND e.fuel_type_id = ?"
+        params += [site_id, fuel_type_id]
+    query += " GROUP BY e.equipment_id"
+    cursor.execute(query, tuple(params))
+    for equipment_site, equipment_fuel, rate, avg_hours in cursor.fetchall():
+        entry = inputs.get((equipment_site, equipment_fuel))
+        if entry is None:
+            continue
+        entry['consumption'] += (rate or 0.0) * (avg_hours if avg_hours is not None else DEFAULT_HOURS)
+        entry['total_equipment'] += 1
+        if avg_hours is not None:
+            entry['equipment_with_data'] += 1
+    return inputs
+
+
+def _upsert_forecasts(cursor, inputs: Dict[Tuple[int, int], Dict[str, Any]], forecast_date: str,
+                      safety_factor: float):
+    start = date.fromisoformat(forecast_date)
+    rows = []
+    for (site_id, fuel_type_id), entry in inputs.items():
+        balance = entry['balance'] or 0.0
+        daily = entry['consumption'] * safety_factor
+        days = math.floor(balance / daily) if daily > 0 else UNLIMITED_DAYS
+        confidence = 85.0
+        if entry['total_equipment'] > 0:
+            confidence = 50.0 + entry['equipment_with_data'] / entry['total_equipment'] * 50.0
+        rows.append((site_id, fuel_type_id, forecast_date, balance, round(daily, 3), safety_factor, days,
+                     (start + timedelta(days=days)).isoformat(), entry['order_quantity'], round(confidence, 2),
+                     CALCULATION_METHOD, CALCULATED_BY))
+    cursor.executemany("""
+        INSERT INTO ConsumptionForecast (site_id, fuel_type_id, forecast_date, current_balance,
+            daily_consumption_rate, safety_factor, forecast_days_remaining, next_refill_date_estimate,
+            recommended_order_quantity, confidence_level, calculation_method, last_calculated, calculated_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), ?)
+        ON CONFLICT (site_id, fuel_type_id, forecast_date) DO UPDATE SET
+            current_balance = excluded.current_balance,
+            daily_consumption_rate = excluded.daily_consumption_rate,
+            safety_factor = excluded.safety_factor,
+            forecast_days_remaining = excluded.forecast_days_remaining,
+            next_refill_date_estimate = excluded.next_refill_date_estimate,
+            recommended_order_quantity = excluded.recommended_order_quantity,
+            confidence_level = excluded.confidence_level,
+            calculation_method = excluded.calculation_method,
+            last_calculated = excluded.last_calculated,
+            calculated_by = excluded.calculated_by
+    """, rows)
+
+
+def calculate_site_forecast(backend: SqliteBackend, cursor, site_id, fuel_type_id, forecast_date=None,
+                            safety_factor=None):
+    """sp_CalculateSiteForecast: upsert one forecast and leave it as the cursor's result set"""
+    forecast_date = _iso_date(forecast_date)
+    if safety_factor is None:
+        safety_factor = backend.safety_factor(cursor)
+    inputs = _forecast_inputs(cursor, int(site_id), int(fuel_type_id))
+    if not inputs:
+        raise ValueError(f"No stock record for site {site_id} and fuel type {fuel_type_id}")
+    _upsert_forecasts(cursor, inputs, forecast_date, float(safety_factor))
+    cursor.execute("""
+        SELECT site_id, fuel_type_id, forecast_date, current_balance, daily_consumption_rate, safety_factor,
+               forecast_days_remaining, next_refill_date_estimate, recommended_order_quantity,
+               confidence_level, calculation_method, last_calculated
+        FROM ConsumptionForecast
+        WHERE site_id = ? AND fuel_type_id = ? AND forecast_date = ?
+    """, (site_id, fuel_type_id, forecast_date))
+
+
+def calculate_all_forecasts(backend: SqliteBackend, cursor, forecast_date=None):
+    """sp_CalculateAllForecasts: every active site/fuel pair in three set-based statements"""
+    forecast_date = _iso_date(forecast_date)
+    inputs = _forecast_inputs(cursor)
+    _upsert_forecasts(cursor, inputs, forecast_date, backend.safety_factor(cursor))
+    logger.info(f"All forecasts calculated successfully for date: {forecast_date} ({len(inputs)} forecasts)")
+
+
+def create_forecast_scenario(backend: SqliteBackend, cursor, forecast_id, scenario_name,
+                             adjusted_consumption_rate=None, adjusted_safety_factor=None):
+    """sp_CreateForecastScenario: what-if days remaining for an existing forecast"""
+    cursor.execute("""
+        SELECT current_balance, daily_consumption_rate, safety_factor, recommended_order_quantity
+        FROM ConsumptionForecast WHERE forecast_id = ?
+    """, (forecast_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Forecast {forecast_id} not found")
+    balance, original_consumption, original_safety_factor, order_quantity = row
+
+    consumption = float(adjusted_consumption_rate) if adjusted_consumption_rate is not None \
+        else (original_consumption or 0.0)
+    if adjusted_safety_factor is not None and original_safety_factor:
+        consumption = consumption * float(adjusted_safety_factor) / original_safety_factor
+    days = math.floor((balance or 0.0) / consumption) if consumption > 0 else UNLIMITED_DAYS
+
+    cursor.execute("""
+        INSERT INTO ForecastScenarios (forecast_id, scenario_name, adjusted_consumption_rate,
+            adjusted_safety_factor, scenario_days_remaining, scenario_refill_date, scenario_order_quantity)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (forecast_id, scenario_name, adjusted_consumption_rate, adjusted_safety_factor, days,
+          (date.today() + timedelta(days=days)).isoformat(), order_quantity))
+    cursor.execute("SELECT * FROM ForecastScenarios WHERE scenario_id = ?", (cursor.lastrowid,))
+
+
+def check_forecast_alerts(backend: SqliteBackend, cursor):
+    """sp_CheckForecastAlerts: at most one forecast-shortage and one low-stock alert per config per day"""
+    cursor.execute("""
+        INSERT INTO AlertHistory (alert_id, alert_message, severity_level)
+        SELECT
+            ac.alert_id,
+            'Forecast shortage alert: ' || s.site_name || ' - ' || ft.fuel_name ||
+            ' estimated to run out in ' || cf.forecast_days_remaining || ' days',
+            CASE
+                WHEN cf.forecast_days_remaining <= 2 THEN 'Critical'
+                WHEN cf.forecast_days_remaining <= 5 THEN 'High'
+                WHEN cf.forecast_days_remaining <= ac.threshold_days THEN 'Medium'
+                ELSE 'Low'
+            END
+        FROM AlertConfigurations ac
+        JOIN Sites s ON ac.site_id = s.site_id
+        JOIN FuelTypes ft ON ac.fuel_type_id = ft.fuel_type_id
+        JOIN ConsumptionForecast cf ON s.site_id = cf.site_id AND ft.fuel_type_id = cf.fuel_type_id
+        WHERE ac.alert_type = 'Forecast Shortage'
+          AND ac.is_active = 1
+          AND cf.forecast_days_remaining <= ac.threshold_days
+          AND cf.forecast_date = date('now', 'localtime')
+          AND NOT EXISTS (
+              SELECT 1 FROM AlertHistory ah
+              WHERE ah.alert_id = ac.alert_id
+                AND ah.triggered_date >= date('now', 'localtime')
+          )
+    """)
+    cursor.execute("""
+        INSERT INTO AlertHistory (alert_id, alert_message, severity_level)
+        SELECT
+            ac.alert_id,
+            'Low stock alert: ' || s.site_name || ' - ' || ft.fuel_name ||
+            ' current stock: ' || printf('%.3f', fs.current_quantity) || ' liters',
+            CASE
+                WHEN fs.current_quantity <= fs.minimum_threshold THEN 'Critical'
+                WHEN fs.current_quantity <= ac.threshold_value THEN 'High'
+                ELSE 'Medium'
+            END
+        FROM AlertConfigurations ac
+        JOIN Sites s ON ac.site_id = s.site_id
+        JOIN FuelTypes ft ON ac.fuel_type_id = ft.fuel_type_id
+        JOIN FuelStock fs ON s.site_id = fs.site_id AND ft.fuel_type_id = fs.fuel_type_id
+        WHERE ac.alert_type = 'Low Stock'
+          AND ac.is_active = 1
+          AND fs.current_quantity <= ac.threshold_value
+          AND NOT EXISTS (
+              SELECT 1 FROM AlertHistory ah
+              WHERE ah.alert_id = ac.alert_id
+                AND ah.triggered_date >= date('now', 'localtime')
+          )
+    """)
+
+
+def update_stock_after_transaction(backend: SqliteBackend, cursor, site_id, fuel_type_id, quantity_change,
+                                   transaction_type=None):
+    """sp_UpdateStockAfterTransaction: adjust stock, refresh the forecast and check alerts"""
+    cursor.execute("""
+        UPDATE FuelStock
+        SET current_quantity = current_quantity + ?,
+            last_updated = datetime('now', 'localtime'),
+            updated_by = ?
+        WHERE site_id = ? AND fuel_type_id = ?
+    """, (quantity_change, CALCULATED_BY, site_id, fuel_type_id))
+    calculate_site_forecast(backend, cursor, site_id, fuel_type_id)
+    check_forecast_alerts(backend, cursor)
+
+
+PROCEDURES = {
+    'sp_CalculateSiteForecast': calculate_site_forecast,
+    'sp_CalculateAllForecasts': calculate_all_forecasts,
+    'sp_CreateForecastScenario': create_forecast_scenario,
+    'sp_CheckForecastAlerts': check_forecast_alerts,
+    'sp_UpdateStockAfterTransaction': update_stock_after_transaction,
+}
@@ -0,0 +1,89 @@
+"""
+Storage backends for Advanced Fuel Consumption Forecasting System
+SQL Server through pyodbc for central deployments, embedded SQLite for edge sites and benchmarking
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('mssql', 'sqlite')
+
+
+class StorageBackend:
+    """DB-API connections plus the stored procedures the API relies on"""
+
+    name = 'base'
+
+    def connect(self):
+        """Return a DB-API connection; callers commit and close it"""
+        raise NotImplementedError
+
+    def call_procedure(self, cursor, name: str, params: tuple = ()):
+        """Run one of the sp_* procedures on an open cursor"""
+        raise NotImplementedError
+
+    @property
+    def database_name(self) -> str:
+        raise NotImplementedError
+
+    def paginate(self, query: str, params: Optional[tuple], limit: int, offset: int = 0):
+        """Restrict an ORDER BY query to one page of rows; returns (query, params)"""
+        return f"{query} LIMIT ? OFFSET ?", tuple(params or ()) + (limit, offset)
+
+    def day_of(self, column: str) -> str:
+        """SQL expression truncating a date/datetime column to its day, for GROUP BY"""
+        return f"date({column})"
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'database': self.database_name}
+
+
+class MssqlBackend(StorageBackend):
+    """SQL Server with the schema and procedures from database/*.sql"""
+
+    name = 'mssql'
+
+    def __init__(self, connection_string: str, database: str):
+        import pyodbc
+        self._pyodbc = pyodbc
+        self.connection_string = connection_string
+        self.database = database
+
+    @property
+    def database_name(self) -> str:
+        return self.database
+
+    def connect(self):
+        return self._pyodbc.connect(self.connection_string)
+
+    def paginate(self, query: str, params: Optional[tuple], limit: int, offset: int = 0):
+        return f"{query} OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", tuple(params or ()) + (offset, limit)
+
+    def day_of(self, column: str) -> str:
+        return f"CAST({column} AS DATE)"
+
+    def call_procedure(self, cursor, name: str, params: tuple = ()):
+        if params:
+            placeholders = ', '.join('?' for _ in params)
+            cursor.execute(f"EXEC {name} {placeholders}", params)
+        else:
+            cursor.execute(f"EXEC {name}")
+
+
+def create_backend(config) -> StorageBackend:
+    """Build the backend selected by Config.DB_BACKEND"""
+    if config.DB_BACKEND == 'mssql':
+        return MssqlBackend(config.get_db_connection_string(), config.DB_NAME)
+    if config.DB_BACKEND == 'sqlite':
+        from sqlite_backend import SqliteBackend
+        return SqliteBackend(
+            config.SQLITE_PATH,
+            cache_mb=config.SQLITE_CACHE_MB,
+            mmap_mb=config.SQLITE_MMAP_MB,
+            busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+            pool_size=config.SQLITE_POOL_SIZE,
+            default_safety_factor=config.DEFAULT_SAFETY_FACTOR
+        )
+    raise ValueError(f"Unknown DB_BACKEND: {config.DB_BACKEND} (expected one of {', '.join(BACKENDS)})")
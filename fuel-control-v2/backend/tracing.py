@@ -0,0 +1,496 @@
+"""
+Lightweight request tracing for Advanced Fuel Consumption Forecasting System
+Spans for Flask handlers, database calls, stored procedures and background jobs
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# OTLP span kinds
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3, 'procedure': 3, 'job': 1}
+
+_current_span = contextvars.ContextVar('fuel_control_current_span', default=None)
+
+_PROCEDURE_RE = re.compile(r'^\s*EXEC(?:UTE)?\s+(\w+)', re.IGNORECASE)
+_HEX32_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def trace_id_for(request_id: str) -> str:
+    """Derive a 32-hex-digit trace id from a request id"""
+    candidate = request_id.replace('-', '').lower()
+    if _HEX32_RE.match(candidate):
+        return candidate
+    return hashlib.md5(request_id.encode('utf-8')).hexdigest()
+
+
+class Span:
+    """A single timed operation within a trace"""
+
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_span_id', 'request_id',
+                 'attributes', 'start_time_ns', 'end_time_ns', '_start_perf', 'duration_ms',
+                 'status', 'error')
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_span_id: Optional[str],
+                 request_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.request_id = request_id
+        self.attributes = attributes
+        self.start_time_ns = time.time_ns()
+        self._start_perf = time.perf_counter()
+        self.end_time_ns = None
+        self.duration_ms = None
+        self.status = 'OK'
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.duration_ms = (time.perf_counter() - self._start_perf) * 1000.0
+        self.end_time_ns = self.start_time_ns + int(self.duration_ms * 1_000_000)
+        if error is not None:
+            self.status = 'ERROR'
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'request_id': self.request_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_time_ns': self.start_time_ns,
+            'end_time_ns': self.end_time_ns,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KINDS.get(self.kind, 1),
+            'startTimeUnixNano': str(self.start_time_ns),
+            'endTimeUnixNano': str(self.end_time_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.request_id:
+            span['attributes'].append(_otlp_attribute('request.id', self.request_id))
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+# =============================================
+# EXPORTERS
+# =============================================
+
+class JsonLinesExporter:
+    """Append finished spans to a local JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+class OTLPHttpExporter:
+    """Batch finished spans and POST them as OTLP/JSON to a collector"""
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 256,
+                 flush_interval: float = 2.0, max_queue: int = 10000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+        self._worker.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Dropping spans is preferable to blocking request threads
+            pass
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._drain(timeout=self.flush_interval)
+            if batch:
+                self._post(batch)
+
+    def _drain(self, timeout: float) -> List[Span]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _post(self, batch: List[Span]):
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'fuel-control.tracing'},
+                    'spans': [span.to_otlp() for span in batch]
+                }]
+            }]
+        }
+        body = json.dumps(payload, default=str).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=body,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                response.read()
+        except Exception as e:
+            logger.warning(f"Trace export to {self.endpoint} failed: {e}")
+
+    def shutdown(self):
+        self._stopped.set()
+        remaining = self._drain(timeout=0.01)
+        if remaining:
+            self._post(remaining)
+
+
+# =============================================
+# TRACER
+# =============================================
+
+class Tracer:
+    """Creates spans and hands finished spans to the configured exporter"""
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter, sample_rate: float = 1.0):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, kind: str = 'internal', **attributes):
+        """Time a block as a child of the current span (no-op outside a sampled trace)"""
+        parent = _current_span.get()
+        if not self.enabled or parent is None:
+            yield None
+            return
+        span = Span(name, kind, parent.trace_id, parent.span_id, parent.request_id, attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish(error)
+            self.exporter.export(span)
+
+    def start_trace(self, name: str, request_id: Optional[str] = None, kind: str = 'server',
+                    **attributes):
+        """Start a root span; returns (span, token) or (None, None) when not sampled"""
+        if not self.enabled:
+            return None, None
+        if request_id is None and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None, None
+        request_id = request_id or uuid.uuid4().hex
+        span = Span(name, kind, trace_id_for(request_id), None, request_id, attributes)
+        return span, _current_span.set(span)
+
+    def end_trace(self, span: Optional[Span], token, error: Optional[BaseException] = None):
+        if span is None:
+            return
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Streamed responses may finish in a different context than they started
+            _current_span.set(None)
+        span.finish(error)
+        self.exporter.export(span)
+
+    def traced(self, name: Optional[str] = None, kind: str = 'job'):
+        """Decorator tracing a function call; starts a new trace when called outside one"""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                if _current_span.get() is not None:
+                    with self.span(span_name, kind=kind):
+                        return func(*args, **kwargs)
+                span, token = self.start_trace(span_name, kind=kind)
+                error = None
+                try:
+                    return func(*args, **kwargs)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self.end_trace(span, token, error)
+            return wrapper
+        return decorator
+
+    def wrap_connection(self, conn):
+        """Wrap a DB-API connection so cursor activity is recorded as spans"""
+        if not self.enabled or _current_span.get() is None:
+            return conn
+        return TracedConnection(conn, self)
+
+
+tracer = Tracer()
+
+
+# =============================================
+# DATABASE INSTRUMENTATION
+# =============================================
+
+def _statement_summary(sql: str, limit: int = 300) -> str:
+    summary = ' '.join(sql.split())
+    return summary if len(summary) <= limit else summary[:limit] + '...'
+
+
+class TracedCursor:
+    """DB-API cursor proxy recording execute and fetch spans"""
+
+    def __init__(self, cursor, tracer: Tracer):
+        self._cursor = cursor
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, *params):
+        procedure = _PROCEDURE_RE.match(sql)
+        if procedure:
+            name, kind = f"procedure {procedure.group(1)}", 'procedure'
+        else:
+            name, kind = 'db.execute', 'client'
+        with self._tracer.span(name, kind=kind, **{'db.statement': _statement_summary(sql)}) as span:
+            result = self._cursor.execute(sql, *params)
+            rowcount = getattr(self._cursor, 'rowcount', -1)
+            if span is not None and rowcount is not None and rowcount >= 0:
+                span.set_attribute('db.rowcount', rowcount)
+            return result
+
+    def executemany(self, sql, seq_of_params):
+        with self._tracer.span('db.executemany', kind='client',
+                               **{'db.statement': _statement_summary(sql)}):
+            return self._cursor.executemany(sql, seq_of_params)
+
+    def fetchone(self):
+        with self._tracer.span('db.fetchone', kind='client') as span:
+            row = self._cursor.fetchone()
+            if span is not None:
+                span.set_attribute('db.rows', 0 if row is None else 1)
+            return row
+
+    def fetchmany(self, size=None):
+        with self._tracer.span('db.fetchmany', kind='client') as span:
+            rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+            if span is not None:
+                span.set_attribute('db.rows', len(rows))
+            return rows
+
+    def fetchall(self):
+        with self._tracer.span('db.fetchall', kind='client') as span:
+            rows = self._cursor.fetchall()
+            if span is not None:
+                span.set_attribute('db.rows', len(rows))
+            return rows
+
+
+class TracedConnection:
+    """DB-API connection proxy handing out traced cursors"""
+
+    def __init__(self, conn, tracer: Tracer):
+        self._conn = conn
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs), self._tracer)
+
+    def commit(self):
+        with self._tracer.span('db.commit', kind='client'):
+            return self._conn.commit()
+
+    def close(self):
+        return self._conn.close()
+
+
+# =============================================
+# FLASK INTEGRATION
+# =============================================
+
+def build_exporter(config):
+    """Create the exporter selected by Config.TRACE_EXPORTER"""
+    exporter = (config.TRACE_EXPORTER or '').lower()
+    if exporter == 'jsonl':
+        return JsonLinesExporter(config.TRACE_FILE)
+    if exporter == 'otlp':
+        return OTLPHttpExporter(config.TRACE_OTLP_ENDPOINT, config.TRACE_SERVICE_NAME)
+    raise ValueError(f"Unknown trace exporter: {config.TRACE_EXPORTER}")
+
+
+def init_tracing(app, config):
+    """Configure the tracer and trace every Flask request"""
+    from flask import g, request
+
+    if not config.TRACING_ENABLED:
+        return tracer
+
+    tracer.configure(build_exporter(config), config.TRACE_SAMPLE_RATE)
+
+    @app.before_request
+    def _start_request_span():
+        route = request.url_rule.rule if request.url_rule else request.path
+        incoming_id = request.headers.get(REQUEST_ID_HEADER)
+        span, token = tracer.start_trace(
+            f"{request.method} {route}", request_id=incoming_id, kind='server',
+            **{'http.method': request.method, 'http.route': route,
+               'http.target': request.full_path.rstrip('?'), 'flask.endpoint': request.endpoint or ''}
+        )
+        g.trace_span, g.trace_token = span, token
+
+    @app.after_request
+    def _tag_response(response):
+        span = g.get('trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            response.headers[REQUEST_ID_HEADER] = span.request_id
+        return response
+
+    @app.teardown_request
+    def _end_request_span(error=None):
+        span = g.pop('trace_span', None)
+        token = g.pop('trace_token', None)
+        tracer.end_trace(span, token, error)
+
+    logger.info(f"Request tracing enabled ({config.TRACE_EXPORTER} exporter)")
+    return tracer
+
+
+# =============================================
+# COLLECTOR STAND-IN
+# =============================================
+
+def run_collector(host: str, port: int, output_path: str):
+    """Accept OTLP/JSON trace exports and append the spans to a JSON-lines file"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    lock = threading.Lock()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            spans = [
+                span
+                for resource_spans in payload.get('resourceSpans', [])
+                for scope_spans in resource_spans.get('scopeSpans', [])
+                for span in scope_spans.get('spans', [])
+            ]
+            with lock, open(output_path, 'a', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(json.dumps(span) + '\n')
+            body = b'{}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), CollectorHandler)
+    print(f"Trace collector listening on http://{host}:{port}/v1/traces -> {output_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='OTLP/JSON trace collector stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4318)
+    parser.add_argument('--output', default='collected_traces.jsonl')
+    args = parser.parse_args()
+    run_collector(args.host, args.port, args.output)
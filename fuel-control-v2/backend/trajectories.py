@@ -0,0 +1,234 @@
+"""
+Stock trajectory projection for Advanced Fuel Consumption Forecasting System
+Projects the daily stock curve of many site/fuel pairs at once from their forecast consumption,
+scheduled deliveries and reorder-point orders arriving after the supplier lead time, and
+downsamples long curves with Largest-Triangle-Three-Buckets so charts get a fixed number of points
+"""
+
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_LEAD_TIME_DAYS = 3  # Suppliers.lead_time_days default
+MIN_POINTS = 3              # LTTB keeps the first and last sample plus one per bucket
+
+
+def _flag(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def trajectory_options(options, default_days: int, max_days: int, max_history: int,
+                       max_points: int) -> Dict[str, Any]:
+    """days, history, points, reorder and lead_time_days from request args or a JSON body"""
+    try:
+        days = int(options.get('days', default_days))
+        history = int(options.get('history', 0))
+        points = int(options['points']) if options.get('points') not in (None, '') else None
+        lead_time = int(options['lead_time_days']) if options.get('lead_time_days') not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ValueError('days, history, points and lead_time_days must be integers')
+    if not 1 <= days <= max_days:
+        raise ValueError(f'days must be between 1 and {max_days}')
+    if not 0 <= history <= max_history:
+        raise ValueError(f'history must be between 0 and {max_history}')
+    if points is not None and not MIN_POINTS <= points <= max_points:
+        raise ValueError(f'points must be between {MIN_POINTS} and {max_points}')
+    if lead_time is not None and lead_time < 0:
+        raise ValueError('lead_time_days must not be negative')
+    return {'days': days, 'history': history, 'points': points, 'lead_time_days': lead_time,
+            'reorder': _flag(options.get('reorder'), True)}
+
+
+def parse_scheduled(entries: Any, today: date) -> List[Tuple[int, int, int, float]]:
+    """[{site_id, fuel_type_id, date, quantity}] -> (site_id, fuel_type_id, day offset, quantity)"""
+    if entries in (None, ''):
+        return []
+    if not isinstance(entries, list):
+        raise ValueError('scheduled_refills must be a list')
+    scheduled = []
+    for entry in entries:
+        try:
+            offset = (date.fromisoformat(str(entry['date'])[:10]) - today).days
+            scheduled.append((int(entry['site_id']), int(entry['fuel_type_id']), offset, float(entry['quantity'])))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('scheduled_refills entries need site_id, fuel_type_id, date and quantity')
+    return scheduled
+
+
+def supplier_lead_times(rows: Iterable[Sequence]) -> Dict[int, int]:
+    """
+    Lead time per fuel from (fuel_type_id, lead_time_days, is_preferred) rows of active suppliers
+    that price it: the preferred supplier's, else the shortest
+    """
+    best: Dict[int, Tuple[int, int]] = {}
+    for fuel_type_id, lead_time, preferred in rows:
+        lead_time = DEFAULT_LEAD_TIME_DAYS if lead_time is None else int(lead_time)
+        rank = (0 if preferred else 1, lead_time)
+        if fuel_type_id not in best or rank < best[fuel_type_id]:
+            best[fuel_type_id] = rank
+    return {fuel_type_id: rank[1] for fuel_type_id, rank in best.items()}
+
+
+def lttb(values: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets over every row of `values` (series x samples at x = 0..n-1)
+    at once; returns (sample indices, values), both series x points. Rows keep all samples when
+    points >= n.
+    """
+    series, count = values.shape
+    if points >= count:
+        indices = np.broadcast_to(np.arange(count), (series, count))
+        return indices, values
+
+    rows = np.arange(series)
+    indices = np.empty((series, points), dtype=np.int64)
+    indices[:, 0], indices[:, -1] = 0, count - 1
+    # points - 2 buckets over the samples between the first and the last, in integer arithmetic so
+    # bucket edges never shift with floating-point rounding
+    bounds = 1 + np.arange(points - 1, dtype=np.int64) * (count - 2) // (points - 2)
+    selected = np.zeros(series, dtype=np.int64)
+    for bucket in range(points - 2):
+        lo, hi = bounds[bucket], bounds[bucket + 1]
+        if bucket + 1 < points - 2:
+            next_lo, next_hi = bounds[bucket + 1], bounds[bucket + 2]
+            next_x, next_y = (next_lo + next_hi - 1) / 2.0, values[:, next_lo:next_hi].mean(axis=1)
+        else:
+            next_x, next_y = count - 1.0, values[:, -1]
+        # Keep the sample forming the largest triangle with the last kept point and the next bucket's mean
+        previous_x, previous_y = selected[:, None].astype(float), values[rows, selected][:, None]
+        candidates = np.arange(lo, hi)[None, :]
+        area = np.abs((previous_x - next_x) * (values[:, lo:hi] - previous_y) -
+                      (previous_x - candidates) * (next_y[:, None] - previous_y))
+        selected = lo + np.argmax(area, axis=1)
+        indices[:, bucket + 1] = selected
+    return indices, values[rows[:, None], indices]
+
+
+def history_curves(pairs: List[Dict[str, Any]], daily_net: Iterable[Sequence], history: int,
+                   today: date) -> np.ndarray:
+    """
+    End-of-day stock for the `history` days before today (pairs x history), rebuilt backwards
+    from the current quantity and (site_id, fuel_type_id, day, refills - usage) rows
+    """
+    index = {(pair['site_id'], pair['fuel_type_id']): row for row, pair in enumerate(pairs)}
+    net = np.zeros((len(pairs), history + 1))  # days -history .. 0 (today)
+    for site_id, fuel_type_id, day, change in daily_net:
+        row = index.get((site_id, fuel_type_id))
+        offset = (date.fromisoformat(str(day)[:10]) - today).days + history
+        if row is not None and 0 <= offset <= history:
+            net[row, offset] += float(change or 0.0)
+    current = np.array([float(pair.get('current_quantity') or 0.0) for pair in pairs])
+    # End of day d = today's stock minus every change recorded after d
+    later = np.cumsum(net[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    return np.maximum(current[:, None] - later, 0.0)
+
+
+def project_trajectories(pairs: List[Dict[str, Any]], days: int, lead_times: Dict[int, int],
+                         scheduled: Sequence[Tuple[int, int, int, float]] = (), reorder: bool = True,
+                         lead_time_days: Optional[int] = None, history: Optional[np.ndarray] = None,
+                         points: Optional[int] = None, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Daily stock for `days` days from today for every pair (site_id, fuel_type_id,
+    current_quantity, maximum_capacity, reorder_point, minimum_threshold,
+    optimal_order_quantity, daily_consumption_rate).
+
+    Each day, deliveries arrive first (up to capacity) and the forecast consumption is burnt.
+    With `reorder`, an order goes out at the end of any day the stock plus what is on order is at
+    or below the reorder point (else the minimum threshold): the optimal order quantity, or
+    enough to fill the tank, arriving after the fuel's lead time. Scheduled deliveries count as
+    on order from today; those dated today are in the tank from the first point.
+
+    Curves are returned per pair as x (day offsets, negative = history) and y (litres),
+    downsampled with LTTB when `points` is below the number of days.
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    count = len(pairs)
+    stock = np.array([float(pair.get('current_quantity') or 0.0) for pair in pairs])
+    capacity = np.array([float(pair.get('maximum_capacity') or 0.0) for pair in pairs])
+    capacity = np.where(capacity > 0, capacity, np.inf)
+    burn = np.array([float(pair.get('daily_consumption_rate') or 0.0) for pair in pairs])
+    reorder_point = np.array([float(pair['reorder_point']) if pair.get('reorder_point') is not None
+                              else float(pair.get('minimum_threshold') or 0.0) for pair in pairs])
+    order_quantity = np.array([float(pair.get('optimal_order_quantity') or 0.0) for pair in pairs])
+    lead = np.array([lead_time_days if lead_time_days is not None
+                     else lead_times.get(pair['fuel_type_id'], DEFAULT_LEAD_TIME_DAYS) for pair in pairs],
+                    dtype=np.int64)
+
+    index = {(pair['site_id'], pair['fuel_type_id']): row for row, pair in enumerate(pairs)}
+    # Orders land max(lead, 1) days after they are placed, so same-day lead times still need a column
+    arrivals = np.zeros((count, days + 1 + max(int(lead.max(initial=0)), 1)))
+    on_order = np.zeros(count)
+    for site_id, fuel_type_id, offset, quantity in scheduled:
+        row = index.get((site_id, fuel_type_id))
+        if row is not None and 0 <= offset <= days:
+            arrivals[row, offset] += quantity
+            on_order[row] += quantity
+
+    curve = np.empty((count, days + 1))
+    first_dry = np.full(count, -1, dtype=np.int64)
+    orders: List[List[Tuple[int, int, float]]] = [[] for _ in range(count)]
+    rows = np.arange(count)
+    can_reorder = reorder & (reorder_point > 0)
+    for day in range(days + 1):
+        arrived = arrivals[:, day]
+        on_order -= arrived
+        stock = np.minimum(stock + arrived, capacity)
+        if day:
+            stock = stock - burn
+            first_dry[(stock < 0) & (first_dry < 0)] = day
+            stock = np.maximum(stock, 0.0)
+        curve[:, day] = stock
+        if can_reorder.any():
+            position = stock + on_order
+            room = np.where(np.isinf(capacity), order_quantity, capacity - position)
+            quantity = np.minimum(np.where(order_quantity > 0, order_quantity, room), room)
+            placing = can_reorder & (position <= reorder_point) & (quantity > 0)
+            for row in rows[placing]:
+                arrival = day + max(int(lead[row]), 1)
+                arrivals[row, arrival] += quantity[row]
+                on_order[row] += quantity[row]
+                orders[row].append((day, arrival, round(float(quantity[row]), 3)))
+
+    offsets = np.arange(days + 1)
+    if history is not None and history.shape[1]:
+        curve = np.concatenate([history, curve], axis=1)
+        offsets = np.arange(-history.shape[1], days + 1)
+    if points is not None:
+        sample, values = lttb(curve, points)
+        x_values, y_values = offsets[sample], values
+    else:
+        x_values, y_values = np.broadcast_to(offsets, curve.shape), curve
+
+    results = []
+    for row, pair in enumerate(pairs):
+        results.append({
+            'site_id': pair['site_id'],
+            'site_name': pair.get('site_name'),
+            'fuel_type_id': pair['fuel_type_id'],
+            'fuel_name': pair.get('fuel_name'),
+            'daily_consumption': float(burn[row]),
+            'capacity': None if np.isinf(capacity[row]) else float(capacity[row]),
+            'reorder_point': float(reorder_point[row]) if reorder_point[row] > 0 else None,
+            'lead_time_days': int(lead[row]),
+            'first_stockout_day': None if first_dry[row] < 0 else int(first_dry[row]),
+            'min_stock': round(float(curve[row, -(days + 1):].min()), 3),
+            'orders': orders[row],
+            'x': x_values[row].tolist(),
+            'y': np.round(y_values[row], 1).tolist(),
+        })
+
+    return {
+        'start': today.isoformat(),
+        'days': days,
+        'history': 0 if history is None else int(history.shape[1]),
+        'points': None if points is None else min(points, curve.shape[1]),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'pairs': results,
+    }
@@ -0,0 +1,302 @@
+"""
+Inter-site transfer planning for Advanced Fuel Consumption Forecasting System
+Finds the cheapest mix of site-to-site transfers and supplier deliveries that covers every
+site's forecast shortfall, as a min-cost flow per fuel over a cached great-circle distance matrix
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trajectories import DEFAULT_LEAD_TIME_DAYS
+
+EARTH_RADIUS_KM = 6371.0
+DISTANCE_CACHE_SIZE = 4  # Site layouts kept; a layout changes only when sites move or are added
+EPSILON = 1e-6           # Litres (and cost units) below this count as zero
+
+_distance_cache: 'OrderedDict[str, Tuple[Dict[int, int], np.ndarray]]' = OrderedDict()
+_distance_lock = threading.Lock()
+
+
+def transfer_options(options, default_horizon: int, max_horizon: int, default_max_km: float,
+                     default_min_litres: float, default_budget_ms: int) -> Dict[str, Any]:
+    """horizon_days, fuel_type_id, max_km, min_litres and time_budget_ms from request args or a JSON body"""
+    try:
+        horizon = int(options.get('horizon_days', default_horizon))
+        fuel_type_id = int(options['fuel_type_id']) if options.get('fuel_type_id') not in (None, '') else None
+        max_km = float(options.get('max_km', default_max_km))
+        min_litres = float(options.get('min_litres', default_min_litres))
+        budget = int(options.get('time_budget_ms', default_budget_ms))
+    except (TypeError, ValueError):
+        raise ValueError('horizon_days, fuel_type_id and time_budget_ms must be integers; max_km and min_litres numbers')
+    if not 1 <= horizon <= max_horizon:
+        raise ValueError(f'horizon_days must be between 1 and {max_horizon}')
+    if max_km <= 0:
+        raise ValueError('max_km must be positive')
+    if min_litres < 0:
+        raise ValueError('min_litres cannot be negative')
+    if not 1 <= budget <= default_budget_ms * 10:
+        raise ValueError(f'time_budget_ms must be between 1 and {default_budget_ms * 10}')
+    return {'horizon_days': horizon, 'fuel_type_id': fuel_type_id, 'max_km': max_km,
+            'min_litres': min_litres, 'time_budget_ms': budget}
+
+
+def haversine_km(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km between every pair of points"""
+    lat = np.radians(latitude)
+    lon = np.radians(longitude)
+    half = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2 +
+            np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half, 0.0, 1.0)))
+
+
+def distance_matrix(sites: Iterable[Sequence]) -> Tuple[Dict[int, int], np.ndarray, bool]:
+    """
+    (row per site_id, km matrix, cache hit) for (site_id, latitude, longitude) rows; sites
+    without coordinates are left out. Matrices are cached by the coordinates they were built from.
+    """
+    located = sorted((int(site_id), round(float(lat), 6), round(float(lon), 6))
+                     for site_id, lat, lon in sites if lat is not None and lon is not None)
+    key = hashlib.sha1(repr(located).encode()).hexdigest()
+    with _distance_lock:
+        if key in _distance_cache:
+            _distance_cache.move_to_end(key)
+            return _distance_cache[key] + (True,)
+
+    index = {site_id: row for row, (site_id, _, _) in enumerate(located)}
+    coordinates = np.array([(lat, lon) for _, lat, lon in located], dtype=float).reshape(-1, 2)
+    km = haversine_km(coordinates[:, 0], coordinates[:, 1])
+    with _distance_lock:
+        _distance_cache[key] = (index, km)
+        while len(_distance_cache) > DISTANCE_CACHE_SIZE:
+            _distance_cache.popitem(last=False)
+    return index, km, False
+
+
+def min_cost_flow(supply: np.ndarray, demand: np.ndarray, cost: np.ndarray,
+                  deadline: Optional[float] = None) -> Tuple[np.ndarray, bool, int]:
+    """
+    Cheapest flow matrix from sources (rows, `supply` each; np.inf for unlimited) to sinks
+    (columns, needing `demand` each) over arcs costing `cost` per unit (np.inf where there is no
+    arc), by successive shortest paths. Paths are found with Bellman-Ford over the bipartite
+    residual graph, one vectorized relaxation of every arc per round. Returns (flow, complete,
+    augmentations). complete is False when some demand cannot be reached from the remaining
+    supply - the flow is then still the cheapest for the litres it carries - or once
+    time.perf_counter() passes `deadline`, when the flow found so far is only feasible.
+    """
+    sources, sinks = cost.shape
+    flow = np.zeros((sources, sinks))
+    sent = np.zeros(sources)
+    received = np.zeros(sinks)
+    columns = np.arange(sinks)
+    rows = np.arange(sources)
+    augmentations = 0
+    # When an unlimited source reaches every sink all demand gets met, and every augmentation
+    # runs along a zero reduced cost path, so the order they come in cannot change the total
+    settles = bool(np.isfinite(cost[np.isinf(supply)]).any(axis=0).all())
+
+    while True:
+        open_sinks = demand - received > EPSILON
+        if not open_sinks.any():
+            return flow, True, augmentations
+        if deadline is not None and time.perf_counter() > deadline:
+            return flow, False, augmentations
+
+        # Distances to every source (-1: straight from the super source) and every sink
+        # Labels only change on strict improvement, so ties never point back along a path
+        dist_source = np.where(supply - sent > EPSILON, 0.0, np.inf)
+        pred_source = np.full(sources, -1)
+        dist_sink = np.full(sinks, np.inf)
+        pred_sink = np.zeros(sinks, dtype=np.int64)
+        for _ in range(sources + sinks):
+            through = dist_source[:, None] + cost
+            via = np.argmin(through, axis=0)
+            candidate = through[via, columns]
+            better = candidate < dist_sink - EPSILON
+            dist_sink = np.where(better, candidate, dist_sink)
+            pred_sink = np.where(better, via, pred_sink)
+            # Back along a used arc: sink j to source i cancels flow at -cost
+            with np.errstate(invalid='ignore'):
+                back = np.where(flow > EPSILON, dist_sink[None, :] - cost, np.inf)
+            via = np.argmin(back, axis=1)
+            candidate = back[rows, via]
+            better = candidate < dist_source - EPSILON
+            if not better.any():
+                break
+            dist_source = np.where(better, candidate, dist_source)
+            pred_source = np.where(better, via, pred_source)
+
+        reachable = np.where(open_sinks, dist_sink, np.inf)
+        if not np.isfinite(reachable).any():
+            return flow, False, augmentations
+
+        # Every tree arc has zero reduced cost, so one search serves many augmentations. When some
+        # demand may go unmet the sinks must fill in order of distance: once an augmentation
+        # empties a source or cancels a back arc's flow the labels are stale and we search again
+        for target in np.argsort(reachable)[:int(np.isfinite(reachable).sum())]:
+            path = []
+            amount = needed = demand[target] - received[target]
+            sink = target
+            for _ in range(sources + sinks):
+                source = int(pred_sink[sink])
+                path.append((source, sink, 1.0))
+                previous = int(pred_source[source])
+                if previous < 0:
+                    amount = min(amount, supply[source] - sent[source])
+                    break
+                path.append((source, previous, -1.0))
+                amount = min(amount, flow[source, previous])
+                sink = previous
+            if amount <= EPSILON:
+                if settles:
+                    continue
+                break
+            for source, sink, direction in path:
+                flow[source, sink] += direction * amount
+            sent[path[-1][0]] += amount
+            received[target] += amount
+            augmentations += 1
+            if not settles and amount < needed - EPSILON:
+                break
+
+
+def plan_transfers(pairs: List[Dict[str, Any]], sites: Iterable[Sequence], lead_times: Dict[int, int],
+                   order_costs: Dict[Tuple[int, int], float], default_order_cost: float, horizon_days: int,
+                   cost_per_litre_km: float, handling_cost: float, shortage_cost: float, road_factor: float,
+                   max_km: float, min_litres: float, time_budget_ms: int) -> Dict[str, Any]:
+    """
+    Transfers and supplier deliveries for every pair (site_id, fuel_type_id, current_quantity,
+    maximum_capacity, minimum_threshold, reorder_point, optimal_order_quantity, daily_demand)
+    over the next `horizon_days`.
+
+    A pair projected to end the horizon below its reorder point (minimum threshold when unset)
+    needs the difference, up to its free tank space; one projected above it can give the excess.
+    Supplier litres cost the pair's delivery cost spread over its usual order quantity, plus
+    `shortage_cost` for litres the site would run short of before the fuel's supplier lead time.
+    Transfers cost `cost_per_litre_km` over the road distance (great-circle x `road_factor`,
+    at most `max_km`) plus `handling_cost` per litre. Each fuel is solved as a min-cost flow
+    within a shared `time_budget_ms`; transfers under `min_litres` are left to suppliers.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000.0
+    index, km, cached = distance_matrix(sites)
+
+    by_fuel: Dict[int, List[Dict[str, Any]]] = {}
+    for pair in pairs:
+        by_fuel.setdefault(pair['fuel_type_id'], []).append(pair)
+
+    transfers, deliveries = [], []
+    totals = {'donors': 0, 'receivers': 0, 'needed_litres': 0.0, 'transfer_litres': 0.0,
+              'supplier_litres': 0.0, 'transfer_cost': 0.0, 'supplier_cost': 0.0, 'baseline_cost': 0.0}
+    complete, augmentations = True, 0
+    for fuel_type_id, group in sorted(by_fuel.items()):
+        stock = np.array([float(pair.get('current_quantity') or 0.0) for pair in group])
+        daily = np.array([max(float(pair.get('daily_demand') or 0.0), 0.0) for pair in group])
+        capacity = np.array([float(pair.get('maximum_capacity') or 0.0) for pair in group])
+        floor = np.array([float(pair.get('minimum_threshold') or 0.0) for pair in group])
+        keep = np.array([float(pair.get('reorder_point') or 0.0) for pair in group])
+        keep = np.maximum(keep, floor)
+        usual_order = np.array([float(pair.get('optimal_order_quantity') or 0.0) for pair in group])
+        lead = lead_times.get(fuel_type_id, DEFAULT_LEAD_TIME_DAYS)
+
+        projected = stock - daily * horizon_days
+        surplus = np.maximum(projected - keep, 0.0)
+        need = np.minimum(np.maximum(keep - projected, 0.0), np.maximum(capacity - stock, 0.0))
+        # Litres used below the minimum threshold before a supplier could deliver
+        urgent = np.minimum(need, np.maximum(daily * min(lead, horizon_days) - (stock - floor), 0.0))
+        order_cost = np.array([order_costs.get((pair['site_id'], fuel_type_id)) or default_order_cost
+                               for pair in group])
+        delivery = order_cost / np.maximum(np.maximum(usual_order, need), 1.0)
+
+        donors = np.flatnonzero((surplus > EPSILON) & np.array([pair['site_id'] in index for pair in group]))
+        receivers = np.flatnonzero(need > EPSILON)
+        if not len(receivers):
+            continue
+        # One sink for the urgent and one for the routine part of every receiver
+        sink_pair = np.concatenate([receivers, receivers])
+        sink_urgent = np.repeat([True, False], len(receivers))
+        sink_need = np.concatenate([urgent[receivers], need[receivers] - urgent[receivers]])
+        kept = sink_need > EPSILON
+        sink_pair, sink_urgent, sink_need = sink_pair[kept], sink_urgent[kept], sink_need[kept]
+        sink_price = delivery[sink_pair] + np.where(sink_urgent, shortage_cost, 0.0)
+
+        donor_rows = np.array([index[group[row]['site_id']] for row in donors], dtype=np.int64)
+        receiver_rows = np.array([index.get(group[row]['site_id'], -1) for row in sink_pair], dtype=np.int64)
+        road = np.full((len(donors), len(sink_pair)), np.inf)
+        located = receiver_rows >= 0
+        road[:, located] = km[np.ix_(donor_rows, receiver_rows[located])] * road_factor
+        road[road > max_km] = np.inf
+        # Transfers dearer than the supplier can never be chosen; dropping them saves solver rounds
+        arc_cost = road * cost_per_litre_km + handling_cost
+        arc_cost[arc_cost >= sink_price[None, :]] = np.inf
+
+        supply = np.concatenate([surplus[donors], [np.inf]])
+        flow, solved, steps = min_cost_flow(supply, sink_need, np.vstack([arc_cost, sink_price[None, :]]), deadline)
+        complete = complete and solved
+        augmentations += steps
+
+        # Litres per donor and receiving pair; moves under min_litres go back to the supplier
+        moved: Dict[Tuple[int, int], List[int]] = {}
+        for donor, sink in zip(*np.nonzero(flow[:-1] > EPSILON)):
+            moved.setdefault((int(donor), int(sink_pair[sink])), []).append(int(sink))
+        for (donor, row), sinks in list(moved.items()):
+            if flow[donor, sinks].sum() < min_litres:
+                flow[-1, sinks] += flow[donor, sinks]
+                flow[donor, sinks] = 0.0
+                del moved[(donor, row)]
+        # Demand left unmet when the time budget ran out goes to the supplier as well
+        flow[-1] += np.maximum(sink_need - flow.sum(axis=0), 0.0)
+
+        for (donor, row), sinks in moved.items():
+            litres = flow[donor, sinks]
+            spent = float((litres * arc_cost[donor, sinks]).sum())
+            avoided = float((litres * sink_price[sinks]).sum())
+            source, target = group[donors[donor]], group[row]
+            transfers.append({
+                'fuel_type_id': fuel_type_id, 'fuel_name': source.get('fuel_name'),
+                'source_site_id': source['site_id'], 'source_site_name': source.get('site_name'),
+                'target_site_id': target['site_id'], 'target_site_name': target.get('site_name'),
+                'litres': round(float(litres.sum())), 'urgent_litres': round(float(litres[sink_urgent[sinks]].sum())),
+                'distance_km': round(float(road[donor, sinks[0]]), 1),
+                'cost': round(spent, 2), 'supplier_cost': round(avoided, 2), 'saving': round(avoided - spent, 2),
+            })
+            totals['transfer_litres'] += float(litres.sum())
+            totals['transfer_cost'] += spent
+
+        supplied = flow[-1]
+        for row in receivers:
+            sinks = np.flatnonzero(sink_pair == row)
+            litres = float(supplied[sinks].sum())
+            if litres > EPSILON:
+                pair = group[row]
+                deliveries.append({'site_id': pair['site_id'], 'site_name': pair.get('site_name'),
+                                   'fuel_type_id': fuel_type_id, 'fuel_name': pair.get('fuel_name'),
+                                   'litres': round(litres),
+                                   'urgent_litres': round(float(supplied[sinks[sink_urgent[sinks]]].sum()))})
+        totals['supplier_litres'] += float(supplied.sum())
+        totals['supplier_cost'] += float((supplied * sink_price).sum())
+        totals['donors'] += len(donors)
+        totals['receivers'] += len(receivers)
+        totals['needed_litres'] += float(sink_need.sum())
+        totals['baseline_cost'] += float((sink_need * sink_price).sum())
+
+    plan_cost = totals['transfer_cost'] + totals['supplier_cost']
+    transfers.sort(key=lambda transfer: -transfer['saving'])
+    return {
+        'horizon_days': horizon_days,
+        'pairs': len(pairs),
+        **{name: round(value, 2) if isinstance(value, float) else value for name, value in totals.items()},
+        'plan_cost': round(plan_cost, 2),
+        'savings': round(totals['baseline_cost'] - plan_cost, 2),
+        'complete': complete,
+        'augmentations': augmentations,
+        'distance_cache': 'hit' if cached else 'miss',
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'transfers': transfers,
+        'deliveries': deliveries,
+    }
+
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Forecast Backtest for Advanced Fuel Consumption Forecasting System
+Replays two years of history day by day and reports how accurate each forecasting method was
+
+Examples:
+    # Backtest the database configured in the environment / .env (SQL Server by default)
+    python backtest.py
+
+    # A generated SQLite fleet, last 365 days, 14-day accuracy horizon
+    python backtest.py --sqlite ../backend/data/fuel_control.db --days 365 --horizon 14
+
+    # Only the procedure's method, per-pair results as JSON, worst 20 pairs printed
+    python backtest.py --methods average --output results/backtest.json --top 20
+
+MAPE and bias compare forecast litres over --horizon days (no safety factor) with UsageTransactions;
+the stockout-miss rate counts forecast dates whose days remaining outlasted the real stock.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'backend')
+
+sys.path.insert(0, BACKEND_DIR)
+
+# =============================================
+# DATA
+# =============================================
+
+def load_history(storage, since: date) -> Dict[str, Any]:
+    """Stock, equipment and every hours, usage and refill row from `since` on"""
+    conn = storage.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT setting_value FROM SystemSettings WHERE setting_key = 'default_safety_factor'")
+        setting = cursor.fetchone()
+        cursor.execute("""
+            SELECT fs.site_id, fs.fuel_type_id, fs.current_quantity, s.site_name, ft.fuel_name
+            FROM FuelStock fs
+            JOIN Sites s ON fs.site_id = s.site_id
+            JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+            WHERE s.is_active = 1
+        """)
+        columns = [column[0] for column in cursor.description]
+        stocks = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT equipment_id, site_id, fuel_type_id, consumption_rate
+            FROM Equipment WHERE is_active = 1
+        """)
+        columns = [column[0] for column in cursor.description]
+        equipment = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT equipment_id, log_date, SUM(running_hours)
+            FROM OperationalHoursLog WHERE log_date >= ?
+            GROUP BY equipment_id, log_date
+        """, (since.isoformat(),))
+        hours = cursor.fetchall()
+        cursor.execute("""
+            SELECT site_id, fuel_type_id, equipment_id, usage_date, quantity
+            FROM UsageTransactions WHERE usage_date >= ?
+        """, (since.isoformat(),))
+        usage = cursor.fetchall()
+        cursor.execute("""
+            SELECT site_id, fuel_type_id, COALESCE(delivery_date, refill_date), quantity
+            FROM RefillTransactions WHERE COALESCE(delivery_date, refill_date) >= ?
+        """, (since.isoformat(),))
+        refills = cursor.fetchall()
+    finally:
+        conn.close()
+    try:
+        safety_factor = float(setting[0]) if setting else None
+    except (TypeError, ValueError):
+        safety_factor = None
+    return {'stocks': stocks, 'equipment': equipment, 'hours': hours, 'usage': usage, 'refills': refills,
+            'safety_factor': safety_factor}
+
+# =============================================
+# REPORT
+# =============================================
+
+def _value(value, suffix: str = '') -> str:
+    return '-' if value is None else f"{value:.2f}{suffix}"
+
+
+def print_rows(title: str, label: str, rows: List[Dict[str, Any]]):
+    print(f"\n{title}")
+    print(f"{label:<40} {'method':<13} {'forecasts':>9} {'MAPE':>9} {'bias':>9} {'checks':>7} {'misses':>7} "
+          f"{'miss %':>7} {'days err':>8}")
+    print('-' * 118)
+    for row in rows:
+        print(f"{row['label'][:40]:<40} {row['method']:<13} {row['forecasts']:>9} {_value(row['mape'], '%'):>9} "
+              f"{_value(row['bias'], '%'):>9} {row['stockout_checks']:>7} {row['stockout_misses']:>7} "
+              f"{_value(row['miss_rate']):>7} {_value(row['mean_days_error']):>8}")
+
+# =============================================
+# MAIN
+# =============================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Backtest forecasting methods against recorded usage')
+    parser.add_argument('--sqlite', metavar='PATH', help='read a SQLite database instead of the configured one')
+    parser.add_argument('--days', type=int, default=730, help='forecast dates to replay, ending at --end')
+    parser.add_argument('--end', type=date.fromisoformat, default=None,
+                        help='last forecast date (default: the latest with a full horizon of usage)')
+    parser.add_argument('--horizon', type=int, default=7, help='days of consumption each forecast is scored on')
+    parser.add_argument('--train-days', type=int, default=56, help='history before the first date for model fits')
+    parser.add_argument('--methods', default=','.join(('average', 'holt-winters')))
+    parser.add_argument('--workers', type=int, default=0, help='processes (0 = one per CPU, 1 = in-process)')
+    parser.add_argument('--top', type=int, default=10, help='worst site/fuel pairs to print per method')
+    parser.add_argument('--output', help='write the full results, per pair included, as JSON')
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        os.environ['DB_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = os.path.abspath(args.sqlite)
+    from config import Config
+    from storage import create_backend
+    from backtesting import run_backtest
+
+    today = date.today()
+    end = args.end or today - timedelta(days=args.horizon)
+    start = end - timedelta(days=args.days - 1)
+    storage = create_backend(Config)
+    if hasattr(storage, 'initialize'):
+        storage.initialize()
+
+    started = time.perf_counter()
+    data = load_history(storage, start - timedelta(days=max(args.train_days, Config.FORECAST_MODEL_HISTORY_DAYS)))
+    loaded = time.perf_counter() - started
+    print(f"📥 {len(data['stocks'])} site/fuel pairs, {len(data['equipment'])} machines, {len(data['hours']):,} "
+          f"hours rows, {len(data['usage']):,} usage rows loaded in {loaded:.1f}s")
+
+    try:
+        result = run_backtest(data['stocks'], data['equipment'], data['hours'], data['usage'], data['refills'],
+                              start, end, as_of=today, methods=[m for m in args.methods.split(',') if m],
+                              horizon=args.horizon, train_days=args.train_days,
+                              model_horizon=max(args.horizon, Config.FORECAST_MODEL_HORIZON_DAYS),
+                              history_days=Config.FORECAST_MODEL_HISTORY_DAYS,
+                              safety_factor=data['safety_factor'] or Config.DEFAULT_SAFETY_FACTOR,
+                              workers=args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    print(f"🔁 {result['forecast_dates']} forecast dates ({result['start']} to {result['end']}) x "
+          f"{result['pairs']} pairs in {result['elapsed_ms'] / 1000:.1f}s, horizon {result['horizon']} days")
+    print_rows('Fleet', 'scope', [{'label': 'all pairs', **row} for row in result['by_method']])
+    print_rows('By fuel', 'fuel', [{'label': row['fuel_name'] or str(row['fuel_type_id']), **row}
+                                   for row in result['by_fuel']])
+    if args.top:
+        for method in {row['method'] for row in result['by_pair']}:
+            worst = sorted((row for row in result['by_pair'] if row['method'] == method and row['mape'] is not None),
+                           key=lambda row: -row['mape'])[:args.top]
+            print_rows(f"Worst {len(worst)} pairs by MAPE ({method})", 'site / fuel',
+                       [{'label': f"{row['site_name']} / {row['fuel_name']}", **row} for row in worst])
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
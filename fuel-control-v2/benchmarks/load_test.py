@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness for Advanced Fuel Consumption Forecasting System API
+Drives mixed workloads at fixed concurrency and checks per-endpoint latency budgets
+
+Examples:
+    # Spawn backend/demo_app.py and run the default mix for 30 seconds with 16 users
+    python load_test.py --target demo --concurrency 16 --duration 30
+
+    # Spawn backend/app.py against the database configured in the environment / .env
+    python load_test.py --target app --concurrency 32 --duration 60 --output results/app.json
+
+    # Drive an already running server, heavier on reporting
+    python load_test.py --target app --base-url http://localhost:5000 --mix dashboard=40,reports=40,hours=10,usage=10
+
+Exit code is 1 when a latency budget (latency_budgets.json) or the error-rate budget is exceeded.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'backend')
+DEFAULT_BUDGETS = os.path.join(BENCHMARKS_DIR, 'latency_budgets.json')
+
+TARGET_MODULES = {'app': 'app', 'demo': 'demo_app'}
+DEFAULT_MIX = 'dashboard=55,hours=15,usage=15,reports=15'
+FORECAST_WINDOW_DAYS = 14  # Days of operational hours sp_CalculateSiteForecast reads
+
+# =============================================
+# STATISTICS
+# =============================================
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyStats:
+    """Thread-safe latency and error counters per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, latency_ms: float, status: int):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(latency_ms)
+            counts = self.statuses.setdefault(label, {})
+            counts[status] = counts.get(status, 0) + 1
+            if status == 0 or status >= 400:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, elapsed_s: float) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            labels = sorted(self.latencies)
+            result = {}
+            for label in labels:
+                values = sorted(self.latencies[label])
+                result[label] = {
+                    'count': len(values),
+                    'errors': self.errors.get(label, 0),
+                    'rps': round(len(values) / elapsed_s, 2) if elapsed_s else 0.0,
+                    'p50_ms': round(percentile(values, 50), 2),
+                    'p95_ms': round(percentile(values, 95), 2),
+                    'p99_ms': round(percentile(values, 99), 2),
+                    'max_ms': round(values[-1], 2),
+                    'statuses': {str(code): n for code, n in sorted(self.statuses[label].items())}
+                }
+            return result
+
+
+def print_summary(summary: Dict[str, Dict[str, float]], elapsed_s: float):
+    total = sum(row['count'] for row in summary.values())
+    errors = sum(row['errors'] for row in summary.values())
+    print(f"\n{'Endpoint':<48} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print('-' * 106)
+    for label, row in summary.items():
+        print(f"{label:<48} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    print('-' * 106)
+    print(f"{'TOTAL':<48} {total:>7} {errors:>5} {total / elapsed_s if elapsed_s else 0:>8.1f}   (latencies in ms)")
+
+
+def check_budgets(summary: Dict[str, Dict[str, float]], budgets: Dict[str, object], target: str) -> List[str]:
+    """Return human readable budget violations for one target"""
+    violations = []
+    endpoint_budgets = budgets.get(target, {})
+    for label, limits in endpoint_budgets.items():
+        row = summary.get(label)
+        if row is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if metric in limits and row[metric] > limits[metric]:
+                violations.append(f"{label}: {metric} {row[metric]:.1f} > budget {limits[metric]}")
+    max_error_rate = budgets.get('max_error_rate')
+    total = sum(row['count'] for row in summary.values())
+    errors = sum(row['errors'] for row in summary.values())
+    if max_error_rate is not None and total and errors / total > max_error_rate:
+        violations.append(f"error rate {errors / total:.2%} > budget {max_error_rate:.2%}")
+    return violations
+
+
+def load_budgets(path: str) -> Dict[str, object]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+# =============================================
+# WORKLOADS
+# =============================================
+
+class Fixtures:
+    """Real ids discovered from the running API so writes reference existing rows"""
+
+    def __init__(self, equipment: List[Dict[str, object]], logged: List[Dict[str, object]] = (), seed: int = 1):
+        self.equipment = [
+            (row['site_id'], row['equipment_id'], row.get('fuel_type_id', 1), row.get('consumption_rate') or 10.0)
+            for row in equipment if row.get('site_id') and row.get('equipment_id')
+        ] or [(1, 1, 1, 10.0)]
+        self.site_ids = sorted({site_id for site_id, *_ in self.equipment})
+
+        # Site shifts in the forecast window with machines not yet logged that day. Each machine-day
+        # is handed out once, so hours writes land where the forecast reads them without tripping
+        # the one-log-per-machine-and-day key
+        taken = {(row.get('equipment_id'), str(row.get('log_date'))[:10]) for row in logged}
+        free: Dict[Tuple[int, str], List[Tuple[int, float]]] = {}
+        for offset in range(FORECAST_WINDOW_DAYS):
+            day = (date.today() - timedelta(days=offset)).isoformat()
+            for site_id, equipment_id, _, rate in self.equipment:
+                if (equipment_id, day) not in taken:
+                    free.setdefault((site_id, day), []).append((equipment_id, rate))
+        self.shifts = [(site_id, day, machines) for (site_id, day), machines in sorted(free.items())]
+        random.Random(seed).shuffle(self.shifts)
+        self.backfilled = 0
+        self.lock = threading.Lock()
+
+    def claim_shift(self, machines: int) -> Optional[Tuple[int, str, List[Tuple[int, float]]]]:
+        """(site_id, log date, [(equipment_id, rate)]) for up to `machines` unlogged machines; None once all are logged"""
+        with self.lock:
+            if not self.shifts:
+                self.backfilled += 1
+                return None
+            site_id, day, free = self.shifts[-1]
+            if len(free) > machines:
+                self.shifts[-1] = (site_id, day, free[machines:])
+            else:
+                self.shifts.pop()
+            return site_id, day, free[:machines]
+
+
+class VirtualUser(threading.Thread):
+    """One keep-alive client looping over weighted scenarios until the deadline"""
+
+    def __init__(self, index: int, host: str, port: int, target: str, mix: List[Tuple[str, float]],
+                 fixtures: Fixtures, stats: Optional[LatencyStats], deadline: float, think_ms: float, seed: int):
+        super().__init__(name=f"vu-{index}", daemon=True)
+        self.host = host
+        self.port = port
+        self.target = target
+        self.mix = mix
+        self.fixtures = fixtures
+        self.stats = stats
+        self.deadline = deadline
+        self.think = think_ms / 1000.0
+        self.rng = random.Random(f"{seed}:{index}")
+        self.conn = None
+
+    def run(self):
+        scenarios = [(getattr(self, f"scenario_{name}"), weight) for name, weight in self.mix]
+        total = sum(weight for _, weight in scenarios)
+        while time.perf_counter() < self.deadline:
+            pick = self.rng.random() * total
+            for scenario, weight in scenarios:
+                pick -= weight
+                if pick <= 0:
+                    break
+            scenario()
+            if self.think:
+                time.sleep(self.rng.expovariate(1.0 / self.think))
+        if self.conn is not None:
+            self.conn.close()
+
+    def request(self, method: str, label: str, path: str, params: Optional[Dict[str, object]] = None,
+                body: Optional[Dict[str, object]] = None):
+        if time.perf_counter() >= self.deadline:
+            return
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        started = time.perf_counter()
+        status = 0
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        if self.stats is not None:
+            self.stats.record(f"{method} {label}", latency_ms, status)
+
+    # Scenarios
+
+    def scenario_dashboard(self):
+        """Dashboard polling: the frontend's refresh cycle"""
+        self.request('GET', '/api/stock/summary', '/api/stock/summary')
+        self.request('GET', '/api/stock', '/api/stock')
+        self.request('GET', '/api/forecasts', '/api/forecasts')
+        self.request('GET', '/api/alerts', '/api/alerts')
+
+    def scenario_hours(self):
+        """A supervisor logging a recent shift's hours for a batch of machines"""
+        shift = self.fixtures.claim_shift(self.rng.randint(3, 12))
+        if shift is not None:
+            site_id, shift_date, batch = shift
+        else:
+            # Every recent machine-day is logged; back-fill a far-past day so the write still happens
+            site_id = self.rng.choice(self.fixtures.site_ids)
+            machines = [(m[1], m[3]) for m in self.fixtures.equipment if m[0] == site_id]
+            shift_date = (date.today() - timedelta(days=self.rng.randint(3 * 365, 60 * 365))).isoformat()
+            batch = self.rng.sample(machines, min(len(machines), self.rng.randint(3, 12)))
+        for equipment_id, rate in batch:
+            hours = round(self.rng.uniform(2, 12), 2)
+            self.request('POST', '/api/operational-hours', '/api/operational-hours', body={
+                'site_id': site_id, 'equipment_id': equipment_id, 'log_date': shift_date,
+                'running_hours': hours,
+                'fuel_consumed': round(hours * float(rate), 2), 'recorded_by': 'Load Test', 'notes': 'load test'
+            })
+        self.request('GET', '/api/operational-hours', '/api/operational-hours',
+                     params={'site_id': site_id, 'start_date': (date.today() - timedelta(days=7)).isoformat()})
+
+    def scenario_usage(self):
+        """Fuel issued to machines, then the usage list for the site"""
+        site_id, equipment_id, fuel_type_id, rate = self.rng.choice(self.fixtures.equipment)
+        for _ in range(self.rng.randint(1, 3)):
+            self.request('POST', '/api/usage', '/api/usage', body={
+                'site_id': site_id, 'fuel_type_id': fuel_type_id, 'equipment_id': equipment_id,
+                'department': 'Operations', 'quantity': round(self.rng.uniform(1, 8) * float(rate), 2),
+                'usage_date': datetime.now().isoformat(timespec='seconds'), 'purpose': 'load test',
+                'created_by': 'Load Test'
+            })
+        self.request('GET', '/api/usage', '/api/usage', params={'site_id': site_id})
+
+    def scenario_reports(self):
+        """Month-end report pulls over wider date ranges"""
+        end = date.today()
+        start = end - timedelta(days=self.rng.choice((7, 30, 90)))
+        self.request('GET', '/api/reports/consumption-summary', '/api/reports/consumption-summary',
+                     params={'start_date': start.isoformat(), 'end_date': end.isoformat()})
+        self.request('GET', '/api/reports/equipment-efficiency', '/api/reports/equipment-efficiency')
+        self.request('GET', '/api/usage', '/api/usage', params={'start_date': start.isoformat()})
+        self.request('GET', '/api/refills', '/api/refills')
+
+# =============================================
+# SERVER MANAGEMENT
+# =============================================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(target: str, port: int, env_overrides: Dict[str, str], log_path: str,
+                 backend_dir: str = BACKEND_DIR) -> subprocess.Popen:
+    """Run the Flask app in a threaded, non-debug server from the backend directory"""
+    module = TARGET_MODULES[target]
+    code = f"import {module} as m; m.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+    env = dict(os.environ, **env_overrides)
+    log = open(log_path, 'w', encoding='utf-8')
+    return subprocess.Popen([sys.executable, '-c', code], cwd=backend_dir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_up(host: str, port: int, timeout_s: float = 30.0, process: Optional[subprocess.Popen] = None):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+    raise RuntimeError(f"server on {host}:{port} did not answer within {timeout_s:.0f}s")
+
+
+def fetch_list(host: str, port: int, path: str) -> List[Dict[str, object]]:
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=120)
+        conn.request('GET', path)
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        if response.status == 200:
+            return json.loads(body)
+    except (OSError, ValueError, http.client.HTTPException):
+        pass
+    return []
+
+
+def discover_fixtures(host: str, port: int, seed: int = 1) -> Fixtures:
+    window_start = date.today() - timedelta(days=FORECAST_WINDOW_DAYS - 1)
+    logged = fetch_list(host, port, f"/api/operational-hours?{urlencode({'start_date': window_start.isoformat()})}")
+    return Fixtures(fetch_list(host, port, '/api/equipment'), logged, seed)
+
+# =============================================
+# MAIN
+# =============================================
+
+def parse_mix(value: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if not hasattr(VirtualUser, f"scenario_{name}"):
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def run_load(host: str, port: int, target: str, mix: List[Tuple[str, float]], concurrency: int,
+             duration_s: float, warmup_s: float, think_ms: float, seed: int) -> Tuple[LatencyStats, float, Fixtures]:
+    fixtures = discover_fixtures(host, port, seed)
+    if warmup_s > 0:
+        warmup_deadline = time.perf_counter() + warmup_s
+        users = [VirtualUser(i, host, port, target, mix, fixtures, None, warmup_deadline, think_ms, seed - 1)
+                 for i in range(concurrency)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+    stats = LatencyStats()
+    started = time.perf_counter()
+    deadline = started + duration_s
+    users = [VirtualUser(i, host, port, target, mix, fixtures, stats, deadline, think_ms, seed)
+             for i in range(concurrency)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return stats, time.perf_counter() - started, fixtures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the Fuel Control API against latency budgets')
+    parser.add_argument('--target', choices=sorted(TARGET_MODULES), default='demo',
+                        help='which backend to spawn (and which budgets/endpoints apply)')
+    parser.add_argument('--base-url', help='use an already running server instead of spawning one')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='extra environment for the spawned server (e.g. DB_SERVER=...)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds before the run')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean think time between scenarios')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--budgets', default=DEFAULT_BUDGETS)
+    parser.add_argument('--no-budgets', action='store_true', help='report only, never fail')
+    parser.add_argument('--output', help='write the summary as JSON')
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.base_url:
+        parts = urlsplit(args.base_url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        env = dict(item.split('=', 1) for item in args.env)
+        log_path = os.path.join(tempfile.gettempdir(), f"fuel_load_test_{args.target}_{port}.log")
+        print(f"🚀 Starting {TARGET_MODULES[args.target]}.py on port {port} (log: {log_path})")
+        process = spawn_server(args.target, port, env, log_path)
+
+    try:
+        wait_until_up(host, port, process=process)
+        mix_text = ', '.join(f"{name}={weight:g}" for name, weight in args.mix)
+        print(f"⏱️  {args.concurrency} users for {args.duration:g}s against {host}:{port} ({mix_text})")
+        stats, elapsed, fixtures = run_load(host, port, args.target, args.mix, args.concurrency, args.duration,
+                                            args.warmup, args.think_ms, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    summary = stats.summary(elapsed)
+    print_summary(summary, elapsed)
+    if fixtures.backfilled:
+        print(f"\n⚠️  {fixtures.backfilled} hours batches found every machine logged for the last "
+              f"{FORECAST_WINDOW_DAYS} days and back-filled far-past days instead")
+
+    violations = [] if args.no_budgets else check_budgets(summary, load_budgets(args.budgets), args.target)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'target': args.target, 'concurrency': args.concurrency, 'duration_s': round(elapsed, 2),
+                'mix': dict(args.mix), 'timestamp': datetime.now().isoformat(),
+                'endpoints': summary, 'violations': violations
+            }, f, indent=2)
+
+    if violations:
+        print('\n❌ Latency budget exceeded:')
+        for violation in violations:
+            print(f"   {violation}")
+        return 1
+    print('\n✅ All endpoints within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
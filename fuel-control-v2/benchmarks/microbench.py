@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for backend hot paths of Advanced Fuel Consumption Forecasting System
+Times per-row and per-request code in backend/app.py and compares against stored baselines
+
+Examples:
+    # Run everything and print timings
+    python microbench.py
+
+    # Record a new baseline for this machine
+    python microbench.py --save-baseline
+
+    # Compare against the baseline; exit 1 when anything is >25% slower
+    python microbench.py --compare --tolerance 0.25
+
+    # Only the JSON benchmarks
+    python microbench.py --filter json --compare
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'backend')
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baselines', 'microbench.json')
+
+sys.path.insert(0, BACKEND_DIR)
+# The hot paths never touch the database; the embedded backend avoids needing an ODBC driver
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+
+import app as backend  # noqa: E402  (needs backend/ on sys.path)
+
+# =============================================
+# FIXTURES
+# =============================================
+
+USAGE_DESCRIPTION = [(name,) for name in (
+    'usage_id', 'transaction_id', 'site_id', 'fuel_type_id', 'equipment_id', 'department', 'quantity',
+    'usage_date', 'purpose', 'operator_name', 'approved_by', 'created_by', 'created_date',
+    'site_name', 'fuel_name', 'equipment_name')]
+
+FORECAST_DESCRIPTION = [(name,) for name in (
+    'forecast_id', 'site_id', 'fuel_type_id', 'forecast_date', 'current_balance', 'daily_consumption_rate',
+    'forecast_days_remaining', 'next_refill_date_estimate', 'confidence_level', 'calculation_method',
+    'total_equipment_count', 'active_equipment_count', 'average_operational_hours', 'created_date',
+    'site_name', 'fuel_name')]
+
+
+def usage_rows(count: int) -> List[tuple]:
+    """Rows shaped like pyodbc results of GET /api/usage"""
+    start = datetime(2025, 1, 1, 18, 0, 0)
+    return [(
+        i, f"USE-{i:09d}", 1 + i % 50, 1 + i % 3, 1 + i % 600, 'Operations',
+        Decimal(f"{100 + i % 900}.{i % 1000:03d}"), start + timedelta(hours=i),
+        'Daily operations', None, None, 'Site Supervisor', start + timedelta(hours=i, minutes=5),
+        f"Construction Site {i % 50}", 'Diesel', f"Excavator {i % 600}"
+    ) for i in range(count)]
+
+
+def forecast_rows(count: int) -> List[tuple]:
+    """Rows shaped like pyodbc results of GET /api/forecasts"""
+    today = datetime(2025, 6, 1).date()
+    return [(
+        i, 1 + i % 50, 1 + i % 3, today, Decimal(f"{20000 + i}.500"), Decimal(f"{1200 + i % 300}.125"),
+        10 + i % 40, today + timedelta(days=7 + i % 30), Decimal('87.50'),
+        'Equipment-based with operational hours', 12, 11, Decimal('8.25'), datetime(2025, 6, 1, 6, 0, 0),
+        f"Construction Site {i % 50}", 'Diesel'
+    ) for i in range(count)]
+
+
+def as_dicts(rows: List[tuple], description) -> List[Dict]:
+    return [backend.row_to_dict(row, description) for row in rows]
+
+# =============================================
+# BENCHMARKS
+# =============================================
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    one_usage = usage_rows(1)[0]
+    usage_1k = usage_rows(1000)
+    usage_dicts_1k = as_dicts(usage_1k, USAGE_DESCRIPTION)
+    forecast_dicts_1k = as_dicts(forecast_rows(1000), FORECAST_DESCRIPTION)
+    results = {n: as_dicts(usage_rows(n), USAGE_DESCRIPTION) for n in (10, 1000, 100000)}
+
+    all_usage_args = {'site_id': '12', 'equipment_id': '340', 'start_date': '2025-01-01', 'end_date': '2025-03-31'}
+    some_hours_args = {'site_id': '12', 'start_date': '2025-01-01'}
+    usage_base = "SELECT ut.* FROM UsageTransactions ut WHERE 1=1"
+    hours_base = "SELECT oh.* FROM OperationalHoursLog oh WHERE 1=1"
+
+    flask_app = backend.app
+
+    def jsonify_rows(rows):
+        def run():
+            with flask_app.test_request_context('/api/usage'):
+                return backend.jsonify(rows).get_data()
+        return run
+
+    return {
+        'row_to_dict.single_row': lambda: backend.row_to_dict(one_usage, USAGE_DESCRIPTION),
+        'row_to_dict.1k_rows': lambda: [backend.row_to_dict(row, USAGE_DESCRIPTION) for row in usage_1k],
+        'json.decimal_encoder.forecasts_1k': lambda: json.dumps(forecast_dicts_1k, cls=backend.DecimalEncoder),
+        'json.decimal_encoder.usage_1k': lambda: json.dumps(usage_dicts_1k, cls=backend.DecimalEncoder),
+        'json.provider.forecasts_1k': lambda: flask_app.json.dumps(forecast_dicts_1k),
+        'json.provider.usage_1k': lambda: flask_app.json.dumps(usage_dicts_1k),
+        'where.usage.all_filters': lambda: backend.build_filtered_query(
+            usage_base, all_usage_args, backend.USAGE_FILTERS, "ORDER BY ut.usage_date DESC"),
+        'where.usage.no_filters': lambda: backend.build_filtered_query(
+            usage_base, {}, backend.USAGE_FILTERS, "ORDER BY ut.usage_date DESC"),
+        'where.operational_hours.some_filters': lambda: backend.build_filtered_query(
+            hours_base, some_hours_args, backend.OPERATIONAL_HOURS_FILTERS, "ORDER BY oh.log_date DESC"),
+        'jsonify.10_rows': jsonify_rows(results[10]),
+        'jsonify.1k_rows': jsonify_rows(results[1000]),
+        'jsonify.100k_rows': jsonify_rows(results[100000]),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    """Calibrate loop count to ~min_time, then take `repeat` samples of the per-call time"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    return {
+        'min_us': round(min(samples), 3),
+        'median_us': round(statistics.median(samples), 3),
+        'loops': number,
+        'repeat': repeat
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[Tuple[str, float, float, float]]:
+    """Return (name, baseline_us, current_us, ratio) for benchmarks slower than the tolerance"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = current['min_us'] / previous['min_us'] if previous['min_us'] else 1.0
+        current['vs_baseline'] = round(ratio, 3)
+        if ratio > 1.0 + tolerance:
+            regressions.append((name, previous['min_us'], current['min_us'], ratio))
+    return regressions
+
+
+def metadata() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(terse=True),
+        'timestamp': datetime.now().isoformat(timespec='seconds')
+    }
+
+# =============================================
+# MAIN
+# =============================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Micro-benchmark backend hot paths against a baseline')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per sample')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--compare', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+        baseline = stored.get('benchmarks', {})
+        if stored.get('metadata', {}).get('machine') != platform.machine() or \
+                stored.get('metadata', {}).get('python') != platform.python_version():
+            print(f"⚠️  Baseline was recorded on {stored.get('metadata')}; comparisons may be noisy")
+
+    benchmarks = {name: func for name, func in build_benchmarks().items() if args.filter in name}
+    results = {}
+    print(f"{'Benchmark':<42} {'min':>12} {'median':>12} {'loops':>8}  baseline")
+    print('-' * 92)
+    for name, func in benchmarks.items():
+        result = measure(func, args.repeat, args.min_time)
+        results[name] = result
+        note = ''
+        if name in baseline and baseline[name].get('min_us'):
+            note = f"x{result['min_us'] / baseline[name]['min_us']:.2f}"
+        print(f"{name:<42} {result['min_us']:>10.2f}us {result['median_us']:>10.2f}us {result['loops']:>8}  {note}")
+
+    regressions = compare(results, baseline, args.tolerance) if args.compare else []
+    document = {'metadata': metadata(), 'benchmarks': results}
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        if os.path.exists(args.baseline) and args.filter:
+            # Partial runs update only the benchmarks they measured
+            with open(args.baseline, encoding='utf-8') as f:
+                merged = json.load(f)
+            merged['benchmarks'].update(results)
+            merged['metadata'] = document['metadata']
+            document = merged
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n💾 Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}:")
+        for name, before, after, ratio in regressions:
+            print(f"   {name}: {before:.2f}us -> {after:.2f}us (x{ratio:.2f})")
+        return 1
+    if args.compare:
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Workload Replay Tool for Advanced Fuel Consumption Forecasting System API
+Replays captured production requests (CAPTURE_ENABLED=true) and compares builds
+
+Examples:
+    # Replay a capture at 5x speed against a spawned local backend/app.py
+    python replay.py run ../backend/logs/capture.jsonl --target app --speed 5 --output results/main.json
+
+    # Same capture against another build (e.g. a git worktree of the branch under review)
+    python replay.py run capture.jsonl --target app --backend-dir ../../fuel-tracker-pr/fuel-control-v2/backend \\
+        --speed 5 --output results/pr.json
+
+    # Comparative latency report; exit 1 when a route's p95 regressed by more than 20%
+    python replay.py compare results/main.json results/pr.json --tolerance 0.2
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from load_test import (BACKEND_DIR, TARGET_MODULES, LatencyStats, free_port, percentile, print_summary,
+                       spawn_server, wait_until_up)
+
+sys.path.insert(0, BACKEND_DIR)
+
+from capture import restore  # noqa: E402  (needs backend/ on sys.path)
+
+# =============================================
+# CAPTURE FILES
+# =============================================
+
+def read_capture(paths: List[str], routes: Optional[List[str]] = None, limit: int = 0) -> List[Dict]:
+    """Load capture records from JSON-lines files, ordered by arrival time"""
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if routes and not any(record['route'].startswith(prefix) for prefix in routes):
+                    continue
+                records.append(record)
+    records.sort(key=lambda r: r['ts'])
+    return records[:limit] if limit else records
+
+# =============================================
+# REPLAY
+# =============================================
+
+class Replayer:
+    """Send captured requests on their original schedule (scaled by speed)"""
+
+    def __init__(self, host: str, port: int, speed: float, max_workers: int):
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.max_workers = max_workers
+        self.stats = LatencyStats()
+        self.lag_ms: List[float] = []
+        self._local = threading.local()
+        self._lag_lock = threading.Lock()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self._local.conn = conn
+        return conn
+
+    def _send(self, record: Dict, due: float):
+        with self._lag_lock:
+            self.lag_ms.append(max(0.0, (time.perf_counter() - due) * 1000.0))
+        path = record['path']
+        args = restore(record.get('args') or {})
+        if args:
+            path = f"{path}?{urlencode(args)}"
+        body = record.get('body')
+        payload = json.dumps(restore(body)) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        started = time.perf_counter()
+        status = 0
+        try:
+            conn = self._connection()
+            conn.request(record['method'], path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self._local.conn.close()
+            self._local.conn = None
+        self.stats.record(f"{record['method']} {record['route']}", (time.perf_counter() - started) * 1000.0, status)
+
+    def run(self, records: List[Dict]) -> float:
+        """Replay records; returns the wall time of the replay in seconds"""
+        if not records:
+            return 0.0
+        first_ts = records[0]['ts']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='replay') as pool:
+            for record in records:
+                due = started + (record['ts'] - first_ts) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, record, due)
+        return time.perf_counter() - started
+
+
+def capture_profile(records: List[Dict]) -> Dict[str, object]:
+    """Shape of the captured workload: duration, request rate and observed concurrency"""
+    if not records:
+        return {}
+    span = records[-1]['ts'] - records[0]['ts']
+    in_flight = sorted(r.get('in_flight', 1) for r in records)
+    return {
+        'requests': len(records),
+        'duration_s': round(span, 2),
+        'rps': round(len(records) / span, 2) if span else None,
+        'in_flight_p50': percentile(in_flight, 50),
+        'in_flight_max': in_flight[-1],
+    }
+
+# =============================================
+# COMPARISON
+# =============================================
+
+def compare_runs(baseline: Dict, candidate: Dict, tolerance: float, metric: str = 'p95_ms') -> int:
+    """Print a side-by-side latency report; returns the number of regressed routes"""
+    base_endpoints = baseline['endpoints']
+    cand_endpoints = candidate['endpoints']
+    labels = sorted(set(base_endpoints) | set(cand_endpoints))
+    print(f"Baseline:  {baseline.get('label') or baseline.get('base_url')} ({baseline.get('timestamp')})")
+    print(f"Candidate: {candidate.get('label') or candidate.get('base_url')} ({candidate.get('timestamp')})\n")
+    print(f"{'Endpoint':<48} {'count':>7} {'p50 A':>8} {'p50 B':>8} {'p95 A':>8} {'p95 B':>8} "
+          f"{'p99 A':>8} {'p99 B':>8} {'change':>8}")
+    print('-' * 120)
+    regressions = 0
+    for label in labels:
+        a = base_endpoints.get(label)
+        b = cand_endpoints.get(label)
+        if a is None or b is None:
+            print(f"{label:<48} {'only in ' + ('baseline' if b is None else 'candidate'):>30}")
+            continue
+        change = (b[metric] - a[metric]) / a[metric] if a[metric] else 0.0
+        flag = ''
+        if change > tolerance:
+            regressions += 1
+            flag = ' ❌'
+        elif change < -tolerance:
+            flag = ' ✅'
+        print(f"{label:<48} {b['count']:>7} {a['p50_ms']:>8.1f} {b['p50_ms']:>8.1f} {a['p95_ms']:>8.1f} "
+              f"{b['p95_ms']:>8.1f} {a['p99_ms']:>8.1f} {b['p99_ms']:>8.1f} {change:>+7.0%}{flag}")
+    print('-' * 120)
+    errors_a = sum(row['errors'] for row in base_endpoints.values())
+    errors_b = sum(row['errors'] for row in cand_endpoints.values())
+    print(f"Errors: baseline {errors_a}, candidate {errors_b}. Regressions ({metric} > +{tolerance:.0%}): {regressions}")
+    return regressions
+
+# =============================================
+# MAIN
+# =============================================
+
+def cmd_run(args) -> int:
+    records = read_capture(args.capture, args.route, args.limit)
+    if not records:
+        print('❌ No capture records to replay')
+        return 2
+    profile = capture_profile(records)
+    print(f"📼 {profile['requests']} requests over {profile['duration_s']}s "
+          f"(concurrency p50 {profile['in_flight_p50']}, max {profile['in_flight_max']}), replaying at {args.speed:g}x")
+
+    process = None
+    if args.base_url:
+        parts = urlsplit(args.base_url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        env = dict(item.split('=', 1) for item in args.env)
+        log_path = os.path.join(tempfile.gettempdir(), f"fuel_replay_{args.target}_{port}.log")
+        print(f"🚀 Starting {TARGET_MODULES[args.target]}.py from {args.backend_dir} on port {port} (log: {log_path})")
+        process = spawn_server(args.target, port, env, log_path, os.path.abspath(args.backend_dir))
+
+    try:
+        wait_until_up(host, port, process=process)
+        replayer = Replayer(host, port, args.speed, args.max_workers)
+        elapsed = replayer.run(records)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    summary = replayer.stats.summary(elapsed)
+    print_summary(summary, elapsed)
+    lag = sorted(replayer.lag_ms)
+    print(f"Schedule lag p95 {percentile(lag, 95):.1f} ms, max {lag[-1]:.1f} ms "
+          f"(raise --max-workers if this grows with --speed)")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'label': args.label or args.base_url or os.path.abspath(args.backend_dir),
+                'base_url': args.base_url, 'speed': args.speed, 'capture': profile,
+                'duration_s': round(elapsed, 2), 'timestamp': datetime.now().isoformat(),
+                'schedule_lag_p95_ms': round(percentile(lag, 95), 2), 'endpoints': summary
+            }, f, indent=2)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    return 1 if compare_runs(baseline, candidate, args.tolerance, args.metric) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Replay captured API workloads and compare builds')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='replay capture files against a server')
+    run.add_argument('capture', nargs='+', help='capture JSON-lines files')
+    run.add_argument('--speed', type=float, default=1.0, help='time compression (1, 5, 20, ...)')
+    run.add_argument('--target', choices=sorted(TARGET_MODULES), default='app')
+    run.add_argument('--backend-dir', default=BACKEND_DIR, help='backend directory of the build to spawn')
+    run.add_argument('--base-url', help='use an already running server instead of spawning one')
+    run.add_argument('--env', action='append', default=[], metavar='KEY=VALUE')
+    run.add_argument('--max-workers', type=int, default=64, help='upper bound on concurrent requests')
+    run.add_argument('--route', action='append', help='only replay routes starting with this prefix')
+    run.add_argument('--limit', type=int, default=0, help='replay only the first N requests')
+    run.add_argument('--label', help='name of this build in reports')
+    run.add_argument('--output', help='write the latency report as JSON')
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser('compare', help='compare two replay reports')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--tolerance', type=float, default=0.2)
+    compare.add_argument('--metric', choices=('p50_ms', 'p95_ms', 'p99_ms'), default='p95_ms')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
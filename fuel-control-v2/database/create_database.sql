@@ -321,6 +321,64 @@ CREATE TABLE SystemSettings (
     updated_date DATETIME2 DEFAULT GETDATE()
 );
 
+-- Sync Requests (NEW): writes replayed by offline field clients, one row per idempotency key
+CREATE TABLE SyncRequests (
+    idempotency_key NVARCHAR(64) PRIMARY KEY,
+    endpoint NVARCHAR(100) NOT NULL,
+    response NVARCHAR(MAX),
+    created_date DATETIME2 DEFAULT GETDATE()
+);
+
+-- Forecast Models (NEW): fitted per-equipment time-series models, refitted when new hours are logged
+CREATE TABLE ForecastModels (
+    equipment_id INT PRIMARY KEY,
+    model_type NVARCHAR(50) NOT NULL, -- holt-winters, or average for short histories
+    data_signature NVARCHAR(100) NOT NULL, -- Log count, last log date and total hours fitted on
+    state_date DATE NOT NULL, -- Last day of the fitted series
+    parameters NVARCHAR(MAX) NOT NULL, -- JSON smoothing parameters and final state
+    fitted_date DATETIME2 DEFAULT GETDATE(),
+    FOREIGN KEY (equipment_id) REFERENCES Equipment(equipment_id)
+);
+
+-- Reorder Recommendations (NEW): optimized supplier, order quantity and reorder point per stock row
+CREATE TABLE ReorderRecommendations (
+    stock_id INT PRIMARY KEY,
+    site_id INT NOT NULL,
+    fuel_type_id INT NOT NULL,
+    supplier_id INT, -- NULL when no active supplier prices the fuel
+    unit_price DECIMAL(10,4),
+    order_quantity DECIMAL(12,2),
+    reorder_point DECIMAL(12,2),
+    safety_stock DECIMAL(12,2),
+    lead_time_days INT,
+    daily_demand DECIMAL(10,3),
+    annual_cost DECIMAL(18,2), -- Purchase + ordering + holding cost per year
+    current_annual_cost DECIMAL(18,2), -- The same supplier at the previous order quantity
+    input_signature NVARCHAR(64) NOT NULL, -- Digest of demand, tank and offers the result was computed from
+    calculated_date DATETIME2 DEFAULT GETDATE(),
+    FOREIGN KEY (stock_id) REFERENCES FuelStock(stock_id),
+    FOREIGN KEY (supplier_id) REFERENCES Suppliers(supplier_id)
+);
+
+-- Delivery Schedule (NEW): planned deliveries per site and fuel from the delivery scheduler
+CREATE TABLE DeliverySchedule (
+    delivery_id INT IDENTITY(1,1) PRIMARY KEY,
+    site_id INT NOT NULL,
+    fuel_type_id INT NOT NULL,
+    supplier_id INT,
+    order_date DATE NOT NULL, -- Latest day to place the order, delivery_date less the lead time
+    delivery_date DATE NOT NULL,
+    quantity DECIMAL(12,2) NOT NULL,
+    trucks INT NOT NULL DEFAULT 1, -- Truckloads the quantity is split into
+    stock_before DECIMAL(12,2), -- Forecast stock when the delivery arrives
+    at_risk BIT DEFAULT 0, -- Stock falls below minimum_threshold before this delivery can arrive
+    status NVARCHAR(20) DEFAULT 'Planned',
+    planned_date DATETIME2 DEFAULT GETDATE(),
+    FOREIGN KEY (site_id) REFERENCES Sites(site_id),
+    FOREIGN KEY (fuel_type_id) REFERENCES FuelTypes(fuel_type_id),
+    FOREIGN KEY (supplier_id) REFERENCES Suppliers(supplier_id)
+);
+
 -- =============================================
 -- INDEXES FOR PERFORMANCE
 -- =============================================
@@ -347,5 +405,9 @@ CREATE INDEX IX_FuelStock_Site_FuelType ON FuelStock(site_id, fuel_type_id);
 CREATE INDEX IX_FuelStock_CurrentQuantity ON FuelStock(current_quantity);
 CREATE INDEX IX_FuelStock_ReorderPoint ON FuelStock(reorder_point);
 
+-- Delivery schedule indexes
+CREATE INDEX IX_DeliverySchedule_Site_FuelType ON DeliverySchedule(site_id, fuel_type_id);
+CREATE INDEX IX_DeliverySchedule_Supplier_Date ON DeliverySchedule(supplier_id, delivery_date);
+
 PRINT 'Advanced Fuel Consumption Forecasting Database Created Successfully!';
 GO
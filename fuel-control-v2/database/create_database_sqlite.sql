@@ -0,0 +1,370 @@
+-- =============================================
+-- Advanced Fuel Consumption Forecasting System Database
+-- SQLite port of create_database.sql (edge sites, offline benchmarking)
+-- =============================================
+-- Type mapping: INT IDENTITY -> INTEGER PRIMARY KEY, NVARCHAR -> TEXT,
+-- DECIMAL -> REAL, BIT -> INTEGER, DATE/DATETIME2 -> ISO-8601 TEXT
+
+PRAGMA foreign_keys = ON;
+
+-- =============================================
+-- CORE TABLES
+-- =============================================
+
+-- Fuel Types Table
+CREATE TABLE IF NOT EXISTS FuelTypes (
+    fuel_type_id INTEGER PRIMARY KEY,
+    fuel_name TEXT NOT NULL UNIQUE,
+    fuel_code TEXT NOT NULL UNIQUE,
+    density REAL DEFAULT 0.850, -- kg/liter
+    energy_content REAL, -- MJ/liter
+    carbon_factor REAL, -- kg CO2/liter
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Sites Table (Enhanced)
+CREATE TABLE IF NOT EXISTS Sites (
+    site_id INTEGER PRIMARY KEY,
+    site_name TEXT NOT NULL,
+    site_code TEXT NOT NULL UNIQUE,
+    site_type TEXT NOT NULL CHECK (site_type IN ('Site', 'Warehouse', 'Distribution Center')),
+    location_address TEXT,
+    latitude REAL,
+    longitude REAL,
+    contact_person TEXT,
+    contact_phone TEXT,
+    contact_email TEXT,
+    storage_capacity REAL, -- Total storage capacity in liters
+    safety_stock_days INTEGER DEFAULT 7, -- Days of safety stock to maintain
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Suppliers Table (Enhanced)
+CREATE TABLE IF NOT EXISTS Suppliers (
+    supplier_id INTEGER PRIMARY KEY,
+    supplier_name TEXT NOT NULL,
+    supplier_code TEXT NOT NULL UNIQUE,
+    contact_person TEXT,
+    phone TEXT,
+    email TEXT,
+    address TEXT,
+    payment_terms TEXT,
+    lead_time_days INTEGER DEFAULT 3, -- Standard delivery lead time
+    minimum_order_quantity REAL DEFAULT 0,
+    is_preferred INTEGER DEFAULT 0,
+    rating REAL CHECK (rating >= 0 AND rating <= 5), -- Supplier rating 0-5
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- =============================================
+-- EQUIPMENT AND CONSUMPTION TRACKING
+-- =============================================
+
+-- Equipment Table
+CREATE TABLE IF NOT EXISTS Equipment (
+    equipment_id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    equipment_name TEXT NOT NULL,
+    equipment_code TEXT NOT NULL,
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    consumption_rate REAL NOT NULL, -- liters per hour
+    equipment_type TEXT, -- Generator, Vehicle, Machinery, etc.
+    manufacturer TEXT,
+    model TEXT,
+    serial_number TEXT,
+    installation_date TEXT,
+    last_maintenance_date TEXT,
+    next_maintenance_date TEXT,
+    efficiency_rating REAL, -- Fuel efficiency rating
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_date TEXT DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (site_id, equipment_code)
+);
+
+-- Operational Hours Log
+CREATE TABLE IF NOT EXISTS OperationalHoursLog (
+    log_id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    equipment_id INTEGER NOT NULL REFERENCES Equipment(equipment_id),
+    log_date TEXT NOT NULL,
+    running_hours REAL NOT NULL,
+    fuel_consumed REAL, -- Actual fuel consumed (if available)
+    recorded_by TEXT,
+    notes TEXT,
+    is_estimated INTEGER DEFAULT 0, -- Whether the hours are estimated
+    created_date TEXT DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (site_id, equipment_id, log_date)
+);
+
+-- =============================================
+-- INVENTORY AND STOCK MANAGEMENT
+-- =============================================
+
+-- Fuel Stock Table (Enhanced)
+CREATE TABLE IF NOT EXISTS FuelStock (
+    stock_id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    current_quantity REAL NOT NULL DEFAULT 0,
+    reserved_quantity REAL DEFAULT 0, -- Reserved for planned usage
+    available_quantity REAL GENERATED ALWAYS AS (current_quantity - IFNULL(reserved_quantity, 0)) STORED,
+    minimum_threshold REAL NOT NULL DEFAULT 0,
+    maximum_capacity REAL NOT NULL,
+    reorder_point REAL, -- Automatic reorder trigger point
+    optimal_order_quantity REAL, -- Economic order quantity
+    last_updated TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_by TEXT,
+    UNIQUE (site_id, fuel_type_id)
+);
+
+-- Fuel Prices Table (Enhanced)
+CREATE TABLE IF NOT EXISTS FuelPrices (
+    price_id INTEGER PRIMARY KEY,
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    supplier_id INTEGER REFERENCES Suppliers(supplier_id),
+    price_per_liter REAL NOT NULL,
+    currency TEXT DEFAULT 'MMK',
+    effective_date TEXT NOT NULL,
+    expiry_date TEXT,
+    price_type TEXT DEFAULT 'Purchase' CHECK (price_type IN ('Purchase', 'Market', 'Contract')),
+    volume_discount_threshold REAL, -- Minimum quantity for discount
+    volume_discount_rate REAL, -- Discount rate for bulk purchases
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- =============================================
+-- FORECASTING AND PLANNING
+-- =============================================
+
+-- Consumption Forecast Table
+CREATE TABLE IF NOT EXISTS ConsumptionForecast (
+    forecast_id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    forecast_date TEXT NOT NULL,
+    current_balance REAL NOT NULL,
+    daily_consumption_rate REAL NOT NULL,
+    safety_factor REAL DEFAULT 1.2, -- Safety multiplier for consumption
+    forecast_days_remaining INTEGER,
+    next_refill_date_estimate TEXT,
+    recommended_order_quantity REAL,
+    confidence_level REAL, -- Forecast confidence percentage
+    calculation_method TEXT, -- Method used for calculation
+    last_calculated TEXT DEFAULT (datetime('now', 'localtime')),
+    calculated_by TEXT,
+    UNIQUE (site_id, fuel_type_id, forecast_date)
+);
+
+-- Forecast Scenarios Table
+CREATE TABLE IF NOT EXISTS ForecastScenarios (
+    scenario_id INTEGER PRIMARY KEY,
+    forecast_id INTEGER NOT NULL REFERENCES ConsumptionForecast(forecast_id),
+    scenario_name TEXT NOT NULL,
+    adjusted_consumption_rate REAL,
+    adjusted_safety_factor REAL,
+    scenario_days_remaining INTEGER,
+    scenario_refill_date TEXT,
+    scenario_order_quantity REAL,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- =============================================
+-- TRANSACTIONS AND HISTORY
+-- =============================================
+
+-- Refill Transactions (Enhanced)
+CREATE TABLE IF NOT EXISTS RefillTransactions (
+    refill_id INTEGER PRIMARY KEY,
+    transaction_id TEXT NOT NULL UNIQUE,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    supplier_id INTEGER REFERENCES Suppliers(supplier_id),
+    source_site_id INTEGER REFERENCES Sites(site_id), -- For inter-site transfers
+    quantity REAL NOT NULL,
+    unit_cost REAL,
+    transportation_cost REAL DEFAULT 0,
+    loading_unloading_cost REAL DEFAULT 0,
+    total_cost REAL,
+    refill_date TEXT NOT NULL,
+    delivery_date TEXT,
+    invoice_number TEXT,
+    purchase_order_number TEXT,
+    quality_check_passed INTEGER DEFAULT 1,
+    notes TEXT,
+    created_by TEXT,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Usage Transactions (Enhanced)
+CREATE TABLE IF NOT EXISTS UsageTransactions (
+    usage_id INTEGER PRIMARY KEY,
+    transaction_id TEXT NOT NULL UNIQUE,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    equipment_id INTEGER REFERENCES Equipment(equipment_id),
+    department TEXT,
+    quantity REAL NOT NULL,
+    usage_date TEXT NOT NULL,
+    purpose TEXT,
+    operator_name TEXT,
+    meter_reading_before REAL,
+    meter_reading_after REAL,
+    efficiency_rating REAL, -- Actual vs expected consumption
+    notes TEXT,
+    created_by TEXT,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- =============================================
+-- ALERTS AND NOTIFICATIONS
+-- =============================================
+
+-- Alert Configurations
+CREATE TABLE IF NOT EXISTS AlertConfigurations (
+    alert_id INTEGER PRIMARY KEY,
+    alert_name TEXT NOT NULL,
+    alert_type TEXT NOT NULL CHECK (alert_type IN ('Low Stock', 'Forecast Shortage', 'Equipment Efficiency', 'Maintenance Due', 'Price Change')),
+    site_id INTEGER REFERENCES Sites(site_id),
+    fuel_type_id INTEGER REFERENCES FuelTypes(fuel_type_id),
+    equipment_id INTEGER REFERENCES Equipment(equipment_id),
+    threshold_value REAL,
+    threshold_days INTEGER,
+    notification_emails TEXT, -- Comma-separated email list
+    is_active INTEGER DEFAULT 1,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Alert History
+CREATE TABLE IF NOT EXISTS AlertHistory (
+    alert_history_id INTEGER PRIMARY KEY,
+    alert_id INTEGER NOT NULL REFERENCES AlertConfigurations(alert_id),
+    alert_message TEXT,
+    severity_level TEXT CHECK (severity_level IN ('Low', 'Medium', 'High', 'Critical')),
+    triggered_date TEXT DEFAULT (datetime('now', 'localtime')),
+    acknowledged_date TEXT,
+    acknowledged_by TEXT,
+    resolved_date TEXT,
+    resolution_notes TEXT
+);
+
+-- =============================================
+-- AUDIT AND SYSTEM TABLES
+-- =============================================
+
+-- Audit Log
+CREATE TABLE IF NOT EXISTS AuditLog (
+    audit_id INTEGER PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    action_type TEXT NOT NULL CHECK (action_type IN ('INSERT', 'UPDATE', 'DELETE')),
+    old_values TEXT,
+    new_values TEXT,
+    changed_by TEXT,
+    changed_date TEXT DEFAULT (datetime('now', 'localtime')),
+    ip_address TEXT,
+    user_agent TEXT
+);
+
+-- System Settings
+CREATE TABLE IF NOT EXISTS SystemSettings (
+    setting_id INTEGER PRIMARY KEY,
+    setting_key TEXT NOT NULL UNIQUE,
+    setting_value TEXT,
+    setting_description TEXT,
+    data_type TEXT DEFAULT 'string',
+    is_system INTEGER DEFAULT 0, -- System settings cannot be deleted
+    updated_by TEXT,
+    updated_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Sync Requests: writes replayed by offline field clients, one row per idempotency key
+CREATE TABLE IF NOT EXISTS SyncRequests (
+    idempotency_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    response TEXT,
+    created_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Forecast Models: fitted per-equipment time-series models, refitted when new hours are logged
+CREATE TABLE IF NOT EXISTS ForecastModels (
+    equipment_id INTEGER PRIMARY KEY REFERENCES Equipment(equipment_id),
+    model_type TEXT NOT NULL, -- holt-winters, or average for short histories
+    data_signature TEXT NOT NULL, -- Log count, last log date and total hours fitted on
+    state_date TEXT NOT NULL, -- Last day of the fitted series
+    parameters TEXT NOT NULL, -- JSON smoothing parameters and final state
+    fitted_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Reorder Recommendations: optimized supplier, order quantity and reorder point per stock row
+CREATE TABLE IF NOT EXISTS ReorderRecommendations (
+    stock_id INTEGER PRIMARY KEY REFERENCES FuelStock(stock_id),
+    site_id INTEGER NOT NULL,
+    fuel_type_id INTEGER NOT NULL,
+    supplier_id INTEGER REFERENCES Suppliers(supplier_id), -- NULL when no active supplier prices the fuel
+    unit_price REAL,
+    order_quantity REAL,
+    reorder_point REAL,
+    safety_stock REAL,
+    lead_time_days INTEGER,
+    daily_demand REAL,
+    annual_cost REAL, -- Purchase + ordering + holding cost per year
+    current_annual_cost REAL, -- The same supplier at the previous order quantity
+    input_signature TEXT NOT NULL, -- Digest of demand, tank and offers the result was computed from
+    calculated_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Delivery Schedule: planned deliveries per site and fuel from the delivery scheduler
+CREATE TABLE IF NOT EXISTS DeliverySchedule (
+    delivery_id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES Sites(site_id),
+    fuel_type_id INTEGER NOT NULL REFERENCES FuelTypes(fuel_type_id),
+    supplier_id INTEGER REFERENCES Suppliers(supplier_id),
+    order_date TEXT NOT NULL, -- Latest day to place the order, delivery_date less the lead time
+    delivery_date TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    trucks INTEGER NOT NULL DEFAULT 1, -- Truckloads the quantity is split into
+    stock_before REAL, -- Forecast stock when the delivery arrives
+    at_risk INTEGER DEFAULT 0, -- Stock falls below minimum_threshold before this delivery can arrive
+    status TEXT DEFAULT 'Planned',
+    planned_date TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+-- =============================================
+-- INDEXES FOR PERFORMANCE
+-- =============================================
+
+-- Equipment indexes
+CREATE INDEX IF NOT EXISTS IX_Equipment_Site_FuelType ON Equipment(site_id, fuel_type_id);
+CREATE INDEX IF NOT EXISTS IX_Equipment_Active ON Equipment(is_active) WHERE is_active = 1;
+
+-- Operational Hours Log indexes
+CREATE INDEX IF NOT EXISTS IX_OperationalHours_Site_Date ON OperationalHoursLog(site_id, log_date);
+CREATE INDEX IF NOT EXISTS IX_OperationalHours_Equipment_Date ON OperationalHoursLog(equipment_id, log_date);
+
+-- Forecast indexes
+CREATE INDEX IF NOT EXISTS IX_Forecast_RefillDate ON ConsumptionForecast(next_refill_date_estimate);
+
+-- Transaction indexes
+CREATE INDEX IF NOT EXISTS IX_RefillTransactions_Site_Date ON RefillTransactions(site_id, refill_date);
+CREATE INDEX IF NOT EXISTS IX_UsageTransactions_Site_Date ON UsageTransactions(site_id, usage_date);
+CREATE INDEX IF NOT EXISTS IX_UsageTransactions_Equipment_Date ON UsageTransactions(equipment_id, usage_date);
+CREATE INDEX IF NOT EXISTS IX_UsageTransactions_Date ON UsageTransactions(usage_date);
+
+-- Stock indexes
+CREATE INDEX IF NOT EXISTS IX_FuelStock_CurrentQuantity ON FuelStock(current_quantity);
+CREATE INDEX IF NOT EXISTS IX_FuelStock_ReorderPoint ON FuelStock(reorder_point);
+
+-- Delivery schedule indexes
+CREATE INDEX IF NOT EXISTS IX_DeliverySchedule_Site_FuelType ON DeliverySchedule(site_id, fuel_type_id);
+CREATE INDEX IF NOT EXISTS IX_DeliverySchedule_Supplier_Date ON DeliverySchedule(supplier_id, delivery_date);
+
+-- Alert indexes
+CREATE INDEX IF NOT EXISTS IX_AlertHistory_TriggeredDate ON AlertHistory(triggered_date);
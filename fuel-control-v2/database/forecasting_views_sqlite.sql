@@ -0,0 +1,84 @@
+-- =============================================
+-- Forecasting Views (SQLite)
+-- Advanced Fuel Consumption Forecasting System
+-- Port of the views in forecasting_procedures.sql for the embedded backend;
+-- the sp_* procedures are implemented in backend/sqlite_backend.py
+-- =============================================
+
+-- Equipment Consumption Summary View
+CREATE VIEW IF NOT EXISTS vw_EquipmentConsumptionSummary AS
+SELECT
+    e.equipment_id,
+    e.equipment_name,
+    e.equipment_code,
+    s.site_name,
+    ft.fuel_name,
+    e.consumption_rate,
+    IFNULL(AVG(oh.running_hours), 0) as avg_daily_hours,
+    IFNULL(SUM(oh.running_hours), 0) as total_hours_30days,
+    e.consumption_rate * IFNULL(AVG(oh.running_hours), 0) as estimated_daily_consumption,
+    COUNT(oh.log_id) as days_logged
+FROM Equipment e
+JOIN Sites s ON e.site_id = s.site_id
+JOIN FuelTypes ft ON e.fuel_type_id = ft.fuel_type_id
+LEFT JOIN OperationalHoursLog oh ON e.equipment_id = oh.equipment_id
+    AND oh.log_date >= date('now', 'localtime', '-30 days')
+WHERE e.is_active = 1
+GROUP BY e.equipment_id, e.equipment_name, e.equipment_code, s.site_name,
+         ft.fuel_name, e.consumption_rate;
+
+-- Site Consumption Summary View
+CREATE VIEW IF NOT EXISTS vw_SiteConsumptionSummary AS
+SELECT
+    s.site_id,
+    s.site_name,
+    s.site_code,
+    ft.fuel_type_id,
+    ft.fuel_name,
+    fs.current_quantity,
+    fs.minimum_threshold,
+    fs.reorder_point,
+    SUM(e.consumption_rate * IFNULL(oh_avg.avg_hours, 0)) as estimated_daily_consumption,
+    COUNT(DISTINCT e.equipment_id) as active_equipment_count,
+    CASE
+        WHEN SUM(e.consumption_rate * IFNULL(oh_avg.avg_hours, 0)) > 0
+        THEN fs.current_quantity / SUM(e.consumption_rate * IFNULL(oh_avg.avg_hours, 0))
+        ELSE 999
+    END as days_remaining_estimate
+FROM Sites s
+JOIN FuelStock fs ON s.site_id = fs.site_id
+JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+LEFT JOIN Equipment e ON s.site_id = e.site_id AND ft.fuel_type_id = e.fuel_type_id AND e.is_active = 1
+LEFT JOIN (
+    SELECT equipment_id, AVG(running_hours) as avg_hours
+    FROM OperationalHoursLog
+    WHERE log_date >= date('now', 'localtime', '-30 days')
+    GROUP BY equipment_id
+) oh_avg ON e.equipment_id = oh_avg.equipment_id
+WHERE s.is_active = 1
+GROUP BY s.site_id, s.site_name, s.site_code, ft.fuel_type_id, ft.fuel_name,
+         fs.current_quantity, fs.minimum_threshold, fs.reorder_point;
+
+-- Current Stock Status View
+CREATE VIEW IF NOT EXISTS vw_CurrentStockStatus AS
+SELECT
+    s.site_name,
+    s.site_code,
+    ft.fuel_name,
+    fs.current_quantity,
+    fs.available_quantity,
+    fs.minimum_threshold,
+    fs.maximum_capacity,
+    fs.reorder_point,
+    CASE
+        WHEN fs.current_quantity <= fs.minimum_threshold THEN 'Critical'
+        WHEN fs.current_quantity <= fs.reorder_point THEN 'Low'
+        WHEN fs.current_quantity >= fs.maximum_capacity * 0.9 THEN 'High'
+        ELSE 'Normal'
+    END as stock_status,
+    (fs.current_quantity / fs.maximum_capacity) * 100 as fill_percentage,
+    fs.last_updated
+FROM Sites s
+JOIN FuelStock fs ON s.site_id = fs.site_id
+JOIN FuelTypes ft ON fs.fuel_type_id = ft.fuel_type_id
+WHERE s.is_active = 1;
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator for Advanced Fuel Consumption Forecasting System
+Deterministic, seeded fleet data at benchmark scale with bulk loaders
+
+Examples:
+    # 500 sites x ~20 machines x 3 years (~20M rows) into a local SQLite stand-in
+    python generate_dataset.py --sites 500 --equipment-per-site 20 --years 3 --sqlite fuel_bench.db
+
+    # CSV files for bcp / BULK INSERT into SQL Server (keep identity values)
+    python generate_dataset.py --sites 100 --years 2 --csv out/
+    bcp FuelControlV2.dbo.UsageTransactions in out/UsageTransactions.csv -c -t, -E -T -S <server>
+
+    # Straight into the SQL Server schema from create_database.sql (empty database)
+    python generate_dataset.py --sites 50 --years 1 --mssql
+
+The same --seed and --end-date always produce identical rows.
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SQLITE_SCHEMA = os.path.join(DATABASE_DIR, 'create_database_sqlite.sql')
+
+# =============================================
+# TABLE LAYOUT (insert order respects foreign keys)
+# =============================================
+
+TABLE_COLUMNS = {
+    'FuelTypes': ('fuel_type_id', 'fuel_name', 'fuel_code', 'density', 'energy_content', 'carbon_factor'),
+    'Suppliers': ('supplier_id', 'supplier_name', 'supplier_code', 'contact_person', 'phone', 'email',
+                  'payment_terms', 'lead_time_days', 'minimum_order_quantity', 'is_preferred', 'rating'),
+    'Sites': ('site_id', 'site_name', 'site_code', 'site_type', 'location_address', 'latitude', 'longitude',
+              'contact_person', 'contact_phone', 'storage_capacity', 'safety_stock_days'),
+    'Equipment': ('equipment_id', 'site_id', 'equipment_name', 'equipment_code', 'fuel_type_id',
+                  'consumption_rate', 'equipment_type', 'manufacturer', 'model', 'installation_date'),
+    'FuelPrices': ('price_id', 'fuel_type_id', 'supplier_id', 'price_per_liter', 'effective_date', 'expiry_date',
+                   'price_type', 'volume_discount_threshold', 'volume_discount_rate'),
+    'AlertConfigurations': ('alert_id', 'alert_name', 'alert_type', 'site_id', 'fuel_type_id',
+                            'threshold_value', 'threshold_days', 'notification_emails'),
+    'SystemSettings': ('setting_id', 'setting_key', 'setting_value', 'setting_description', 'data_type'),
+    'OperationalHoursLog': ('log_id', 'site_id', 'equipment_id', 'log_date', 'running_hours', 'fuel_consumed',
+                            'recorded_by', 'is_estimated'),
+    'UsageTransactions': ('usage_id', 'transaction_id', 'site_id', 'fuel_type_id', 'equipment_id', 'department',
+                          'quantity', 'usage_date', 'purpose', 'created_by'),
+    'RefillTransactions': ('refill_id', 'transaction_id', 'site_id', 'fuel_type_id', 'supplier_id', 'quantity',
+                           'unit_cost', 'total_cost', 'refill_date', 'delivery_date', 'created_by'),
+    'AlertHistory': ('alert_history_id', 'alert_id', 'alert_message', 'severity_level', 'triggered_date'),
+    'FuelStock': ('stock_id', 'site_id', 'fuel_type_id', 'current_quantity', 'minimum_threshold',
+                  'maximum_capacity', 'reorder_point', 'optimal_order_quantity', 'last_updated'),
+}
+
+# =============================================
+# REFERENCE DATA (mirrors insert_sample_data.sql)
+# =============================================
+
+FUEL_TYPES = [
+    (1, 'Diesel', 'DSL', 0.832, 35.86, 2.68, 1850.0),
+    (2, 'Gasoline', 'GSL', 0.745, 32.18, 2.31, 1950.0),
+    (3, 'Jet A-1', 'JET', 0.775, 35.30, 2.52, 2100.0),
+    (4, 'Heavy Fuel Oil', 'HFO', 0.960, 40.50, 3.15, 1650.0),
+    (5, 'Biodiesel B20', 'BD20', 0.840, 33.50, 2.20, 1900.0),
+    (6, 'Natural Gas', 'NG', 0.717, 38.70, 1.87, 1400.0),
+]
+FUEL_IDS = {code: fuel_id for fuel_id, _, code, *_ in FUEL_TYPES}
+BASE_PRICES = {fuel_id: price for fuel_id, *_, price in FUEL_TYPES}
+
+REGIONS = [
+    ('Yangon', 16.84, 96.17), ('Mandalay', 21.97, 96.08), ('Bago', 17.34, 96.48),
+    ('Monywa', 22.11, 95.14), ('Thanlyin', 16.76, 96.25), ('Naypyidaw', 19.76, 96.13),
+    ('Mawlamyine', 16.49, 97.63), ('Pathein', 16.78, 94.73), ('Taunggyi', 20.78, 97.04),
+    ('Magway', 20.15, 94.92), ('Sittwe', 20.15, 92.90), ('Myitkyina', 25.38, 97.40),
+    ('Lashio', 22.94, 97.75), ('Dawei', 14.08, 98.19), ('Hpa-An', 16.89, 97.63), ('Pyay', 18.82, 95.22),
+]
+
+# kind -> (site_type, name prefix, code prefix, department, weekday factors Mon..Sun, monsoon factor)
+SITE_KINDS = {
+    'construction': ('Site', 'Construction Site', 'CS', 'Construction', (1, 1, 1, 1, 1, 0.8, 0.25), 0.65),
+    'mining': ('Site', 'Mining Operation', 'MO', 'Mining', (1, 1, 1, 1, 1, 0.95, 0.85), 0.85),
+    'power': ('Site', 'Power Plant', 'PP', 'Power Generation', (1, 1, 1, 1, 1, 1, 1), 1.0),
+    'warehouse': ('Warehouse', 'Warehouse', 'WH', 'Logistics', (1, 1, 1, 1, 1, 0.6, 0.2), 0.95),
+    'distribution': ('Distribution Center', 'Distribution Center', 'DC', 'Distribution',
+                     (1, 1, 1, 1, 1, 0.9, 0.5), 0.9),
+}
+SITE_KIND_WEIGHTS = [('construction', 40), ('mining', 20), ('power', 5), ('warehouse', 15), ('distribution', 20)]
+
+# kind -> [(equipment_type, code prefix, fuel code, rate range L/h, mean hours, sd hours, weight, models)]
+EQUIPMENT_PROFILES = {
+    'construction': [
+        ('Excavator', 'EX', 'DSL', (15.0, 22.0), 8.0, 2.0, 3, [('Komatsu', 'PC200'), ('Hitachi', 'ZX200'), ('Caterpillar', '320')]),
+        ('Bulldozer', 'BD', 'DSL', (20.0, 25.0), 7.0, 2.0, 2, [('Caterpillar', 'D6T'), ('Komatsu', 'D65')]),
+        ('Generator', 'GEN', 'DSL', (12.0, 18.0), 10.0, 3.0, 2, [('Cummins', 'C250'), ('Perkins', 'P275')]),
+        ('Concrete Mixer', 'CM', 'DSL', (6.0, 8.0), 6.0, 2.0, 2, [('Volvo', 'FM400')]),
+        ('Crane', 'CR', 'DSL', (22.0, 28.0), 6.0, 2.5, 1, [('Liebherr', 'LTM1070')]),
+        ('Site Vehicle', 'SV', 'GSL', (6.0, 9.0), 5.0, 2.0, 1, [('Toyota', 'Hilux')]),
+    ],
+    'mining': [
+        ('Mining Truck', 'MT', 'DSL', (42.0, 50.0), 12.0, 3.0, 4, [('Caterpillar', '777D'), ('Komatsu', 'HD785')]),
+        ('Excavator', 'EX', 'DSL', (32.0, 38.0), 11.0, 3.0, 2, [('Caterpillar', '390F')]),
+        ('Generator', 'GEN', 'DSL', (25.0, 32.0), 14.0, 4.0, 1, [('Caterpillar', 'C15')]),
+        ('Bulldozer', 'BD', 'BD20', (24.0, 30.0), 9.0, 3.0, 1, [('Caterpillar', 'D8T')]),
+    ],
+    'power': [
+        ('Power Generator', 'PG', 'HFO', (170.0, 190.0), 20.0, 3.0, 2, [('GE', 'LM6000'), ('Siemens', 'SGT-800')]),
+        ('Gas Turbine', 'GT', 'NG', (140.0, 160.0), 16.0, 5.0, 1, [('Siemens', 'SGT-400')]),
+        ('Auxiliary Generator', 'AG', 'DSL', (22.0, 28.0), 8.0, 3.0, 1, [('Caterpillar', 'C18')]),
+    ],
+    'warehouse': [
+        ('Forklift', 'FL', 'DSL', (3.0, 4.5), 7.0, 2.0, 4, [('Toyota', 'FD25'), ('Linde', 'H25')]),
+        ('Backup Generator', 'GEN', 'DSL', (10.0, 14.0), 1.5, 1.5, 1, [('Caterpillar', 'C9')]),
+        ('Delivery Truck', 'TRK', 'DSL', (8.0, 10.0), 6.0, 2.0, 2, [('Isuzu', 'NPR75')]),
+        ('Delivery Van', 'VAN', 'GSL', (6.0, 8.0), 5.0, 2.0, 1, [('Toyota', 'HiAce')]),
+    ],
+    'distribution': [
+        ('Delivery Truck', 'TRK', 'DSL', (8.0, 11.0), 8.0, 2.5, 3, [('Isuzu', 'NPR75'), ('Hino', '500')]),
+        ('Delivery Van', 'VAN', 'GSL', (6.0, 8.0), 6.0, 2.0, 2, [('Toyota', 'HiAce')]),
+        ('Forklift', 'FL', 'DSL', (3.0, 4.5), 6.0, 2.0, 2, [('Toyota', 'FD25')]),
+        ('Aircraft Refueller', 'AR', 'JET', (10.0, 14.0), 4.0, 2.0, 1, [('Rampmaster', 'RM10')]),
+    ],
+}
+
+SUPPLIER_SEEDS = [
+    ('Myanmar Petroleum Corporation', 'MPC', 'Net 30', 2, 10000.0, 1, 4.5),
+    ('Asia Fuel Trading', 'AFT', 'Net 15', 3, 5000.0, 1, 4.2),
+    ('Global Energy Solutions', 'GES', 'Net 45', 5, 20000.0, 0, 3.8),
+    ('Local Fuel Depot', 'LFD', 'COD', 1, 1000.0, 0, 4.0),
+    ('Premium Oil Company', 'POC', 'Net 30', 4, 15000.0, 1, 4.7),
+]
+
+SYSTEM_SETTINGS = [
+    ('default_safety_factor', '1.2', 'Default safety factor for consumption forecasting', 'decimal'),
+    ('forecast_calculation_frequency', '24', 'Hours between automatic forecast calculations', 'integer'),
+    ('low_stock_alert_threshold', '0.2', 'Percentage of maximum capacity to trigger low stock alerts', 'decimal'),
+    ('email_notification_enabled', 'true', 'Enable email notifications for alerts', 'boolean'),
+    ('default_currency', 'MMK', 'Default currency for pricing', 'string'),
+    ('maintenance_reminder_days', '30', 'Days before maintenance due to send reminder', 'integer'),
+    ('consumption_variance_threshold', '0.15', 'Acceptable variance in consumption before flagging anomaly', 'decimal'),
+    ('forecast_confidence_minimum', '0.75', 'Minimum confidence level required for forecasts', 'decimal'),
+]
+
+
+class DatasetSpec:
+    """Size and shape of the generated fleet"""
+
+    def __init__(self, sites: int = 50, equipment_per_site: int = 12, years: float = 1.0,
+                 suppliers: int = 12, seed: int = 42, end_date: Optional[date] = None):
+        self.sites = sites
+        self.equipment_per_site = equipment_per_site
+        self.years = years
+        self.suppliers = suppliers
+        self.seed = seed
+        self.end_date = end_date or date.today()
+        self.days = max(1, int(round(years * 365)))
+        self.start_date = self.end_date - timedelta(days=self.days - 1)
+
+    def rng(self, *scope) -> random.Random:
+        """Independent, reproducible random stream for one entity"""
+        return random.Random(':'.join(str(part) for part in (self.seed,) + scope))
+
+    def estimated_rows(self) -> int:
+        machines = self.sites * self.equipment_per_site
+        return int(machines * self.days * 0.93 * 2)
+
+
+# =============================================
+# SINKS
+# =============================================
+
+class RowSink:
+    """Buffers rows per table and flushes them in batches"""
+
+    def __init__(self, batch_size: int = 50000):
+        self.batch_size = batch_size
+        self.buffers: Dict[str, List[tuple]] = {table: [] for table in TABLE_COLUMNS}
+        self.counts: Dict[str, int] = {table: 0 for table in TABLE_COLUMNS}
+
+    def add(self, table: str, row: tuple):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._flush_table(table)
+
+    def add_many(self, table: str, rows: Iterable[tuple]):
+        for row in rows:
+            self.add(table, row)
+
+    def _flush_table(self, table: str):
+        # TABLE_COLUMNS lists parents before children: pending parent rows go first, so no batch
+        # reaches the database ahead of the rows its foreign keys reference
+        for parent in TABLE_COLUMNS:
+            if parent == table:
+                break
+            self._write_buffer(parent)
+        self._write_buffer(table)
+
+    def _write_buffer(self, table: str):
+        rows = self.buffers[table]
+        if rows:
+            self.write(table, rows)
+            self.counts[table] += len(rows)
+            self.buffers[table] = []
+
+    def flush(self):
+        for table in TABLE_COLUMNS:
+            self._flush_table(table)
+
+    def write(self, table: str, rows: List[tuple]):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class CsvSink(RowSink):
+    """One CSV per table, with identity values, for bcp / BULK INSERT"""
+
+    def __init__(self, directory: str, batch_size: int = 50000):
+        super().__init__(batch_size)
+        os.makedirs(directory, exist_ok=True)
+        self.files = {}
+        self.writers = {}
+        for table, columns in TABLE_COLUMNS.items():
+            f = open(os.path.join(directory, f"{table}.csv"), 'w', newline='', encoding='utf-8')
+            self.files[table] = f
+            self.writers[table] = csv.writer(f)
+            self.writers[table].writerow(columns)
+
+    def write(self, table: str, rows: List[tuple]):
+        self.writers[table].writerows(rows)
+
+    def close(self):
+        super().close()
+        for f in self.files.values():
+            f.close()
+
+
+def split_sqlite_schema(path: str = SQLITE_SCHEMA) -> Tuple[List[str], List[str]]:
+    """Split the SQLite schema into (table statements, index statements)"""
+    tables, indexes, buffer = [], [], ''
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip().startswith('--') and not buffer.strip():
+                continue
+            buffer += line
+            if sqlite3.complete_statement(buffer):
+                statement = buffer.strip()
+                (indexes if statement.upper().startswith('CREATE INDEX') else tables).append(statement)
+                buffer = ''
+    return tables, indexes
+
+
+class SqliteSink(RowSink):
+    """Bulk load into the local SQLite stand-in; indexes are built after the load"""
+
+    def __init__(self, path: str, batch_size: int = 50000, overwrite: bool = False):
+        super().__init__(batch_size)
+        if overwrite and os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path)
+        for pragma in ('journal_mode = OFF', 'synchronous = OFF', 'locking_mode = EXCLUSIVE',
+                       'temp_store = MEMORY', 'cache_size = -262144'):
+            self.conn.execute(f"PRAGMA {pragma}")
+        # The schema turns foreign keys on; they stay on so the parent-first flush order is checked
+        self.tables, self.indexes = split_sqlite_schema()
+        for statement in self.tables:
+            self.conn.execute(statement)
+        self.statements = {
+            table: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+            for table, columns in TABLE_COLUMNS.items()
+        }
+        self.conn.execute('BEGIN')
+
+    def write(self, table: str, rows: List[tuple]):
+        self.conn.executemany(self.statements[table], rows)
+
+    def close(self):
+        super().close()
+        self.conn.commit()
+        for statement in self.indexes:
+            self.conn.execute(statement)
+        self.conn.execute('ANALYZE')
+        self.conn.commit()
+        self.conn.execute('PRAGMA locking_mode = NORMAL')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.close()
+
+
+class MssqlSink(RowSink):
+    """Bulk load into the SQL Server schema with pyodbc fast_executemany"""
+
+    def __init__(self, connection_string: str, batch_size: int = 20000):
+        import pyodbc
+        super().__init__(batch_size)
+        self.conn = pyodbc.connect(connection_string, autocommit=False)
+        self.cursor = self.conn.cursor()
+        self.cursor.fast_executemany = True
+
+    def write(self, table: str, rows: List[tuple]):
+        columns = TABLE_COLUMNS[table]
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        self.cursor.execute(f"SET IDENTITY_INSERT {table} ON")
+        self.cursor.executemany(insert, rows)
+        self.cursor.execute(f"SET IDENTITY_INSERT {table} OFF")
+        self.conn.commit()
+
+    def close(self):
+        super().close()
+        self.conn.close()
+
+
+# =============================================
+# GENERATOR
+# =============================================
+
+def _weighted_choice(rng: random.Random, weighted: Sequence[Tuple[object, float]]):
+    total = sum(weight for _, weight in weighted)
+    pick = rng.random() * total
+    for item, weight in weighted:
+        pick -= weight
+        if pick <= 0:
+            return item
+    return weighted[-1][0]
+
+
+class FleetGenerator:
+    """Builds master data and simulates daily operations site by site"""
+
+    def __init__(self, spec: DatasetSpec, sink: RowSink, progress: bool = True):
+        self.spec = spec
+        self.sink = sink
+        self.progress = progress
+        self.next_ids = {'log': 1, 'usage': 1, 'refill': 1, 'alert_history': 1}
+        self.stock_rows = []
+
+    def generate(self):
+        started = time.perf_counter()
+        self.sink.add_many('FuelTypes', (row[:6] for row in FUEL_TYPES))
+        suppliers = self._suppliers()
+        prices = self._fuel_prices(suppliers)
+        self.sink.add_many('SystemSettings', ((i, *row) for i, row in enumerate(SYSTEM_SETTINGS, 1)))
+
+        sites = self._sites()
+        equipment_id = 1
+        alert_id = 1
+        for index, site in enumerate(sites, 1):
+            machines = self._equipment(site, equipment_id)
+            equipment_id += len(machines)
+            tanks = self._tanks(site, machines)
+            alerts = {}
+            for fuel_id, tank in tanks.items():
+                alerts[fuel_id] = alert_id
+                self.sink.add('AlertConfigurations', (
+                    alert_id, f"{site['site_name']} Low {tank['fuel_name']} Stock", 'Low Stock', site['site_id'],
+                    fuel_id, round(tank['minimum_threshold'], 2), None, f"site{site['site_id']}@company.com"))
+                self.sink.add('AlertConfigurations', (
+                    alert_id + 1, f"{site['site_name']} {tank['fuel_name']} Forecast Shortage", 'Forecast Shortage',
+                    site['site_id'], fuel_id, None, 5, f"site{site['site_id']}@company.com"))
+                alert_id += 2
+            self._simulate_site(site, machines, tanks, alerts, suppliers, prices)
+            if self.progress and (index % max(1, len(sites) // 20) == 0 or index == len(sites)):
+                rows = sum(self.sink.counts.values()) + sum(len(b) for b in self.sink.buffers.values())
+                elapsed = time.perf_counter() - started
+                print(f"  {index}/{len(sites)} sites, {rows:,} rows, {rows / max(elapsed, 1e-9):,.0f} rows/s")
+
+        self.sink.add_many('FuelStock', self.stock_rows)
+        self.sink.close()
+        return self.sink.counts
+
+    # Master data
+
+    def _suppliers(self) -> List[dict]:
+        suppliers = []
+        for supplier_id in range(1, self.spec.suppliers + 1):
+            rng = self.spec.rng('supplier', supplier_id)
+            name, code, terms, lead, moq, preferred, rating = SUPPLIER_SEEDS[(supplier_id - 1) % len(SUPPLIER_SEEDS)]
+            if supplier_id > len(SUPPLIER_SEEDS):
+                region = REGIONS[supplier_id % len(REGIONS)][0]
+                name = f"{name} {region}"
+                lead = max(1, lead + rng.randint(-1, 3))
+                moq = round(moq * rng.uniform(0.5, 2.0), -2)
+                rating = round(min(5.0, max(2.5, rating + rng.uniform(-0.8, 0.4))), 2)
+            fuels = [fuel_id for fuel_id, *_ in FUEL_TYPES if fuel_id == 1 or rng.random() < 0.45]
+            supplier = {'supplier_id': supplier_id, 'lead_time_days': lead, 'minimum_order_quantity': moq,
+                        'rating': rating, 'fuels': fuels}
+            suppliers.append(supplier)
+            self.sink.add('Suppliers', (supplier_id, name, f"{code}{supplier_id:03d}", 'Sales Manager',
+                                        f"+95-1-{100000 + supplier_id:06d}", f"orders{supplier_id}@{code.lower()}.com.mm",
+                                        terms, lead, moq, preferred, rating))
+        return suppliers
+
+    def _fuel_prices(self, suppliers: List[dict]) -> Dict[Tuple[int, int], List[Tuple[date, date, float]]]:
+        """Monthly price segments per (fuel, supplier) plus a monthly Market price per fuel"""
+        spec = self.spec
+        months = []
+        cursor = date(spec.start_date.year, spec.start_date.month, 1)
+        while cursor <= spec.end_date:
+            following = date(cursor.year + cursor.month // 12, cursor.month % 12 + 1, 1)
+            months.append((cursor, following - timedelta(days=1)))
+            cursor = following
+
+        market = {}
+        for fuel_id, *_ in FUEL_TYPES:
+            rng = spec.rng('market', fuel_id)
+            level, series = BASE_PRICES[fuel_id], []
+            for _ in months:
+                level *= math.exp(rng.gauss(0.002, 0.03))
+                series.append(level)
+            market[fuel_id] = series
+
+        prices, price_id = {}, 1
+        for fuel_id, *_ in FUEL_TYPES:
+            for (start, end), level in zip(months, market[fuel_id]):
+                expiry = None if end >= spec.end_date else end.isoformat()
+                self.sink.add('FuelPrices', (price_id, fuel_id, None, round(level, 4), start.isoformat(), expiry,
+                                             'Market', None, None))
+                price_id += 1
+        for supplier in suppliers:
+            for fuel_id in supplier['fuels']:
+                rng = spec.rng('price', supplier['supplier_id'], fuel_id)
+                offset = rng.uniform(-0.04, 0.05)
+                threshold = round(rng.choice((15000, 30000, 50000, 75000, 100000)), 2)
+                discount = round(rng.uniform(0.02, 0.10), 4)
+                segments = []
+                for (start, end), level in zip(months, market[fuel_id]):
+                    price = round(level * (1 + offset + rng.gauss(0, 0.01)), 4)
+                    expiry = None if end >= spec.end_date else end.isoformat()
+                    self.sink.add('FuelPrices', (price_id, fuel_id, supplier['supplier_id'], price,
+                                                 start.isoformat(), expiry, 'Purchase', threshold, discount))
+                    segments.append((start, end, price))
+                    price_id += 1
+                prices[(fuel_id, supplier['supplier_id'])] = segments
+        return prices
+
+    def _sites(self) -> List[dict]:
+        sites = []
+        counters = {}
+        for site_id in range(1, self.spec.sites + 1):
+            rng = self.spec.rng('site', site_id)
+            kind = _weighted_choice(rng, SITE_KIND_WEIGHTS)
+            site_type, prefix, code_prefix, department, weekday, monsoon = SITE_KINDS[kind]
+            region, lat, lon = REGIONS[rng.randrange(len(REGIONS))]
+            counters[code_prefix] = counters.get(code_prefix, 0) + 1
+            number = counters[code_prefix]
+            site = {
+                'site_id': site_id, 'kind': kind, 'site_name': f"{prefix} {region} {number}",
+                'department': department, 'weekday': weekday, 'monsoon': monsoon,
+                'latitude': round(lat + rng.uniform(-0.6, 0.6), 6), 'longitude': round(lon + rng.uniform(-0.6, 0.6), 6),
+                'safety_stock_days': {'power': 21, 'mining': 14, 'warehouse': 10}.get(kind, 7),
+                'recorded_by': f"{department} Supervisor {site_id}",
+            }
+            sites.append(site)
+            self.sink.add('Sites', (site_id, site['site_name'], f"{code_prefix}{number:04d}", site_type,
+                                    f"{region} Region, Plot {rng.randint(1, 999)}", site['latitude'],
+                                    site['longitude'], site['recorded_by'], f"+95-{rng.randint(1, 9)}-{rng.randint(100000, 999999)}",
+                                    None, site['safety_stock_days']))
+        return sites
+
+    def _equipment(self, site: dict, first_id: int) -> List[dict]:
+        rng = self.spec.rng('equipment', site['site_id'])
+        mean = self.spec.equipment_per_site
+        count = rng.randint(max(1, mean // 2), max(1, mean * 3 // 2))
+        profiles = EQUIPMENT_PROFILES[site['kind']]
+        machines, per_code = [], {}
+        for offset in range(count):
+            profile = _weighted_choice(rng, [(p, p[6]) for p in profiles])
+            equipment_type, code_prefix, fuel_code, (low, high), mean_hours, sd_hours, _, models = profile
+            manufacturer, model = rng.choice(models)
+            per_code[code_prefix] = per_code.get(code_prefix, 0) + 1
+            machine = {
+                'equipment_id': first_id + offset, 'fuel_type_id': FUEL_IDS[fuel_code],
+                'consumption_rate': round(rng.uniform(low, high), 3),
+                'mean_hours': mean_hours * rng.uniform(0.8, 1.2), 'sd_hours': sd_hours,
+                'trend': rng.uniform(-0.10, 0.10),  # relative change per year
+                'downtime': rng.uniform(0.01, 0.06),
+                'efficiency_sd': rng.uniform(0.02, 0.08),
+            }
+            machines.append(machine)
+            installed = self.spec.start_date - timedelta(days=rng.randint(30, 3000))
+            self.sink.add('Equipment', (machine['equipment_id'], site['site_id'],
+                                        f"{equipment_type} {per_code[code_prefix]}",
+                                        f"{code_prefix}{per_code[code_prefix]:03d}", machine['fuel_type_id'],
+                                        machine['consumption_rate'], equipment_type, manufacturer, model,
+                                        installed.isoformat()))
+        return machines
+
+    def _tanks(self, site: dict, machines: List[dict]) -> Dict[int, dict]:
+        rng = self.spec.rng('tanks', site['site_id'])
+        daily = {}
+        for machine in machines:
+            daily[machine['fuel_type_id']] = daily.get(machine['fuel_type_id'], 0.0) + \
+                machine['consumption_rate'] * machine['mean_hours']
+        tanks = {}
+        for fuel_id in sorted(daily):
+            expected = daily[fuel_id]
+            capacity = round(max(5000.0, expected * site['safety_stock_days'] * rng.uniform(2.0, 3.5)), -2)
+            tanks[fuel_id] = {
+                'fuel_name': FUEL_TYPES[fuel_id - 1][1],
+                'maximum_capacity': capacity,
+                'minimum_threshold': round(min(capacity * 0.15, expected * 3), -1),
+                'reorder_point': round(min(capacity * 0.35, expected * (site['safety_stock_days'] + 3)), -1),
+                'optimal_order_quantity': round(capacity * rng.uniform(0.45, 0.6), -2),
+                'current_quantity': capacity * rng.uniform(0.55, 0.85),
+            }
+        return tanks
+
+    # Daily operations
+
+    def _price_on(self, segments: List[Tuple[date, date, float]], day: date) -> float:
+        for start, end, price in segments:
+            if start <= day <= end:
+                return price
+        return segments[-1][2]
+
+    def _simulate_site(self, site, machines, tanks, alerts, suppliers, prices):
+        spec = self.spec
+        sink = self.sink
+        rng = spec.rng('operations', site['site_id'])
+        site_id = site['site_id']
+        recorded_by = site['recorded_by']
+        department = site['department']
+        weekday = site['weekday']
+        monsoon = site['monsoon']
+        pending = {}  # fuel_id -> (delivery day index, quantity, supplier_id, ordered date)
+        vendors = {fuel_id: [s for s in suppliers if fuel_id in s['fuels']] for fuel_id in tanks}
+        ids = self.next_ids
+
+        day = spec.start_date
+        for day_index in range(spec.days):
+            day_iso = day.isoformat()
+            usage_stamp = f"{day_iso} 18:00:00"
+            season = monsoon if 6 <= day.month <= 9 else 1.0
+            years_in = day_index / 365.0
+            factor_day = weekday[day.weekday()] * season
+            consumed = dict.fromkeys(tanks, 0.0)
+
+            for machine in machines:
+                if rng.random() < machine['downtime']:
+                    continue
+                hours = rng.gauss(machine['mean_hours'], machine['sd_hours']) * factor_day * \
+                    (1.0 + machine['trend'] * years_in)
+                hours = round(min(24.0, max(0.0, hours)), 2)
+                fuel = round(hours * machine['consumption_rate'] * rng.gauss(1.0, machine['efficiency_sd']), 3)
+                fuel = max(0.0, fuel)
+                sink.add('OperationalHoursLog', (ids['log'], site_id, machine['equipment_id'], day_iso, hours,
+                                                 fuel, recorded_by, 0))
+                ids['log'] += 1
+                if fuel > 0:
+                    sink.add('UsageTransactions', (ids['usage'], f"USE-{ids['usage']:09d}", site_id,
+                                                   machine['fuel_type_id'], machine['equipment_id'], department,
+                                                   fuel, usage_stamp, 'Daily operations', recorded_by))
+                    ids['usage'] += 1
+                    consumed[machine['fuel_type_id']] += fuel
+
+            for fuel_id, tank in tanks.items():
+                order = pending.get(fuel_id)
+                if order is not None and order[0] == day_index:
+                    _, quantity, supplier_id, ordered = order
+                    quantity = min(quantity, tank['maximum_capacity'] - tank['current_quantity'])
+                    if quantity > 0:
+                        unit_cost = self._price_on(prices[(fuel_id, supplier_id)], ordered)
+                        sink.add('RefillTransactions', (ids['refill'], f"REF-{ids['refill']:08d}", site_id, fuel_id,
+                                                        supplier_id, round(quantity, 3), unit_cost,
+                                                        round(quantity * unit_cost, 2), f"{ordered.isoformat()} 09:00:00",
+                                                        f"{day_iso} 10:00:00", 'System'))
+                        ids['refill'] += 1
+                        tank['current_quantity'] += quantity
+                    del pending[fuel_id]
+
+                tank['current_quantity'] = max(0.0, tank['current_quantity'] - consumed[fuel_id])
+
+                if tank['current_quantity'] <= tank['reorder_point'] and fuel_id not in pending and vendors[fuel_id]:
+                    supplier = rng.choice(vendors[fuel_id])
+                    lead = max(1, supplier['lead_time_days'] + rng.choice((0, 0, 0, 1, 2)))
+                    quantity = max(tank['optimal_order_quantity'], supplier['minimum_order_quantity'])
+                    pending[fuel_id] = (day_index + lead, quantity, supplier['supplier_id'], day)
+
+                if tank['current_quantity'] <= tank['minimum_threshold']:
+                    severity = 'Critical' if tank['current_quantity'] <= tank['minimum_threshold'] * 0.5 else 'High'
+                    sink.add('AlertHistory', (ids['alert_history'], alerts[fuel_id],
+                                              f"Low stock alert: {site['site_name']} - {tank['fuel_name']} "
+                                              f"current stock: {tank['current_quantity']:.0f} liters",
+                                              severity, f"{day_iso} 18:30:00"))
+                    ids['alert_history'] += 1
+            day += timedelta(days=1)
+
+        for fuel_id, tank in tanks.items():
+            self.stock_rows.append((len(self.stock_rows) + 1, site_id, fuel_id, round(tank['current_quantity'], 3),
+                                    tank['minimum_threshold'], tank['maximum_capacity'], tank['reorder_point'],
+                                    tank['optimal_order_quantity'], f"{spec.end_date.isoformat()} 18:00:00"))
+
+
+# =============================================
+# MAIN
+# =============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic fleet dataset and bulk-load it')
+    parser.add_argument('--sites', type=int, default=50, help='number of sites')
+    parser.add_argument('--equipment-per-site', type=int, default=12, help='average machines per site')
+    parser.add_argument('--years', type=float, default=1.0, help='years of history')
+    parser.add_argument('--suppliers', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-date', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(), default=None,
+                        help='last day of history (YYYY-MM-DD, default today)')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--sqlite', metavar='PATH', help='load into a SQLite database file')
+    target.add_argument('--csv', metavar='DIR', help='write one CSV per table')
+    target.add_argument('--mssql', action='store_true', help='load into SQL Server using backend/config.py')
+    target.add_argument('--dry-run', action='store_true', help='generate without storing, report counts')
+    parser.add_argument('--overwrite', action='store_true', help='replace an existing SQLite file')
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(args.sites, args.equipment_per_site, args.years, args.suppliers, args.seed, args.end_date)
+    if args.sqlite:
+        sink = SqliteSink(args.sqlite, args.batch_size, overwrite=args.overwrite)
+    elif args.csv:
+        sink = CsvSink(args.csv, args.batch_size)
+    elif args.mssql:
+        sys.path.insert(0, os.path.join(os.path.dirname(DATABASE_DIR), 'backend'))
+        from config import Config
+        sink = MssqlSink(Config.get_db_connection_string(), min(args.batch_size, 20000))
+    else:
+        sink = RowSink(args.batch_size)
+
+    print(f"🏭 Generating {spec.sites} sites x ~{spec.equipment_per_site} machines x {spec.days} days "
+          f"({spec.start_date} .. {spec.end_date}), seed {spec.seed}, ~{spec.estimated_rows():,} rows")
+    started = time.perf_counter()
+    counts = FleetGenerator(spec, sink).generate()
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"   {table:<22} {count:>12,}")
+    print(f"✅ {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
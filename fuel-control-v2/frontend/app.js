@@ -14,7 +14,84 @@ const CONFIG = {
         warning: '#f59e0b',
         error: '#ef4444',
         critical: '#dc2626'
-    }
+    },
+    // Client cache: GET responses are fresh for `ttl` ms, then served stale
+    // (and revalidated in the background) until `maxStale` ms have passed.
+    // Matched on the longest path prefix; unlisted endpoints, and those listed
+    // as null, are not cached.
+    CACHE_POLICIES: {
+        '/fuel-types': { ttl: 3600000, maxStale: 86400000 },
+        '/sites': { ttl: 300000, maxStale: 3600000 },
+        '/equipment': { ttl: 300000, maxStale: 3600000 },
+        '/system/settings': { ttl: 300000, maxStale: 3600000 },
+        '/stock': { ttl: 15000, maxStale: 300000 },
+        '/alerts': { ttl: 15000, maxStale: 300000 },
+        '/forecasts': { ttl: 30000, maxStale: 600000 },
+        // Simulated from the live stock, which refills and usage change without touching /forecasts
+        '/forecasts/stockout-risk': null,
+        '/forecasts/trajectory': null,
+        '/operational-hours': { ttl: 30000, maxStale: 600000 },
+        '/refills': { ttl: 30000, maxStale: 600000 },
+        '/usage': { ttl: 30000, maxStale: 600000 },
+        '/reports': { ttl: 60000, maxStale: 600000 }
+    },
+    // Cached resources dropped after a successful write to each endpoint
+    CACHE_INVALIDATION: {
+        '/fuel-types': ['/fuel-types'],
+        '/sites': ['/sites', '/stock'],
+        '/equipment': ['/equipment', '/reports'],
+        '/operational-hours': ['/operational-hours', '/forecasts', '/alerts', '/reports'],
+        '/refills': ['/refills', '/stock', '/forecasts', '/alerts', '/reports'],
+        '/usage': ['/usage', '/stock', '/forecasts', '/alerts', '/reports'],
+        '/forecasts/calculate': ['/forecasts', '/alerts'],
+        '/forecasts/scenarios': ['/forecasts'],
+        '/forecasts/scenarios/grid': [],  // Evaluates only; nothing is saved
+        '/reorder/optimize': ['/reorder', '/stock', '/forecasts'],
+        '/alerts/check': ['/alerts']
+    },
+    // Virtualized tables: rows kept in the DOM beyond the viewport, rows per
+    // server page, and the row count from which sort/filter runs on a worker
+    TABLE: {
+        ROW_HEIGHT: 49,
+        OVERSCAN: 10,
+        PAGE_SIZE: 200,
+        WORKER_MIN_ROWS: 2000
+    },
+    // Section code lives in frontend/sections/ and is imported on first use
+    // (or prefetched); `global` is the name inline onclick handlers use
+    SECTIONS: {
+        'forecasting': { module: './sections/forecasting.js', global: 'Forecasting' },
+        'stock': { module: './sections/stock.js', global: 'Stock' },
+        'equipment': { module: './sections/equipment.js', global: 'Equipment' },
+        'operational-hours': { module: './sections/operational-hours.js', global: 'OperationalHours' },
+        'refills': { module: './sections/refills.js', global: 'Refills' },
+        'usage': { module: './sections/usage.js', global: 'Usage' }
+    },
+    PREFETCH: {
+        HOVER_DELAY: 80,     // ms a pointer rests on a nav item before its section is prefetched
+        IDLE_TIMEOUT: 2000   // ms to wait for an idle period before prefetching the likely next section
+    },
+    LOADING_DELAY: 200,      // ms before the loading overlay appears; faster loads never show it
+    // Offline field use: the last response under each PERSIST prefix is kept in
+    // IndexedDB (for MAX_AGE ms) and served when the server cannot be reached
+    OFFLINE: {
+        DB_NAME: 'fuelControl',
+        PERSIST: ['/fuel-types', '/sites', '/equipment', '/stock', '/alerts', '/forecasts',
+                  '/operational-hours', '/refills', '/usage'],
+        MAX_AGE: 7 * 86400000
+    },
+    // Writes to QUEUED endpoints made without a connection wait in IndexedDB and are
+    // replayed BATCH_SIZE at a time through /sync/batch, retried with exponential
+    // backoff (RETRY_BASE..RETRY_MAX ms) and spread over JITTER ms when the link returns
+    SYNC: {
+        QUEUED: ['/operational-hours', '/refills', '/usage'],
+        BATCH_SIZE: 50,
+        INTERVAL: 60000,
+        RETRY_BASE: 5000,
+        RETRY_MAX: 300000,
+        JITTER: 5000
+    },
+    SERVICE_WORKER: './sw.js'
 };
 
 // Global state
@@ -33,6 +110,10 @@ let stockChart = null;
 
 // Utility Functions
 class Utils {
+    static arraysEqual(a, b) {
+        return a.length === b.length && a.every((value, i) => value === b[i]);
+    }
+
     static formatNumber(num, decimals = 2) {
         if (num === null || num === undefined) return '0';
         return parseFloat(num).toLocaleString('en-US', {
@@ -75,8 +156,13 @@ class Utils {
 
     static showLoading(show = true) {
         const spinner = document.getElementById('loadingSpinner');
-        if (spinner) {
-            spinner.classList.toggle('active', show);
+        if (!spinner) return;
+        // Loads answered from cache finish within the delay and never flash the overlay
+        clearTimeout(this.loadingTimer);
+        if (show) {
+            this.loadingTimer = setTimeout(() => spinner.classList.add('active'), CONFIG.LOADING_DELAY);
+        } else {
+            spinner.classList.remove('active');
         }
     }
 
@@ -116,6 +202,11 @@ class Utils {
 
 // API Service
 class ApiService {
+    // endpoint -> { data, text, fetchedAt }
+    static cache = new Map();
+    // endpoint -> { promise, invalidated } for GETs still on the wire
+    static inflight = new Map();
+
     static async request(endpoint, options = {}) {
         const url = `${CONFIG.API_BASE_URL}${endpoint}`;
         const defaultOptions = {
@@ -125,14 +216,12 @@ class ApiService {
         };
 
         try {
-            const response = await fetch(url, { ...defaultOptions, ...options });
-            
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({}));
-                throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+            const data = JSON.parse(await this.fetchText(url, { ...defaultOptions, ...options }));
+            const method = (options.method || 'GET').toUpperCase();
+            if (method !== 'GET') {
+                this.invalidateAfterWrite(endpoint);
             }
-
-            return await response.json();
+            return data;
         } catch (error) {
             console.error(`API Error [${endpoint}]:`, error);
             Utils.showNotification(`API Error: ${error.message}`, 'error');
@@ -140,11 +229,150 @@ class ApiService {
         }
     }
 
-    static async get(endpoint) {
-        return this.request(endpoint);
+    static async fetchText(url, options) {
+        let response;
+        try {
+            response = await fetch(url, options);
+        } catch (error) {
+            SyncQueue.setReachable(false);
+            throw error;
+        }
+        SyncQueue.setReachable(true);
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            const error = new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+            error.status = response.status;
+            throw error;
+        }
+
+        return await response.text();
+    }
+
+    /**
+     * GET through the client cache.
+     *
+     * Identical requests already on the wire share one fetch. A fresh cache
+     * entry is returned without a request; a stale one is returned at once
+     * and refreshed in the background, and `onUpdate(data)` is called if the
+     * refreshed response differs. `force: true` skips the cache; `quiet: true`
+     * (prefetching) logs failures instead of notifying the user. Without a
+     * connection the copy saved by OfflineStore is returned, however old.
+     * Cached responses are shared between callers and must not be mutated.
+     */
+    static async get(endpoint, { onUpdate = null, force = false, quiet = false } = {}) {
+        const policy = this.cachePolicy(endpoint);
+        if (!policy) {
+            return this.request(endpoint);
+        }
+
+        const entry = this.cache.get(endpoint);
+        const age = entry ? Date.now() - entry.fetchedAt : Infinity;
+
+        if (!force && age <= policy.ttl) {
+            return entry.data;
+        }
+
+        if (!force && age <= policy.maxStale) {
+            this.revalidate(endpoint).then(fresh => {
+                if (fresh.changed && onUpdate) onUpdate(fresh.data);
+            }).catch(error => {
+                console.warn(`Background refresh failed [${endpoint}]:`, error);
+            });
+            return entry.data;
+        }
+
+        try {
+            return (await this.revalidate(endpoint)).data;
+        } catch (error) {
+            const saved = await OfflineStore.fallback(endpoint, error);
+            if (saved) {
+                return saved.data;
+            }
+            if (quiet) {
+                console.warn(`Prefetch failed [${endpoint}]:`, error);
+            } else {
+                console.error(`API Error [${endpoint}]:`, error);
+                Utils.showNotification(`API Error: ${error.message}`, 'error');
+            }
+            throw error;
+        }
+    }
+
+    static revalidate(endpoint) {
+        const pending = this.inflight.get(endpoint);
+        if (pending) {
+            return pending.promise;
+        }
+
+        const request = { invalidated: false };
+        request.promise = this.fetchText(`${CONFIG.API_BASE_URL}${endpoint}`, {
+            headers: { 'Content-Type': 'application/json' }
+        }).then(text => {
+            const previous = this.cache.get(endpoint);
+            const changed = !previous || previous.text !== text;
+            const data = changed ? JSON.parse(text) : previous.data;
+            // A write that landed while this was on the wire may not be reflected in it
+            if (!request.invalidated) {
+                const fetchedAt = Date.now();
+                this.cache.set(endpoint, { data, text, fetchedAt });
+                OfflineStore.save(endpoint, text, fetchedAt);
+            }
+            return { data, changed };
+        }).finally(() => {
+            if (this.inflight.get(endpoint) === request) {
+                this.inflight.delete(endpoint);
+            }
+        });
+
+        this.inflight.set(endpoint, request);
+        return request.promise;
+    }
+
+    static matchPrefix(endpoint, prefixes) {
+        const path = endpoint.split('?')[0];
+        let best = null;
+        for (const prefix of prefixes) {
+            if ((path === prefix || path.startsWith(prefix + '/')) &&
+                (!best || prefix.length > best.length)) {
+                best = prefix;
+            }
+        }
+        return best;
+    }
+
+    static cachePolicy(endpoint) {
+        const prefix = this.matchPrefix(endpoint, Object.keys(CONFIG.CACHE_POLICIES));
+        return prefix ? CONFIG.CACHE_POLICIES[prefix] : null;
+    }
+
+    static invalidateAfterWrite(endpoint) {
+        const prefix = this.matchPrefix(endpoint, Object.keys(CONFIG.CACHE_INVALIDATION));
+        this.invalidate(prefix ? CONFIG.CACHE_INVALIDATION[prefix] : [endpoint.split('?')[0]]);
+    }
+
+    /**
+     * Drop cached responses under the given path prefixes (all when omitted).
+     * Matching requests still in flight finish for their callers but are not cached.
+     */
+    static invalidate(prefixes = null) {
+        const matches = endpoint => !prefixes || this.matchPrefix(endpoint, prefixes) !== null;
+
+        for (const endpoint of [...this.cache.keys()]) {
+            if (matches(endpoint)) this.cache.delete(endpoint);
+        }
+        for (const [endpoint, request] of [...this.inflight]) {
+            if (matches(endpoint)) {
+                request.invalidated = true;
+                this.inflight.delete(endpoint);
+            }
+        }
     }
 
     static async post(endpoint, data) {
+        if (CONFIG.SYNC.QUEUED.includes(endpoint)) {
+            return SyncQueue.submit(endpoint, data);
+        }
         return this.request(endpoint, {
             method: 'POST',
             body: JSON.stringify(data)
@@ -165,16 +393,792 @@ class ApiService {
     }
 }
 
+// Offline Storage
+// IndexedDB holds the last response of each CONFIG.OFFLINE.PERSIST endpoint
+// (reference data and the first pages of recent history) for reading without
+// a connection, and the outbox of writes waiting for SyncQueue.
+class OfflineStore {
+    static db = null;
+    static noticeShown = false;
+
+    static open() {
+        if (!this.db) {
+            this.db = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB is not available'));
+                    return;
+                }
+                const request = indexedDB.open(CONFIG.OFFLINE.DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    request.result.createObjectStore('responses', { keyPath: 'endpoint' });
+                    // Auto-increment keys keep queued writes in the order they were made
+                    request.result.createObjectStore('outbox', { keyPath: 'seq', autoIncrement: true });
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return this.db;
+    }
+
+    // Run `operation(objectStore)` in one transaction; resolves with the result of the request it returns
+    static async run(storeName, mode, operation) {
+        const db = await this.open();
+        return new Promise((resolve, reject) => {
+            const transaction = db.transaction(storeName, mode);
+            const request = operation(transaction.objectStore(storeName));
+            transaction.oncomplete = () => resolve(request ? request.result : undefined);
+            transaction.onerror = transaction.onabort = () => reject(transaction.error);
+        });
+    }
+
+    static get(storeName, key) {
+        return this.run(storeName, 'readonly', store => store.get(key));
+    }
+
+    static getAll(storeName) {
+        return this.run(storeName, 'readonly', store => store.getAll());
+    }
+
+    static add(storeName, value) {
+        return this.run(storeName, 'readwrite', store => store.add(value));
+    }
+
+    static putAll(storeName, values) {
+        return this.run(storeName, 'readwrite', store => values.forEach(value => store.put(value)));
+    }
+
+    static delete(storeName, keys) {
+        return this.run(storeName, 'readwrite', store => keys.forEach(key => store.delete(key)));
+    }
+
+    static save(endpoint, text, fetchedAt) {
+        if (!ApiService.matchPrefix(endpoint, CONFIG.OFFLINE.PERSIST)) return;
+        this.run('responses', 'readwrite', store => store.put({ endpoint, text, fetchedAt }))
+            .catch(error => console.warn(`Offline copy not saved [${endpoint}]:`, error));
+    }
+
+    /**
+     * The saved copy of `endpoint` as { data, fetchedAt } when `error` means the
+     * server could not be reached, else null. The copy also goes back into the
+     * memory cache, so the next read revalidates it instead of waiting on the network.
+     */
+    static async fallback(endpoint, error) {
+        if (!this.unreachable(error) || !ApiService.matchPrefix(endpoint, CONFIG.OFFLINE.PERSIST)) {
+            return null;
+        }
+        const saved = await this.get('responses', endpoint).catch(() => null);
+        if (!saved) {
+            return null;
+        }
+
+        const data = JSON.parse(saved.text);
+        ApiService.cache.set(endpoint, { data, text: saved.text, fetchedAt: saved.fetchedAt });
+        if (!this.noticeShown) {
+            this.noticeShown = true;
+            Utils.showNotification(`Offline - showing data saved ${new Date(saved.fetchedAt).toLocaleString()}`, 'warning');
+        }
+        return { data, fetchedAt: saved.fetchedAt };
+    }
+
+    // Drop saved responses older than CONFIG.OFFLINE.MAX_AGE
+    static prune() {
+        const cutoff = Date.now() - CONFIG.OFFLINE.MAX_AGE;
+        return this.run('responses', 'readwrite', store => {
+            store.openCursor().onsuccess = event => {
+                const cursor = event.target.result;
+                if (!cursor) return;
+                if (cursor.value.fetchedAt < cutoff) cursor.delete();
+                cursor.continue();
+            };
+        }).catch(error => console.warn('Offline storage unavailable:', error));
+    }
+
+    // No answer at all, or a gateway reporting the backend as down
+    static unreachable(error) {
+        return !navigator.onLine || error instanceof TypeError || [502, 503, 504].includes(error.status);
+    }
+}
+
+// Offline Writes
+// Writes to CONFIG.SYNC.QUEUED endpoints that cannot reach the server go to the
+// outbox under an idempotency key and are replayed in batches through
+// /sync/batch. The server applies each key once, so replaying a write whose
+// response was lost on a flaky link does not record it twice.
+class SyncQueue {
+    static reachable = true;
+    static flushing = null;
+    static retryTimer = null;
+    static retryDelay = 0;
+    static counts = { pending: 0, failed: 0 };
+
+    static init() {
+        window.addEventListener('online', () => this.setReachable(true));
+        window.addEventListener('offline', () => this.setReachable(false));
+        setInterval(() => {
+            if (this.counts.pending && !this.retryTimer) this.flush();
+        }, CONFIG.SYNC.INTERVAL);
+
+        this.reachable = navigator.onLine;
+        this.refreshCounts().then(() => {
+            if (this.counts.pending) this.flush();
+        });
+    }
+
+    static newKey() {
+        if (window.crypto?.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+    }
+
+    // Path of an API endpoint as the server routes it (/operational-hours -> /api/operational-hours)
+    static apiPath(endpoint) {
+        return new URL(`${CONFIG.API_BASE_URL}${endpoint}`, window.location.href).pathname;
+    }
+
+    /**
+     * POST a queueable write. It is sent at once when the server is reachable and
+     * no older write is waiting; otherwise, or when the link drops mid-request, it
+     * is queued and `{ queued: true }` is returned. Rejections by the server throw.
+     */
+    static async submit(endpoint, payload) {
+        const operation = { idempotency_key: this.newKey(), endpoint, payload, queuedAt: Date.now() };
+
+        if (this.reachable && !this.counts.pending) {
+            try {
+                const text = await ApiService.fetchText(`${CONFIG.API_BASE_URL}${endpoint}`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'Idempotency-Key': operation.idempotency_key },
+                    body: JSON.stringify(payload)
+                });
+                ApiService.invalidateAfterWrite(endpoint);
+                return JSON.parse(text);
+            } catch (error) {
+                if (!OfflineStore.unreachable(error)) {
+                    console.error(`API Error [${endpoint}]:`, error);
+                    Utils.showNotification(`API Error: ${error.message}`, 'error');
+                    throw error;
+                }
+            }
+        }
+
+        try {
+            await OfflineStore.add('outbox', operation);
+        } catch (error) {
+            Utils.showNotification('No connection, and this browser cannot store the entry offline', 'error');
+            throw error;
+        }
+        await this.refreshCounts();
+        if (!this.retryTimer) this.scheduleRetry();
+        return { queued: true, idempotency_key: operation.idempotency_key };
+    }
+
+    static setReachable(reachable) {
+        if (reachable === this.reachable) return;
+        this.reachable = reachable;
+        if (reachable) {
+            OfflineStore.noticeShown = false;
+            // Every device on a site regains the link at once: spread their replays out
+            if (this.counts.pending) {
+                clearTimeout(this.retryTimer);
+                this.retryTimer = setTimeout(() => {
+                    this.retryTimer = null;
+                    this.flush();
+                }, Math.random() * CONFIG.SYNC.JITTER);
+            }
+        }
+        this.renderStatus();
+    }
+
+    static scheduleRetry() {
+        const { RETRY_BASE, RETRY_MAX } = CONFIG.SYNC;
+        this.retryDelay = Math.min(RETRY_MAX, this.retryDelay ? this.retryDelay * 2 : RETRY_BASE);
+        clearTimeout(this.retryTimer);
+        this.retryTimer = setTimeout(() => {
+            this.retryTimer = null;
+            this.flush();
+        }, this.retryDelay * (0.5 + Math.random()));
+    }
+
+    // Replay the outbox; concurrent calls share one run
+    static flush() {
+        if (!this.flushing) {
+            this.flushing = this.sendBatches().finally(() => {
+                this.flushing = null;
+            });
+        }
+        return this.flushing;
+    }
+
+    static async sendBatches() {
+        let synced = 0;
+        const rejected = [];
+        try {
+            for (;;) {
+                // Writes the server rejected stay aside until the user retries them
+                const batch = (await OfflineStore.getAll('outbox'))
+                    .filter(operation => !operation.error)
+                    .slice(0, CONFIG.SYNC.BATCH_SIZE);
+                if (!batch.length) break;
+
+                const { results } = JSON.parse(await ApiService.fetchText(`${CONFIG.API_BASE_URL}/sync/batch`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        operations: batch.map(operation => ({
+                            idempotency_key: operation.idempotency_key,
+                            endpoint: this.apiPath(operation.endpoint),
+                            payload: operation.payload
+                        }))
+                    })
+                }));
+
+                const outcomes = new Map(results.map(result => [result.idempotency_key, result]));
+                const applied = [];
+                const failed = [];
+                for (const operation of batch) {
+                    const outcome = outcomes.get(operation.idempotency_key);
+                    if (outcome && outcome.status < 300) {
+                        applied.push(operation);
+                    } else {
+                        failed.push({ ...operation, error: outcome?.error || 'No result returned' });
+                    }
+                }
+                await OfflineStore.delete('outbox', applied.map(operation => operation.seq));
+                await OfflineStore.putAll('outbox', failed);
+                new Set(applied.map(operation => operation.endpoint))
+                    .forEach(endpoint => ApiService.invalidateAfterWrite(endpoint));
+                synced += applied.length;
+                rejected.push(...failed);
+            }
+            this.retryDelay = 0;
+        } catch (error) {
+            console.warn('Offline sync failed:', error);
+            if (OfflineStore.unreachable(error)) this.scheduleRetry();
+        }
+
+        await this.refreshCounts();
+        if (synced) {
+            Utils.showNotification(`${synced} offline ${synced === 1 ? 'entry' : 'entries'} synced`, 'success');
+            Navigation.loadSectionData(currentSection);
+        }
+        if (rejected.length) {
+            Utils.showNotification(`${rejected.length} offline ${rejected.length === 1 ? 'entry was' : 'entries were'} rejected: ${rejected[0].error}`, 'error');
+        }
+    }
+
+    // Send rejected writes again (after the cause was fixed on the server) along with the rest
+    static async retry() {
+        const outbox = await OfflineStore.getAll('outbox');
+        await OfflineStore.putAll('outbox', outbox.filter(operation => operation.error)
+            .map(({ error, ...operation }) => operation));
+        this.retryDelay = 0;
+        clearTimeout(this.retryTimer);
+        this.retryTimer = null;
+        return this.flush();
+    }
+
+    static async refreshCounts() {
+        try {
+            const outbox = await OfflineStore.getAll('outbox');
+            const failed = outbox.filter(operation => operation.error).length;
+            this.counts = { pending: outbox.length - failed, failed };
+        } catch (error) {
+            // No offline storage: nothing can have been queued
+        }
+        this.renderStatus();
+    }
+
+    static renderStatus() {
+        const button = document.getElementById('syncStatus');
+        if (!button) return;
+
+        const { pending, failed } = this.counts;
+        const parts = [];
+        if (!this.reachable) parts.push('Offline');
+        if (pending) parts.push(`${pending} to sync`);
+        if (failed) parts.push(`${failed} rejected`);
+
+        button.hidden = !parts.length;
+        button.classList.toggle('offline', !this.reachable);
+        button.classList.toggle('failed', failed > 0);
+        button.title = failed ? 'Some entries were rejected by the server - click to send them again'
+            : 'Entries are saved on this device - click to sync now';
+        Render.text('syncStatusText', parts.join(' · '));
+    }
+}
+
+// DOM Rendering
+// Writes are queued per target and applied together in the next animation
+// frame; writes that would not change anything are skipped.
+class Render {
+    static queue = new Map();
+    static frame = null;
+    static written = new WeakMap();
+
+    static schedule(target, write) {
+        // A later write for the same target replaces one still queued
+        this.queue.set(target, write);
+        if (!this.frame) {
+            this.frame = requestAnimationFrame(() => this.flush());
+        }
+    }
+
+    static flush() {
+        const writes = [...this.queue.values()];
+        this.queue.clear();
+        this.frame = null;
+        writes.forEach(write => write());
+    }
+
+    static resolve(element) {
+        return typeof element === 'string' ? document.getElementById(element) : element;
+    }
+
+    static text(element, value) {
+        const el = this.resolve(element);
+        if (!el) return;
+        const text = String(value);
+        this.schedule(el, () => {
+            if (el.textContent !== text) el.textContent = text;
+        });
+    }
+
+    static html(element, html) {
+        const el = this.resolve(element);
+        if (!el) return;
+        this.schedule(el, () => {
+            if (this.written.get(el) === html) return;
+            this.written.set(el, html);
+            el.innerHTML = html;
+        });
+    }
+
+    /**
+     * Keep `element`'s children in step with `items` (one element of markup each),
+     * replacing only the children whose markup changed.
+     */
+    static list(element, items, emptyHtml = '') {
+        const el = this.resolve(element);
+        if (!el) return;
+        this.schedule(el, () => {
+            const previous = this.written.get(el);
+            if (!items.length || !Array.isArray(previous)) {
+                const html = items.length ? items.join('') : emptyHtml;
+                if (items.length || previous !== html) el.innerHTML = html;
+                this.written.set(el, items.length ? items.slice() : html);
+                return;
+            }
+            items.forEach((item, i) => {
+                if (i >= previous.length) {
+                    el.insertAdjacentHTML('beforeend', item);
+                } else if (previous[i] !== item) {
+                    el.children[i].outerHTML = item;
+                }
+            });
+            for (let i = previous.length - 1; i >= items.length; i--) {
+                el.children[i].remove();
+            }
+            this.written.set(el, items.slice());
+        });
+    }
+}
+
+// Table sort/filter (runs on the table worker, or inline for small tables)
+function queryRows(rows, { filter, fields, sortKey, sortDir }) {
+    const needle = (filter || '').trim().toLowerCase();
+    const indices = [];
+    for (let i = 0; i < rows.length; i++) {
+        const row = rows[i];
+        if (!needle || fields.some(field => row[field] != null && String(row[field]).toLowerCase().includes(needle))) {
+            indices.push(i);
+        }
+    }
+
+    if (sortKey) {
+        const direction = sortDir === 'desc' ? -1 : 1;
+        const collator = new Intl.Collator(undefined, { numeric: true, sensitivity: 'base' });
+        indices.sort((a, b) => {
+            const x = rows[a][sortKey];
+            const y = rows[b][sortKey];
+            // Empty values last in either direction
+            if (x == null || x === '') return y == null || y === '' ? a - b : 1;
+            if (y == null || y === '') return -1;
+            const order = typeof x === 'number' && typeof y === 'number' ? x - y : collator.compare(String(x), String(y));
+            return direction * order || a - b;
+        });
+    }
+
+    return Int32Array.from(indices);
+}
+
+class TableWorker {
+    static worker = null;
+    static failed = false;
+    static pending = new Map();
+    static nextId = 1;
+
+    static get() {
+        if (this.worker || this.failed) return this.worker;
+        try {
+            // Built from this file so the worker needs no separate script or build step
+            const source = `const queryRows = ${queryRows.toString()};
+const datasets = new Map();
+onmessage = ({ data }) => {
+    if (data.type === 'load') {
+        datasets.set(data.table, data.rows);
+    } else if (data.type === 'append') {
+        datasets.get(data.table).push(...data.rows);
+    } else {
+        const indices = queryRows(datasets.get(data.table) || [], data.query);
+        postMessage({ id: data.id, indices }, [indices.buffer]);
+    }
+};`;
+            const url = URL.createObjectURL(new Blob([source], { type: 'text/javascript' }));
+            this.worker = new Worker(url);
+            this.worker.onmessage = ({ data }) => {
+                const resolve = this.pending.get(data.id);
+                this.pending.delete(data.id);
+                if (resolve) resolve(data.indices);
+            };
+        } catch (error) {
+            console.warn('Table worker unavailable, sorting on the main thread:', error);
+            this.failed = true;
+        }
+        return this.worker;
+    }
+
+    static load(table, rows) {
+        const worker = this.get();
+        if (worker) worker.postMessage({ type: 'load', table, rows });
+    }
+
+    static append(table, rows) {
+        const worker = this.get();
+        if (worker) worker.postMessage({ type: 'append', table, rows });
+    }
+
+    static query(table, query) {
+        const id = this.nextId++;
+        return new Promise(resolve => {
+            this.pending.set(id, resolve);
+            this.worker.postMessage({ type: 'query', table, id, query });
+        });
+    }
+}
+
+/**
+ * Table that keeps only the rows around the viewport in the DOM.
+ *
+ * Rows come from setRows() or, with `fetchPage(offset, limit)`, are loaded a
+ * page at a time as the user scrolls. Header clicks sort and the filter box
+ * narrows the loaded rows; both run on TableWorker for large tables.
+ * `columns` lists the row field behind each header (null: not sortable).
+ */
+class VirtualTable {
+    static tables = new Map();
+
+    static get(tableId, options) {
+        if (!this.tables.has(tableId)) {
+            const element = document.getElementById(tableId);
+            if (!element) return null;
+            this.tables.set(tableId, new VirtualTable(element, options));
+        }
+        return this.tables.get(tableId);
+    }
+
+    constructor(table, { columns, renderRow, emptyMessage = 'No data available', fetchPage = null }) {
+        this.table = table;
+        this.tbody = table.tBodies[0];
+        this.columns = columns;
+        this.fields = columns.filter(Boolean);
+        this.renderRow = renderRow;
+        this.emptyMessage = emptyMessage;
+        this.fetchPage = fetchPage;
+        this.rows = [];
+        this.view = null;  // Row indices after sort/filter, null for server order
+        this.filter = '';
+        this.sortKey = null;
+        this.sortDir = 'asc';
+        this.hasMore = false;
+        this.loading = false;
+        this.generation = 0;
+        this.querySeq = 0;
+        this.rowHeight = CONFIG.TABLE.ROW_HEIGHT;
+        this.measured = false;
+        this.window = null;  // [first, last, count, footer] of the rows in the DOM
+        this.rowHtml = [];   // Markup of those rows, to patch only what changed
+        this.stale = false;  // Rows or view changed since the last render
+
+        this.container = table.closest('.table-container') || table.parentElement;
+        this.container.classList.add('virtual-scroll');
+        this.container.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender());
+
+        this.setupHeader();
+        this.setupToolbar();
+    }
+
+    setupHeader() {
+        Array.from(this.table.tHead.rows[0].cells).forEach((th, i) => {
+            const key = this.columns[i];
+            if (!key) return;
+            th.classList.add('sortable');
+            th.addEventListener('click', () => {
+                // asc -> desc -> server order
+                if (this.sortKey !== key) {
+                    this.sortKey = key;
+                    this.sortDir = 'asc';
+                } else if (this.sortDir === 'asc') {
+                    this.sortDir = 'desc';
+                } else {
+                    this.sortKey = null;
+                }
+                this.updateHeader();
+                this.requery();
+            });
+        });
+    }
+
+    updateHeader() {
+        Array.from(this.table.tHead.rows[0].cells).forEach((th, i) => {
+            const sorted = this.sortKey && this.columns[i] === this.sortKey;
+            th.classList.toggle('sorted-asc', sorted && this.sortDir === 'asc');
+            th.classList.toggle('sorted-desc', sorted && this.sortDir === 'desc');
+        });
+    }
+
+    setupToolbar() {
+        const toolbar = document.createElement('div');
+        toolbar.className = 'table-toolbar';
+        toolbar.innerHTML = '<input type="search" class="table-filter" placeholder="Filter rows..."><span class="table-status"></span>';
+        this.container.parentElement.insertBefore(toolbar, this.container);
+        this.status = toolbar.querySelector('.table-status');
+
+        let timer = null;
+        toolbar.querySelector('.table-filter').addEventListener('input', (e) => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                this.filter = e.target.value;
+                this.requery();
+            }, 150);
+        });
+    }
+
+    get id() {
+        return this.table.id;
+    }
+
+    get rowCount() {
+        return this.view ? this.view.length : this.rows.length;
+    }
+
+    setRows(rows) {
+        this.generation++;
+        this.rows = rows.slice();
+        this.hasMore = false;
+        this.loading = false;
+        this.reset();
+    }
+
+    async reload() {
+        const generation = ++this.generation;
+        this.loading = true;
+        try {
+            const rows = await this.fetchPage(0, CONFIG.TABLE.PAGE_SIZE);
+            if (generation !== this.generation) return;
+            this.rows = rows.slice();
+            this.hasMore = rows.length >= CONFIG.TABLE.PAGE_SIZE;
+        } finally {
+            if (generation === this.generation) this.loading = false;
+        }
+        this.reset();
+    }
+
+    async loadMore() {
+        if (this.loading || !this.hasMore) return;
+        const generation = this.generation;
+        this.loading = true;
+        this.updateStatus();
+        try {
+            const rows = await this.fetchPage(this.rows.length, CONFIG.TABLE.PAGE_SIZE);
+            if (generation !== this.generation) return;
+            this.hasMore = rows.length >= CONFIG.TABLE.PAGE_SIZE;
+            this.rows.push(...rows);
+            if (this.useWorker) TableWorker.append(this.id, rows);
+        } catch (error) {
+            this.hasMore = false;
+        } finally {
+            if (generation === this.generation) this.loading = false;
+        }
+        this.requery();
+    }
+
+    reset() {
+        this.useWorker = this.rows.length >= CONFIG.TABLE.WORKER_MIN_ROWS && TableWorker.get() !== null;
+        if (this.useWorker) TableWorker.load(this.id, this.rows);
+        this.requery();
+    }
+
+    async requery() {
+        const seq = ++this.querySeq;
+        let view = null;
+        if (this.sortKey || this.filter.trim()) {
+            const query = { filter: this.filter, fields: this.fields, sortKey: this.sortKey, sortDir: this.sortDir };
+            view = this.useWorker ? await TableWorker.query(this.id, query) : queryRows(this.rows, query);
+            // A newer sort, filter or page superseded this one while it was running
+            if (seq !== this.querySeq) return;
+        }
+        this.view = view;
+        this.stale = true;
+        this.scheduleRender();
+    }
+
+    scheduleRender() {
+        Render.schedule(this, () => this.render());
+    }
+
+    render() {
+        const count = this.rowCount;
+        const colspan = this.columns.length;
+        this.updateStatus();
+
+        if (!count) {
+            const message = this.loading ? 'Loading...' : this.emptyMessage;
+            this.tbody.innerHTML = `<tr><td colspan="${colspan}" style="text-align: center;">${message}</td></tr>` +
+                this.loadMoreRow(colspan);
+            this.window = null;
+            return;
+        }
+
+        const headerHeight = this.table.tHead ? this.table.tHead.offsetHeight : 0;
+        const scrollTop = Math.max(0, this.container.scrollTop - headerHeight);
+        const viewport = this.container.clientHeight || window.innerHeight;
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - CONFIG.TABLE.OVERSCAN);
+        const last = Math.min(count, Math.ceil((scrollTop + viewport) / this.rowHeight) + CONFIG.TABLE.OVERSCAN);
+        const footer = this.loadMoreRow(colspan);
+        const previous = this.window;
+
+        if (!this.stale && previous && previous[0] === first && previous[1] === last &&
+            previous[2] === count && previous[3] === footer) {
+            this.pageOnScroll(last, count);
+            return;
+        }
+
+        const rows = [];
+        for (let i = first; i < last; i++) {
+            rows.push(this.renderRow(this.rows[this.view ? this.view[i] : i]).trim());
+        }
+
+        // Overlapping windows are patched: rows that scrolled away are removed, new ones
+        // inserted, and rows still in view touched only if their markup changed
+        if (previous && Math.max(first, previous[0]) < Math.min(last, previous[1])) {
+            this.patchRows(previous, first, last, rows);
+            this.tbody.rows[0].style.height = `${first * this.rowHeight}px`;
+            this.tbody.rows[this.tbody.rows.length - (previous[3] ? 2 : 1)].style.height = `${(count - last) * this.rowHeight}px`;
+            if (footer !== previous[3]) {
+                if (previous[3]) this.tbody.rows[this.tbody.rows.length - 1].remove();
+                if (footer) this.tbody.insertAdjacentHTML('beforeend', footer);
+            }
+        } else {
+            this.tbody.innerHTML = this.spacer(first * this.rowHeight, colspan) + rows.join('') +
+                this.spacer((count - last) * this.rowHeight, colspan) + footer;
+        }
+        this.window = [first, last, count, footer];
+        this.rowHtml = rows;
+        this.stale = false;
+
+        if (!this.measured) {
+            const row = this.tbody.rows[1];
+            if (row && row.offsetHeight) {
+                this.measured = true;
+                if (Math.abs(row.offsetHeight - this.rowHeight) > 1) {
+                    this.rowHeight = row.offsetHeight;
+                    this.stale = true;
+                    this.scheduleRender();
+                }
+            }
+        }
+
+        this.pageOnScroll(last, count);
+    }
+
+    patchRows([oldFirst, oldLast], first, last, rows) {
+        const tbody = this.tbody;
+        // Data rows sit between the top spacer (row 0) and the bottom spacer
+        for (let i = oldLast - 1; i >= last; i--) tbody.rows[1 + i - oldFirst].remove();
+        for (let i = oldFirst; i < first; i++) tbody.rows[1].remove();
+
+        const keptFirst = Math.max(first, oldFirst);
+        const keptLast = Math.min(last, oldLast);
+        for (let i = keptFirst; i < keptLast; i++) {
+            const html = rows[i - first];
+            if (html !== this.rowHtml[i - oldFirst]) {
+                tbody.rows[1 + i - keptFirst].outerHTML = html;
+            }
+        }
+
+        if (first < keptFirst) {
+            tbody.rows[0].insertAdjacentHTML('afterend', rows.slice(0, keptFirst - first).join(''));
+        }
+        if (last > keptLast) {
+            tbody.rows[1 + last - first - (last - keptLast) - 1].insertAdjacentHTML('afterend',
+                rows.slice(keptLast - first).join(''));
+        }
+    }
+
+    pageOnScroll(last, count) {
+        // Rows arrive in server order, so only an unfiltered view pages on scroll
+        if (this.hasMore && !this.filter.trim() && last >= count - CONFIG.TABLE.OVERSCAN) {
+            this.loadMore();
+        }
+    }
+
+    spacer(height, colspan) {
+        // Always present (possibly 0px high) so patching can rely on the row layout
+        return `<tr class="virtual-spacer" style="height: ${height}px;"><td colspan="${colspan}"></td></tr>`;
+    }
+
+    loadMoreRow(colspan) {
+        if (!this.hasMore || !this.filter.trim()) return '';
+        return `<tr class="virtual-more"><td colspan="${colspan}">
+            <button class="btn btn-ghost" onclick="VirtualTable.tables.get('${this.id}').loadMore()">Load more rows</button>
+        </td></tr>`;
+    }
+
+    updateStatus() {
+        if (!this.status) return;
+        const loaded = Utils.formatNumber(this.rows.length, 0);
+        let text = this.view && this.filter.trim() ? `${Utils.formatNumber(this.view.length, 0)} of ${loaded} rows` : `${loaded} rows`;
+        if (this.loading) text += ' · loading...';
+        else if (this.hasMore) text += this.filter.trim() ? ' · more available' : ' · more on scroll';
+        this.status.textContent = text;
+    }
+}
+
 // Navigation System
 class Navigation {
+    static previousSection = null;
+    static hoverTimer = null;
+
     static init() {
         // Add click handlers to navigation items
         document.querySelectorAll('.nav-item').forEach(item => {
+            const section = item.getAttribute('data-section');
             item.addEventListener('click', (e) => {
                 e.preventDefault();
-                const section = item.getAttribute('data-section');
                 this.showSection(section);
             });
+
+            // Hover intent: a pointer resting on the link (or keyboard focus) prefetches it
+            item.addEventListener('mouseenter', () => {
+                clearTimeout(this.hoverTimer);
+                this.hoverTimer = setTimeout(() => Sections.prefetch(section), CONFIG.PREFETCH.HOVER_DELAY);
+            });
+            item.addEventListener('mouseleave', () => clearTimeout(this.hoverTimer));
+            item.addEventListener('focus', () => Sections.prefetch(section));
+            item.addEventListener('touchstart', () => Sections.prefetch(section), { passive: true });
         });
 
         // Show initial section
@@ -203,37 +1207,21 @@ class Navigation {
             activeNavItem.classList.add('active');
         }
 
+        if (currentSection !== sectionName) {
+            Sections.recordVisit(currentSection, sectionName);
+        }
         currentSection = sectionName;
 
-        // Load section data
-        this.loadSectionData(sectionName);
+        // Load section data, then use the next idle period to prepare the likely next section
+        this.loadSectionData(sectionName).then(() => Sections.prefetchWhenIdle(Sections.likelyNext(sectionName)));
     }
 
     static async loadSectionData(sectionName) {
         try {
-            switch (sectionName) {
-                case 'dashboard':
-                    await Dashboard.load();
-                    break;
-                case 'forecasting':
-                    await Forecasting.load();
-                    break;
-                case 'stock':
-                    await Stock.load();
-                    break;
-                case 'equipment':
-                    await Equipment.load();
-                    break;
-                case 'operational-hours':
-                    await OperationalHours.load();
-                    break;
-                case 'refills':
-                    await Refills.load();
-                    break;
-                case 'usage':
-                    await Usage.load();
-                    break;
-                // Add other sections as needed
+            const section = sectionName === 'dashboard' ? Dashboard : await Sections.load(sectionName);
+            // Sections without a module yet (sites, reports, ...) have nothing to load
+            if (section) {
+                await section.load();
             }
         } catch (error) {
             console.error(`Error loading section ${sectionName}:`, error);
@@ -241,6 +1229,78 @@ class Navigation {
     }
 }
 
+// Section Loader
+class Sections {
+    static modules = new Map();
+    static visitsKey = 'fuelControl.sectionVisits';
+
+    /** The section's controller class, importing its module on first use */
+    static load(name) {
+        const section = CONFIG.SECTIONS[name];
+        if (!section) return Promise.resolve(null);
+        if (!this.modules.has(name)) {
+            const loading = import(section.module).then(module => {
+                // Inline handlers such as onclick="Forecasting.showScenarios(1)" look it up globally
+                window[section.global] = module.default;
+                return module.default;
+            });
+            // A failed import (e.g. offline) is retried on the next visit
+            loading.catch(() => this.modules.delete(name));
+            this.modules.set(name, loading);
+        }
+        return this.modules.get(name);
+    }
+
+    /** Fetch a section's code and warm the API cache with its data, without rendering */
+    static prefetch(name) {
+        if (!name || name === currentSection || navigator.connection?.saveData) return;
+        const loading = name === 'dashboard' ? Promise.resolve(Dashboard) : this.load(name);
+        loading
+            .then(section => section?.prefetch?.())
+            .catch(error => console.warn(`Prefetch of ${name} failed:`, error));
+    }
+
+    static prefetchWhenIdle(name) {
+        if (!name) return;
+        if (window.requestIdleCallback) {
+            requestIdleCallback(() => this.prefetch(name), { timeout: CONFIG.PREFETCH.IDLE_TIMEOUT });
+        } else {
+            setTimeout(() => this.prefetch(name), CONFIG.PREFETCH.IDLE_TIMEOUT);
+        }
+    }
+
+    static visits() {
+        try {
+            return JSON.parse(localStorage.getItem(this.visitsKey)) || {};
+        } catch (error) {
+            return {};
+        }
+    }
+
+    /** Count section-to-section moves so prefetching follows how this browser is used */
+    static recordVisit(from, to) {
+        const visits = this.visits();
+        visits[from] = visits[from] || {};
+        visits[from][to] = (visits[from][to] || 0) + 1;
+        try {
+            localStorage.setItem(this.visitsKey, JSON.stringify(visits));
+        } catch (error) {
+            // Storage full or disabled: prefetching falls back to menu order
+        }
+    }
+
+    /** Most frequent next section after `name`, else the next one in the menu */
+    static likelyNext(name) {
+        const counts = this.visits()[name] || {};
+        const known = Object.keys(counts).filter(section => section === 'dashboard' || CONFIG.SECTIONS[section]);
+        if (known.length) {
+            return known.reduce((best, section) => counts[section] > counts[best] ? section : best);
+        }
+        const order = Object.keys(CONFIG.SECTIONS);
+        return order[order.indexOf(name) + 1] || null;
+    }
+}
+
 // Dashboard Module
 class Dashboard {
     static async load() {
@@ -260,27 +1320,35 @@ class Dashboard {
         }
     }
 
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return Promise.all(['/sites', '/equipment', '/stock', '/alerts?days=1', '/forecasts']
+            .map(endpoint => ApiService.get(endpoint, { quiet: true })));
+    }
+
     static async loadKPIs() {
+        // Re-running after a background refresh reads the now-fresh cache
+        const refresh = () => this.loadKPIs();
         try {
             const [sites, equipment, stock, alerts] = await Promise.all([
-                ApiService.get('/sites'),
-                ApiService.get('/equipment'),
-                ApiService.get('/stock'),
-                ApiService.get('/alerts?days=1')
+                ApiService.get('/sites', { onUpdate: refresh }),
+                ApiService.get('/equipment', { onUpdate: refresh }),
+                ApiService.get('/stock', { onUpdate: refresh }),
+                ApiService.get('/alerts?days=1', { onUpdate: refresh })
             ]);
 
             // Update KPI values
-            document.getElementById('totalSites').textContent = sites.length;
-            document.getElementById('totalEquipment').textContent = equipment.length;
+            Render.text('totalSites', sites.length);
+            Render.text('totalEquipment', equipment.length);
             
             const totalStock = stock.reduce((sum, item) => sum + (item.current_quantity || 0), 0);
-            document.getElementById('totalFuelStock').textContent = Utils.formatNumber(totalStock, 0) + 'L';
+            Render.text('totalFuelStock', Utils.formatNumber(totalStock, 0) + 'L');
             
             const criticalAlerts = alerts.filter(alert => alert.severity_level === 'Critical').length;
-            document.getElementById('criticalAlerts').textContent = criticalAlerts;
+            Render.text('criticalAlerts', criticalAlerts);
 
             // Update notification count
-            document.getElementById('notificationCount').textContent = alerts.length;
+            Render.text('notificationCount', alerts.length);
         } catch (error) {
             console.error('KPI load error:', error);
         }
@@ -288,12 +1356,7 @@ class Dashboard {
 
     static async loadStockChart() {
         try {
-            const stock = await ApiService.get('/stock');
-            
-            // Destroy existing chart
-            if (stockChart) {
-                stockChart.destroy();
-            }
+            const stock = await ApiService.get('/stock', { onUpdate: () => this.loadStockChart() });
 
             // Prepare chart data
             const chartData = stock.slice(0, 10).map(item => ({
@@ -301,21 +1364,37 @@ class Dashboard {
                 quantity: item.current_quantity || 0,
                 percentage: item.fill_percentage || 0
             }));
+            const labels = chartData.map(item => item.site);
+            const percentages = chartData.map(item => item.percentage);
+            const colors = chartData.map(item => {
+                if (item.percentage < 20) return CONFIG.CHART_COLORS.critical;
+                if (item.percentage < 40) return CONFIG.CHART_COLORS.warning;
+                return CONFIG.CHART_COLORS.success;
+            });
 
             const ctx = document.getElementById('stockChart');
-            if (ctx) {
+            if (ctx && stockChart && stockChart.canvas === ctx) {
+                // Live refresh: change the datasets in place, redraw without animation
+                const dataset = stockChart.data.datasets[0];
+                if (Utils.arraysEqual(stockChart.data.labels, labels) && Utils.arraysEqual(dataset.data, percentages)) {
+                    return;
+                }
+                stockChart.data.labels = labels;
+                dataset.data = percentages;
+                dataset.backgroundColor = colors;
+                Render.schedule(stockChart, () => stockChart.update('none'));
+            } else if (ctx) {
+                if (stockChart) {
+                    stockChart.destroy();
+                }
                 stockChart = new Chart(ctx, {
                     type: 'bar',
                     data: {
-                        labels: chartData.map(item => item.site),
+                        labels,
                         datasets: [{
                             label: 'Stock Level (%)',
-                            data: chartData.map(item => item.percentage),
-                            backgroundColor: chartData.map(item => {
-                                if (item.percentage < 20) return CONFIG.CHART_COLORS.critical;
-                                if (item.percentage < 40) return CONFIG.CHART_COLORS.warning;
-                                return CONFIG.CHART_COLORS.success;
-                            }),
+                            data: percentages,
+                            backgroundColor: colors,
                             borderRadius: 4,
                             borderSkipped: false,
                         }]
@@ -349,399 +1428,45 @@ class Dashboard {
 
     static async loadRecentForecasts() {
         try {
-            const forecasts = await ApiService.get('/forecasts');
+            const forecasts = await ApiService.get('/forecasts', { onUpdate: () => this.loadRecentForecasts() });
             const recentForecasts = forecasts
                 .filter(f => f.forecast_days_remaining <= 7)
                 .sort((a, b) => a.forecast_days_remaining - b.forecast_days_remaining)
                 .slice(0, 5);
 
-            const container = document.getElementById('recentForecasts');
-            if (container) {
-                container.innerHTML = recentForecasts.map(forecast => `
+            Render.list('recentForecasts', recentForecasts.map(forecast => `
                     <div class="forecast-item">
                         <h4>${forecast.site_name} - ${forecast.fuel_name}</h4>
                         <p>Days remaining: <strong>${forecast.forecast_days_remaining}</strong></p>
                         <p>Next refill: ${Utils.formatDate(forecast.next_refill_date_estimate)}</p>
                     </div>
-                `).join('') || '<p>No critical forecasts</p>';
-            }
+                `.trim()), '<p>No critical forecasts</p>');
         } catch (error) {
             console.error('Recent forecasts load error:', error);
         }
     }
 }
 
-// Forecasting Module
-class Forecasting {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            await Promise.all([
-                this.loadSiteFilter(),
-                this.loadForecasts()
-            ]);
-            
-            // Set default date to today
-            document.getElementById('forecastDateFilter').value = new Date().toISOString().split('T')[0];
-        } catch (error) {
-            console.error('Forecasting load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static async loadSiteFilter() {
-        try {
-            const sites = await ApiService.get('/sites');
-            const select = document.getElementById('forecastSiteFilter');
-            
-            if (select) {
-                select.innerHTML = '<option value="">All Sites</option>' +
-                    sites.map(site => `<option value="${site.site_id}">${site.site_name}</option>`).join('');
-            }
-        } catch (error) {
-            console.error('Site filter load error:', error);
-        }
-    }
-
-    static async loadForecasts() {
-        try {
-            const siteId = document.getElementById('forecastSiteFilter')?.value;
-            const forecastDate = document.getElementById('forecastDateFilter')?.value;
-            
-            let url = '/forecasts';
-            const params = new URLSearchParams();
-            
-            if (siteId) params.append('site_id', siteId);
-            if (forecastDate) params.append('forecast_date', forecastDate);
-            
-            if (params.toString()) {
-                url += '?' + params.toString();
-            }
-
-            const forecasts = await ApiService.get(url);
-            this.renderForecastsTable(forecasts);
-        } catch (error) {
-            console.error('Forecasts load error:', error);
-        }
-    }
-
-    static renderForecastsTable(forecasts) {
-        const tbody = document.querySelector('#forecastsTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = forecasts.map(forecast => {
-            const daysClass = forecast.forecast_days_remaining <= 3 ? 'status-critical' : 
-                             forecast.forecast_days_remaining <= 7 ? 'status-low' : 'status-normal';
-            
-            return `
-                <tr>
-                    <td>${forecast.site_name}</td>
-                    <td>${forecast.fuel_name}</td>
-                    <td>${Utils.formatNumber(forecast.current_balance, 0)}L</td>
-                    <td>${Utils.formatNumber(forecast.daily_consumption_rate, 1)}L/day</td>
-                    <td><span class="status-badge ${daysClass}">${forecast.forecast_days_remaining} days</span></td>
-                    <td>${Utils.formatDate(forecast.next_refill_date_estimate)}</td>
-                    <td>${Utils.formatNumber(forecast.confidence_level, 0)}%</td>
-                    <td>
-                        <button class="btn btn-ghost" onclick="Forecasting.showScenarios(${forecast.forecast_id})">
-                            <i class="fas fa-chart-line"></i> Scenarios
-                        </button>
-                    </td>
-                </tr>
-            `;
-        }).join('') || '<tr><td colspan="8" style="text-align: center;">No forecasts available</td></tr>';
-    }
-
-    static async showScenarios(forecastId) {
-        try {
-            const scenarios = await ApiService.get(`/forecasts/${forecastId}/scenarios`);
-            // Implementation for showing scenarios would go here
-            Utils.showNotification('Scenario planning feature coming soon!', 'info');
-        } catch (error) {
-            console.error('Scenarios load error:', error);
-        }
-    }
-}
-
-// Stock Module
-class Stock {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            const stock = await ApiService.get('/stock');
-            this.renderStockTable(stock);
-        } catch (error) {
-            console.error('Stock load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static renderStockTable(stock) {
-        const tbody = document.querySelector('#stockTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = stock.map(item => `
-            <tr>
-                <td>${item.site_name}</td>
-                <td>${item.fuel_name}</td>
-                <td>${Utils.formatNumber(item.current_quantity, 0)}L</td>
-                <td>${Utils.formatNumber(item.available_quantity, 0)}L</td>
-                <td>
-                    <div style="display: flex; align-items: center; gap: 8px;">
-                        <div style="width: 60px; height: 8px; background: #e2e8f0; border-radius: 4px; overflow: hidden;">
-                            <div style="width: ${item.fill_percentage}%; height: 100%; background: ${
-                                item.fill_percentage < 20 ? CONFIG.CHART_COLORS.critical :
-                                item.fill_percentage < 40 ? CONFIG.CHART_COLORS.warning :
-                                CONFIG.CHART_COLORS.success
-                            };"></div>
-                        </div>
-                        <span>${Utils.formatNumber(item.fill_percentage, 1)}%</span>
-                    </div>
-                </td>
-                <td><span class="status-badge ${Utils.getStatusClass(item.stock_status)}">${item.stock_status}</span></td>
-                <td>${Utils.formatDateTime(item.last_updated)}</td>
-            </tr>
-        `).join('') || '<tr><td colspan="7" style="text-align: center;">No stock data available</td></tr>';
-    }
-}
-
-// Equipment Module
-class Equipment {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            const equipment = await ApiService.get('/equipment');
-            this.renderEquipmentTable(equipment);
-        } catch (error) {
-            console.error('Equipment load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static renderEquipmentTable(equipment) {
-        const tbody = document.querySelector('#equipmentTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = equipment.map(item => `
-            <tr>
-                <td>${item.equipment_name}</td>
-                <td>${item.site_name}</td>
-                <td>${item.equipment_type || 'N/A'}</td>
-                <td>${item.fuel_name}</td>
-                <td>${Utils.formatNumber(item.consumption_rate, 1)}</td>
-                <td>${item.manufacturer || 'N/A'}</td>
-                <td>${item.model || 'N/A'}</td>
-                <td><span class="status-badge ${item.is_active ? 'status-normal' : 'status-critical'}">${item.is_active ? 'Active' : 'Inactive'}</span></td>
-                <td>
-                    <button class="btn btn-ghost" onclick="Equipment.edit(${item.equipment_id})">
-                        <i class="fas fa-edit"></i>
-                    </button>
-                </td>
-            </tr>
-        `).join('') || '<tr><td colspan="9" style="text-align: center;">No equipment data available</td></tr>';
-    }
-
-    static edit(equipmentId) {
-        Utils.showNotification('Equipment editing feature coming soon!', 'info');
-    }
-}
-
-// Operational Hours Module
-class OperationalHours {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            await Promise.all([
-                this.loadSiteOptions(),
-                this.loadOperationalHours()
-            ]);
-            
-            // Set default date to today
-            document.getElementById('hoursLogDate').value = new Date().toISOString().split('T')[0];
-            
-            // Setup form handler
-            this.setupForm();
-        } catch (error) {
-            console.error('Operational hours load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static async loadSiteOptions() {
-        try {
-            const sites = await ApiService.get('/sites');
-            const select = document.getElementById('hoursLogSite');
-            
-            if (select) {
-                select.innerHTML = '<option value="">Select Site</option>' +
-                    sites.map(site => `<option value="${site.site_id}">${site.site_name}</option>`).join('');
-            }
-        } catch (error) {
-            console.error('Site options load error:', error);
-        }
-    }
-
-    static async loadSiteEquipment() {
-        const siteId = document.getElementById('hoursLogSite')?.value;
-        const equipmentSelect = document.getElementById('hoursLogEquipment');
-        
-        if (!siteId || !equipmentSelect) return;
-
-        try {
-            const equipment = await ApiService.get(`/equipment?site_id=${siteId}`);
-            equipmentSelect.innerHTML = '<option value="">Select Equipment</option>' +
-                equipment.map(eq => `<option value="${eq.equipment_id}">${eq.equipment_name}</option>`).join('');
-        } catch (error) {
-            console.error('Equipment load error:', error);
-        }
-    }
-
-    static async loadOperationalHours() {
-        try {
-            const hours = await ApiService.get('/operational-hours');
-            this.renderOperationalHoursTable(hours);
-        } catch (error) {
-            console.error('Operational hours load error:', error);
-        }
-    }
-
-    static renderOperationalHoursTable(hours) {
-        const tbody = document.querySelector('#operationalHoursTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = hours.map(item => `
-            <tr>
-                <td>${Utils.formatDate(item.log_date)}</td>
-                <td>${item.site_name}</td>
-                <td>${item.equipment_name}</td>
-                <td>${Utils.formatNumber(item.running_hours, 1)}</td>
-                <td>${item.fuel_consumed ? Utils.formatNumber(item.fuel_consumed, 1) + 'L' : 'N/A'}</td>
-                <td>${item.recorded_by || 'N/A'}</td>
-                <td>${item.notes || 'N/A'}</td>
-            </tr>
-        `).join('') || '<tr><td colspan="7" style="text-align: center;">No operational hours data available</td></tr>';
-    }
-
-    static setupForm() {
-        const form = document.getElementById('quickHoursForm');
-        if (!form) return;
-
-        form.addEventListener('submit', async (e) => {
-            e.preventDefault();
-            
-            const formData = {
-                site_id: parseInt(document.getElementById('hoursLogSite').value),
-                equipment_id: parseInt(document.getElementById('hoursLogEquipment').value),
-                log_date: document.getElementById('hoursLogDate').value,
-                running_hours: parseFloat(document.getElementById('hoursLogHours').value),
-                recorded_by: document.getElementById('hoursLogRecordedBy').value,
-                notes: document.getElementById('hoursLogNotes').value
-            };
-
-            try {
-                Utils.showLoading(true);
-                await ApiService.post('/operational-hours', formData);
-                Utils.showNotification('Operational hours logged successfully!', 'success');
-                form.reset();
-                document.getElementById('hoursLogDate').value = new Date().toISOString().split('T')[0];
-                await this.loadOperationalHours();
-            } catch (error) {
-                console.error('Hours logging error:', error);
-            } finally {
-                Utils.showLoading(false);
-            }
-        });
-    }
-}
-
-// Refills Module
-class Refills {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            const refills = await ApiService.get('/refills');
-            this.renderRefillsTable(refills);
-        } catch (error) {
-            console.error('Refills load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static renderRefillsTable(refills) {
-        const tbody = document.querySelector('#refillsTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = refills.map(refill => `
-            <tr>
-                <td>${refill.transaction_id}</td>
-                <td>${Utils.formatDate(refill.refill_date)}</td>
-                <td>${refill.site_name}</td>
-                <td>${refill.fuel_name}</td>
-                <td>${Utils.formatNumber(refill.quantity, 0)}L</td>
-                <td>${refill.supplier_name || 'N/A'}</td>
-                <td>${refill.unit_cost ? Utils.formatNumber(refill.unit_cost, 2) : 'N/A'}</td>
-                <td>${refill.total_cost ? Utils.formatNumber(refill.total_cost, 0) : 'N/A'}</td>
-                <td>${refill.created_by || 'System'}</td>
-            </tr>
-        `).join('') || '<tr><td colspan="9" style="text-align: center;">No refill transactions found</td></tr>';
-    }
-}
-
-// Usage Module
-class Usage {
-    static async load() {
-        Utils.showLoading(true);
-        
-        try {
-            const usage = await ApiService.get('/usage');
-            this.renderUsageTable(usage);
-        } catch (error) {
-            console.error('Usage load error:', error);
-        } finally {
-            Utils.showLoading(false);
-        }
-    }
-
-    static renderUsageTable(usage) {
-        const tbody = document.querySelector('#usageTable tbody');
-        if (!tbody) return;
-
-        tbody.innerHTML = usage.map(item => `
-            <tr>
-                <td>${item.transaction_id}</td>
-                <td>${Utils.formatDate(item.usage_date)}</td>
-                <td>${item.site_name}</td>
-                <td>${item.fuel_name}</td>
-                <td>${item.equipment_name || 'N/A'}</td>
-                <td>${Utils.formatNumber(item.quantity, 0)}L</td>
-                <td>${item.purpose || 'N/A'}</td>
-                <td>${item.operator_name || 'N/A'}</td>
-                <td>${item.created_by || 'System'}</td>
-            </tr>
-        `).join('') || '<tr><td colspan="9" style="text-align: center;">No usage transactions found</td></tr>';
-    }
-}
-
 // Global Functions (called from HTML)
-window.refreshDashboard = () => Dashboard.load();
-window.refreshStock = () => Stock.load();
+window.refreshDashboard = () => {
+    ApiService.invalidate(['/sites', '/equipment', '/stock', '/alerts', '/forecasts']);
+    return Dashboard.load();
+};
+window.refreshStock = () => {
+    ApiService.invalidate(['/stock']);
+    return window.refreshSection('stock');
+};
+window.refreshSection = async (name) => {
+    const section = await Sections.load(name);
+    return section?.load();
+};
 window.calculateAllForecasts = async () => {
     try {
         Utils.showLoading(true);
         await ApiService.post('/forecasts/calculate');
         Utils.showNotification('Forecasts calculated successfully!', 'success');
         if (currentSection === 'forecasting') {
-            await Forecasting.loadForecasts();
+            await (await Sections.load('forecasting')).loadForecasts();
         }
     } catch (error) {
         console.error('Calculate forecasts error:', error);
@@ -750,8 +1475,9 @@ window.calculateAllForecasts = async () => {
     }
 };
 
-window.loadForecasts = () => Forecasting.loadForecasts();
-window.loadSiteEquipment = () => OperationalHours.loadSiteEquipment();
+window.retrySync = () => SyncQueue.retry();
+window.loadForecasts = async () => (await Sections.load('forecasting')).loadForecasts();
+window.loadSiteEquipment = async () => (await Sections.load('operational-hours')).loadSiteEquipment();
 window.showForecastInput = () => Utils.showNotification('Forecast input feature coming soon!', 'info');
 window.showEquipmentForm = () => Utils.showNotification('Equipment form feature coming soon!', 'info');
 window.showHoursForm = () => Utils.showNotification('Hours form is already visible below!', 'info');
@@ -779,6 +1505,14 @@ document.addEventListener('DOMContentLoaded', () => {
         };
     }
     
+    // Offline support: cached app shell, saved API responses and queued writes
+    if ('serviceWorker' in navigator && CONFIG.SERVICE_WORKER) {
+        navigator.serviceWorker.register(CONFIG.SERVICE_WORKER)
+            .catch(error => console.warn('Service worker registration failed:', error));
+    }
+    OfflineStore.prune();
+    SyncQueue.init();
+    
     // Initialize navigation
     Navigation.init();
     
@@ -788,9 +1522,9 @@ document.addEventListener('DOMContentLoaded', () => {
         lastUpdatedElement.textContent = new Date().toLocaleString();
     }
     
-    // Setup auto-refresh for dashboard
+    // Setup auto-refresh for dashboard (skipped while the tab is hidden)
     setInterval(() => {
-        if (currentSection === 'dashboard') {
+        if (currentSection === 'dashboard' && !document.hidden) {
             Dashboard.loadKPIs();
         }
     }, CONFIG.REFRESH_INTERVAL);
@@ -803,11 +1537,10 @@ window.FuelControlApp = {
     CONFIG,
     Utils,
     ApiService,
+    OfflineStore,
+    SyncQueue,
     Navigation,
+    Sections,
     Dashboard,
-    Forecasting,
-    Stock,
-    Equipment,
-    OperationalHours,
     globalData
 };
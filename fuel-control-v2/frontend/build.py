@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Frontend build for Advanced Fuel Control & Forecasting System
+Bundles and minifies local JS/CSS, re-encodes the logos at display size, fingerprints every
+file with a content hash, writes .gz/.br siblings and rewrites index.html into dist/
+Section modules (sections/*.js) stay separate files for app.js to import() on demand
+The service worker (sw.js) keeps its name and is given the fingerprinted shell to precache
+
+Examples:
+    # Build frontend/dist (serve it with: python minimal_demo.py --dist)
+    python build.py
+
+    # Another output folder, no image re-encoding
+    python build.py --out /tmp/fuel-dist --skip-images
+
+Optional: Pillow (resize + WebP), brotli (.br files); without them images are copied as-is
+and only .gz siblings are written.
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+FRONTEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(FRONTEND_DIR, 'dist')
+HASH_LENGTH = 10
+COMPRESSIBLE = ('.html', '.js', '.css', '.svg', '.json')
+SECTIONS_DIR = 'sections'
+SERVICE_WORKER = 'sw.js'
+MIN_COMPRESS_BYTES = 512
+
+# Logos are rendered at a fixed CSS height (styles.css .logo / .footer-logo); encode at 2x for HiDPI
+IMAGE_HEIGHTS = {
+    'assets/logo.png.jpg': 80,
+    'assets/footer-logo.gif': 60,
+}
+
+# =============================================
+# MINIFIERS
+# =============================================
+
+JS_REGEX_PREFIX_KEYWORDS = {'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of', 'new',
+                            'delete', 'void', 'throw', 'yield', 'await'}
+JS_REGEX_PREFIX_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+# A newline after these can never end a statement, so it is dropped instead of kept for ASI
+JS_NEWLINE_DROP_AFTER = set('{;,([')
+JS_NEWLINE_DROP_BEFORE = set('}),]')
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch in '_$' or ord(ch) > 127
+
+
+def minify_js(source: str) -> str:
+    """
+    Conservative JS minifier: strips comments and indentation, keeps strings, template literals
+    and regex literals byte-for-byte, and keeps a newline wherever ASI could depend on it
+    """
+    out: List[str] = []
+    i, n = 0, len(source)
+    pending_space = pending_newline = False
+    last_word = ''
+    # Each open template literal pushes the brace depth its ${...} expression started at
+    template_stack: List[int] = []
+    depth = 0
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ''
+
+    def emit(token: str):
+        nonlocal pending_space, pending_newline
+        prev = last_char()
+        first = token[0]
+        if pending_newline and prev and prev not in JS_NEWLINE_DROP_AFTER and first not in JS_NEWLINE_DROP_BEFORE:
+            out.append('\n')
+        elif (pending_space or pending_newline) and prev and (
+                (_is_word(prev) and _is_word(first)) or (prev in '+-' and first == prev) or
+                (prev == '/' and first == '/')):
+            out.append(' ')
+        pending_space = pending_newline = False
+        out.append(token)
+
+    def read_template_chunk(start: int) -> int:
+        """From just after ` or }, copy template text up to the closing ` or the next ${"""
+        j = start
+        while j < n:
+            ch = source[j]
+            if ch == '\\':
+                j += 2
+                continue
+            if ch == '`':
+                return j + 1
+            if ch == '$' and j + 1 < n and source[j + 1] == '{':
+                return j + 2
+            j += 1
+        raise ValueError('Unterminated template literal')
+
+    while i < n:
+        ch = source[i]
+        if ch in ' \t\r\f\v':
+            pending_space = True
+            i += 1
+        elif ch == '\n':
+            pending_newline = True
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end < 0:
+                raise ValueError('Unterminated block comment')
+            if source.startswith('/*!', i):
+                emit(source[i:end + 2])
+            elif '\n' in source[i:end]:
+                pending_newline = True  # A multi-line comment counts as a line break for ASI
+            else:
+                pending_space = True
+            i = end + 2
+        elif ch in '"\'':
+            j = i + 1
+            while j < n and source[j] != ch:
+                if source[j] == '\n':
+                    raise ValueError(f"Unterminated string at offset {i}")
+                j += 2 if source[j] == '\\' else 1
+            emit(source[i:j + 1])
+            last_word = ''
+            i = j + 1
+        elif ch == '`':
+            j = read_template_chunk(i + 1)
+            emit(source[i:j])
+            if source[j - 1] == '{':
+                template_stack.append(depth)
+                depth += 1
+            last_word = ''
+            i = j
+        elif ch == '}' and template_stack and depth - 1 == template_stack[-1]:
+            # End of a ${...} expression: resume the template text
+            template_stack.pop()
+            depth -= 1
+            j = read_template_chunk(i + 1)
+            emit(source[i:j])
+            if source[j - 1] == '{':
+                template_stack.append(depth)
+                depth += 1
+            i = j
+        elif ch == '/':
+            prev = last_char()
+            if not prev or prev in JS_REGEX_PREFIX_CHARS or last_word in JS_REGEX_PREFIX_KEYWORDS:
+                j, in_class = i + 1, False
+                while j < n:
+                    c = source[j]
+                    if c == '\\':
+                        j += 2
+                        continue
+                    if c == '\n':
+                        raise ValueError(f"Unterminated regex at offset {i}")
+                    if c == '[':
+                        in_class = True
+                    elif c == ']':
+                        in_class = False
+                    elif c == '/' and not in_class:
+                        break
+                    j += 1
+                j += 1
+                while j < n and _is_word(source[j]):
+                    j += 1
+                emit(source[i:j])
+                i = j
+            else:
+                emit(ch)
+                i += 1
+            last_word = ''
+        elif _is_word(ch):
+            j = i
+            while j < n and (_is_word(source[j]) or (source[j] == '.' and source[i].isdigit())):
+                j += 1
+            last_word = source[i:j]
+            emit(last_word)
+            i = j
+        else:
+            if ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+            emit(ch)
+            last_word = ''
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+CSS_TIGHT = set('{};,>')
+
+
+def minify_css(source: str) -> str:
+    """Strip comments and whitespace around punctuation; strings and calc() operators are left alone"""
+    out: List[str] = []
+    i, n = 0, len(source)
+    pending_space = False
+    while i < n:
+        ch = source[i]
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            pending_space = True
+        elif ch.isspace():
+            pending_space = True
+            i += 1
+        elif ch in '"\'':
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == '\\' else 1
+            if pending_space and out and out[-1][-1] not in CSS_TIGHT and out[-1][-1] != ':':
+                out.append(' ')
+            pending_space = False
+            out.append(source[i:j + 1])
+            i = j + 1
+        else:
+            if pending_space and out and out[-1][-1] not in CSS_TIGHT and out[-1][-1] != ':' \
+                    and ch not in CSS_TIGHT:
+                out.append(' ')
+            pending_space = False
+            if ch == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(ch)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+# =============================================
+# BUILD STEPS
+# =============================================
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted(name: str, data: bytes, extension: Optional[str] = None) -> str:
+    """assets/logo.png.jpg -> assets/logo.<hash>.jpg"""
+    directory, base = os.path.split(name)
+    stem = base.split('.')[0]
+    extension = extension or os.path.splitext(base)[1]
+    return os.path.join(directory, f"{stem}.{content_hash(data)}{extension}").replace(os.sep, '/')
+
+
+class Build:
+    """Collects output files, then writes them with their compressed siblings"""
+
+    def __init__(self, out_dir: str, brotli_module=None):
+        self.out_dir = out_dir
+        self.brotli = brotli_module
+        self.outputs: Dict[str, bytes] = {}
+        self.manifest: Dict[str, object] = {}
+
+    def add(self, name: str, data: bytes):
+        self.outputs[name] = data
+
+    def write(self):
+        if os.path.isdir(self.out_dir):
+            shutil.rmtree(self.out_dir)
+        for name, data in sorted(self.outputs.items()):
+            path = os.path.join(self.out_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            if not name.endswith(COMPRESSIBLE) or len(data) < MIN_COMPRESS_BYTES:
+                continue
+            # mtime=0 keeps .gz output byte-identical between builds
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                with open(path + '.gz', 'wb') as f:
+                    f.write(gz)
+            if self.brotli is not None:
+                br = self.brotli.compress(data, quality=11)
+                if len(br) < len(data):
+                    with open(path + '.br', 'wb') as f:
+                        f.write(br)
+        with open(os.path.join(self.out_dir, 'asset-manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+
+def local_refs(html: str, pattern: str) -> List[Tuple[str, str]]:
+    """(full tag, local path) for tags matching pattern, skipping absolute/CDN URLs"""
+    refs = []
+    for match in re.finditer(pattern, html):
+        path = match.group('path')
+        if not re.match(r'^([a-z]+:)?//', path) and not path.startswith('data:'):
+            refs.append((match.group(0), path))
+    return refs
+
+
+def bundle(build: Build, html: str, refs: List[Tuple[str, str]], joiner: str, minify, extension: str,
+           tag_template: str, transform=None) -> str:
+    """Concatenate local files in document order into one fingerprinted bundle at the first tag"""
+    if not refs:
+        return html
+    sources = []
+    for _, path in refs:
+        with open(os.path.join(FRONTEND_DIR, path), encoding='utf-8') as f:
+            sources.append(f.read())
+    original_size = sum(len(source.encode('utf-8')) for source in sources)
+    source = joiner.join(sources)
+    if transform is not None:
+        source = transform(source)
+    data = minify(source).encode('utf-8')
+    stem = os.path.splitext(os.path.basename(refs[0][1]))[0]
+    name = fingerprinted(f"{stem}{extension}", data)
+    build.add(name, data)
+    build.manifest[name] = {'sources': [path for _, path in refs], 'bytes': len(data), 'source_bytes': original_size}
+    html = html.replace(refs[0][0], tag_template.format(path=name), 1)
+    for tag, _ in refs[1:]:
+        html = html.replace(tag, '', 1)
+    return html
+
+
+def split_modules(build: Build) -> Dict[str, str]:
+    """Minify and fingerprint each section module on its own; returns {source path: built path}"""
+    built = {}
+    directory = os.path.join(FRONTEND_DIR, SECTIONS_DIR)
+    if not os.path.isdir(directory):
+        return built
+    for base in sorted(os.listdir(directory)):
+        if not base.endswith('.js'):
+            continue
+        path = f"{SECTIONS_DIR}/{base}"
+        with open(os.path.join(directory, base), encoding='utf-8') as f:
+            source = f.read()
+        data = minify_js(source).encode('utf-8')
+        name = fingerprinted(path, data)
+        build.add(name, data)
+        build.manifest[name] = {'sources': [path], 'bytes': len(data), 'source_bytes': len(source.encode('utf-8'))}
+        built[path] = name
+    return built
+
+
+def link_modules(source: str, modules: Dict[str, str]) -> str:
+    """Point the import() specifiers in CONFIG.SECTIONS at the fingerprinted modules"""
+    for path, name in modules.items():
+        source = source.replace(f"'./{path}'", f"'./{name}'")
+    return source
+
+
+def build_service_worker(build: Build):
+    """Write sw.js with the built shell files and a version that changes whenever any of them does"""
+    with open(os.path.join(FRONTEND_DIR, SERVICE_WORKER), encoding='utf-8') as f:
+        source = f.read()
+    shell = ['./', './index.html'] + [f"./{name}" for name in sorted(build.outputs) if name != 'index.html']
+    version = content_hash(b''.join(build.outputs[name] for name in sorted(build.outputs)))
+    source = re.sub(r"const VERSION = '[^']*';", f"const VERSION = '{version}';", source, count=1)
+    source, replaced = re.subn(r"const SHELL = \[[^\]]*\];", f"const SHELL = {json.dumps(shell)};", source, count=1)
+    if not replaced:
+        raise ValueError(f"{SERVICE_WORKER} has no SHELL list to rewrite")
+    data = minify_js(source).encode('utf-8')
+    build.add(SERVICE_WORKER, data)
+    build.manifest[SERVICE_WORKER] = {'sources': [SERVICE_WORKER], 'bytes': len(data),
+                                      'source_bytes': len(source.encode('utf-8')), 'precache': len(shell)}
+
+
+def encode_image(path: str, height: int, image_module) -> List[Tuple[str, bytes, Tuple[int, int]]]:
+    """Resized WebP plus a fallback in the original format: [(extension, bytes, (w, h)), ...]"""
+    with image_module.open(path) as image:
+        width = max(1, round(image.width * height / image.height))
+        animated = getattr(image, 'is_animated', False)
+        frames, durations = [], []
+        for index in range(getattr(image, 'n_frames', 1)):
+            image.seek(index)
+            frames.append(image.convert('RGBA').resize((width, height), image_module.LANCZOS))
+            durations.append(image.info.get('duration', 100))
+        loop = image.info.get('loop', 0)
+        fallback_format = image.format
+
+    outputs = []
+    buffer = io.BytesIO()
+    frames[0].save(buffer, 'WEBP', quality=82, method=6, save_all=animated, append_images=frames[1:],
+                   duration=durations, loop=loop)
+    outputs.append(('.webp', buffer.getvalue(), (width, height)))
+
+    buffer = io.BytesIO()
+    if fallback_format == 'GIF':
+        frames[0].save(buffer, 'GIF', save_all=animated, append_images=frames[1:], duration=durations,
+                       loop=loop, optimize=True, disposal=2)
+        outputs.append(('.gif', buffer.getvalue(), (width, height)))
+    else:
+        frames[0].convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        outputs.append(('.jpg', buffer.getvalue(), (width, height)))
+    return outputs
+
+
+def process_images(build: Build, html: str, image_module) -> str:
+    """Re-encode logos at display size and wrap them in <picture> with a WebP source"""
+    for tag, path in local_refs(html, r'<img\b[^>]*\bsrc="(?P<path>[^"]+)"[^>]*>'):
+        source_path = os.path.join(FRONTEND_DIR, path)
+        if not os.path.exists(source_path):
+            print(f"⚠️  {path} referenced by index.html does not exist; left unchanged")
+            continue
+        height = IMAGE_HEIGHTS.get(path)
+        if image_module is None or height is None:
+            with open(source_path, 'rb') as f:
+                data = f.read()
+            name = fingerprinted(path, data)
+            build.add(name, data)
+            build.manifest[name] = {'sources': [path], 'bytes': len(data), 'source_bytes': len(data)}
+            html = html.replace(tag, tag.replace(f'src="{path}"', f'src="{name}"'), 1)
+            continue
+
+        encoded = encode_image(source_path, height, image_module)
+        names = []
+        for extension, data, _ in encoded:
+            name = fingerprinted(path, data, extension)
+            build.add(name, data)
+            build.manifest[name] = {'sources': [path], 'bytes': len(data),
+                                    'source_bytes': os.path.getsize(source_path)}
+            names.append(name)
+        width, image_height = encoded[-1][2]
+        img = tag.replace(f'src="{path}"', f'src="{names[-1]}" width="{width}" height="{image_height}" '
+                                           f'decoding="async"')
+        html = html.replace(tag, f'<picture><source srcset="{names[0]}" type="image/webp">{img}</picture>', 1)
+    return html
+
+
+def run_build(out_dir: str, skip_images: bool = False) -> Build:
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("⚠️  brotli not installed: writing .gz siblings only (pip install brotli)")
+    image_module = None
+    if not skip_images:
+        try:
+            from PIL import Image as image_module
+        except ImportError:
+            print("⚠️  Pillow not installed: images are fingerprinted but not resized (pip install Pillow)")
+
+    with open(os.path.join(FRONTEND_DIR, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    build = Build(out_dir, brotli)
+    modules = split_modules(build)
+    html = bundle(build, html, local_refs(html, r'<script\b[^>]*\bsrc="(?P<path>[^"]+)"[^>]*>\s*</script>'),
+                  ';\n', minify_js, '.js', '<script src="{path}" defer></script>',
+                  transform=lambda source: link_modules(source, modules))
+    html = bundle(build, html, local_refs(html, r'<link\b[^>]*\brel="stylesheet"[^>]*\bhref="(?P<path>[^"]+)"[^>]*>'),
+                  '\n', minify_css, '.css', '<link rel="stylesheet" href="{path}">')
+    html = process_images(build, html, image_module)
+    build.add('index.html', html.encode('utf-8'))
+    build_service_worker(build)
+    build.write()
+    return build
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Build the frontend into fingerprinted, precompressed files')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='output directory (replaced on every build)')
+    parser.add_argument('--skip-images', action='store_true', help='copy images without re-encoding')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        build = run_build(os.path.abspath(args.out), args.skip_images)
+    except (OSError, ValueError) as e:
+        print(f"❌ Build failed: {e}")
+        return 1
+
+    print(f"{'File':<44} {'source':>10} {'built':>10} {'gzip':>9} {'brotli':>9}")
+    print('-' * 86)
+    for name, info in sorted(build.manifest.items()):
+        path = os.path.join(build.out_dir, name)
+        sizes = [os.path.getsize(path + suffix) if os.path.exists(path + suffix) else None
+                 for suffix in ('.gz', '.br')]
+        cells = [f"{size / 1024:>8.1f}K" if size else f"{'-':>9}" for size in sizes]
+        print(f"{name:<44} {info['source_bytes'] / 1024:>9.1f}K {info['bytes'] / 1024:>9.1f}K {cells[0]} {cells[1]}")
+    print(f"\n✅ Built {build.out_dir} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
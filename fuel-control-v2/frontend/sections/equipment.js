@@ -0,0 +1,60 @@
+/**
+ * Equipment section - equipment register
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class Equipment {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            const equipment = await ApiService.get('/equipment', { onUpdate: data => this.renderEquipmentTable(data) });
+            this.renderEquipmentTable(equipment);
+        } catch (error) {
+            console.error('Equipment load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return ApiService.get('/equipment', { quiet: true });
+    }
+
+    static table() {
+        return VirtualTable.get('equipmentTable', {
+            columns: ['equipment_name', 'site_name', 'equipment_type', 'fuel_name', 'consumption_rate', 'manufacturer', 'model', 'is_active', null],
+            renderRow: item => this.renderRow(item),
+            emptyMessage: 'No equipment data available'
+        });
+    }
+
+    static renderRow(item) {
+        return `
+            <tr>
+                <td>${item.equipment_name}</td>
+                <td>${item.site_name}</td>
+                <td>${item.equipment_type || 'N/A'}</td>
+                <td>${item.fuel_name}</td>
+                <td>${Utils.formatNumber(item.consumption_rate, 1)}</td>
+                <td>${item.manufacturer || 'N/A'}</td>
+                <td>${item.model || 'N/A'}</td>
+                <td><span class="status-badge ${item.is_active ? 'status-normal' : 'status-critical'}">${item.is_active ? 'Active' : 'Inactive'}</span></td>
+                <td>
+                    <button class="btn btn-ghost" onclick="Equipment.edit(${item.equipment_id})">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                </td>
+            </tr>
+        `;
+    }
+
+    static renderEquipmentTable(equipment) {
+        this.table()?.setRows(equipment);
+    }
+
+    static edit(equipmentId) {
+        Utils.showNotification('Equipment editing feature coming soon!', 'info');
+    }
+}
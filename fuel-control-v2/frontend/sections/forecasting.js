@@ -0,0 +1,492 @@
+/**
+ * Forecasting section - consumption forecasts with site/date filters
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class Forecasting {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            await Promise.all([
+                this.loadSiteFilter(),
+                this.loadForecasts()
+            ]);
+            
+            // Set default date to today
+            document.getElementById('forecastDateFilter').value = new Date().toISOString().split('T')[0];
+        } catch (error) {
+            console.error('Forecasting load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return Promise.all([
+            ApiService.get('/sites', { quiet: true }),
+            ApiService.get(this.forecastsUrl(), { quiet: true })
+        ]);
+    }
+
+    static async loadSiteFilter() {
+        try {
+            const sites = await ApiService.get('/sites', { onUpdate: () => this.loadSiteFilter() });
+            Render.list('forecastSiteFilter', ['<option value="">All Sites</option>',
+                ...sites.map(site => `<option value="${site.site_id}">${site.site_name}</option>`)]);
+        } catch (error) {
+            console.error('Site filter load error:', error);
+        }
+    }
+
+    static forecastsUrl() {
+        const siteId = document.getElementById('forecastSiteFilter')?.value;
+        const forecastDate = document.getElementById('forecastDateFilter')?.value;
+        
+        let url = '/forecasts';
+        const params = new URLSearchParams();
+        
+        if (siteId) params.append('site_id', siteId);
+        if (forecastDate) params.append('forecast_date', forecastDate);
+        
+        if (params.toString()) {
+            url += '?' + params.toString();
+        }
+        return url;
+    }
+
+    static async loadForecasts() {
+        try {
+            const url = this.forecastsUrl();
+
+            // Re-run rather than render the refreshed data: the filters may have changed since
+            const forecasts = await ApiService.get(url, { onUpdate: () => this.loadForecasts() });
+            this.renderForecastsTable(forecasts);
+        } catch (error) {
+            console.error('Forecasts load error:', error);
+        }
+    }
+
+    static table() {
+        return VirtualTable.get('forecastsTable', {
+            columns: ['site_name', 'fuel_name', 'current_balance', 'daily_consumption_rate', 'forecast_days_remaining', 'next_refill_date_estimate', 'confidence_level', null],
+            renderRow: forecast => this.renderRow(forecast),
+            emptyMessage: 'No forecasts available'
+        });
+    }
+
+    static renderRow(forecast) {
+        const daysClass = forecast.forecast_days_remaining <= 3 ? 'status-critical' : 
+                         forecast.forecast_days_remaining <= 7 ? 'status-low' : 'status-normal';
+        
+        return `
+            <tr>
+                <td>${forecast.site_name}</td>
+                <td>${forecast.fuel_name}</td>
+                <td>${Utils.formatNumber(forecast.current_balance, 0)}L</td>
+                <td>${Utils.formatNumber(forecast.daily_consumption_rate, 1)}L/day</td>
+                <td><span class="status-badge ${daysClass}">${forecast.forecast_days_remaining} days</span></td>
+                <td>${Utils.formatDate(forecast.next_refill_date_estimate)}</td>
+                <td>${Utils.formatNumber(forecast.confidence_level, 0)}%</td>
+                <td>
+                    <button class="btn btn-ghost" onclick="Forecasting.showScenarios(${forecast.forecast_id})">
+                        <i class="fas fa-chart-line"></i> Scenarios
+                    </button>
+                </td>
+            </tr>
+        `;
+        
+    }
+
+    static renderForecastsTable(forecasts) {
+        this.table()?.setRows(forecasts);
+    }
+
+    // Monte Carlo stockout probabilities for every site and fuel (or the filtered site)
+    static async loadStockoutRisk() {
+        const days = parseInt(document.getElementById('riskDaysInput')?.value) || 14;
+        const siteId = document.getElementById('forecastSiteFilter')?.value;
+        const params = new URLSearchParams({ days });
+        if (siteId) params.append('site_id', siteId);
+
+        try {
+            Utils.showLoading(true);
+            const risk = await ApiService.get(`/forecasts/stockout-risk?${params}`);
+            Render.list(document.querySelector('#stockoutRiskTable tbody'), risk.results.map(item => this.renderRiskRow(item)),
+                '<tr><td colspan="6" style="text-align: center;">No stock to simulate</td></tr>');
+        } catch (error) {
+            console.error('Stockout risk error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    static renderRiskRow(item) {
+        const probability = item.stockout_probability[item.stockout_probability.length - 1].probability;
+        const riskClass = probability >= 0.5 ? 'status-critical' : probability >= 0.1 ? 'status-low' : 'status-normal';
+        const days = value => value === null ? '-' : value;
+        const { p5, p50, p95 } = item.days_remaining;
+
+        return `
+            <tr>
+                <td>${item.site_name}</td>
+                <td>${item.fuel_name}</td>
+                <td>${Utils.formatNumber(item.current_quantity, 0)}L</td>
+                <td>${Utils.formatNumber(item.expected_daily_consumption, 1)}L/day</td>
+                <td><span class="status-badge ${riskClass}">${Utils.formatNumber(probability * 100, 1)}%</span></td>
+                <td>${days(p5)} / ${days(p50)} / ${days(p95)}</td>
+            </tr>
+        `;
+    }
+
+    // Projected stock with reorders and lead times; the server downsamples each curve to a fixed point count
+    static async loadTrajectories() {
+        const days = parseInt(document.getElementById('trajectoryDaysInput')?.value) || 60;
+        const history = parseInt(document.getElementById('trajectoryHistoryInput')?.value) || 0;
+        const siteId = document.getElementById('forecastSiteFilter')?.value;
+        const params = new URLSearchParams({ days, history, points: 120 });
+        if (siteId) params.append('site_id', siteId);
+
+        try {
+            Utils.showLoading(true);
+            const trajectory = await ApiService.get(`/forecasts/trajectory?${params}`);
+            this.renderTrajectories(trajectory);
+        } catch (error) {
+            console.error('Stock trajectory error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    static renderTrajectories(trajectory) {
+        const ctx = document.getElementById('trajectoryChart');
+        if (!ctx) return;
+
+        // Lowest projected fill first
+        const fill = pair => pair.capacity ? pair.min_stock / pair.capacity : pair.min_stock;
+        const pairs = [...trajectory.pairs].sort((a, b) => fill(a) - fill(b)).slice(0, 5);
+        const colors = Object.values(CONFIG.CHART_COLORS);
+        const stockouts = trajectory.pairs.filter(pair => pair.first_stockout_day !== null).length;
+        const orders = trajectory.pairs.reduce((total, pair) => total + pair.orders.length, 0);
+        Render.text('trajectorySummary', `${trajectory.pairs.length} site/fuel pairs: ${stockouts} run dry and ` +
+            `${orders} orders are placed within ${trajectory.days} days`);
+
+        if (this.trajectoryChart) {
+            this.trajectoryChart.destroy();
+        }
+        this.trajectoryChart = new Chart(ctx, {
+            type: 'line',
+            data: {
+                datasets: pairs.map((pair, i) => ({
+                    label: `${pair.site_name} - ${pair.fuel_name}`,
+                    data: pair.x.map((x, j) => ({ x, y: pair.y[j] })),
+                    borderColor: colors[i % colors.length],
+                    backgroundColor: colors[i % colors.length],
+                    pointRadius: 0,
+                    borderWidth: 2
+                }))
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                parsing: false,
+                interaction: { mode: 'nearest', intersect: false },
+                scales: {
+                    x: {
+                        type: 'linear',
+                        title: { display: true, text: 'Days from today' }
+                    },
+                    y: {
+                        beginAtZero: true,
+                        ticks: {
+                            callback: value => Utils.formatNumber(value, 0) + 'L'
+                        }
+                    }
+                }
+            }
+        });
+    }
+
+    // Re-optimizes the stock rows whose demand or supplier offers changed, then lists every stored recommendation
+    static async optimizeReorders() {
+        const siteId = document.getElementById('forecastSiteFilter')?.value;
+        const params = siteId ? `?${new URLSearchParams({ site_id: siteId })}` : '';
+
+        try {
+            Utils.showLoading(true);
+            const result = await ApiService.post('/reorder/optimize', siteId ? { site_id: parseInt(siteId) } : {});
+            const recommendations = await ApiService.get(`/reorder/recommendations${params}`);
+            Render.list(document.querySelector('#reorderTable tbody'), recommendations.map(item => this.renderReorderRow(item)),
+                '<tr><td colspan="8" style="text-align: center;">No stock to optimize</td></tr>');
+            Utils.showNotification(`${result.recalculated} of ${result.pairs} reorder plans updated`, 'success');
+        } catch (error) {
+            console.error('Reorder optimization error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    static renderReorderRow(item) {
+        if (item.supplier_id === null) {
+            return `
+                <tr>
+                    <td>${item.site_name}</td>
+                    <td>${item.fuel_name}</td>
+                    <td colspan="6"><span class="status-badge status-low">No supplier can deliver this fuel to the tank</span></td>
+                </tr>
+            `;
+        }
+        const saving = item.current_annual_cost === null ? '-' :
+            Utils.formatNumber(item.current_annual_cost - item.annual_cost, 0);
+
+        return `
+            <tr>
+                <td>${item.site_name}</td>
+                <td>${item.fuel_name}</td>
+                <td>${item.supplier_name}</td>
+                <td>${Utils.formatNumber(item.order_quantity, 0)}L</td>
+                <td>${Utils.formatNumber(item.reorder_point, 0)}L</td>
+                <td>${item.lead_time_days} days</td>
+                <td>${Utils.formatNumber(item.unit_price, 2)}</td>
+                <td>${saving}</td>
+            </tr>
+        `;
+    }
+
+    // Network-wide transfer proposals; litres still needed from suppliers are summarized
+    static async planTransfers() {
+        try {
+            Utils.showLoading(true);
+            const plan = await ApiService.get('/transfers/plan');
+            Render.list(document.querySelector('#transferTable tbody'), plan.transfers.map(item => this.renderTransferRow(item)),
+                '<tr><td colspan="7" style="text-align: center;">No transfer beats a supplier delivery</td></tr>');
+            Render.text(document.getElementById('transferSummary'),
+                `${Utils.formatNumber(plan.transfer_litres, 0)}L by transfer, ${Utils.formatNumber(plan.supplier_litres, 0)}L ` +
+                `from suppliers over ${plan.horizon_days} days; saving ${Utils.formatNumber(plan.savings, 0)}` +
+                (plan.complete ? '' : ' (time budget reached)'));
+        } catch (error) {
+            console.error('Transfer planning error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    static renderTransferRow(item) {
+        const urgent = item.urgent_litres ? ' <span class="status-badge status-low">urgent</span>' : '';
+
+        return `
+            <tr>
+                <td>${item.source_site_name}</td>
+                <td>${item.target_site_name}${urgent}</td>
+                <td>${item.fuel_name}</td>
+                <td>${Utils.formatNumber(item.litres, 0)}L</td>
+                <td>${Utils.formatNumber(item.distance_km, 1)} km</td>
+                <td>${Utils.formatNumber(item.cost, 0)}</td>
+                <td>${Utils.formatNumber(item.saving, 0)}</td>
+            </tr>
+        `;
+    }
+
+    // Fleet delivery calendar; re-planned on the server and stored as the planned deliveries
+    static async planDeliveries() {
+        try {
+            Utils.showLoading(true);
+            const plan = await ApiService.post('/deliveries/schedule', {});
+            Render.list(document.querySelector('#deliveryTable tbody'), plan.schedule.map(item => this.renderDeliveryRow(item)),
+                '<tr><td colspan="7" style="text-align: center;">No deliveries needed over the horizon</td></tr>');
+            Render.text(document.getElementById('deliverySummary'),
+                `${plan.deliveries} deliveries (${plan.trucks} trucks, ${Utils.formatNumber(plan.litres, 0)}L) over ` +
+                `${plan.horizon_days} days; ${plan.at_risk} site/fuel pairs at risk`);
+        } catch (error) {
+            console.error('Delivery scheduling error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    static renderDeliveryRow(item) {
+        const risk = item.at_risk ? ' <span class="status-badge status-low">late</span>' : '';
+
+        return `
+            <tr>
+                <td>${Utils.formatDate(item.delivery_date)}${risk}</td>
+                <td>${Utils.formatDate(item.order_date)}</td>
+                <td>${item.site_name}</td>
+                <td>${item.fuel_name}</td>
+                <td>${Utils.formatNumber(item.quantity, 0)}L</td>
+                <td>${item.trucks}</td>
+                <td>${Utils.formatNumber(item.stock_before, 0)}L</td>
+            </tr>
+        `;
+    }
+
+    // What-if grid for one forecast: evaluated on the server in one pass, saved only on request
+    static async showScenarios(forecastId) {
+        this.scenarioForecastId = forecastId;
+        this.scenarioGrid = null;
+        const card = document.getElementById('scenarioCard');
+        const content = document.getElementById('scenarioContent');
+        if (!card || !content) return;
+
+        const safetyFactor = parseFloat(document.getElementById('safetyFactorInput')?.value) || 1.2;
+        const safetyFactors = [...new Set([1, safetyFactor, 1.5])].sort((a, b) => a - b);
+        content.innerHTML = `
+            <form class="scenario-form" onsubmit="Forecasting.evaluateScenarios(event)">
+                <div class="filter-group">
+                    <label>Consumption ×:</label>
+                    <input type="text" id="scenarioMultipliers" value="0.8, 0.9, 1, 1.1, 1.2" title="Comma-separated values, or start:stop:step">
+                </div>
+                <div class="filter-group">
+                    <label>Safety factors:</label>
+                    <input type="text" id="scenarioSafetyFactors" value="${safetyFactors.join(', ')}" title="Comma-separated values, or start:stop:step">
+                </div>
+                <div class="filter-group">
+                    <label>Lead times (days):</label>
+                    <input type="text" id="scenarioLeadTimes" value="0, 3, 7" title="Comma-separated values, or start:stop:step">
+                </div>
+                <button type="submit" class="btn btn-primary"><i class="fas fa-table-cells"></i> Evaluate</button>
+            </form>
+            <div id="scenarioGrid" class="table-container"></div>
+            <div id="scenarioDetail" class="scenario-detail"></div>
+            <div id="scenarioSaved" class="scenario-saved"></div>
+        `;
+        card.style.display = '';
+        card.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+
+        await Promise.all([this.evaluateScenarios(), this.loadSavedScenarios()]);
+    }
+
+    // "0.8, 1, 1.2" -> [0.8, 1, 1.2]; "0.5:1.5:0.1" -> { start, stop, step } (evaluated server-side)
+    static parseAxis(inputId) {
+        const text = document.getElementById(inputId)?.value.trim() || '';
+        if (text.includes(':')) {
+            const [start, stop, step = 1] = text.split(':').map(Number);
+            return { start, stop, step };
+        }
+        return text.split(',').map(value => value.trim()).filter(Boolean).map(Number);
+    }
+
+    static async evaluateScenarios(event) {
+        event?.preventDefault();
+        try {
+            this.scenarioGrid = await ApiService.post('/forecasts/scenarios/grid', {
+                forecast_ids: [this.scenarioForecastId],
+                consumption_multipliers: this.parseAxis('scenarioMultipliers'),
+                safety_factors: this.parseAxis('scenarioSafetyFactors'),
+                lead_times: this.parseAxis('scenarioLeadTimes')
+            });
+            this.renderScenarioGrid();
+        } catch (error) {
+            console.error('Scenario grid error:', error);
+        }
+    }
+
+    static renderScenarioGrid() {
+        const grid = this.scenarioGrid;
+        const forecast = grid?.forecasts[0];
+        if (!forecast) return;
+
+        const { consumption_multipliers: multipliers, safety_factors: safetyFactors } = grid.axes;
+        const columns = safetyFactors || [forecast.safety_factor];
+        const daysClass = days => days <= 3 ? 'status-critical' : days <= 7 ? 'status-low' : 'status-normal';
+
+        Render.html('scenarioGrid', `
+            <table class="data-table scenario-grid">
+                <thead>
+                    <tr>
+                        <th>Consumption × / Safety factor</th>
+                        ${columns.map(value => `<th>${Utils.formatNumber(value, 2)}</th>`).join('')}
+                    </tr>
+                </thead>
+                <tbody>
+                    ${multipliers.map((multiplier, i) => `
+                        <tr>
+                            <th>×${Utils.formatNumber(multiplier, 2)}</th>
+                            ${forecast.days_remaining[i].map((days, j) => `
+                                <td>
+                                    <button type="button" class="status-badge ${daysClass(days)}" onclick="Forecasting.selectScenario(${i}, ${j})">
+                                        ${days} days
+                                    </button>
+                                </td>
+                            `).join('')}
+                        </tr>
+                    `).join('')}
+                </tbody>
+            </table>
+        `);
+        Render.html('scenarioDetail', `
+            <p>${forecast.site_name} - ${forecast.fuel_name}: ${Utils.formatNumber(forecast.current_balance, 0)}L at
+            ${Utils.formatNumber(forecast.daily_consumption_rate, 1)}L/day. Pick a cell to see order dates and save it.</p>
+        `);
+    }
+
+    static selectScenario(i, j) {
+        const grid = this.scenarioGrid;
+        const forecast = grid?.forecasts[0];
+        if (!forecast) return;
+
+        const multiplier = grid.axes.consumption_multipliers[i];
+        const safetyFactor = grid.axes.safety_factors ? grid.axes.safety_factors[j] : forecast.safety_factor;
+        const days = forecast.days_remaining[i][j];
+        this.selectedScenario = { multiplier, safetyFactor, days };
+
+        Render.html('scenarioDetail', `
+            <p><strong>Consumption ×${Utils.formatNumber(multiplier, 2)}, safety factor ${Utils.formatNumber(safetyFactor, 2)}:</strong>
+            stock lasts ${days} days.</p>
+            <ul class="scenario-orders">
+                ${grid.axes.lead_times.map((leadTime, k) => {
+                    const orderBy = forecast.refill_dates[i][j][k];
+                    const late = days - leadTime < 0;
+                    return `<li>${leadTime}-day lead time: order by ${Utils.formatDate(orderBy)}${late ? ' <span class="status-badge status-critical">too late</span>' : ''}</li>`;
+                }).join('')}
+            </ul>
+            <form class="scenario-form" onsubmit="Forecasting.saveScenario(event)">
+                <div class="filter-group">
+                    <label>Scenario name:</label>
+                    <input type="text" id="scenarioName" required
+                           value="Consumption ×${Utils.formatNumber(multiplier, 2)}, SF ${Utils.formatNumber(safetyFactor, 2)}">
+                </div>
+                <button type="submit" class="btn btn-secondary"><i class="fas fa-save"></i> Save Scenario</button>
+            </form>
+        `);
+    }
+
+    static async saveScenario(event) {
+        event?.preventDefault();
+        const forecast = this.scenarioGrid?.forecasts[0];
+        const selected = this.selectedScenario;
+        if (!forecast || !selected) return;
+
+        try {
+            await ApiService.post('/forecasts/scenarios', {
+                forecast_id: this.scenarioForecastId,
+                scenario_name: document.getElementById('scenarioName')?.value || 'Scenario',
+                adjusted_consumption_rate: Math.round(forecast.daily_consumption_rate * selected.multiplier * 1000) / 1000,
+                adjusted_safety_factor: selected.safetyFactor
+            });
+            Utils.showNotification('Scenario saved', 'success');
+            await this.loadSavedScenarios();
+        } catch (error) {
+            console.error('Scenario save error:', error);
+        }
+    }
+
+    static async loadSavedScenarios() {
+        const forecastId = this.scenarioForecastId;
+        try {
+            const scenarios = await ApiService.get(`/forecasts/${forecastId}/scenarios`);
+            if (forecastId !== this.scenarioForecastId) return;
+            Render.html('scenarioSaved', scenarios.length ? `
+                <h4>Saved Scenarios</h4>
+                <ul>
+                    ${scenarios.map(scenario => `
+                        <li>${scenario.scenario_name}: ${scenario.scenario_days_remaining} days, refill ${Utils.formatDate(scenario.scenario_refill_date)}</li>
+                    `).join('')}
+                </ul>
+            ` : '');
+        } catch (error) {
+            console.error('Scenarios load error:', error);
+        }
+    }
+}
@@ -0,0 +1,134 @@
+/**
+ * Operational hours section - hours log and quick entry form
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class OperationalHours {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            await Promise.all([
+                this.loadSiteOptions(),
+                this.loadOperationalHours()
+            ]);
+            
+            // Set default date to today
+            document.getElementById('hoursLogDate').value = new Date().toISOString().split('T')[0];
+            
+            // Setup form handler
+            this.setupForm();
+        } catch (error) {
+            console.error('Operational hours load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return Promise.all([
+            ApiService.get('/sites', { quiet: true }),
+            ApiService.get(this.pageUrl(0, CONFIG.TABLE.PAGE_SIZE), { quiet: true })
+        ]);
+    }
+
+    static async loadSiteOptions() {
+        try {
+            const sites = await ApiService.get('/sites', { onUpdate: () => this.loadSiteOptions() });
+            Render.list('hoursLogSite', ['<option value="">Select Site</option>',
+                ...sites.map(site => `<option value="${site.site_id}">${site.site_name}</option>`)]);
+        } catch (error) {
+            console.error('Site options load error:', error);
+        }
+    }
+
+    static async loadSiteEquipment() {
+        const siteId = document.getElementById('hoursLogSite')?.value;
+        const equipmentSelect = document.getElementById('hoursLogEquipment');
+        
+        if (!siteId || !equipmentSelect) return;
+
+        try {
+            const equipment = await ApiService.get(`/equipment?site_id=${siteId}`);
+            equipmentSelect.innerHTML = '<option value="">Select Equipment</option>' +
+                equipment.map(eq => `<option value="${eq.equipment_id}">${eq.equipment_name}</option>`).join('');
+        } catch (error) {
+            console.error('Equipment load error:', error);
+        }
+    }
+
+    static async loadOperationalHours() {
+        try {
+            await this.table()?.reload();
+        } catch (error) {
+            console.error('Operational hours load error:', error);
+        }
+    }
+
+    static table() {
+        return VirtualTable.get('operationalHoursTable', {
+            columns: ['log_date', 'site_name', 'equipment_name', 'running_hours', 'fuel_consumed', 'recorded_by', 'notes'],
+            renderRow: item => this.renderRow(item),
+            emptyMessage: 'No operational hours data available',
+            fetchPage: (offset, limit) => ApiService.get(this.pageUrl(offset, limit),
+                // Only the first page re-renders: later pages follow it on scroll
+                offset ? {} : { onUpdate: () => this.table().reload() })
+        });
+    }
+
+    static pageUrl(offset, limit) {
+        return `/operational-hours?limit=${limit}&offset=${offset}`;
+    }
+
+    static renderRow(item) {
+        return `
+            <tr>
+                <td>${Utils.formatDate(item.log_date)}</td>
+                <td>${item.site_name}</td>
+                <td>${item.equipment_name}</td>
+                <td>${Utils.formatNumber(item.running_hours, 1)}</td>
+                <td>${item.fuel_consumed ? Utils.formatNumber(item.fuel_consumed, 1) + 'L' : 'N/A'}</td>
+                <td>${item.recorded_by || 'N/A'}</td>
+                <td>${item.notes || 'N/A'}</td>
+            </tr>
+        `;
+    }
+
+    static setupForm() {
+        const form = document.getElementById('quickHoursForm');
+        // load() runs on every visit; the handler is attached once
+        if (!form || form.dataset.bound) return;
+        form.dataset.bound = 'true';
+
+        form.addEventListener('submit', async (e) => {
+            e.preventDefault();
+            
+            const formData = {
+                site_id: parseInt(document.getElementById('hoursLogSite').value),
+                equipment_id: parseInt(document.getElementById('hoursLogEquipment').value),
+                log_date: document.getElementById('hoursLogDate').value,
+                running_hours: parseFloat(document.getElementById('hoursLogHours').value),
+                recorded_by: document.getElementById('hoursLogRecordedBy').value,
+                notes: document.getElementById('hoursLogNotes').value
+            };
+
+            try {
+                Utils.showLoading(true);
+                const result = await ApiService.post('/operational-hours', formData);
+                if (result.queued) {
+                    Utils.showNotification('Saved on this device - it will sync when the connection returns', 'warning');
+                } else {
+                    Utils.showNotification('Operational hours logged successfully!', 'success');
+                }
+                form.reset();
+                document.getElementById('hoursLogDate').value = new Date().toISOString().split('T')[0];
+                await this.loadOperationalHours();
+            } catch (error) {
+                console.error('Hours logging error:', error);
+            } finally {
+                Utils.showLoading(false);
+            }
+        });
+    }
+}
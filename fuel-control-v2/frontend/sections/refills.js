@@ -0,0 +1,54 @@
+/**
+ * Refills section - refill transactions
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class Refills {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            await this.table()?.reload();
+        } catch (error) {
+            console.error('Refills load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return ApiService.get(this.pageUrl(0, CONFIG.TABLE.PAGE_SIZE), { quiet: true });
+    }
+
+    static table() {
+        return VirtualTable.get('refillsTable', {
+            columns: ['transaction_id', 'refill_date', 'site_name', 'fuel_name', 'quantity', 'supplier_name', 'unit_cost', 'total_cost', 'created_by'],
+            renderRow: refill => this.renderRow(refill),
+            emptyMessage: 'No refill transactions found',
+            fetchPage: (offset, limit) => ApiService.get(this.pageUrl(offset, limit),
+                // Only the first page re-renders: later pages follow it on scroll
+                offset ? {} : { onUpdate: () => this.table().reload() })
+        });
+    }
+
+    static pageUrl(offset, limit) {
+        return `/refills?limit=${limit}&offset=${offset}`;
+    }
+
+    static renderRow(refill) {
+        return `
+            <tr>
+                <td>${refill.transaction_id}</td>
+                <td>${Utils.formatDate(refill.refill_date)}</td>
+                <td>${refill.site_name}</td>
+                <td>${refill.fuel_name}</td>
+                <td>${Utils.formatNumber(refill.quantity, 0)}L</td>
+                <td>${refill.supplier_name || 'N/A'}</td>
+                <td>${refill.unit_cost ? Utils.formatNumber(refill.unit_cost, 2) : 'N/A'}</td>
+                <td>${refill.total_cost ? Utils.formatNumber(refill.total_cost, 0) : 'N/A'}</td>
+                <td>${refill.created_by || 'System'}</td>
+            </tr>
+        `;
+    }
+}
@@ -0,0 +1,61 @@
+/**
+ * Stock section - current stock levels per site and fuel
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class Stock {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            const stock = await ApiService.get('/stock', { onUpdate: data => this.renderStockTable(data) });
+            this.renderStockTable(stock);
+        } catch (error) {
+            console.error('Stock load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return ApiService.get('/stock', { quiet: true });
+    }
+
+    static table() {
+        return VirtualTable.get('stockTable', {
+            columns: ['site_name', 'fuel_name', 'current_quantity', 'available_quantity', 'fill_percentage', 'stock_status', 'last_updated'],
+            renderRow: item => this.renderRow(item),
+            emptyMessage: 'No stock data available'
+        });
+    }
+
+    static renderRow(item) {
+        return `
+            <tr>
+                <td>${item.site_name}</td>
+                <td>${item.fuel_name}</td>
+                <td>${Utils.formatNumber(item.current_quantity, 0)}L</td>
+                <td>${Utils.formatNumber(item.available_quantity, 0)}L</td>
+                <td>
+                    <div style="display: flex; align-items: center; gap: 8px;">
+                        <div style="width: 60px; height: 8px; background: #e2e8f0; border-radius: 4px; overflow: hidden;">
+                            <div style="width: ${item.fill_percentage}%; height: 100%; background: ${
+                                item.fill_percentage < 20 ? CONFIG.CHART_COLORS.critical :
+                                item.fill_percentage < 40 ? CONFIG.CHART_COLORS.warning :
+                                CONFIG.CHART_COLORS.success
+                            };"></div>
+                        </div>
+                        <span>${Utils.formatNumber(item.fill_percentage, 1)}%</span>
+                    </div>
+                </td>
+                <td><span class="status-badge ${Utils.getStatusClass(item.stock_status)}">${item.stock_status}</span></td>
+                <td>${Utils.formatDateTime(item.last_updated)}</td>
+            </tr>
+        `;
+    }
+
+    static renderStockTable(stock) {
+        this.table()?.setRows(stock);
+    }
+}
@@ -0,0 +1,54 @@
+/**
+ * Usage section - usage transactions
+ * Loaded on first use by Sections in app.js; relies on its globals (CONFIG, Utils, ApiService, VirtualTable, Render)
+ */
+
+export default class Usage {
+    static async load() {
+        Utils.showLoading(true);
+        
+        try {
+            await this.table()?.reload();
+        } catch (error) {
+            console.error('Usage load error:', error);
+        } finally {
+            Utils.showLoading(false);
+        }
+    }
+
+    // Warm the cache with what load() will request, without rendering
+    static prefetch() {
+        return ApiService.get(this.pageUrl(0, CONFIG.TABLE.PAGE_SIZE), { quiet: true });
+    }
+
+    static table() {
+        return VirtualTable.get('usageTable', {
+            columns: ['transaction_id', 'usage_date', 'site_name', 'fuel_name', 'equipment_name', 'quantity', 'purpose', 'operator_name', 'created_by'],
+            renderRow: item => this.renderRow(item),
+            emptyMessage: 'No usage transactions found',
+            fetchPage: (offset, limit) => ApiService.get(this.pageUrl(offset, limit),
+                // Only the first page re-renders: later pages follow it on scroll
+                offset ? {} : { onUpdate: () => this.table().reload() })
+        });
+    }
+
+    static pageUrl(offset, limit) {
+        return `/usage?limit=${limit}&offset=${offset}`;
+    }
+
+    static renderRow(item) {
+        return `
+            <tr>
+                <td>${item.transaction_id}</td>
+                <td>${Utils.formatDate(item.usage_date)}</td>
+                <td>${item.site_name}</td>
+                <td>${item.fuel_name}</td>
+                <td>${item.equipment_name || 'N/A'}</td>
+                <td>${Utils.formatNumber(item.quantity, 0)}L</td>
+                <td>${item.purpose || 'N/A'}</td>
+                <td>${item.operator_name || 'N/A'}</td>
+                <td>${item.created_by || 'System'}</td>
+            </tr>
+        `;
+    }
+}
@@ -0,0 +1,89 @@
+/**
+ * Service worker - keeps the application shell usable without a network
+ * Pages are network-first with the cached copy as fallback; scripts, styles, images and the
+ * CDN libraries are served from cache and refreshed in the background. API calls pass through:
+ * app.js keeps its own IndexedDB copy of API data and queues writes (OfflineStore, SyncQueue).
+ * build.py rewrites VERSION and SHELL with the fingerprinted dist/ file names.
+ */
+
+const VERSION = 'dev';
+const CACHE_PREFIX = 'fuel-control-shell-';
+const CACHE_NAME = `${CACHE_PREFIX}${VERSION}`;
+const SHELL = [
+    './',
+    './index.html',
+    './styles.css',
+    './app.js',
+    './sections/forecasting.js',
+    './sections/stock.js',
+    './sections/equipment.js',
+    './sections/operational-hours.js',
+    './sections/refills.js',
+    './sections/usage.js'
+];
+// Third-party assets index.html loads (Chart.js, Font Awesome, Google Fonts)
+const CDN_HOSTS = ['cdn.jsdelivr.net', 'cdnjs.cloudflare.com', 'fonts.googleapis.com', 'fonts.gstatic.com'];
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // Drop the shells of previous builds
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith(CACHE_PREFIX) && key !== CACHE_NAME)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+
+    const url = new URL(request.url);
+    if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request));
+    } else if (url.origin === self.location.origin ? !url.pathname.includes('/api/') : CDN_HOSTS.includes(url.hostname)) {
+        event.respondWith(staleWhileRevalidate(event));
+    }
+});
+
+async function networkFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        return (await cache.match(request, { ignoreSearch: true })) ||
+            (await cache.match('./index.html')) ||
+            Response.error();
+    }
+}
+
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(event.request);
+    const refresh = fetch(event.request).then(response => {
+        // CDN files loaded without CORS come back opaque; they are still safe to replay
+        if (response.ok || response.type === 'opaque') {
+            cache.put(event.request, response.clone());
+        }
+        return response;
+    });
+
+    if (cached) {
+        event.waitUntil(refresh.catch(() => {}));
+        return cached;
+    }
+    return refresh;
+}
@@ -1,124 +1,316 @@
 #!/usr/bin/env python3
 """
 Minimal Fuel Control Demo - Single File
+Threaded static + mock API server: static files are cached in memory by mtime (large assets
+are sent with sendfile), API bodies are serialized once, and every response carries
+Content-Length/ETag/Cache-Control so browsers revalidate instead of re-downloading
 """
 
+import argparse
+import email.utils
+import hashlib
+import mimetypes
 import os
+import re
 import sys
 import webbrowser
 import threading
-import time
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
 import json
 
-# Simple Flask-like server
-class DemoHandler(SimpleHTTPRequestHandler):
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')  # Output of frontend/build.py
+MEMORY_CACHE_LIMIT = 256 * 1024  # Larger files are streamed from disk with sendfile
+STATIC_MAX_AGE = 300  # Seconds assets may be reused without revalidation (HTML always revalidates)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+FINGERPRINTED = re.compile(r'\.[0-9a-f]{10}\.[A-Za-z0-9]+$')  # name.<content hash>.ext from build.py
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))  # Preference order for .br/.gz siblings
+
+# Simple API responses
+API_RESPONSES = [
+    ('/api/health', {"status": "healthy", "version": "demo"}),
+    ('/api/sites', [
+        {"site_id": 1, "site_name": "Main Warehouse"},
+        {"site_id": 2, "site_name": "Construction Site Alpha"},
+        {"site_id": 3, "site_name": "Mining Operation"},
+        {"site_id": 4, "site_name": "Power Plant"}
+    ]),
+    ('/api/equipment', [
+        {"equipment_id": 1, "equipment_name": "Forklift Unit 1", "site_name": "Main Warehouse", "fuel_name": "Diesel", "consumption_rate": 3.5, "is_active": True},
+        {"equipment_id": 2, "equipment_name": "Excavator Alpha 1", "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "consumption_rate": 18.5, "is_active": True},
+        {"equipment_id": 3, "equipment_name": "Mining Truck 1", "site_name": "Mining Operation", "fuel_name": "Diesel", "consumption_rate": 45.0, "is_active": True},
+        {"equipment_id": 4, "equipment_name": "Main Generator 1", "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "consumption_rate": 180.0, "is_active": True}
+    ]),
+    ('/api/stock', [
+        {"site_name": "Main Warehouse", "fuel_name": "Diesel", "current_quantity": 350000, "available_quantity": 340000, "fill_percentage": 70.0, "stock_status": "Normal", "last_updated": "2025-01-03T12:00:00"},
+        {"site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_quantity": 8000, "available_quantity": 7500, "fill_percentage": 16.0, "stock_status": "Critical", "last_updated": "2025-01-03T12:00:00"},
+        {"site_name": "Mining Operation", "fuel_name": "Diesel", "current_quantity": 65000, "available_quantity": 60000, "fill_percentage": 65.0, "stock_status": "Normal", "last_updated": "2025-01-03T12:00:00"},
+        {"site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "current_quantity": 45000, "available_quantity": 40000, "fill_percentage": 22.5, "stock_status": "Low", "last_updated": "2025-01-03T12:00:00"}
+    ]),
+    ('/api/forecasts', [
+        {"forecast_id": 1, "site_name": "Main Warehouse", "fuel_name": "Diesel", "current_balance": 350000, "daily_consumption_rate": 2500, "forecast_days_remaining": 140, "next_refill_date_estimate": "2025-05-01", "confidence_level": 85},
+        {"forecast_id": 2, "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_balance": 8000, "daily_consumption_rate": 1200, "forecast_days_remaining": 6, "next_refill_date_estimate": "2025-01-09", "confidence_level": 92},
+        {"forecast_id": 3, "site_name": "Mining Operation", "fuel_name": "Diesel", "current_balance": 65000, "daily_consumption_rate": 3500, "forecast_days_remaining": 18, "next_refill_date_estimate": "2025-01-21", "confidence_level": 88},
+        {"forecast_id": 4, "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "current_balance": 45000, "daily_consumption_rate": 4320, "forecast_days_remaining": 10, "next_refill_date_estimate": "2025-01-13", "confidence_level": 90}
+    ]),
+    ('/api/operational-hours', [
+        {"log_id": 1, "site_name": "Construction Site Alpha", "equipment_name": "Excavator Alpha 1", "log_date": "2025-01-03", "running_hours": 8.5, "fuel_consumed": 157.25, "recorded_by": "Site Supervisor", "notes": "Normal operation"},
+        {"log_id": 2, "site_name": "Mining Operation", "equipment_name": "Mining Truck 1", "log_date": "2025-01-03", "running_hours": 12.0, "fuel_consumed": 540.0, "recorded_by": "Mining Chief", "notes": "Heavy load transport"}
+    ]),
+    ('/api/refills', [
+        {"transaction_id": "REF-2025-001", "refill_date": "2025-01-03", "site_name": "Main Warehouse", "fuel_name": "Diesel", "quantity": 100000, "supplier_name": "Myanmar Petroleum", "unit_cost": 1850.00, "total_cost": 185000000, "created_by": "System"}
+    ]),
+    ('/api/usage', [
+        {"transaction_id": "USE-2025-001", "usage_date": "2025-01-03", "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "equipment_name": "Excavator Alpha 1", "quantity": 157.25, "purpose": "Excavation work", "operator_name": "John Operator", "created_by": "Site Supervisor"}
+    ]),
+    ('/api/alerts', [
+        {"alert_name": "Construction Alpha Low Stock", "severity_level": "Critical", "alert_message": "Construction Site Alpha diesel stock is critically low (8,000L remaining)", "triggered_date": "2025-01-03T12:00:00", "site_name": "Construction Site Alpha", "fuel_name": "Diesel"},
+        {"alert_name": "Power Plant Forecast Warning", "severity_level": "High", "alert_message": "Power Plant estimated to run out of fuel in 10 days", "triggered_date": "2025-01-03T12:00:00", "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil"}
+    ]),
+]
+
+
+class CachedBody:
+    """Response body serialized once, with its validator"""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+# Serialized at startup; the mock data never changes while serving
+API_BODIES = [(prefix, CachedBody(json.dumps(response).encode(), 'application/json'))
+              for prefix, response in API_RESPONSES]
+NOT_FOUND_BODY = CachedBody(json.dumps({"error": "Not found"}).encode(), 'application/json')
+
+
+class StaticFile:
+    """
+    One response body under the static root: the file itself or its precompressed sibling.
+    Small bodies are kept in memory, larger ones only as metadata and sent with sendfile.
+    """
+
+    def __init__(self, path: str, stat: os.stat_result, logical_path: str = None, encoding: str = None):
+        logical_path = logical_path or path
+        self.path = path
+        self.encoding = encoding
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(logical_path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type.endswith(('javascript', 'json', 'svg+xml')):
+            self.content_type += '; charset=utf-8'
+        if FINGERPRINTED.search(logical_path):
+            # The name changes whenever the content does, so browsers never need to revalidate
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        elif logical_path.endswith('.html'):
+            self.cache_control = 'no-cache'
+        else:
+            self.cache_control = f'public, max-age={STATIC_MAX_AGE}'
+        self.body = None
+        if self.size <= MEMORY_CACHE_LIMIT:
+            with open(path, 'rb') as f:
+                self.body = f.read()
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class StaticCache:
+    """(path, encoding) -> StaticFile, refreshed when the file's mtime or size changes"""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, url_path: str):
+        """Map a URL path to a file inside root, or None (also for traversal attempts)"""
+        relative = unquote(url_path).lstrip('/') or 'index.html'
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, 'index.html')
+        return path
+
+    def _load(self, path: str, logical_path: str, encoding: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.files.pop((logical_path, encoding), None)
+            return None
+        cached = self.files.get((logical_path, encoding))
+        if cached is not None and cached.is_current(stat):
+            return cached
+        with self.lock:
+            cached = self.files.get((logical_path, encoding))
+            if cached is None or not cached.is_current(stat):
+                cached = StaticFile(path, stat, logical_path, encoding)
+                self.files[(logical_path, encoding)] = cached
+        return cached
+
+    def get(self, url_path: str, accept_encoding: str = ''):
+        """The best variant the client accepts: .br, then .gz, then the file itself"""
+        path = self.resolve(url_path)
+        if path is None:
+            return None
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in accepted:
+                cached = self._load(path + suffix, path, encoding)
+                if cached is not None:
+                    return cached
+        return self._load(path, path, None)
+
+
+static_cache = StaticCache(FRONTEND_DIR)  # Replaced by the dist/ root with --dist
+
+
+class DemoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive: every response has a Content-Length
+    server_version = 'FuelControlDemo/2.0'
+    quiet = True
+
     def do_GET(self):
-        if self.path.startswith('/api/'):
-            self.send_api_response()
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def handle_request(self, send_body: bool):
+        path = urlsplit(self.path).path
+        if path.startswith('/api/'):
+            self.send_api_response(path, send_body)
         else:
-            # Serve frontend files
-            if self.path == '/':
-                self.path = '/index.html'
-            
-            # Change to frontend directory
-            os.chdir('frontend')
-            super().do_GET()
-            os.chdir('..')
-    
-    def send_api_response(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+            self.send_static(path, send_body)
+
+    def not_modified(self, etag: str) -> bool:
+        tags = self.headers.get('If-None-Match')
+        return bool(tags) and (tags.strip() == '*' or etag in [tag.strip() for tag in tags.split(',')])
+
+    def send_api_response(self, path: str, send_body: bool):
+        cached = next((body for prefix, body in API_BODIES if path.startswith(prefix)), None)
+        status = 200 if cached else 404
+        cached = cached or NOT_FOUND_BODY
+        if status == 200 and self.not_modified(cached.etag):
+            self.send_response(304)
+            self.send_header('ETag', cached.etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', cached.content_type)
+        self.send_header('Content-Length', str(len(cached.body)))
+        self.send_header('ETag', cached.etag)
+        self.send_header('Cache-Control', 'no-cache')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        
-        # Simple API responses
-        if '/api/health' in self.path:
-            response = {"status": "healthy", "version": "demo"}
-        elif '/api/sites' in self.path:
-            response = [
-                {"site_id": 1, "site_name": "Main Warehouse"},
-                {"site_id": 2, "site_name": "Construction Site Alpha"},
-                {"site_id": 3, "site_name": "Mining Operation"},
-                {"site_id": 4, "site_name": "Power Plant"}
-            ]
-        elif '/api/equipment' in self.path:
-            response = [
-                {"equipment_id": 1, "equipment_name": "Forklift Unit 1", "site_name": "Main Warehouse", "fuel_name": "Diesel", "consumption_rate": 3.5, "is_active": True},
-                {"equipment_id": 2, "equipment_name": "Excavator Alpha 1", "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "consumption_rate": 18.5, "is_active": True},
-                {"equipment_id": 3, "equipment_name": "Mining Truck 1", "site_name": "Mining Operation", "fuel_name": "Diesel", "consumption_rate": 45.0, "is_active": True},
-                {"equipment_id": 4, "equipment_name": "Main Generator 1", "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "consumption_rate": 180.0, "is_active": True}
-            ]
-        elif '/api/stock' in self.path:
-            response = [
-                {"site_name": "Main Warehouse", "fuel_name": "Diesel", "current_quantity": 350000, "available_quantity": 340000, "fill_percentage": 70.0, "stock_status": "Normal", "last_updated": "2025-01-03T12:00:00"},
-                {"site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_quantity": 8000, "available_quantity": 7500, "fill_percentage": 16.0, "stock_status": "Critical", "last_updated": "2025-01-03T12:00:00"},
-                {"site_name": "Mining Operation", "fuel_name": "Diesel", "current_quantity": 65000, "available_quantity": 60000, "fill_percentage": 65.0, "stock_status": "Normal", "last_updated": "2025-01-03T12:00:00"},
-                {"site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "current_quantity": 45000, "available_quantity": 40000, "fill_percentage": 22.5, "stock_status": "Low", "last_updated": "2025-01-03T12:00:00"}
-            ]
-        elif '/api/forecasts' in self.path:
-            response = [
-                {"forecast_id": 1, "site_name": "Main Warehouse", "fuel_name": "Diesel", "current_balance": 350000, "daily_consumption_rate": 2500, "forecast_days_remaining": 140, "next_refill_date_estimate": "2025-05-01", "confidence_level": 85},
-                {"forecast_id": 2, "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "current_balance": 8000, "daily_consumption_rate": 1200, "forecast_days_remaining": 6, "next_refill_date_estimate": "2025-01-09", "confidence_level": 92},
-                {"forecast_id": 3, "site_name": "Mining Operation", "fuel_name": "Diesel", "current_balance": 65000, "daily_consumption_rate": 3500, "forecast_days_remaining": 18, "next_refill_date_estimate": "2025-01-21", "confidence_level": 88},
-                {"forecast_id": 4, "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil", "current_balance": 45000, "daily_consumption_rate": 4320, "forecast_days_remaining": 10, "next_refill_date_estimate": "2025-01-13", "confidence_level": 90}
-            ]
-        elif '/api/operational-hours' in self.path:
-            response = [
-                {"log_id": 1, "site_name": "Construction Site Alpha", "equipment_name": "Excavator Alpha 1", "log_date": "2025-01-03", "running_hours": 8.5, "fuel_consumed": 157.25, "recorded_by": "Site Supervisor", "notes": "Normal operation"},
-                {"log_id": 2, "site_name": "Mining Operation", "equipment_name": "Mining Truck 1", "log_date": "2025-01-03", "running_hours": 12.0, "fuel_consumed": 540.0, "recorded_by": "Mining Chief", "notes": "Heavy load transport"}
-            ]
-        elif '/api/refills' in self.path:
-            response = [
-                {"transaction_id": "REF-2025-001", "refill_date": "2025-01-03", "site_name": "Main Warehouse", "fuel_name": "Diesel", "quantity": 100000, "supplier_name": "Myanmar Petroleum", "unit_cost": 1850.00, "total_cost": 185000000, "created_by": "System"}
-            ]
-        elif '/api/usage' in self.path:
-            response = [
-                {"transaction_id": "USE-2025-001", "usage_date": "2025-01-03", "site_name": "Construction Site Alpha", "fuel_name": "Diesel", "equipment_name": "Excavator Alpha 1", "quantity": 157.25, "purpose": "Excavation work", "operator_name": "John Operator", "created_by": "Site Supervisor"}
-            ]
-        elif '/api/alerts' in self.path:
-            response = [
-                {"alert_name": "Construction Alpha Low Stock", "severity_level": "Critical", "alert_message": "Construction Site Alpha diesel stock is critically low (8,000L remaining)", "triggered_date": "2025-01-03T12:00:00", "site_name": "Construction Site Alpha", "fuel_name": "Diesel"},
-                {"alert_name": "Power Plant Forecast Warning", "severity_level": "High", "alert_message": "Power Plant estimated to run out of fuel in 10 days", "triggered_date": "2025-01-03T12:00:00", "site_name": "Power Plant", "fuel_name": "Heavy Fuel Oil"}
-            ]
-        else:
-            response = {"error": "Not found"}
-        
-        self.wfile.write(json.dumps(response).encode())
+        if send_body:
+            self.wfile.write(cached.body)
+
+    def send_static(self, path: str, send_body: bool):
+        cached = static_cache.get(path, self.headers.get('Accept-Encoding', ''))
+        if cached is None:
+            body = b'Not found'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+        if self.not_modified(cached.etag):
+            self.send_response(304)
+            self.send_header('ETag', cached.etag)
+            self.send_header('Cache-Control', cached.cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', cached.content_type)
+        self.send_header('Content-Length', str(cached.size))
+        if cached.encoding:
+            self.send_header('Content-Encoding', cached.encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', cached.etag)
+        self.send_header('Last-Modified', cached.last_modified)
+        self.send_header('Cache-Control', cached.cache_control)
+        self.end_headers()
+        if not send_body:
+            return
+        if cached.body is not None:
+            self.wfile.write(cached.body)
+            return
+        # Large assets (footer-logo.gif): kernel copies file -> socket without passing through Python
+        self.wfile.flush()
+        with open(cached.path, 'rb') as f:
+            self.connection.sendfile(f, 0, cached.size)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
 
-def start_server():
+
+class DemoServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # A whole room opening the page at once
+
+
+def start_server(host: str = 'localhost', port: int = 8080, open_browser: bool = True):
     """Start the demo server"""
     print("🚀 Starting Fuel Control Demo Server...")
-    print("📊 Server: http://localhost:8080")
-    print("📊 API: http://localhost:8080/api/")
+    print(f"📊 Server: http://{host}:{port}")
+    print(f"📊 API: http://{host}:{port}/api/")
     print()
-    
+
     try:
-        server = HTTPServer(('localhost', 8080), DemoHandler)
+        server = DemoServer((host, port), DemoHandler)
         print("✅ Server started successfully!")
-        print("🌐 Opening browser...")
-        
-        # Open browser after a short delay
-        threading.Timer(2.0, lambda: webbrowser.open('http://localhost:8080')).start()
-        
+
+        if open_browser:
+            print("🌐 Opening browser...")
+            # Open browser after a short delay
+            threading.Timer(2.0, lambda: webbrowser.open(f'http://localhost:{port}')).start()
+
         print("🎉 Fuel Control System is running!")
         print("⚠️  Press Ctrl+C to stop")
         print()
-        
+
         server.serve_forever()
-        
+
     except KeyboardInterrupt:
         print("\n🛑 Stopping server...")
-        server.shutdown()
+        server.server_close()
         print("✅ Server stopped")
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fuel Control demo: frontend plus mock API')
+    parser.add_argument('--host', default='localhost', help='0.0.0.0 to serve a whole room')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--no-browser', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    parser.add_argument('--dist', action='store_true', help='serve the frontend/build.py output (frontend/dist)')
+    args = parser.parse_args()
+    DemoHandler.quiet = not args.verbose
+
     # Check if frontend directory exists
-    if not os.path.exists('frontend'):
+    if not os.path.exists(FRONTEND_DIR):
         print("❌ Frontend directory not found!")
-        print("📁 Make sure you're in the fuel-control-v2 directory")
+        print("📁 Make sure frontend/ sits next to minimal_demo.py")
         sys.exit(1)
-    
-    start_server()
\ No newline at end of file
+    if args.dist:
+        if not os.path.exists(os.path.join(DIST_DIR, 'index.html')):
+            print("❌ frontend/dist not found: run python frontend/build.py first")
+            sys.exit(1)
+        static_cache = StaticCache(DIST_DIR)
+        print("📦 Serving the built frontend from frontend/dist")
+
+    start_server(args.host, args.port, not args.no_browser)
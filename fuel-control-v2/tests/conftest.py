@@ -0,0 +1,9 @@
+"""
+Unit tests for the backend planners and models. The backend modules import each other by bare
+name (they run from backend/), so the directory goes on sys.path here.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
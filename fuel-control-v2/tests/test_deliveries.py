@@ -0,0 +1,80 @@
+"""Tests for backend/deliveries.py"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+import deliveries
+
+TODAY = date(2024, 3, 1)
+
+
+def _pair(site_id, stock, daily, supplier_id=1, lead=0, capacity=10000.0, minimum=1000.0, moq=0.0):
+    return {'site_id': site_id, 'fuel_type_id': 1, 'current_quantity': stock, 'minimum_threshold': minimum,
+            'maximum_capacity': capacity, 'daily_demand': daily, 'supplier_id': supplier_id,
+            'lead_time_days': lead, 'minimum_order_quantity': moq}
+
+
+def _dates(plan):
+    return [(delivery['site_id'], delivery['delivery_date']) for delivery in plan['schedule']]
+
+
+@pytest.mark.parametrize('daily_trucks', [0, 2])
+def test_deliveries_never_exceed_capacity(daily_trucks):
+    rng = np.random.default_rng(daily_trucks)
+    pairs = []
+    for site_id in range(60):
+        capacity = float(rng.uniform(2000, 20000))
+        # Some pairs run dry before their supplier's lead time is up
+        pairs.append(_pair(site_id, float(rng.uniform(0, capacity)), float(rng.uniform(100, capacity / 2)),
+                           supplier_id=int(rng.integers(1, 4)), lead=int(rng.integers(0, 5)),
+                           capacity=capacity, minimum=capacity * 0.1))
+    plan = deliveries.schedule_deliveries(pairs, 30, 5000.0, daily_trucks, None, TODAY)
+    capacity = {pair['site_id']: pair['maximum_capacity'] for pair in pairs}
+    assert plan['deliveries']
+    for delivery in plan['schedule']:
+        assert delivery['stock_before'] >= 0
+        assert delivery['quantity'] <= capacity[delivery['site_id']] - delivery['stock_before'] + 1
+
+
+def test_stock_out_delivery_fills_an_empty_tank():
+    plan = deliveries.schedule_deliveries([_pair(1, 3000.0, 2000.0, lead=3)], 5, 20000.0, 0, None, TODAY)
+    first = plan['schedule'][0]
+    assert first['delivery_date'] == '2024-03-04'
+    assert (first['stock_before'], first['quantity']) == (0, 10000)
+    assert plan['risks'][0]['lowest_stock'] == -3000
+    assert plan['risks'][0]['reason'] == 'Runs short before an order placed today can arrive'
+
+
+def test_truck_limit_pulls_forward_only_when_oversubscribed():
+    same_day = [_pair(1, 6000.0, 1000.0), _pair(2, 6000.0, 1000.0)]
+    assert _dates(deliveries.schedule_deliveries(same_day, 10, 10000.0, 0, None, TODAY)) == [
+        (1, '2024-03-06'), (2, '2024-03-06')]
+    # One truck a day: one of the two loads due on the 6th goes a day early
+    plan = deliveries.schedule_deliveries(same_day, 10, 10000.0, 1, None, TODAY)
+    assert _dates(plan) == [(1, '2024-03-05'), (2, '2024-03-06')]
+    assert plan['risks'] == []
+
+    # Due on different days, each delivery stays on its own due day
+    apart = [_pair(1, 6000.0, 1000.0), _pair(2, 7000.0, 1000.0)]
+    assert _dates(deliveries.schedule_deliveries(apart, 10, 10000.0, 1, None, TODAY)) == [
+        (1, '2024-03-06'), (2, '2024-03-07')]
+
+
+def test_reserved_trucks_are_honoured():
+    pairs = [_pair(1, 6000.0, 1000.0), _pair(2, 6000.0, 1000.0)]
+    plan = deliveries.schedule_deliveries(pairs, 10, 10000.0, 1, {(1, '2024-03-06'): 1}, TODAY)
+    assert _dates(plan) == [(1, '2024-03-04'), (2, '2024-03-05')]
+    # Reservations for other suppliers or outside the horizon change nothing
+    plan = deliveries.schedule_deliveries(pairs, 10, 10000.0, 1, {(2, '2024-03-06'): 1, (1, '2024-04-01'): 1},
+                                          TODAY)
+    assert _dates(plan) == [(1, '2024-03-05'), (2, '2024-03-06')]
+
+
+def test_pairs_without_supplier_are_risks():
+    plan = deliveries.schedule_deliveries([_pair(1, 3000.0, 1000.0, supplier_id=None), _pair(2, 9000.0, 100.0)],
+                                          10, 10000.0, 0, None, TODAY)
+    assert plan['schedule'] == []
+    assert [(risk['site_id'], risk['reason']) for risk in plan['risks']] == [(1, 'No active supplier prices this fuel')]
+    assert plan['risks'][0]['first_short_date'] == '2024-03-03'
@@ -0,0 +1,27 @@
+"""Tests for backend/reorder.py"""
+
+import reorder
+
+PAIR = {'site_id': 1, 'fuel_type_id': 1, 'daily_demand': 400.0, 'demand_std': 60.0,
+        'maximum_capacity': 30000.0, 'safety_stock_days': 3, 'optimal_order_quantity': 10000.0}
+OFFER = {'fuel_type_id': 1, 'supplier_id': 7, 'price_per_liter': 1.45, 'volume_discount_threshold': 20000.0,
+         'volume_discount_rate': 0.03, 'lead_time_days': 2, 'minimum_order_quantity': 2000.0,
+         'is_preferred': True, 'rating': 4.0}
+
+
+def _run(stored, holding_rate=0.2, service_level=0.95, min_rating=0.0):
+    return reorder.run_optimizer([dict(PAIR)], [OFFER], {}, stored, 150.0, holding_rate, service_level, min_rating)
+
+
+def test_unchanged_inputs_are_not_recalculated():
+    first = _run({})
+    signature = first['recommendations'][0]['input_signature']
+    assert _run({(1, 1): signature})['recalculated'] == 0
+
+
+def test_optimizer_settings_change_the_signature():
+    signature = _run({})['recommendations'][0]['input_signature']
+    stored = {(1, 1): signature}
+    assert _run(stored, holding_rate=0.25)['recalculated'] == 1
+    assert _run(stored, service_level=0.99)['recalculated'] == 1
+    assert _run(stored, min_rating=3.0)['recalculated'] == 1
@@ -0,0 +1,43 @@
+"""Tests for backend/timeseries.py"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import timeseries
+
+FORECAST_DATE = date(2024, 3, 1)
+
+
+def _forecast(history):
+    models = timeseries.fit_models({1: history}, 14, workers=1)
+    stocks = [{'site_id': 2, 'fuel_type_id': 1, 'current_quantity': 5000.0, 'optimal_order_quantity': 4000.0}]
+    equipment = [{'equipment_id': 1, 'site_id': 2, 'fuel_type_id': 1, 'consumption_rate': 20.0}]
+    return models[1], timeseries.site_forecasts(stocks, equipment, models, {}, 1.2, FORECAST_DATE, 30)[0]
+
+
+def test_single_log_gets_no_fit_credit():
+    model, forecast = _forecast({FORECAST_DATE - timedelta(days=1): 6.0})
+    assert model['model_type'] == 'average'
+    assert model['rmse'] is None
+    assert forecast['confidence_level'] == 50.0
+    assert forecast['active_equipment_count'] == 1
+
+
+def test_average_error_is_leave_one_out():
+    hours = [4.0, 6.0, 8.0]
+    model, forecast = _forecast({FORECAST_DATE - timedelta(days=offset + 1): value
+                                 for offset, value in enumerate(hours)})
+    # Each day against the mean of the other two: 7 - 4, 6 - 6, 5 - 8
+    assert model['rmse'] == pytest.approx(((9.0 + 0.0 + 9.0) / 3) ** 0.5)
+    assert 50.0 < forecast['confidence_level'] < 100.0
+
+
+def test_cached_single_log_model_gets_no_fit_credit():
+    # Average models cached before the leave-one-out error stored the in-sample spread, 0 for one log
+    model = timeseries._average_model([6.0])
+    model.update(rmse=0.0, state_date=(FORECAST_DATE - timedelta(days=1)).isoformat())
+    stocks = [{'site_id': 2, 'fuel_type_id': 1, 'current_quantity': 5000.0}]
+    equipment = [{'equipment_id': 1, 'site_id': 2, 'fuel_type_id': 1, 'consumption_rate': 20.0}]
+    forecast = timeseries.site_forecasts(stocks, equipment, {1: model}, {}, 1.2, FORECAST_DATE, 30)[0]
+    assert forecast['confidence_level'] < 100.0
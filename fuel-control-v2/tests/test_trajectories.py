@@ -0,0 +1,80 @@
+"""Tests for backend/trajectories.py"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+import trajectories
+
+TODAY = date(2024, 3, 1)
+
+
+def _pair(stock=4000.0, rate=500.0, capacity=10000.0, reorder_point=None):
+    return {'site_id': 1, 'fuel_type_id': 1, 'current_quantity': stock, 'maximum_capacity': capacity,
+            'reorder_point': reorder_point, 'minimum_threshold': 0.0, 'optimal_order_quantity': 5000.0,
+            'daily_consumption_rate': rate}
+
+
+def reference_lttb(values, points):
+    """Steinarsson's scalar Largest-Triangle-Three-Buckets for one series, with exact bucket edges"""
+    count = len(values)
+    edge = [1 + bucket * (count - 2) // (points - 2) for bucket in range(points - 1)] + [count]
+    kept, previous = [0], 0
+    for bucket in range(points - 2):
+        lo, hi = edge[bucket], edge[bucket + 1]
+        next_lo, next_hi = hi, edge[bucket + 2]
+        next_x = (next_lo + next_hi - 1) / 2.0
+        next_y = sum(values[next_lo:next_hi]) / (next_hi - next_lo)
+        areas = [abs((previous - next_x) * (values[index] - values[previous]) -
+                     (previous - index) * (next_y - values[previous])) for index in range(lo, hi)]
+        previous = lo + int(np.argmax(areas))
+        kept.append(previous)
+    return kept + [count - 1]
+
+
+def test_scheduled_refill_today_is_applied():
+    scheduled = trajectories.parse_scheduled(
+        [{'site_id': 1, 'fuel_type_id': 1, 'date': '2024-03-01', 'quantity': 3000}], TODAY)
+    assert scheduled == [(1, 1, 0, 3000.0)]
+    result = trajectories.project_trajectories([_pair()], 3, {}, scheduled, reorder=False, today=TODAY)
+    assert result['pairs'][0]['y'] == [7000.0, 6500.0, 6000.0, 5500.0]
+    # Capped at the tank like any other delivery
+    capped = trajectories.project_trajectories([_pair(stock=9000.0)], 1, {}, scheduled, reorder=False, today=TODAY)
+    assert capped['pairs'][0]['y'] == [10000.0, 9500.0]
+
+
+def test_scheduled_refill_outside_the_projection_is_ignored():
+    scheduled = [(1, 1, -1, 3000.0), (1, 1, 5, 3000.0)]
+    result = trajectories.project_trajectories([_pair()], 3, {}, scheduled, reorder=False, today=TODAY)
+    assert result['pairs'][0]['y'] == [4000.0, 3500.0, 3000.0, 2500.0]
+
+
+@pytest.mark.parametrize('lead', [0, 1, 3])
+def test_reorders_land_within_the_projection(lead):
+    result = trajectories.project_trajectories([_pair(stock=1000.0, reorder_point=2000.0)], 10, {1: lead},
+                                               today=TODAY)
+    orders = result['pairs'][0]['orders']
+    assert orders and all(arrival == day + max(lead, 1) for day, arrival, _ in orders)
+
+
+@pytest.mark.parametrize('count, points', [(10, 3), (50, 7), (100, 10), (365, 60), (1000, 999)])
+def test_lttb_matches_the_scalar_algorithm(count, points):
+    rng = np.random.default_rng(count)
+    values = np.cumsum(rng.normal(size=(3, count)), axis=1)
+    indices, sampled = trajectories.lttb(values, points)
+    assert indices.shape == sampled.shape == (3, points)
+    for row in range(3):
+        assert indices[row].tolist() == reference_lttb(values[row].tolist(), points)
+        assert (np.diff(indices[row]) > 0).all()
+        assert np.array_equal(sampled[row], values[row, indices[row]])
+
+
+def test_lttb_keeps_spikes_and_short_series():
+    values = np.zeros((1, 200))
+    values[0, 77] = 50.0
+    values[0, 150] = -20.0
+    indices, _ = trajectories.lttb(values, 10)
+    assert {77, 150} <= set(indices[0].tolist())
+    indices, sampled = trajectories.lttb(values[:, :8], 10)
+    assert indices[0].tolist() == list(range(8)) and np.array_equal(sampled, values[:, :8])
@@ -0,0 +1,142 @@
+"""Tests for backend/transfers.py, against brute force over integer flows on small instances"""
+
+import itertools
+import warnings
+
+import numpy as np
+import pytest
+
+import transfers
+
+INF = np.inf
+
+
+def brute_force(supply, demand, cost):
+    """(largest total flow, cheapest cost at that total) over every integer flow matrix"""
+    sources, sinks = cost.shape
+    cells = [(i, j) for i in range(sources) for j in range(sinks) if np.isfinite(cost[i, j])]
+    best = (-1.0, 0.0)
+    for amounts in itertools.product(*[range(int(min(supply[i], demand[j])) + 1) for i, j in cells]):
+        flow = np.zeros(cost.shape)
+        for (i, j), amount in zip(cells, amounts):
+            flow[i, j] = amount
+        if (flow.sum(axis=1) > supply).any() or (flow.sum(axis=0) > demand).any():
+            continue
+        best = max(best, (flow.sum(), -sum(flow[i, j] * cost[i, j] for i, j in cells)))
+    return best[0], -best[1]
+
+
+def solve(supply, demand, cost):
+    supply, demand, cost = np.asarray(supply, float), np.asarray(demand, float), np.asarray(cost, float)
+    flow, complete, _ = transfers.min_cost_flow(supply, demand, cost)
+    assert (flow >= -transfers.EPSILON).all()
+    assert (flow.sum(axis=1) <= supply + transfers.EPSILON).all()
+    assert (flow.sum(axis=0) <= demand + transfers.EPSILON).all()
+    assert not ((flow > transfers.EPSILON) & np.isinf(cost)).any()
+    spent = float(np.where(flow > transfers.EPSILON, flow * np.where(np.isfinite(cost), cost, 0.0), 0.0).sum())
+    return flow, complete, spent
+
+
+def assert_optimal(supply, demand, cost):
+    flow, complete, spent = solve(supply, demand, cost)
+    # Unlimited sources are bounded by the total demand for the enumeration
+    bounded = np.minimum(np.asarray(supply, float), sum(demand))
+    total, cheapest = brute_force(bounded, np.asarray(demand, float), np.asarray(cost, float))
+    assert flow.sum() == pytest.approx(total)
+    assert spent == pytest.approx(cheapest)
+    assert complete == (total == pytest.approx(sum(demand)))
+
+
+def test_saturating_augmentation_searches_again():
+    # Filling sink 1 from source 0 empties it; sink 2 must then come from source 1 at 8, not reroute at 9
+    supply, demand = [2, 3], [3, 3, 1]
+    cost = [[INF, 1, 3], [9, INF, 8]]
+    flow, complete, spent = solve(supply, demand, cost)
+    assert not complete
+    assert flow.sum() == pytest.approx(5)
+    assert spent == pytest.approx(28)
+
+
+def test_zero_supply():
+    flow, complete, spent = solve([0, 0], [5, 2], [[1, 2], [3, 4]])
+    assert not complete
+    assert flow.sum() == 0 and spent == 0
+
+
+def test_unreachable_sink():
+    flow, complete, spent = solve([INF], [4, 3], [[2, INF]])
+    assert not complete
+    assert flow[0, 0] == pytest.approx(4) and flow[0, 1] == 0
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_brute_force_with_limited_supply(seed):
+    rng = np.random.default_rng(seed)
+    sources, sinks = rng.integers(1, 3, endpoint=True), rng.integers(1, 3, endpoint=True)
+    cost = rng.integers(1, 10, (sources, sinks)).astype(float)
+    cost[rng.random((sources, sinks)) < 0.25] = INF
+    assert_optimal(rng.integers(0, 4, sources).astype(float), rng.integers(1, 4, sinks).astype(float), cost)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_brute_force_with_unlimited_supplier(seed):
+    # The shape plan_transfers solves: donors plus a supplier row reaching every sink
+    rng = np.random.default_rng(100 + seed)
+    donors, sinks = rng.integers(1, 2, endpoint=True), rng.integers(1, 3, endpoint=True)
+    cost = rng.integers(1, 10, (donors, sinks)).astype(float)
+    cost[rng.random((donors, sinks)) < 0.25] = INF
+    cost = np.vstack([cost, rng.integers(5, 15, (1, sinks))])
+    supply = np.append(rng.integers(0, 4, donors).astype(float), INF)
+    assert_optimal(supply, rng.integers(1, 4, sinks).astype(float), cost)
+
+
+def test_no_invalid_value_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        # Sink 1 has no arc and is never reached, so its distance stays np.inf against np.inf cost
+        solve([3, INF], [2, 4], [[1, INF], [5, INF]])
+
+
+SITES = [(1, 0.0, 0.0), (2, 0.0, 0.1), (3, 0.0, 0.3), (4, 0.0, 5.0)]
+
+
+def _pair(site_id, stock, daily):
+    return {'site_id': site_id, 'fuel_type_id': 1, 'current_quantity': stock, 'maximum_capacity': 10000.0,
+            'minimum_threshold': 0.0, 'reorder_point': 1000.0, 'optimal_order_quantity': 1000.0,
+            'daily_demand': daily}
+
+
+def _plan(pairs, min_litres=0.0):
+    # 100/1000 per litre from the supplier; transfers cost 0.005 per litre-km plus 0.01 handling
+    return transfers.plan_transfers(pairs, SITES, {1: 0}, {}, 100.0, 10, 0.005, 0.01, 0.0, 1.0,
+                                    300.0, min_litres, 5000)
+
+
+def test_plan_matches_brute_force():
+    # Site 1 can give 500 and site 4 300; sites 2 and 3 need 400 each. Only site 2, 11 km from
+    # site 1, is close enough for a transfer to beat the supplier
+    plan = _plan([_pair(1, 1500.0, 0.0), _pair(2, 600.0, 0.0), _pair(3, 600.0, 0.0), _pair(4, 1300.0, 0.0)])
+    km = transfers.haversine_km(np.zeros(4), np.array([0.0, 0.1, 0.3, 5.0]))
+    cost = np.array([[km[0, 1] * 0.005 + 0.01, km[0, 2] * 0.005 + 0.01], [0.1, 0.1]])
+    # Enumerate in 100-litre units, with the supplier row bounded by the total need
+    total, cheapest = brute_force(np.array([5.0, 8.0]), np.array([4.0, 4.0]), cost)
+    assert plan['complete']
+    assert total == 8
+    assert plan['plan_cost'] == pytest.approx(cheapest * 100, abs=0.01)
+    assert plan['transfer_litres'] == pytest.approx(400)
+    assert [(transfer['source_site_id'], transfer['target_site_id']) for transfer in plan['transfers']] == [(1, 2)]
+
+
+def test_plan_without_surplus_uses_the_supplier():
+    plan = _plan([_pair(1, 900.0, 0.0), _pair(2, 600.0, 0.0)])
+    assert plan['transfers'] == []
+    assert plan['supplier_litres'] == pytest.approx(500)
+    assert plan['plan_cost'] == plan['baseline_cost']
+
+
+def test_small_transfers_go_back_to_the_supplier():
+    pairs = [_pair(1, 1050.0, 0.0), _pair(2, 600.0, 0.0)]
+    assert _plan(pairs)['transfer_litres'] == pytest.approx(50)
+    plan = _plan(pairs, min_litres=100.0)
+    assert plan['transfers'] == []
+    assert plan['supplier_litres'] == pytest.approx(400)